@@ -13,17 +13,22 @@ load_dotenv(os.path.join(project_root, '.env'))
 # Add parent directory to path for absolute imports
 sys.path.insert(0, project_root)
 
-from flask import Flask, jsonify, send_from_directory, request
+from flask import Flask, jsonify, request
 import logging
 from flask_cors import CORS
+from werkzeug.exceptions import NotFound
 
 # Import config - try absolute first, then relative
 try:
     from apps.api.config import Config
     from apps.api import db, migrate, jwt
+    from apps.api.utils.image_variants import variant_source
+    from apps.api.utils.static_uploads import send_upload
 except ImportError:
     from config import Config
     from __init__ import db, migrate, jwt
+    from utils.image_variants import variant_source
+    from utils.static_uploads import send_upload
 
 def create_app(config_class=Config):
     """Application factory pattern"""
@@ -74,12 +79,12 @@ def create_app(config_class=Config):
     # JWT token blacklist check
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
+        # Served from the per-worker revocation cache (utils/token_revocation.py)
         try:
-            from apps.api.models.token_blacklist import TokenBlacklist
+            from apps.api.utils.token_revocation import is_payload_revoked
         except ImportError:
-            from models.token_blacklist import TokenBlacklist
-        jti = jwt_payload['jti']
-        return TokenBlacklist.is_token_revoked(jti)
+            from utils.token_revocation import is_payload_revoked
+        return is_payload_revoked(jwt_payload)
     
     # Register blueprints
     try:
@@ -97,6 +102,13 @@ def create_app(config_class=Config):
     app.register_blueprint(issues_bp)
     app.register_blueprint(benefits_bp)
     app.register_blueprint(admin_bp)
+
+    if app.config.get('GEOGRAPHY_PRELOAD'):
+        try:
+            from apps.api.utils.geography import preload_geography
+        except ImportError:
+            from utils.geography import preload_geography
+        preload_geography(app)
     
     # Health check endpoint
     @app.route('/health', methods=['GET'])
@@ -151,10 +163,16 @@ def create_app(config_class=Config):
         upload_dir = app.config.get('UPLOAD_FOLDER', 'uploads')
         directory = str(upload_dir)
 
+        # Resized variant not written yet (or a pre-pipeline upload): serve the original
+        source = variant_source(normalized)
+        fallback = bool(source) and not os.path.isfile(os.path.join(directory, normalized))
+        if fallback:
+            normalized = source
+
         try:
-            response = send_from_directory(directory, normalized)
+            response = send_upload(directory, normalized, fallback=fallback)
             return _add_cors_headers(response)
-        except FileNotFoundError:
+        except NotFound:
             response = jsonify({'error': 'File not found'})
             response.status_code = 404
             return _add_cors_headers(response)
@@ -68,6 +68,20 @@ class Config:
     SMTP_USERNAME = os.getenv('SMTP_USERNAME', '')
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
     FROM_EMAIL = os.getenv('FROM_EMAIL', 'noreply@munlink-zambales.gov.ph')
+    SMTP_TIMEOUT = int(os.getenv('SMTP_TIMEOUT', 10))
+
+    # Email outbox (see utils/email_sender.py); disable to send inline
+    EMAIL_OUTBOX_ENABLED = os.getenv('EMAIL_OUTBOX_ENABLED', 'true').lower() == 'true'
+    # Run a dispatcher thread in each API process; turn off when run_worker.py handles it
+    EMAIL_DISPATCH_INLINE = os.getenv('EMAIL_DISPATCH_INLINE', 'true').lower() == 'true'
+    EMAIL_DISPATCH_INTERVAL = int(os.getenv('EMAIL_DISPATCH_INTERVAL', 15))
+    EMAIL_SMTP_POOL_SIZE = int(os.getenv('EMAIL_SMTP_POOL_SIZE', 2))
+    EMAIL_SMTP_MAX_IDLE_SECONDS = int(os.getenv('EMAIL_SMTP_MAX_IDLE_SECONDS', 60))
+    EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', 50))
+    EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', 5))
+    EMAIL_RETRY_BASE_SECONDS = int(os.getenv('EMAIL_RETRY_BASE_SECONDS', 30))
+    EMAIL_RETRY_MAX_SECONDS = int(os.getenv('EMAIL_RETRY_MAX_SECONDS', 3600))
+    EMAIL_CLAIM_TIMEOUT = int(os.getenv('EMAIL_CLAIM_TIMEOUT', 300))
     
     # QR Codes
     QR_BASE_URL = os.getenv('QR_BASE_URL', 'http://localhost:3000/verify')
@@ -87,6 +101,87 @@ class Config:
     MUNICIPAL_LOGOS_DIR = BASE_DIR / 'public' / 'logos' / 'municipalities'
     PROVINCE_LOGO_DIR = BASE_DIR / 'public' / 'logos' / 'zambales'
     LANDMARKS_DIR = BASE_DIR / 'public' / 'landmarks'
+    # Seconds between mtime checks of cached document config/logos (utils/doc_assets.py)
+    DOC_ASSET_CHECK_INTERVAL = float(os.getenv('DOC_ASSET_CHECK_INTERVAL', 2.0))
+
+    # Caching (seconds; 0 disables)
+    PERFORMANCE_CACHE_TTL = int(os.getenv('PERFORMANCE_CACHE_TTL', 60))
+
+    # Background jobs (see utils/jobs.py and scripts/run_worker.py)
+    JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', 3))
+    JOBS_RETRY_BASE_SECONDS = int(os.getenv('JOBS_RETRY_BASE_SECONDS', 10))
+    JOBS_RETRY_MAX_SECONDS = int(os.getenv('JOBS_RETRY_MAX_SECONDS', 600))
+    JOBS_LOCK_TIMEOUT = int(os.getenv('JOBS_LOCK_TIMEOUT', 900))
+    # How often workers look for jobs held past JOBS_LOCK_TIMEOUT, seconds
+    JOBS_REQUEUE_INTERVAL = int(os.getenv('JOBS_REQUEUE_INTERVAL', 60))
+
+    # JWT revocation cache refresh (utils/token_revocation.py) and blacklist purge
+    JWT_REVOCATION_REFRESH_SECONDS = float(os.getenv('JWT_REVOCATION_REFRESH_SECONDS', 2))
+    TOKEN_CLEANUP_INTERVAL = int(os.getenv('TOKEN_CLEANUP_INTERVAL', 3600))
+
+    # Dashboard counter drift repair (utils/municipality_counters.py), seconds
+    COUNTER_RECONCILE_INTERVAL = int(os.getenv('COUNTER_RECONCILE_INTERVAL', 3600))
+
+    # Chart rollups (utils/daily_rollups.py): repair interval (seconds) and how many past days it re-derives
+    ROLLUP_RECONCILE_INTERVAL = int(os.getenv('ROLLUP_RECONCILE_INTERVAL', 3600))
+    ROLLUP_RECONCILE_DAYS = int(os.getenv('ROLLUP_RECONCILE_DAYS', 2))
+
+    # Benefit program expiry sweep (utils/benefit_expiry.py), seconds
+    BENEFIT_EXPIRY_INTERVAL = int(os.getenv('BENEFIT_EXPIRY_INTERVAL', 300))
+
+    # Batched audit writes (utils/audit_sink.py): flush every N seconds (0 = write-through)
+    # or once AUDIT_BATCH_SIZE rows are queued; AUDIT_SPOOL_DIR keeps queued rows on disk
+    AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', 2))
+    AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', 200))
+    AUDIT_SPOOL_DIR = os.getenv('AUDIT_SPOOL_DIR', '')
+    # Queued rows kept at most (oldest dropped beyond this, e.g. while the database is down)
+    AUDIT_MAX_PENDING = int(os.getenv('AUDIT_MAX_PENDING', 10000))
+
+    # Bulk document PDFs (utils/bulk_documents.py); 0 processes = one per CPU
+    BULK_PDF_PROCESSES = int(os.getenv('BULK_PDF_PROCESSES', 0))
+    BULK_PDF_MAX_REQUESTS = int(os.getenv('BULK_PDF_MAX_REQUESTS', 500))
+
+    # Marketplace view counting (utils/view_counter.py): buffered per worker
+    # and flushed every N seconds; 0 writes through on every view
+    ITEM_VIEW_FLUSH_INTERVAL = float(os.getenv('ITEM_VIEW_FLUSH_INTERVAL', 10))
+    ITEM_VIEW_DAILY_ROLLUPS = os.getenv('ITEM_VIEW_DAILY_ROLLUPS', 'true').lower() == 'true'
+
+    # Upload image pipeline (utils/image_variants.py); 0 = process inline
+    IMAGE_PIPELINE_WORKERS = int(os.getenv('IMAGE_PIPELINE_WORKERS', 2))
+
+    # Geography registry (utils/geography.py). Preload warms it in create_app
+    # (each gunicorn worker); otherwise it loads on first use. Other workers'
+    # edits are picked up within the check interval.
+    GEOGRAPHY_PRELOAD = os.getenv('GEOGRAPHY_PRELOAD', 'false').lower() == 'true'
+    GEOGRAPHY_CHECK_INTERVAL = float(os.getenv('GEOGRAPHY_CHECK_INTERVAL', 60))
+    # Browser cache lifetime for the geography endpoints (revalidated by ETag)
+    GEOGRAPHY_MAX_AGE = int(os.getenv('GEOGRAPHY_MAX_AGE', 300))
+
+    # Store each distinct upload once and hard-link entity paths to it
+    # (utils/blob_store.py); off = every upload is its own file
+    UPLOAD_CONTENT_ADDRESSED = os.getenv('UPLOAD_CONTENT_ADDRESSED', 'true').lower() == 'true'
+
+    # /uploads caching (utils/static_uploads.py). Uniquely named uploads never
+    # change, so they get an immutable max-age; anything else is revalidated.
+    UPLOADS_IMMUTABLE_MAX_AGE = int(os.getenv('UPLOADS_IMMUTABLE_MAX_AGE', 31536000))
+    UPLOADS_MAX_AGE = int(os.getenv('UPLOADS_MAX_AGE', 0))
+    # Let the front proxy send the bytes: an nginx `internal` location that
+    # aliases UPLOAD_FOLDER (e.g. /_uploads/), or X-Sendfile for Apache/lighttpd
+    UPLOADS_ACCEL_REDIRECT_PREFIX = os.getenv('UPLOADS_ACCEL_REDIRECT_PREFIX', '')
+    UPLOADS_X_SENDFILE = os.getenv('UPLOADS_X_SENDFILE', 'false').lower() == 'true'
+
+    # Reference numbers (utils/reference_numbers.py). 1 = dense numbers taken
+    # inside the caller's transaction; >1 = each worker reserves blocks in
+    # their own transaction (fewer counter updates, gaps after restarts)
+    REFERENCE_BLOCK_SIZE = int(os.getenv('REFERENCE_BLOCK_SIZE', 1))
+
+    # DOCX -> PDF (utils/doc_to_pdf.py): auto | uno | subprocess
+    DOCX_PDF_CONVERTER = os.getenv('DOCX_PDF_CONVERTER', 'auto')
+    DOCX_UNO_INSTANCES = int(os.getenv('DOCX_UNO_INSTANCES', 1))
+    # Each server process claims its own block of DOCX_UNO_INSTANCES ports from here
+    DOCX_UNO_PORT_BASE = int(os.getenv('DOCX_UNO_PORT_BASE', 2002))
+    # Comma-separated host:port of externally managed listeners (skips spawning)
+    DOCX_UNO_ENDPOINTS = os.getenv('DOCX_UNO_ENDPOINTS', '')
     
     @staticmethod
     def init_app(app):
@@ -132,6 +227,12 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    PERFORMANCE_CACHE_TTL = 0
+    EMAIL_DISPATCH_INLINE = False
+    BULK_PDF_PROCESSES = 1
+    ITEM_VIEW_FLUSH_INTERVAL = 0
+    IMAGE_PIPELINE_WORKERS = 0
+    AUDIT_FLUSH_INTERVAL = 0
 
 
 # Config dictionary
@@ -0,0 +1,63 @@
+"""add email_outbox table
+
+Revision ID: 20251103_add_email_outbox
+Revises: 20251103_add_jobs
+Create Date: 2025-11-03
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _index_exists(bind, table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return any(idx.get('name') == index_name for idx in inspector.get_indexes(table_name))
+
+
+# revision identifiers, used by Alembic.
+revision = '20251103_add_email_outbox'
+down_revision = '20251103_add_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if not _table_exists(bind, 'email_outbox'):
+        op.create_table(
+            'email_outbox',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('to_email', sa.String(length=255), nullable=False),
+            sa.Column('subject', sa.String(length=255), nullable=False),
+            sa.Column('body', sa.Text(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+            sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='5'),
+            sa.Column('next_attempt_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.Column('claim_token', sa.String(length=64), nullable=True),
+            sa.Column('claimed_at', sa.DateTime(), nullable=True),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('sent_at', sa.DateTime(), nullable=True),
+        )
+
+    if not _index_exists(bind, 'email_outbox', 'idx_outbox_status_next'):
+        op.create_index('idx_outbox_status_next', 'email_outbox', ['status', 'next_attempt_at'])
+    if not _index_exists(bind, 'email_outbox', 'idx_outbox_claim'):
+        op.create_index('idx_outbox_claim', 'email_outbox', ['claim_token'])
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    for name in ('idx_outbox_claim', 'idx_outbox_status_next'):
+        if _table_exists(bind, 'email_outbox') and _index_exists(bind, 'email_outbox', name):
+            op.drop_index(name, table_name='email_outbox')
+    if _table_exists(bind, 'email_outbox'):
+        op.drop_table('email_outbox')
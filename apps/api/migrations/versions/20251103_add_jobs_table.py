@@ -0,0 +1,70 @@
+"""add jobs table for background work
+
+Revision ID: 20251103_add_jobs
+Revises: 20251102_user_verification
+Create Date: 2025-11-03
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _index_exists(bind, table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return any(idx.get('name') == index_name for idx in inspector.get_indexes(table_name))
+
+
+# revision identifiers, used by Alembic.
+revision = '20251103_add_jobs'
+down_revision = '20251102_user_verification'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if not _table_exists(bind, 'jobs'):
+        op.create_table(
+            'jobs',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('kind', sa.String(length=50), nullable=False),
+            sa.Column('payload', sa.JSON(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=False, server_default='queued'),
+            sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='3'),
+            sa.Column('run_after', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.Column('locked_by', sa.String(length=100), nullable=True),
+            sa.Column('locked_at', sa.DateTime(), nullable=True),
+            sa.Column('result', sa.JSON(), nullable=True),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('created_by', sa.Integer(), nullable=True),
+            sa.Column('municipality_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['created_by'], ['users.id']),
+            sa.ForeignKeyConstraint(['municipality_id'], ['municipalities.id']),
+        )
+
+    if not _index_exists(bind, 'jobs', 'idx_job_status_run_after'):
+        op.create_index('idx_job_status_run_after', 'jobs', ['status', 'run_after'])
+    if not _index_exists(bind, 'jobs', 'idx_job_kind'):
+        op.create_index('idx_job_kind', 'jobs', ['kind'])
+    if not _index_exists(bind, 'jobs', 'idx_job_created_by'):
+        op.create_index('idx_job_created_by', 'jobs', ['created_by'])
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    for name in ('idx_job_created_by', 'idx_job_kind', 'idx_job_status_run_after'):
+        if _table_exists(bind, 'jobs') and _index_exists(bind, 'jobs', name):
+            op.drop_index(name, table_name='jobs')
+    if _table_exists(bind, 'jobs'):
+        op.drop_table('jobs')
@@ -0,0 +1,38 @@
+"""index token_blacklist.revoked_at for incremental revocation loads
+
+Revision ID: 20251104_token_revoked_idx
+Revises: 20251103_add_email_outbox
+Create Date: 2025-11-04
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _index_exists(bind, table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return any(idx.get('name') == index_name for idx in inspector.get_indexes(table_name))
+
+
+# revision identifiers, used by Alembic.
+revision = '20251104_token_revoked_idx'
+down_revision = '20251103_add_email_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if _table_exists(bind, 'token_blacklist') and not _index_exists(bind, 'token_blacklist', 'idx_token_revoked_at'):
+        op.create_index('idx_token_revoked_at', 'token_blacklist', ['revoked_at'])
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _table_exists(bind, 'token_blacklist') and _index_exists(bind, 'token_blacklist', 'idx_token_revoked_at'):
+        op.drop_index('idx_token_revoked_at', table_name='token_blacklist')
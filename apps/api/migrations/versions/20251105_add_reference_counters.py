@@ -0,0 +1,42 @@
+"""add reference_counters table
+
+Revision ID: 20251105_reference_counters
+Revises: 20251104_token_revoked_idx
+Create Date: 2025-11-05
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+# revision identifiers, used by Alembic.
+revision = '20251105_reference_counters'
+down_revision = '20251104_token_revoked_idx'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if not _table_exists(bind, 'reference_counters'):
+        op.create_table(
+            'reference_counters',
+            sa.Column('entity', sa.String(length=40), nullable=False),
+            sa.Column('municipality_id', sa.Integer(), nullable=False, autoincrement=False),
+            sa.Column('year', sa.Integer(), nullable=False, autoincrement=False),
+            sa.Column('next_value', sa.Integer(), nullable=False, server_default='1'),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('entity', 'municipality_id', 'year'),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _table_exists(bind, 'reference_counters'):
+        op.drop_table('reference_counters')
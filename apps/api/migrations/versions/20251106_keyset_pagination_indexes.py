@@ -0,0 +1,50 @@
+"""composite (created_at, id) indexes for keyset pagination
+
+Revision ID: 20251106_keyset_indexes
+Revises: 20251105_reference_counters
+Create Date: 2025-11-06
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def _index_exists(bind, table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return any(idx.get('name') == index_name for idx in inspector.get_indexes(table_name))
+
+
+# revision identifiers, used by Alembic.
+revision = '20251106_keyset_indexes'
+down_revision = '20251105_reference_counters'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('items', 'idx_item_feed_created_id', ['is_active', 'status', 'created_at', 'id']),
+    ('announcements', 'idx_announcement_active_created_id', ['is_active', 'created_at', 'id']),
+    ('issues', 'idx_issue_public_created_id', ['is_public', 'created_at', 'id']),
+    ('audit_logs', 'idx_audit_muni_created_id', ['municipality_id', 'created_at', 'id']),
+    ('document_requests', 'idx_doc_request_muni_created_id', ['municipality_id', 'created_at', 'id']),
+    ('transactions', 'idx_transaction_created_id', ['created_at', 'id']),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table, name, columns in INDEXES:
+        if _table_exists(bind, table) and not _index_exists(bind, table, name):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    for table, name, _ in INDEXES:
+        if _table_exists(bind, table) and _index_exists(bind, table, name):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,66 @@
+"""full-text search index for marketplace items
+
+Postgres: GIN index on the weighted title/description tsvector.
+SQLite: external-content FTS5 table plus sync triggers, back-filled.
+
+Revision ID: 20251107_item_search
+Revises: 20251106_keyset_indexes
+Create Date: 2025-11-07
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+# revision identifiers, used by Alembic.
+revision = '20251107_item_search'
+down_revision = '20251106_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+# Keep in sync with models/marketplace.py
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5("
+    "title, description, content='items', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN "
+    "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF title, description ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+]
+POSTGRES_DDL = (
+    "CREATE INDEX IF NOT EXISTS idx_item_search ON items USING GIN (("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')))"
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not _table_exists(bind, 'items'):
+        return
+    if bind.dialect.name == 'postgresql':
+        op.execute(POSTGRES_DDL)
+    elif bind.dialect.name == 'sqlite':
+        for stmt in SQLITE_DDL:
+            op.execute(stmt)
+        # Index rows that predate the triggers
+        op.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS idx_item_search")
+    elif bind.dialect.name == 'sqlite':
+        for trigger in ('items_fts_ai', 'items_fts_ad', 'items_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS items_fts")
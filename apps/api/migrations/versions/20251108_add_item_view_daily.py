@@ -0,0 +1,40 @@
+"""add item_view_daily rollup table
+
+Revision ID: 20251108_item_view_daily
+Revises: 20251107_item_search
+Create Date: 2025-11-08
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+# revision identifiers, used by Alembic.
+revision = '20251108_item_view_daily'
+down_revision = '20251107_item_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if not _table_exists(bind, 'item_view_daily'):
+        op.create_table(
+            'item_view_daily',
+            sa.Column('item_id', sa.Integer(), sa.ForeignKey('items.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('views', sa.Integer(), nullable=False, server_default='0'),
+            sa.PrimaryKeyConstraint('item_id', 'day'),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _table_exists(bind, 'item_view_daily'):
+        op.drop_table('item_view_daily')
@@ -0,0 +1,53 @@
+"""add content-addressed upload tables
+
+Revision ID: 20251109_upload_blobs
+Revises: 20251108_item_view_daily
+Create Date: 2025-11-09
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+# revision identifiers, used by Alembic.
+revision = '20251109_upload_blobs'
+down_revision = '20251108_item_view_daily'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if not _table_exists(bind, 'upload_blobs'):
+        op.create_table(
+            'upload_blobs',
+            sa.Column('sha256', sa.String(length=64), primary_key=True),
+            sa.Column('size', sa.BigInteger(), nullable=False, server_default='0'),
+            sa.Column('extension', sa.String(length=16), nullable=False, server_default=''),
+            sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+
+    if not _table_exists(bind, 'upload_refs'):
+        op.create_table(
+            'upload_refs',
+            sa.Column('path', sa.String(length=500), primary_key=True),
+            sa.Column('sha256', sa.String(length=64), sa.ForeignKey('upload_blobs.sha256'), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_upload_refs_sha256', 'upload_refs', ['sha256'])
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _table_exists(bind, 'upload_refs'):
+        op.drop_index('ix_upload_refs_sha256', table_name='upload_refs')
+        op.drop_table('upload_refs')
+    if _table_exists(bind, 'upload_blobs'):
+        op.drop_table('upload_blobs')
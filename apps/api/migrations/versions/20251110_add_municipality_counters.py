@@ -0,0 +1,42 @@
+"""add municipality_counters table
+
+Revision ID: 20251110_muni_counters
+Revises: 20251109_upload_blobs
+Create Date: 2025-11-10
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+# revision identifiers, used by Alembic.
+revision = '20251110_muni_counters'
+down_revision = '20251109_upload_blobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # Rows are seeded per municipality by the first stats read (or the
+    # reconcile job / scripts/reconcile_counters.py)
+    if not _table_exists(bind, 'municipality_counters'):
+        op.create_table(
+            'municipality_counters',
+            sa.Column('municipality_id', sa.Integer(), nullable=False, autoincrement=False),
+            sa.Column('name', sa.String(length=64), nullable=False),
+            sa.Column('value', sa.Integer(), nullable=False, server_default='0'),
+            sa.PrimaryKeyConstraint('municipality_id', 'name'),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _table_exists(bind, 'municipality_counters'):
+        op.drop_table('municipality_counters')
@@ -0,0 +1,43 @@
+"""add daily_rollups table
+
+Revision ID: 20251111_daily_rollups
+Revises: 20251110_muni_counters
+Create Date: 2025-11-11
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+# revision identifiers, used by Alembic.
+revision = '20251111_daily_rollups'
+down_revision = '20251110_muni_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # History is backfilled per municipality on its first chart read (or by
+    # scripts/backfill_rollups.py)
+    if not _table_exists(bind, 'daily_rollups'):
+        op.create_table(
+            'daily_rollups',
+            sa.Column('municipality_id', sa.Integer(), nullable=False, autoincrement=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('metric', sa.String(length=64), nullable=False),
+            sa.Column('value', sa.Integer(), nullable=False, server_default='0'),
+            sa.PrimaryKeyConstraint('municipality_id', 'day', 'metric'),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _table_exists(bind, 'daily_rollups'):
+        op.drop_table('daily_rollups')
@@ -0,0 +1,59 @@
+"""add benefit_programs.expires_at
+
+Revision ID: 20251112_benefit_expiry
+Revises: 20251111_daily_rollups
+Create Date: 2025-11-12
+"""
+
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20251112_benefit_expiry'
+down_revision = '20251111_daily_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns('benefit_programs')]
+    if 'expires_at' not in columns:
+        op.add_column('benefit_programs', sa.Column('expires_at', sa.DateTime(), nullable=True))
+        # Prefill from created_at + duration_days (date arithmetic is not portable SQL)
+        programs = sa.table(
+            'benefit_programs',
+            sa.column('id', sa.Integer),
+            sa.column('created_at', sa.DateTime),
+            sa.column('duration_days', sa.Integer),
+            sa.column('expires_at', sa.DateTime),
+        )
+        rows = bind.execute(
+            sa.select(programs.c.id, programs.c.created_at, programs.c.duration_days)
+            .where(programs.c.duration_days > 0, programs.c.created_at.isnot(None))
+        ).all()
+        for program_id, created_at, duration_days in rows:
+            bind.execute(
+                programs.update()
+                .where(programs.c.id == program_id)
+                .values(expires_at=created_at + timedelta(days=int(duration_days)))
+            )
+
+    indexes = {ix['name'] for ix in inspector.get_indexes('benefit_programs')}
+    if 'idx_benefit_program_expiry' not in indexes:
+        op.create_index('idx_benefit_program_expiry', 'benefit_programs', ['is_active', 'expires_at'])
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    indexes = {ix['name'] for ix in inspector.get_indexes('benefit_programs')}
+    if 'idx_benefit_program_expiry' in indexes:
+        op.drop_index('idx_benefit_program_expiry', table_name='benefit_programs')
+    columns = [col['name'] for col in inspector.get_columns('benefit_programs')]
+    if 'expires_at' in columns:
+        op.drop_column('benefit_programs', 'expires_at')
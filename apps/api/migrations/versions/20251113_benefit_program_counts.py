@@ -0,0 +1,61 @@
+"""add benefit_program_counts and backfill current_beneficiaries
+
+Revision ID: 20251113_benefit_counts
+Revises: 20251112_benefit_expiry
+Create Date: 2025-11-13
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+# revision identifiers, used by Alembic.
+revision = '20251113_benefit_counts'
+down_revision = '20251112_benefit_expiry'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if not _table_exists(bind, 'benefit_program_counts'):
+        op.create_table(
+            'benefit_program_counts',
+            sa.Column('program_id', sa.Integer(), sa.ForeignKey('benefit_programs.id', ondelete='CASCADE'),
+                      nullable=False, autoincrement=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('value', sa.Integer(), nullable=False, server_default='0'),
+            sa.PrimaryKeyConstraint('program_id', 'status'),
+        )
+        op.execute(
+            """
+            INSERT INTO benefit_program_counts (program_id, status, value)
+            SELECT program_id, LOWER(COALESCE(status, 'pending')), COUNT(*)
+            FROM benefit_applications
+            GROUP BY program_id, LOWER(COALESCE(status, 'pending'))
+            """
+        )
+
+    # Listings used to recompute this on read; store the true value once
+    op.execute(
+        """
+        UPDATE benefit_programs
+        SET current_beneficiaries = (
+            SELECT COUNT(*) FROM benefit_applications a
+            WHERE a.program_id = benefit_programs.id
+              AND LOWER(a.status) IN ('approved', 'completed')
+        )
+        """
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _table_exists(bind, 'benefit_program_counts'):
+        op.drop_table('benefit_program_counts')
@@ -0,0 +1,43 @@
+"""add user_token_revocations
+
+Revision ID: 20251114_user_token_revocations
+Revises: 20251113_benefit_counts
+Create Date: 2025-11-14
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _table_exists(bind, table_name: str) -> bool:
+    inspector = sa.inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+# revision identifiers, used by Alembic.
+revision = '20251114_user_token_revocations'
+down_revision = '20251113_benefit_counts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if _table_exists(bind, 'user_token_revocations'):
+        return
+    op.create_table(
+        'user_token_revocations',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('revoked_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('idx_user_token_revocation_user', 'user_token_revocations', ['user_id'])
+    op.create_index('idx_user_token_revocation_revoked_at', 'user_token_revocations', ['revoked_at'])
+    op.create_index('idx_user_token_revocation_expires', 'user_token_revocations', ['expires_at'])
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _table_exists(bind, 'user_token_revocations'):
+        op.drop_table('user_token_revocations')
@@ -14,23 +14,35 @@ Base = db.Model
 try:
     from apps.api.models.user import User
     from apps.api.models.municipality import Municipality, Barangay
-    from apps.api.models.marketplace import Item, Transaction, Message
+    from apps.api.models.marketplace import Item, Transaction, Message, ItemViewDaily
     from apps.api.models.document import DocumentType, DocumentRequest
     from apps.api.models.issue import IssueCategory, Issue, IssueUpdate
-    from apps.api.models.benefit import BenefitProgram, BenefitApplication
-    from apps.api.models.token_blacklist import TokenBlacklist
+    from apps.api.models.benefit import BenefitProgram, BenefitApplication, BenefitProgramCount
+    from apps.api.models.token_blacklist import TokenBlacklist, UserTokenRevocation
     from apps.api.models.password_reset import PasswordResetToken
     from apps.api.models.audit import AuditLog
+    from apps.api.models.job import Job
+    from apps.api.models.email_outbox import EmailOutbox
+    from apps.api.models.reference_counter import ReferenceCounter
+    from apps.api.models.upload_blob import UploadBlob, UploadRef
+    from apps.api.models.municipality_counter import MunicipalityCounter
+    from apps.api.models.daily_rollup import DailyRollup
 except ImportError:
     from .user import User
     from .municipality import Municipality, Barangay
-    from .marketplace import Item, Transaction, Message
+    from .marketplace import Item, Transaction, Message, ItemViewDaily
     from .document import DocumentType, DocumentRequest
     from .issue import IssueCategory, Issue, IssueUpdate
-    from .benefit import BenefitProgram, BenefitApplication
-    from .token_blacklist import TokenBlacklist
+    from .benefit import BenefitProgram, BenefitApplication, BenefitProgramCount
+    from .token_blacklist import TokenBlacklist, UserTokenRevocation
     from .password_reset import PasswordResetToken
     from .audit import AuditLog
+    from .job import Job
+    from .email_outbox import EmailOutbox
+    from .reference_counter import ReferenceCounter
+    from .upload_blob import UploadBlob, UploadRef
+    from .municipality_counter import MunicipalityCounter
+    from .daily_rollup import DailyRollup
 
 __all__ = [
     'User',
@@ -39,6 +51,7 @@ __all__ = [
     'Item',
     'Transaction',
     'Message',
+    'ItemViewDaily',
     'DocumentType',
     'DocumentRequest',
     'IssueCategory',
@@ -46,8 +59,17 @@ __all__ = [
     'IssueUpdate',
     'BenefitProgram',
     'BenefitApplication',
+    'BenefitProgramCount',
     'TokenBlacklist',
+    'UserTokenRevocation',
     'PasswordResetToken',
     'AuditLog',
+    'Job',
+    'EmailOutbox',
+    'ReferenceCounter',
+    'UploadBlob',
+    'UploadRef',
+    'MunicipalityCounter',
+    'DailyRollup',
 ]
 
@@ -9,6 +9,15 @@ except ImportError:
 from datetime import datetime
 from sqlalchemy import Index
 
+
+def _image_variants(images):
+    try:
+        from apps.api.utils.image_variants import image_variant_paths
+    except ImportError:  # pragma: no cover
+        from utils.image_variants import image_variant_paths
+    return [image_variant_paths(p) for p in (images or []) if p]
+
+
 class Announcement(db.Model):
     """Announcement model for municipality communications."""
     
@@ -36,6 +45,8 @@ class Announcement(db.Model):
         Index('idx_announcement_active', 'is_active'),
         Index('idx_announcement_priority', 'priority'),
         Index('idx_announcement_created', 'created_at'),
+        # Keyset pagination (utils/pagination.py)
+        Index('idx_announcement_active_created_id', 'is_active', 'created_at', 'id'),
     )
     
     def __repr__(self):
@@ -53,6 +64,7 @@ class Announcement(db.Model):
             'creator_name': f"{self.creator.first_name} {self.creator.last_name}" if self.creator else None,
             'priority': self.priority,
             'images': self.images or [],
+            'image_variants': _image_variants(self.images),
             'external_url': self.external_url,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
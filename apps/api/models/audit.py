@@ -38,6 +38,8 @@ class AuditLog(db.Model):
         Index('idx_audit_muni', 'municipality_id'),
         Index('idx_audit_entity', 'entity_type', 'entity_id'),
         Index('idx_audit_created_at', 'created_at'),
+        # Keyset pagination (utils/pagination.py)
+        Index('idx_audit_muni_created_id', 'municipality_id', 'created_at', 'id'),
     )
 
     def to_dict(self):
@@ -1,10 +1,10 @@
 """Benefits program models."""
-from datetime import datetime
+from datetime import datetime, timedelta
 try:
     from apps.api import db
 except ImportError:
     from __init__ import db
-from sqlalchemy import Index
+from sqlalchemy import Index, and_, event, or_
 
 class BenefitProgram(db.Model):
     __tablename__ = 'benefit_programs'
@@ -46,6 +46,9 @@ class BenefitProgram(db.Model):
     is_accepting_applications = db.Column(db.Boolean, default=True)
     # Duration/Completion
     duration_days = db.Column(db.Integer, nullable=True)
+    # created_at + duration_days, kept in sync on save; the expiry sweeper
+    # (utils/benefit_expiry.py) completes programs once it has passed
+    expires_at = db.Column(db.DateTime, nullable=True)
     completed_at = db.Column(db.DateTime, nullable=True)
     
     # Timestamps
@@ -55,12 +58,42 @@ class BenefitProgram(db.Model):
     # Relationships
     municipality = db.relationship('Municipality', backref='benefit_programs')
     applications = db.relationship('BenefitApplication', backref='program', lazy='dynamic')
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_benefit_program_expiry', 'is_active', 'expires_at'),
+    )
     
     def __repr__(self):
         return f'<BenefitProgram {self.name}>'
+
+    def compute_expires_at(self):
+        """End of the program's duration, or None when it runs until completed manually."""
+        try:
+            days = int(self.duration_days) if self.duration_days else 0
+        except (TypeError, ValueError):
+            return None
+        if days <= 0 or not self.created_at:
+            return None
+        return self.created_at + timedelta(days=days)
+
+    @property
+    def has_expired(self):
+        """Past ``expires_at`` but not yet completed by the sweeper."""
+        return bool(self.is_active and self.expires_at and self.expires_at <= datetime.utcnow())
+
+    @classmethod
+    def open_clause(cls, now=None):
+        """SQL filter for programs that are active and not past their expiry."""
+        now = now or datetime.utcnow()
+        return and_(cls.is_active.is_(True), or_(cls.expires_at.is_(None), cls.expires_at > now))
     
     def to_dict(self):
         """Convert benefit program to dictionary."""
+        # Until the sweeper runs, an expired program is reported as completed
+        expired = self.has_expired
+        is_active = bool(self.is_active) and not expired
+        completed_at = self.completed_at or (self.expires_at if expired else None)
         return {
             'id': self.id,
             'name': self.name,
@@ -76,15 +109,28 @@ class BenefitProgram(db.Model):
             'benefit_description': self.benefit_description,
             'max_beneficiaries': self.max_beneficiaries,
             'current_beneficiaries': self.current_beneficiaries,
-            'is_active': self.is_active,
-            'is_accepting_applications': self.is_accepting_applications,
+            'is_active': is_active,
+            'is_accepting_applications': self.is_accepting_applications and not expired,
             'duration_days': self.duration_days,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'completed_at': completed_at.isoformat() if completed_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'status': 'active' if self.is_active else 'completed',
+            'status': 'active' if is_active else 'completed',
         }
 
 
+@event.listens_for(BenefitProgram, 'before_insert')
+def _program_before_insert(mapper, connection, target):
+    if target.created_at is None:
+        target.created_at = datetime.utcnow()
+    target.expires_at = target.compute_expires_at()
+
+
+@event.listens_for(BenefitProgram, 'before_update')
+def _program_before_update(mapper, connection, target):
+    target.expires_at = target.compute_expires_at()
+
+
 class BenefitApplication(db.Model):
     __tablename__ = 'benefit_applications'
     
@@ -172,3 +218,15 @@ class BenefitApplication(db.Model):
         
         return data
 
+
+class BenefitProgramCount(db.Model):
+    """Applications per (program, status), maintained by utils/benefit_counts.py."""
+    __tablename__ = 'benefit_program_counts'
+
+    program_id = db.Column(db.Integer, db.ForeignKey('benefit_programs.id', ondelete='CASCADE'),
+                           primary_key=True, autoincrement=False)
+    status = db.Column(db.String(20), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<BenefitProgramCount {self.program_id}/{self.status}={self.value}>'
@@ -0,0 +1,19 @@
+"""Per-(municipality, day, metric) activity counts (see utils/daily_rollups.py)."""
+
+try:
+    from apps.api import db
+except Exception:  # pragma: no cover
+    from __init__ import db
+
+
+class DailyRollup(db.Model):
+    __tablename__ = 'daily_rollups'
+
+    municipality_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    day = db.Column(db.Date, primary_key=True)
+    # e.g. registrations, issues, document_requests.type.4
+    metric = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DailyRollup {self.municipality_id}/{self.day}/{self.metric}={self.value}>'
@@ -129,6 +129,8 @@ class DocumentRequest(db.Model):
         Index('idx_doc_request_municipality', 'municipality_id'),
         Index('idx_doc_request_status', 'status'),
         Index('idx_doc_request_number', 'request_number'),
+        # Keyset pagination (utils/pagination.py)
+        Index('idx_doc_request_muni_created_id', 'municipality_id', 'created_at', 'id'),
     )
     
     def __repr__(self):
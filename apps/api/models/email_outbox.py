@@ -0,0 +1,63 @@
+"""Outbound email queue.
+
+Routes enqueue messages here instead of talking to SMTP inline; the outbox
+dispatcher (utils/email_sender.py) delivers them in batches over pooled SMTP
+sessions and retries transient failures.
+"""
+
+from datetime import datetime
+
+try:
+    from apps.api import db
+except Exception:  # pragma: no cover
+    from __init__ import db
+
+from sqlalchemy import Index
+
+
+class EmailOutbox(db.Model):
+    __tablename__ = 'email_outbox'
+
+    # pending -> sending -> sent | failed  (transient errors go back to pending)
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claim_token = db.Column(db.String(64), nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('idx_outbox_status_next', 'status', 'next_attempt_at'),
+        Index('idx_outbox_claim', 'claim_token'),
+    )
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.to_email} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'to_email': self.to_email,
+            'subject': self.subject,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+        }
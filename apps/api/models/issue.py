@@ -112,6 +112,8 @@ class Issue(db.Model):
         Index('idx_issue_status', 'status'),
         Index('idx_issue_priority', 'priority'),
         Index('idx_issue_number', 'issue_number'),
+        # Keyset pagination (utils/pagination.py)
+        Index('idx_issue_public_created_id', 'is_public', 'created_at', 'id'),
     )
     
     def __repr__(self):
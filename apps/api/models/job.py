@@ -0,0 +1,74 @@
+"""Background job model.
+
+Rows in ``jobs`` form a database-backed queue: API requests enqueue work and
+separate worker processes claim and run it, so slow tasks (PDF generation,
+DOCX conversion, exports, SMTP) never occupy a gunicorn request thread.
+"""
+
+from datetime import datetime
+
+try:
+    from apps.api import db
+except Exception:  # pragma: no cover
+    from __init__ import db
+
+from sqlalchemy import Index
+
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    # Lifecycle: queued -> running -> succeeded | failed
+    # (a failed attempt with retries left goes back to queued with a later run_after)
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # e.g. 'export', 'document_pdf', 'email'
+    payload = db.Column(db.JSON, nullable=True)
+
+    status = db.Column(db.String(20), nullable=False, default=STATUS_QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    municipality_id = db.Column(db.Integer, db.ForeignKey('municipalities.id'), nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('idx_job_status_run_after', 'status', 'run_after'),
+        Index('idx_job_kind', 'kind'),
+        Index('idx_job_created_by', 'created_by'),
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_after': self.run_after.isoformat() if self.run_after else None,
+            'result': self.result,
+            'error': self.error,
+            'municipality_id': self.municipality_id,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
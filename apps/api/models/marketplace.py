@@ -4,7 +4,17 @@ try:
     from apps.api import db
 except ImportError:
     from __init__ import db
-from sqlalchemy import Index
+from sqlalchemy import DDL, Index, event
+
+
+def _image_variants(images):
+    # Imported lazily: utils pulls in models at package import time
+    try:
+        from apps.api.utils.image_variants import image_variant_paths
+    except ImportError:  # pragma: no cover
+        from utils.image_variants import image_variant_paths
+    return [image_variant_paths(p) for p in (images or []) if p]
+
 
 class Item(db.Model):
     __tablename__ = 'items'
@@ -71,6 +81,8 @@ class Item(db.Model):
         Index('idx_item_transaction_type', 'transaction_type'),
         Index('idx_item_status', 'status'),
         Index('idx_item_created_at', 'created_at'),
+        # Keyset pagination of the feed (utils/pagination.py)
+        Index('idx_item_feed_created_id', 'is_active', 'status', 'created_at', 'id'),
     )
     
     def __repr__(self):
@@ -93,6 +105,8 @@ class Item(db.Model):
             'barangay_id': self.barangay_id,
             'pickup_location': self.pickup_location,
             'images': self.images,
+            # thumb/medium/large WebP paths per image (utils/image_variants.py)
+            'image_variants': _image_variants(self.images),
             'status': self.status,
             'is_active': self.is_active,
             'approved_by': self.approved_by,
@@ -118,6 +132,33 @@ class Item(db.Model):
         return data
 
 
+# Full-text search over title/description (utils/marketplace_search.py).
+# SQLite: an external-content FTS5 table kept in sync by triggers.
+# Postgres: a GIN index on the same weighted tsvector expression the search
+# query uses, so the database maintains it on every write.
+ITEM_SEARCH_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5("
+    "title, description, content='items', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN "
+    "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF title, description ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+]
+ITEM_SEARCH_POSTGRES_DDL = (
+    "CREATE INDEX IF NOT EXISTS idx_item_search ON items USING GIN (("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')))"
+)
+
+for _stmt in ITEM_SEARCH_SQLITE_DDL:
+    event.listen(Item.__table__, 'after_create', DDL(_stmt).execute_if(dialect='sqlite'))
+event.listen(Item.__table__, 'before_drop', DDL("DROP TABLE IF EXISTS items_fts").execute_if(dialect='sqlite'))
+event.listen(Item.__table__, 'after_create', DDL(ITEM_SEARCH_POSTGRES_DDL).execute_if(dialect='postgresql'))
+
+
 class Transaction(db.Model):
     __tablename__ = 'transactions'
     
@@ -168,6 +209,8 @@ class Transaction(db.Model):
         Index('idx_transaction_buyer', 'buyer_id'),
         Index('idx_transaction_seller', 'seller_id'),
         Index('idx_transaction_status', 'status'),
+        # Keyset pagination (utils/pagination.py)
+        Index('idx_transaction_created_id', 'created_at', 'id'),
     )
     
     def __repr__(self):
@@ -290,3 +333,19 @@ class Message(db.Model):
             'read_at': self.read_at.isoformat() if self.read_at else None,
         }
 
+
+
+class ItemViewDaily(db.Model):
+    """Per-item, per-day view totals (written by utils/view_counter.py)."""
+    __tablename__ = 'item_view_daily'
+
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'item_id': self.item_id,
+            'day': self.day.isoformat() if self.day else None,
+            'views': self.views,
+        }
@@ -109,7 +109,7 @@ class Barangay(db.Model):
     )
     
     def __repr__(self):
-        return f'<Barangay {self.name}, {self.municipality.name}>'
+        return f'<Barangay {self.name} (municipality {self.municipality_id})>'
     
     def to_dict(self):
         """Convert barangay to dictionary."""
@@ -0,0 +1,21 @@
+"""Per-municipality dashboard counters (see utils/municipality_counters.py).
+
+One row per (municipality, counter name), e.g. ``issues.status.pending``.
+Values are kept current by ORM flush hooks and repaired by a reconcile job.
+"""
+
+try:
+    from apps.api import db
+except Exception:  # pragma: no cover
+    from __init__ import db
+
+
+class MunicipalityCounter(db.Model):
+    __tablename__ = 'municipality_counters'
+
+    municipality_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<MunicipalityCounter {self.municipality_id}/{self.name}={self.value}>'
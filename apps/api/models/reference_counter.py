@@ -0,0 +1,26 @@
+"""Per-(entity, municipality, year) sequence counters for reference numbers.
+
+See utils/reference_numbers.py. ``municipality_id`` is 0 for province-wide
+sequences so it can be part of the primary key.
+"""
+
+from datetime import datetime
+
+try:
+    from apps.api import db
+except Exception:  # pragma: no cover
+    from __init__ import db
+
+
+class ReferenceCounter(db.Model):
+    __tablename__ = 'reference_counters'
+
+    entity = db.Column(db.String(40), primary_key=True)
+    municipality_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    # Next value to hand out
+    next_value = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ReferenceCounter {self.entity}/{self.municipality_id}/{self.year} next={self.next_value}>'
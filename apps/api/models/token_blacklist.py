@@ -31,6 +31,7 @@ class TokenBlacklist(db.Model):
         Index('idx_token_jti', 'jti'),
         Index('idx_token_user', 'user_id'),
         Index('idx_token_expires', 'expires_at'),
+        Index('idx_token_revoked_at', 'revoked_at'),
     )
     
     def __repr__(self):
@@ -56,7 +57,40 @@ class TokenBlacklist(db.Model):
     
     @classmethod
     def cleanup_expired_tokens(cls):
-        """Remove expired tokens from the blacklist."""
-        cls.query.filter(cls.expires_at < datetime.utcnow()).delete()
+        """Remove expired tokens from the blacklist. Returns the number removed."""
+        removed = cls.query.filter(cls.expires_at < datetime.utcnow()).delete(synchronize_session=False)
         db.session.commit()
+        return removed
 
+
+
+class UserTokenRevocation(db.Model):
+    """Revokes every access token of ``user_id`` issued at or before ``revoked_at``.
+
+    Written when a user loses a role, admin scope or verification, or is
+    deleted (see utils/token_revocation.py). There is no foreign key so the
+    row outlives a deleted user.
+    """
+    __tablename__ = 'user_token_revocations'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # After this every token the row covers has expired on its own
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('idx_user_token_revocation_user', 'user_id'),
+        Index('idx_user_token_revocation_revoked_at', 'revoked_at'),
+        Index('idx_user_token_revocation_expires', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f'<UserTokenRevocation user={self.user_id} at={self.revoked_at}>'
+
+    @classmethod
+    def cleanup_expired(cls):
+        """Remove rows whose tokens have all expired. Returns the number removed."""
+        removed = cls.query.filter(cls.expires_at < datetime.utcnow()).delete(synchronize_session=False)
+        db.session.commit()
+        return removed
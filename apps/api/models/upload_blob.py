@@ -0,0 +1,40 @@
+"""Content-addressed upload storage (see utils/blob_store.py).
+
+``upload_blobs`` has one row per distinct upload content, keyed by the
+SHA-256 of the bytes as uploaded; ``upload_refs`` maps each entity path
+handed out by ``save_uploaded_file`` to its blob. ``ref_count`` is the
+number of ``upload_refs`` rows pointing at the blob.
+"""
+
+from datetime import datetime
+
+try:
+    from apps.api import db
+except Exception:  # pragma: no cover
+    from __init__ import db
+
+
+class UploadBlob(db.Model):
+    __tablename__ = 'upload_blobs'
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False, default=0)
+    # Extension of the first upload; the blob file is named <sha256><extension>
+    extension = db.Column(db.String(16), nullable=False, default='')
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<UploadBlob {self.sha256[:12]} refs={self.ref_count}>'
+
+
+class UploadRef(db.Model):
+    __tablename__ = 'upload_refs'
+
+    # Path relative to UPLOAD_FOLDER, as stored on the owning entity
+    path = db.Column(db.String(500), primary_key=True)
+    sha256 = db.Column(db.String(64), db.ForeignKey('upload_blobs.sha256'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<UploadRef {self.path} -> {self.sha256[:12]}>'
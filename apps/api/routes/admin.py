@@ -25,6 +25,25 @@ from apps.api.utils.validators import ValidationError
 from apps.api.utils.email_sender import send_user_status_email, send_document_request_status_email
 from apps.api.models.audit import AuditLog
 from apps.api.utils.audit import log_action as log_generic_action
+from apps.api.utils.identity import current_admin_municipality_id
+from apps.api.utils.loaders import transaction_party_options, user_display_name
+from apps.api.utils.pagination import keyset_paginate, cursor_meta, wants_cursor, wants_total, CursorError
+from apps.api.utils.municipality_report import get_municipality_performance, PROVINCE_SCOPE
+from apps.api.utils.municipality_counters import get_counters
+from apps.api.utils.daily_rollups import rollup_series, rollup_totals
+from apps.api.utils.benefit_counts import (
+    BeneficiaryLimitReached,
+    clear_program_counts,
+    complete_program_applications,
+    get_status_counts,
+    record_status_change,
+)
+from apps.api.utils.exports import validate_export, write_export, ExportError
+from apps.api.utils.jobs import enqueue as enqueue_job
+from apps.api.utils import job_handlers  # noqa: F401  (registers background job kinds)
+from apps.api.models.job import Job
+from apps.api.utils.document_issuing import issue_document_pdf
+from apps.api.utils.bulk_documents import select_bulk_requests, generate_bulk_pdfs
 from apps.api.utils.qr_utils import (
     generate_pickup_code,
     hash_code,
@@ -53,30 +72,15 @@ def enforce_admin_role():
         pass
 
 def get_admin_municipality_id():
-    """Get the municipality ID for the current admin user."""
-    # get_jwt_identity returns whatever was used as identity when creating
-    # the token. We cast to int for DB lookup.
-    identity = get_jwt_identity()
-    try:
-        user_id = int(identity)
-    except (TypeError, ValueError):
-        if current_app.config.get('DEBUG'):
-            print(f"DEBUG: Invalid JWT identity: {identity}")
-        return None
-    if current_app.config.get('DEBUG'):
-        print(f"DEBUG: JWT identity: {user_id}")  # Debug line
-    user = User.query.get(user_id)
-    if current_app.config.get('DEBUG'):
-        print(f"DEBUG: User found: {user.username if user else 'None'}, Role: {user.role if user else 'None'}")  # Debug line
-    
-    if not user or user.role not in ['admin', 'municipal_admin']:
-        if current_app.config.get('DEBUG'):
-            print(f"DEBUG: User validation failed - user: {user}, role: {user.role if user else 'None'}")  # Debug line
-        return None
-    
+    """Get the municipality ID for the current admin user.
+
+    Read from the access token's identity claims; tokens issued before those
+    claims existed fall back to a single (request-memoized) user lookup.
+    """
+    municipality_id = current_admin_municipality_id()
     if current_app.config.get('DEBUG'):
-        print(f"DEBUG: Admin municipality ID: {user.admin_municipality_id}")  # Debug line
-    return user.admin_municipality_id
+        print(f"DEBUG: JWT identity: {get_jwt_identity()}, admin municipality ID: {municipality_id}")  # Debug line
+    return municipality_id
 
 def require_admin_municipality():
     """Decorator to ensure admin has municipality scope."""
@@ -389,31 +393,11 @@ def get_user_stats():
         if isinstance(municipality_id, tuple):  # Error response
             return municipality_id
         
-        # Count users by status
-        total_users = User.query.filter(
-            and_(
-                User.municipality_id == municipality_id,
-                User.role == 'resident'
-            )
-        ).count()
-        
-        pending_users = User.query.filter(
-            and_(
-                User.municipality_id == municipality_id,
-                User.role == 'resident',
-                User.admin_verified == False,
-                User.is_active == True
-            )
-        ).count()
-        
-        verified_users = User.query.filter(
-            and_(
-                User.municipality_id == municipality_id,
-                User.role == 'resident',
-                User.admin_verified == True,
-                User.is_active == True
-            )
-        ).count()
+        # Count users by status (maintained counters, utils/municipality_counters.py)
+        counters = get_counters(municipality_id)
+        total_users = counters['users.residents']
+        pending_users = counters['users.residents.pending']
+        verified_users = counters['users.residents.verified']
         
         # Recent registrations (last 7 days)
         week_ago = datetime.utcnow() - timedelta(days=7)
@@ -447,45 +431,9 @@ def get_user_growth():
         range_param = request.args.get('range', 'last_30_days')
         start, end = _parse_range(range_param)
 
-        bind = db.session.get_bind()
-        dialect = getattr(getattr(bind, 'dialect', None), 'name', 'sqlite') if bind else 'sqlite'
-
-        if dialect == 'sqlite':
-            day_column = func.strftime('%Y-%m-%d', User.created_at)
-            group_by_col = 'day'
-            order_by_col = 'day'
-        else:
-            # For PostgreSQL and others: truncate to day and handle tz-aware datetimes
-            day_column = func.date_trunc('day', User.created_at)
-            group_by_col = day_column
-            order_by_col = day_column
-
-        rows = (
-            db.session.query(
-                day_column.label('day'),
-                func.count(User.id)
-            )
-            .filter(and_(
-                User.municipality_id == municipality_id,
-                User.role == 'resident',
-                User.created_at >= start,
-                User.created_at <= end,
-            ))
-            .group_by(group_by_col)
-            .order_by(order_by_col)
-            .all()
-        )
-
-        counts = {}
-        for day_value, count in rows:
-            if isinstance(day_value, str):
-                key = day_value
-            else:
-                try:
-                    key = day_value.strftime('%Y-%m-%d')
-                except Exception:
-                    key = str(day_value)
-            counts[key] = int(count)
+        # Daily rollups (utils/daily_rollups.py): one small row per active day
+        per_day = rollup_series(municipality_id, 'registrations', start.date(), end.date())
+        counts = {d.strftime('%Y-%m-%d'): n for d, n in per_day.items()}
         # Build full series inclusive of dates in range
         days = []
         cur = start
@@ -708,28 +656,11 @@ def get_issue_stats():
             return municipality_id
         
         # Count issues by status
-        total_issues = Issue.query.filter(Issue.municipality_id == municipality_id).count()
-        
-        pending_issues = Issue.query.filter(
-            and_(
-                Issue.municipality_id == municipality_id,
-                Issue.status == 'pending'
-            )
-        ).count()
-        
-        active_issues = Issue.query.filter(
-            and_(
-                Issue.municipality_id == municipality_id,
-                Issue.status == 'in_progress'
-            )
-        ).count()
-        
-        resolved_issues = Issue.query.filter(
-            and_(
-                Issue.municipality_id == municipality_id,
-                Issue.status == 'resolved'
-            )
-        ).count()
+        counters = get_counters(municipality_id)
+        total_issues = counters['issues']
+        pending_issues = counters['issues.status.pending']
+        active_issues = counters['issues.status.in_progress']
+        resolved_issues = counters['issues.status.resolved']
         
         return jsonify({
             'total_issues': total_issues,
@@ -751,37 +682,12 @@ def get_marketplace_stats():
         if isinstance(municipality_id, tuple):  # Error response
             return municipality_id
         
-        # Count marketplace items by status
-        total_items = MarketplaceItem.query.filter(
-            and_(
-                MarketplaceItem.municipality_id == municipality_id,
-                MarketplaceItem.is_active == True
-            )
-        ).count()
-        
-        pending_items = MarketplaceItem.query.filter(
-            and_(
-                MarketplaceItem.municipality_id == municipality_id,
-                MarketplaceItem.status == 'pending',
-                MarketplaceItem.is_active == True
-            )
-        ).count()
-        
-        approved_items = MarketplaceItem.query.filter(
-            and_(
-                MarketplaceItem.municipality_id == municipality_id,
-                MarketplaceItem.status == 'available',
-                MarketplaceItem.is_active == True
-            )
-        ).count()
-        
-        rejected_items = MarketplaceItem.query.filter(
-            and_(
-                MarketplaceItem.municipality_id == municipality_id,
-                MarketplaceItem.status == 'rejected',
-                MarketplaceItem.is_active == True
-            )
-        ).count()
+        # Count active marketplace items by status
+        counters = get_counters(municipality_id)
+        total_items = counters['items.active']
+        pending_items = counters['items.active.status.pending']
+        approved_items = counters['items.active.status.available']
+        rejected_items = counters['items.active.status.rejected']
         
         return jsonify({
             'total_items': total_items,
@@ -1058,24 +964,10 @@ def get_announcement_stats():
             return municipality_id
         
         # Count announcements by status
-        total_announcements = Announcement.query.filter(
-            Announcement.municipality_id == municipality_id
-        ).count()
-        
-        active_announcements = Announcement.query.filter(
-            and_(
-                Announcement.municipality_id == municipality_id,
-                Announcement.is_active == True
-            )
-        ).count()
-        
-        high_priority = Announcement.query.filter(
-            and_(
-                Announcement.municipality_id == municipality_id,
-                Announcement.priority == 'high',
-                Announcement.is_active == True
-            )
-        ).count()
+        counters = get_counters(municipality_id)
+        total_announcements = counters['announcements']
+        active_announcements = counters['announcements.active']
+        high_priority = counters['announcements.active.priority.high']
         
         return jsonify({
             'total_announcements': total_announcements,
@@ -1105,55 +997,13 @@ def get_dashboard_stats():
         }
         
         try:
-            # User statistics
-            pending_verifications = User.query.filter(
-                and_(
-                    User.municipality_id == municipality_id,
-                    User.role == 'resident',
-                    User.admin_verified == False,
-                    User.is_active == True
-                )
-            ).count()
-            stats['pending_verifications'] = pending_verifications
+            counters = get_counters(municipality_id)
+            stats['pending_verifications'] = counters['users.residents.pending']
+            stats['active_issues'] = counters['issues.status.pending'] + counters['issues.status.in_progress']
+            stats['marketplace_items'] = counters['items.active.status.pending']
+            stats['announcements'] = counters['announcements.active']
         except Exception:
-            pass  # Keep default 0
-        
-        try:
-            # Issue statistics
-            active_issues = Issue.query.filter(
-                and_(
-                    Issue.municipality_id == municipality_id,
-                    Issue.status.in_(['pending', 'in_progress'])
-                )
-            ).count()
-            stats['active_issues'] = active_issues
-        except Exception:
-            pass  # Keep default 0
-        
-        try:
-            # Marketplace statistics
-            marketplace_items = MarketplaceItem.query.filter(
-                and_(
-                    MarketplaceItem.municipality_id == municipality_id,
-                    MarketplaceItem.status == 'pending',
-                    MarketplaceItem.is_active == True
-                )
-            ).count()
-            stats['marketplace_items'] = marketplace_items
-        except Exception:
-            pass  # Keep default 0
-        
-        try:
-            # Announcements statistics
-            announcements = Announcement.query.filter(
-                and_(
-                    Announcement.municipality_id == municipality_id,
-                    Announcement.is_active == True
-                )
-            ).count()
-            stats['announcements'] = announcements
-        except Exception:
-            pass  # Keep default 0
+            db.session.rollback()  # Keep defaults
         
         return jsonify(stats), 200
         
@@ -1183,53 +1033,7 @@ def admin_list_benefit_programs():
             .order_by(BenefitProgram.created_at.desc())
             .all()
         )
-        # Auto-complete expired programs
-        now = datetime.now(timezone.utc)
-        changed = False
-        for p in programs:
-            try:
-                if p.is_active and p.duration_days and p.created_at:
-                    from datetime import timedelta as _td
-                    created_at = p.created_at
-                    if created_at.tzinfo is None or created_at.tzinfo.utcoffset(created_at) is None:
-                        created_at = created_at.replace(tzinfo=timezone.utc)
-                    if created_at + _td(days=int(p.duration_days)) <= now:
-                        p.is_active = False
-                        p.is_accepting_applications = False
-                        p.completed_at = now.replace(tzinfo=None)
-                        changed = True
-            except Exception:
-                pass
-        if changed:
-            db.session.commit()
-
-        # Compute beneficiaries as count of approved applications per program
-        try:
-            program_ids = [p.id for p in programs] or []
-            if program_ids:
-                rows = (
-                    db.session.query(
-                        BenefitApplication.program_id,
-                        func.count(BenefitApplication.id)
-                    )
-                    .filter(
-                        BenefitApplication.program_id.in_(program_ids),
-                        BenefitApplication.status == 'approved'
-                    )
-                    .group_by(BenefitApplication.program_id)
-                    .all()
-                )
-                counts = {pid: int(cnt) for pid, cnt in rows}
-                for p in programs:
-                    # override in-memory for response consistency
-                    try:
-                        p.current_beneficiaries = counts.get(p.id, 0)
-                    except Exception:
-                        pass
-        except Exception:
-            # Best-effort; fall back to stored value
-            pass
-
+        # current_beneficiaries is maintained on the row (utils/benefit_counts.py)
         return jsonify({
             'programs': [p.to_dict() for p in programs],
             'count': len(programs)
@@ -1256,15 +1060,14 @@ def admin_get_benefit_program(program_id: int):
 
         data = program.to_dict()
 
-        # Attach a quick applicant breakdown for context
+        # Attach a quick applicant breakdown for context (stored per-status counts)
         try:
-            total_apps = BenefitApplication.query.filter_by(program_id=program_id).count()
-            approved = BenefitApplication.query.filter_by(program_id=program_id, status='approved').count()
-            completed = BenefitApplication.query.filter_by(program_id=program_id, status='completed').count()
+            counts = get_status_counts(program_id)
             data['application_stats'] = {
-                'total': int(total_apps),
-                'approved': int(approved),
-                'completed': int(completed),
+                'total': sum(counts.values()),
+                'approved': counts['approved'],
+                'completed': counts['completed'],
+                'by_status': dict(counts),
             }
         except Exception:
             pass
@@ -1292,7 +1095,7 @@ def admin_list_benefit_applications():
         if status:
             q = q.filter(BenefitApplication.status == status)
         if active_only:
-            q = q.filter(BenefitProgram.is_active.is_(True))
+            q = q.filter(BenefitProgram.open_clause())
 
         apps = q.order_by(BenefitApplication.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
         data = []
@@ -1455,10 +1258,10 @@ def admin_update_transfer(transfer_id: int):
                 actor_role='admin',
                 old_values={'status': prev_status},
                 new_values={'status': new_status},
+                sync=False,
             )
-            db.session.commit()
         except Exception:
-            db.session.rollback()
+            pass
         return jsonify({'message': 'Transfer updated', 'transfer': t.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
@@ -1481,7 +1284,8 @@ def admin_update_benefit_application_status(application_id: int):
         if new_status not in ['pending', 'under_review', 'approved', 'rejected', 'cancelled', 'completed']:
             return jsonify({'error': 'Invalid status'}), 400
 
-        app = BenefitApplication.query.get(application_id)
+        # Row lock: a concurrent update waits and then sees this status as `prev`
+        app = BenefitApplication.query.filter_by(id=application_id).with_for_update().populate_existing().first()
         if not app:
             return jsonify({'error': 'Application not found'}), 404
 
@@ -1509,15 +1313,15 @@ def admin_update_benefit_application_status(application_id: int):
             app.completed_at = naive_now
             if not app.approved_at:
                 app.approved_at = naive_now
-        # Adjust program beneficiaries count based on status transition
+        # Move the stored counts in the same transaction; approvals respect max_beneficiaries
         try:
-            if prev not in ['approved', 'completed'] and new_status in ['approved', 'completed']:
-                program.current_beneficiaries = (program.current_beneficiaries or 0) + 1
-            if prev in ['approved', 'completed'] and new_status not in ['approved', 'completed']:
-                current = (program.current_beneficiaries or 0)
-                program.current_beneficiaries = max(0, current - 1)
-        except Exception:
-            pass
+            record_status_change(program.id, prev, new_status)
+        except BeneficiaryLimitReached:
+            db.session.rollback()
+            return jsonify({
+                'error': 'Program has reached its beneficiary limit',
+                'max_beneficiaries': program.max_beneficiaries,
+            }), 409
         db.session.commit()
 
         # Generic audit log (best-effort)
@@ -1532,10 +1336,10 @@ def admin_update_benefit_application_status(application_id: int):
                 old_values={'status': prev},
                 new_values={'status': new_status},
                 notes=notes,
+                sync=False,
             )
-            db.session.commit()
         except Exception:
-            db.session.rollback()
+            pass
 
         # Email notifications (best-effort)
         try:
@@ -1664,6 +1468,7 @@ def admin_delete_benefit_program(program_id: int):
         if program.municipality_id and program.municipality_id != municipality_id:
             return jsonify({'error': 'Program not in your municipality'}), 403
 
+        clear_program_counts(program.id)
         db.session.delete(program)
         db.session.commit()
         return jsonify({'message': 'Program deleted'}), 200
@@ -1692,24 +1497,7 @@ def admin_complete_benefit_program(program_id: int):
         program.is_accepting_applications = False
         program.completed_at = now.replace(tzinfo=None)
 
-        try:
-            approved_apps = (
-                BenefitApplication.query
-                .filter(
-                    BenefitApplication.program_id == program_id,
-                    BenefitApplication.status.in_(['approved', 'completed'])
-                )
-                .all()
-            )
-            for app in approved_apps:
-                app.status = 'completed'
-                naive_now = now.replace(tzinfo=None)
-                app.completed_at = naive_now
-                if not app.approved_at:
-                    app.approved_at = naive_now
-                app.updated_at = naive_now
-        except Exception:
-            pass
+        complete_program_applications(program.id, now.replace(tzinfo=None))
 
         db.session.commit()
         return jsonify({'message': 'Program marked as completed', 'program': program.to_dict()}), 200
@@ -1735,6 +1523,12 @@ def _parse_range(range_param: str):
     return now - timedelta(days=30), now
 
 
+def _wants_async(payload: dict) -> bool:
+    """True when the caller asked for background processing (?async=1 or {"async": true})."""
+    flag = payload.get('async', request.args.get('async'))
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+
 @admin_bp.route('/documents/stats', methods=['GET'])
 @jwt_required()
 def admin_documents_stats():
@@ -1746,44 +1540,20 @@ def admin_documents_stats():
         range_param = request.args.get('range', 'last_30_days')
         start, end = _parse_range(range_param)
 
-        total = DocumentRequest.query\
-            .filter(
-                and_(
-                    DocumentRequest.municipality_id == municipality_id,
-                    DocumentRequest.created_at >= start,
-                    DocumentRequest.created_at <= end,
-                )
-            ).count()
-
-        # Top requested document names if relationship exists; fallback to counts by id
-        try:
-            from apps.api.models.document import DocumentType
-            rows = db.session.query(DocumentType.name, func.count(DocumentRequest.id))\
-                .join(DocumentRequest, DocumentRequest.document_type_id == DocumentType.id)\
-                .filter(
-                    and_(
-                        DocumentRequest.municipality_id == municipality_id,
-                        DocumentRequest.created_at >= start,
-                        DocumentRequest.created_at <= end,
-                    )
-                )\
-                .group_by(DocumentType.name)\
-                .order_by(func.count(DocumentRequest.id).desc())\
-                .limit(5).all()
-            top = [{'name': r[0], 'count': int(r[1])} for r in rows]
-        except Exception:
-            rows = db.session.query(DocumentRequest.document_type_id, func.count(DocumentRequest.id))\
-                .filter(
-                    and_(
-                        DocumentRequest.municipality_id == municipality_id,
-                        DocumentRequest.created_at >= start,
-                        DocumentRequest.created_at <= end,
-                    )
-                )\
-                .group_by(DocumentRequest.document_type_id)\
-                .order_by(func.count(DocumentRequest.id).desc())\
-                .limit(5).all()
-            top = [{'name': str(r[0]), 'count': int(r[1])} for r in rows]
+        # Daily rollups (utils/daily_rollups.py) instead of scanning document_requests
+        totals = rollup_totals(municipality_id, 'document_requests', start.date(), end.date())
+        total = totals.pop('document_requests', 0)
+        per_type = sorted(
+            ((int(metric.rsplit('.', 1)[1]), n) for metric, n in totals.items() if n),
+            key=lambda pair: pair[1],
+            reverse=True,
+        )[:5]
+        names = dict(
+            db.session.query(DocumentType.id, DocumentType.name)
+            .filter(DocumentType.id.in_([type_id for type_id, _ in per_type]))
+            .all()
+        ) if per_type else {}
+        top = [{'name': names.get(type_id, str(type_id)), 'count': n} for type_id, n in per_type]
 
         return jsonify({'total_requests': total, 'top_requested': top}), 200
     except Exception as e:
@@ -1968,6 +1738,23 @@ def get_document_requests():
             elif norm == 'digital':
                 query = query.filter(DocumentRequest.delivery_method == 'digital')
         
+        def _serialize(rows):
+            requests_data = []
+            for req, user, doc_type in rows:
+                request_data = req.to_dict(include_user=True, include_audit=True)
+                request_data['user'] = user.to_dict()
+                request_data['document_type'] = doc_type.to_dict()
+                requests_data.append(request_data)
+            return requests_data
+
+        if wants_cursor(request.args):
+            total = query.order_by(None).count() if wants_total(request.args) else None
+            rows, next_cursor = keyset_paginate(
+                query, DocumentRequest.created_at, DocumentRequest.id, request.args.get('cursor'), per_page,
+                key=lambda row: (row[0].created_at, row[0].id),
+            )
+            return jsonify({'requests': _serialize(rows), 'pagination': cursor_meta(next_cursor, per_page, total)}), 200
+
         # Order by creation date (newest first)
         query = query.order_by(DocumentRequest.created_at.desc())
         
@@ -1977,12 +1764,7 @@ def get_document_requests():
         )
         
         # Format response data
-        requests_data = []
-        for req, user, doc_type in requests_paginated.items:
-            request_data = req.to_dict(include_user=True, include_audit=True)
-            request_data['user'] = user.to_dict()
-            request_data['document_type'] = doc_type.to_dict()
-            requests_data.append(request_data)
+        requests_data = _serialize(requests_paginated.items)
         
         return jsonify({
             'requests': requests_data,
@@ -1994,6 +1776,8 @@ def get_document_requests():
             }
         }), 200
         
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get document requests', 'details': str(e)}), 500
 
@@ -2003,8 +1787,6 @@ def get_document_requests():
 def generate_document_request_pdf(request_id: int):
     """Generate PDF for a digital document request using dynamic ReportLab generator."""
     try:
-        from apps.api.utils.pdf_generator import generate_document_pdf
-
         municipality_id = require_admin_municipality()
         if isinstance(municipality_id, tuple):
             return municipality_id
@@ -2018,40 +1800,26 @@ def generate_document_request_pdf(request_id: int):
         if (req.delivery_method or '').lower() not in ('digital',):
             return jsonify({'error': 'PDF generation is only available for digital requests'}), 400
 
-        user = User.query.get(req.user_id)
         doc_type = DocumentType.query.get(req.document_type_id)
         if not doc_type:
             return jsonify({'error': 'Document type not found'}), 404
 
+        if _wants_async(request.get_json(silent=True) or {}):
+            job = enqueue_job(
+                'document_pdf',
+                {'request_id': req.id, 'admin_id': get_jwt_identity()},
+                created_by=get_jwt_identity(),
+                municipality_id=municipality_id,
+            )
+            return jsonify({'job_id': job.id, 'status': job.status, 'poll_url': f"/api/admin/jobs/{job.id}"}), 202
+
         # Current admin for BY line
         try:
             admin_user = User.query.get(get_jwt_identity())
         except Exception:
             admin_user = None
 
-        abs_path, rel_path = generate_document_pdf(req, doc_type, user, admin_user=admin_user)
-
-        req.document_file = rel_path
-        # Retain existing behavior for digital requests: set ready after generation,
-        # but defer final completion to an explicit action.
-        req.status = 'ready'
-        req.ready_at = datetime.utcnow()
-        req.updated_at = datetime.utcnow()
-        # Audit (best-effort)
-        try:
-            log_generic_action(
-                user_id=get_jwt_identity(),
-                municipality_id=req.municipality_id,
-                entity_type='document_request',
-                entity_id=req.id,
-                action='generate_pdf',
-                actor_role='admin',
-                old_values=None,
-                new_values={'document_file': rel_path},
-                notes=None,
-            )
-        except Exception:
-            pass
+        rel_path = issue_document_pdf(req, admin_user=admin_user, actor_id=get_jwt_identity(), doc_type=doc_type)
         db.session.commit()
 
         return jsonify({'message': 'Document generated', 'url': f"/uploads/{rel_path}", 'request': req.to_dict()}), 200
@@ -2064,6 +1832,93 @@ def generate_document_request_pdf(request_id: int):
         return jsonify({'error': 'Failed to generate PDF', 'details': str(e)}), 500
 
 
+@admin_bp.route('/documents/requests/generate-pdf', methods=['POST'])
+@jwt_required()
+def bulk_generate_document_request_pdfs():
+    """Generate PDFs for many digital requests at once.
+
+    Body: {"ids": [...]} or a filter {"status", "document_type_id", "from", "to"}.
+    Returns a per-id result map; all updates are committed together.
+    """
+    try:
+        municipality_id = require_admin_municipality()
+        if isinstance(municipality_id, tuple):
+            return municipality_id
+
+        data = request.get_json(silent=True) or {}
+        max_requests = int(current_app.config.get('BULK_PDF_MAX_REQUESTS', 500))
+        ids = data.get('ids')
+        if ids is not None:
+            try:
+                ids = list(dict.fromkeys(int(i) for i in ids))
+            except (TypeError, ValueError):
+                return jsonify({'error': 'ids must be a list of integers'}), 400
+            if not ids:
+                return jsonify({'error': 'ids must not be empty'}), 400
+            if len(ids) > max_requests:
+                return jsonify({'error': f'At most {max_requests} requests per batch'}), 400
+        filters = {
+            'status': data.get('status'),
+            'document_type_id': data.get('document_type_id'),
+            'from': data.get('from'),
+            'to': data.get('to'),
+        }
+        if ids is None and not any(filters.values()):
+            return jsonify({'error': 'Provide ids or at least one filter (status, document_type_id, from, to)'}), 400
+        try:
+            start = datetime.fromisoformat(filters['from']) if filters['from'] else None
+            end = datetime.fromisoformat(filters['to']) if filters['to'] else None
+            document_type_id = int(filters['document_type_id']) if filters['document_type_id'] else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid filter value'}), 400
+
+        if _wants_async(data):
+            job = enqueue_job(
+                'document_pdf_bulk',
+                {
+                    'municipality_id': municipality_id,
+                    'admin_id': get_jwt_identity(),
+                    'ids': ids,
+                    'status': filters['status'],
+                    'document_type_id': document_type_id,
+                    'start': start.isoformat() if start else None,
+                    'end': end.isoformat() if end else None,
+                },
+                created_by=get_jwt_identity(),
+                municipality_id=municipality_id,
+            )
+            return jsonify({'job_id': job.id, 'status': job.status, 'poll_url': f"/api/admin/jobs/{job.id}"}), 202
+
+        reqs = select_bulk_requests(
+            municipality_id,
+            ids=ids,
+            status=filters['status'],
+            document_type_id=document_type_id,
+            start=start,
+            end=end,
+            limit=None if ids is not None else max_requests,
+        )
+        try:
+            admin_user = User.query.get(get_jwt_identity())
+        except Exception:
+            admin_user = None
+        outcome = generate_bulk_pdfs(
+            reqs,
+            municipality_id=municipality_id,
+            admin_user=admin_user,
+            actor_id=get_jwt_identity(),
+            requested_ids=ids,
+        )
+        return jsonify({'message': 'Bulk generation finished', **outcome}), 200
+    except Exception as e:
+        db.session.rollback()
+        try:
+            current_app.logger.exception("Bulk PDF generation failed")
+        except Exception:
+            pass
+        return jsonify({'error': 'Failed to generate PDFs', 'details': str(e)}), 500
+
+
 @admin_bp.route('/documents/requests/<int:request_id>/download', methods=['GET'])
 @jwt_required()
 def download_document_request_pdf(request_id: int):
@@ -2166,10 +2021,10 @@ def update_document_request_status(request_id: int):
                 old_values={'status': prev_status},
                 new_values={'status': new_status},
                 notes=notes or rejection_reason,
+                sync=False,
             )
-            db.session.commit()
         except Exception:
-            db.session.rollback()
+            pass
 
         # Email notifications (best-effort)
         try:
@@ -2240,10 +2095,10 @@ def admin_ready_for_pickup(request_id: int):
                 old_values=None,
                 new_values={'status': 'ready'},
                 notes=None,
+                sync=False,
             )
-            db.session.commit()
         except Exception:
-            db.session.rollback()
+            pass
         try:
             user = User.query.get(req.user_id)
             doc_type = DocumentType.query.get(req.document_type_id)
@@ -2335,10 +2190,10 @@ def admin_generate_claim_token(request_id: int):
                 old_values=None,
                 new_values={'qr_code': req.qr_code, 'code_masked': (req.qr_data or {}).get('code_masked')},
                 notes=None,
+                sync=False,
             )
-            db.session.commit()
         except Exception:
-            db.session.rollback()
+            pass
 
         return jsonify({
             'message': 'Claim token generated',
@@ -2482,10 +2337,10 @@ def update_document_request_content(request_id: int):
                 old_values=None,
                 new_values={k: updates.get(k) for k in ['purpose','remarks','civil_status','age'] if k in updates},
                 notes=None,
+                sync=False,
             )
-            db.session.commit()
         except Exception:
-            db.session.rollback()
+            pass
 
         return jsonify({'message': 'Content updated', 'request': req.to_dict(include_user=True, include_audit=True)}), 200
     except Exception as e:
@@ -2508,29 +2363,10 @@ def admin_municipality_performance():
         range_param = request.args.get('range', 'last_30_days')
         start, end = _parse_range(range_param)
 
-        def build_perf(m_id: int):
-            users = User.query.filter(and_(User.municipality_id == m_id, User.role == 'resident', User.admin_verified == True, User.is_active == True)).count()
-            listings = MarketplaceItem.query.filter(and_(MarketplaceItem.municipality_id == m_id, MarketplaceItem.created_at >= start, MarketplaceItem.created_at <= end)).count()
-            docs = DocumentRequest.query.filter(and_(DocumentRequest.municipality_id == m_id, DocumentRequest.created_at >= start, DocumentRequest.created_at <= end)).count()
-            benefits_active = 0
-            disputes_opened = 0
-            try:
-                benefits_active = BenefitProgram.query.filter(and_(BenefitProgram.municipality_id == m_id, BenefitProgram.is_active == True)).count()
-            except Exception:
-                pass
-            try:
-                disputes_opened = MarketplaceTransaction.query.filter(and_(MarketplaceTransaction.status == 'disputed', MarketplaceTransaction.created_at >= start, MarketplaceTransaction.created_at <= end)).count()
-            except Exception:
-                pass
-            name = (Municipality.query.get(m_id).name if Municipality.query.get(m_id) else f"Municipality {m_id}")
-            return {'id': m_id, 'name': name, 'users': users, 'listings': listings, 'documents': docs, 'benefits_active': benefits_active, 'disputes': disputes_opened}
-
-        if role == 'admin':
-            # Province-level: return top N municipalities by activity
-            ids = [m.id for m in Municipality.query.all()]
-            data = [build_perf(mid) for mid in ids]
-        else:
-            data = [build_perf(current_id)]
+        # Province-level admins see every municipality; others only their own.
+        # Figures come from grouped aggregates and are cached briefly per (range, scope).
+        scope = PROVINCE_SCOPE if role == 'admin' else int(current_id)
+        data = get_municipality_performance(range_param, scope, start, end)
 
         return jsonify({'municipalities': data}), 200
     except Exception as e:
@@ -2555,31 +2391,34 @@ def admin_list_transactions():
             q = q.join(MarketplaceItem, MarketplaceItem.id == MarketplaceTransaction.item_id).filter(MarketplaceItem.municipality_id == municipality_id)
         if status:
             q = q.filter(MarketplaceTransaction.status == status)
-        q = q.order_by(MarketplaceTransaction.created_at.desc())
-        p = q.paginate(page=page, per_page=per_page, error_out=False)
+        q = q.options(*transaction_party_options())
+        cursor_mode = wants_cursor(request.args)
+        if cursor_mode:
+            total = q.order_by(None).count() if wants_total(request.args) else None
+            items, next_cursor = keyset_paginate(
+                q, MarketplaceTransaction.created_at, MarketplaceTransaction.id, request.args.get('cursor'), per_page
+            )
+        else:
+            p = q.order_by(MarketplaceTransaction.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
+            items = p.items
 
         rows = []
-        for t in p.items:
+        for t in items:
             d = t.to_dict()
-            try:
-                item = MarketplaceItem.query.get(t.item_id)
-                d['item_title'] = getattr(item, 'title', None)
-            except Exception:
-                d['item_title'] = None
-            # Attach buyer/seller display names and photos (best-effort)
-            try:
-                buyer = User.query.get(t.buyer_id)
-                seller = User.query.get(t.seller_id)
-                d['buyer_name'] = (f"{getattr(buyer,'first_name','')} {getattr(buyer,'last_name','')}").strip() or getattr(buyer,'username', None) or str(t.buyer_id)
-                d['seller_name'] = (f"{getattr(seller,'first_name','')} {getattr(seller,'last_name','')}").strip() or getattr(seller,'username', None) or str(t.seller_id)
-                d['buyer_profile_picture'] = getattr(buyer, 'profile_picture', None)
-                d['seller_profile_picture'] = getattr(seller, 'profile_picture', None)
-            except Exception:
-                d['buyer_name'] = str(t.buyer_id)
-                d['seller_name'] = str(t.seller_id)
+            # Item, buyer and seller arrive with the page via joined loading
+            item, buyer, seller = t.item, t.buyer, t.seller
+            d['item_title'] = getattr(item, 'title', None)
+            d['buyer_name'] = user_display_name(buyer, str(t.buyer_id))
+            d['seller_name'] = user_display_name(seller, str(t.seller_id))
+            d['buyer_profile_picture'] = getattr(buyer, 'profile_picture', None)
+            d['seller_profile_picture'] = getattr(seller, 'profile_picture', None)
             rows.append(d)
 
+        if cursor_mode:
+            return jsonify({'transactions': rows, **cursor_meta(next_cursor, per_page, total)}), 200
         return jsonify({'transactions': rows, 'total': p.total, 'page': p.page, 'pages': p.pages, 'per_page': p.per_page}), 200
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to list transactions', 'details': str(e)}), 500
 
@@ -2622,8 +2461,14 @@ def admin_list_audit():
                 pass
         page = int(request.args.get('page', 1))
         per_page = min(100, int(request.args.get('per_page', 20)))
+        if wants_cursor(request.args):
+            total = q.count() if wants_total(request.args) else None
+            logs, next_cursor = keyset_paginate(q, AuditLog.created_at, AuditLog.id, request.args.get('cursor'), per_page)
+            return jsonify({'logs': [l.to_dict() for l in logs], **cursor_meta(next_cursor, per_page, total)}), 200
         p = q.order_by(AuditLog.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
         return jsonify({'logs': [l.to_dict() for l in p.items], 'page': p.page, 'pages': p.pages, 'per_page': p.per_page, 'total': p.total}), 200
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to list audit logs', 'details': str(e)}), 500
 
@@ -2662,84 +2507,48 @@ def admin_export_entity(entity: str, fmt: str):
 
         filters = request.get_json(silent=True) or {}
         range_param = filters.get('range')
-        start, end = _parse_range(range_param or 'last_30_days')
-
-        headers = []
-        rows = []
-
-        # Build dataset by entity
-        et = entity.lower()
-        if et == 'users':
-            users = User.query.filter(and_(User.municipality_id == municipality_id, User.role == 'resident')).all()
-            headers = ['ID','Name','Email','Phone','Verified','Joined']
-            for u in users:
-                name = f"{getattr(u,'first_name','') or ''} {getattr(u,'last_name','') or ''}".strip() or getattr(u,'username','')
-                rows.append([u.id, name, getattr(u,'email',''), getattr(u,'phone_number',''), 'Yes' if getattr(u,'admin_verified',False) else 'No', (u.created_at.isoformat()[:10] if getattr(u,'created_at',None) else '')])
-        elif et == 'benefits':
-            items = BenefitProgram.query.filter(BenefitProgram.municipality_id == municipality_id).all()
-            headers = ['ID','Name','Active','Created']
-            rows = [[b.id, getattr(b,'name',''), 'Yes' if getattr(b,'is_active',False) else 'No', (b.created_at.isoformat()[:10] if getattr(b,'created_at',None) else '')] for b in items]
-        elif et == 'requests':
-            items = DocumentRequest.query.filter(and_(DocumentRequest.municipality_id == municipality_id, DocumentRequest.created_at >= start, DocumentRequest.created_at <= end)).all()
-            headers = ['ID','Req No','User','Type','Status','Created']
-            for r in items:
-                user = User.query.get(r.user_id)
-                name = f"{getattr(user,'first_name','') or ''} {getattr(user,'last_name','') or ''}".strip() or getattr(user,'username','')
-                rows.append([r.id, r.request_number, name, getattr(r.document_type,'name',None) if hasattr(r,'document_type') else '', r.status, (r.created_at.isoformat()[:19].replace('T',' ') if r.created_at else '')])
-        elif et == 'issues':
-            items = Issue.query.filter(Issue.municipality_id == municipality_id).all()
-            headers = ['ID','Title','Status','Created']
-            rows = [[i.id, i.title, i.status, (i.created_at.isoformat()[:19].replace('T',' ') if i.created_at else '')] for i in items]
-        elif et == 'items':
-            items = MarketplaceItem.query.filter(MarketplaceItem.municipality_id == municipality_id).all()
-            headers = ['ID','Title','Status','Created']
-            rows = [[i.id, i.title, i.status, (i.created_at.isoformat()[:19].replace('T',' ') if i.created_at else '')] for i in items]
-        elif et == 'announcements':
-            items = Announcement.query.filter(Announcement.municipality_id == municipality_id).all()
-            headers = ['ID','Title','Active','Created']
-            rows = [[a.id, a.title, 'Yes' if getattr(a,'is_active',False) else 'No', (a.created_at.isoformat()[:10] if getattr(a,'created_at',None) else '')] for a in items]
-        elif et == 'audit':
-            items = AuditLog.query.filter(AuditLog.municipality_id == municipality_id).order_by(AuditLog.created_at.desc()).limit(1000).all()
-            headers = ['Time','Actor','Role','Entity','Entity ID','Action']
-            rows = [[(l.created_at.isoformat()[:19].replace('T',' ') if l.created_at else ''), l.user_id, l.actor_role, l.entity_type, l.entity_id, l.action] for l in items]
+        # range 'all' lifts the date window (e.g. full request history)
+        if range_param == 'all':
+            start, end = None, None
         else:
-            return jsonify({'error': 'Unknown export entity'}), 400
+            start, end = _parse_range(range_param or 'last_30_days')
+        # Streaming mode writes rows straight from a server-side cursor into the
+        # output file; the default keeps the buffered generators.
+        stream_flag = filters.get('stream', request.args.get('stream'))
+        streaming = str(stream_flag).lower() in ('1', 'true', 'yes')
 
-        from pathlib import Path
-        base = Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
-        out_dir = base / 'exports' / str(muni_slug)
-        out_dir.mkdir(parents=True, exist_ok=True)
-        filename_base = f"{et}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
-
-        if fmt.lower() == 'pdf':
-            from apps.api.utils.pdf_table_report import generate_table_pdf
-            out_path = out_dir / f"{filename_base}.pdf"
-            generate_table_pdf(out_path=out_path, title=f"{municipality_name} – {et.title()} Report", municipality_name=municipality_name, headers=headers, rows=rows)
-            rel = str(out_path.relative_to(base)).replace('\\','/')
-            return jsonify({'url': rel, 'summary': {'rows': len(rows)}}), 200
-        if fmt.lower() in ('xlsx','excel'):
-            from apps.api.utils.excel_generator import generate_workbook, save_workbook
-            out_path = out_dir / f"{filename_base}.xlsx"
-            gov_lines = [
-                'Republic of the Philippines',
-                'Province of Zambales',
-                f'Municipality of {municipality_name}',
-                'Office of the Municipal Mayor',
-            ]
-            wb = generate_workbook({
-                et.title(): {
-                    'headers': headers,
-                    'rows': rows,
-                    'municipality_name': municipality_name,
-                    'title': f'{municipality_name} – {et.title()} Report',
-                    'gov_lines': gov_lines,
-                }
-            })
-            save_workbook(wb, out_path)
-            rel = str(out_path.relative_to(base)).replace('\\','/')
-            return jsonify({'url': rel, 'summary': {'rows': len(rows)}}), 200
+        if _wants_async(filters):
+            try:
+                validate_export(entity, fmt)  # fail now, not in the worker
+            except ExportError as e:
+                return jsonify({'error': str(e)}), 400
+            job = enqueue_job(
+                'export',
+                {
+                    'entity': entity,
+                    'fmt': fmt,
+                    'municipality_id': municipality_id,
+                    'start': start.isoformat() if start else None,
+                    'end': end.isoformat() if end else None,
+                    'stream': streaming,
+                },
+                created_by=get_jwt_identity(),
+                municipality_id=municipality_id,
+            )
+            return jsonify({'job_id': job.id, 'status': job.status, 'poll_url': f"/api/admin/jobs/{job.id}"}), 202
 
-        return jsonify({'error': 'Unsupported format'}), 400
+        try:
+            result = write_export(
+                entity, fmt,
+                municipality_id=municipality_id,
+                municipality_name=municipality_name,
+                municipality_slug=muni_slug,
+                start=start, end=end,
+                streaming=streaming,
+            )
+        except ExportError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result), 200
     except Exception as e:
         try:
             current_app.logger.exception("Failed to export %s.%s", entity, fmt)
@@ -2822,10 +2631,10 @@ def admin_cleanup():
                 old_values=None,
                 new_values={'deleted': deleted, 'before': before},
                 notes='Archive saved' if archived_url else None,
+                sync=False,
             )
-            db.session.commit()
         except Exception:
-            db.session.rollback()
+            pass
 
         return jsonify({'deleted_count': deleted, 'archived_url': archived_url}), 200
     except Exception as e:
@@ -2838,40 +2647,32 @@ def admin_cleanup():
 def admin_get_transaction(tx_id: int):
     try:
         municipality_id = get_admin_municipality_id()
-        tx = MarketplaceTransaction.query.get(tx_id)
+        tx = (
+            MarketplaceTransaction.query
+            .options(*transaction_party_options())
+            .filter(MarketplaceTransaction.id == tx_id)
+            .first()
+        )
         if not tx:
             return jsonify({'error': 'Transaction not found'}), 404
         if municipality_id:
-            item = MarketplaceItem.query.get(tx.item_id)
+            item = tx.item
             if not item or int(item.municipality_id) != int(municipality_id):
                 return jsonify({'error': 'Transaction not in your municipality'}), 403
         # Build enriched transaction payload with buyer/seller names
         txd = tx.to_dict()
-        try:
-            buyer = User.query.get(tx.buyer_id)
-            seller = User.query.get(tx.seller_id)
-            txd['buyer'] = {
-                'id': tx.buyer_id,
-                'first_name': getattr(buyer, 'first_name', None),
-                'last_name': getattr(buyer, 'last_name', None),
-                'username': getattr(buyer, 'username', None),
-                'email': getattr(buyer, 'email', None),
-                'profile_picture': getattr(buyer, 'profile_picture', None),
-            }
-            txd['seller'] = {
-                'id': tx.seller_id,
-                'first_name': getattr(seller, 'first_name', None),
-                'last_name': getattr(seller, 'last_name', None),
-                'username': getattr(seller, 'username', None),
-                'email': getattr(seller, 'email', None),
-                'profile_picture': getattr(seller, 'profile_picture', None),
+        buyer, seller = tx.buyer, tx.seller
+        for key, uid, u in (('buyer', tx.buyer_id, buyer), ('seller', tx.seller_id, seller)):
+            txd[key] = {
+                'id': uid,
+                'first_name': getattr(u, 'first_name', None),
+                'last_name': getattr(u, 'last_name', None),
+                'username': getattr(u, 'username', None),
+                'email': getattr(u, 'email', None),
+                'profile_picture': getattr(u, 'profile_picture', None),
             }
-            txd['buyer_name'] = (f"{getattr(buyer,'first_name','')} {getattr(buyer,'last_name','')}").strip() or getattr(buyer, 'username', None)
-            txd['seller_name'] = (f"{getattr(seller,'first_name','')} {getattr(seller,'last_name','')}").strip() or getattr(seller, 'username', None)
-            txd['buyer_profile_picture'] = getattr(buyer, 'profile_picture', None)
-            txd['seller_profile_picture'] = getattr(seller, 'profile_picture', None)
-        except Exception:
-            pass
+            txd[f'{key}_name'] = user_display_name(u)
+            txd[f'{key}_profile_picture'] = getattr(u, 'profile_picture', None)
 
         audit = []
         try:
@@ -2943,3 +2744,43 @@ def admin_update_transaction_status(tx_id: int):
         db.session.rollback()
         return jsonify({'error': 'Failed to update transaction status', 'details': str(e)}), 500
 
+
+# Background jobs (status polling)
+@admin_bp.route('/jobs', methods=['GET'])
+@jwt_required()
+def admin_list_jobs():
+    """List recent background jobs for the admin's municipality."""
+    try:
+        municipality_id = require_admin_municipality()
+        if isinstance(municipality_id, tuple):
+            return municipality_id
+        q = Job.query.filter(Job.municipality_id == municipality_id)
+        status = (request.args.get('status') or '').strip()
+        kind = (request.args.get('kind') or '').strip()
+        if status:
+            q = q.filter(Job.status == status)
+        if kind:
+            q = q.filter(Job.kind == kind)
+        limit = min(request.args.get('limit', type=int) or 50, 200)
+        jobs = q.order_by(Job.created_at.desc(), Job.id.desc()).limit(limit).all()
+        return jsonify({'jobs': [j.to_dict() for j in jobs]}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to list jobs', 'details': str(e)}), 500
+
+
+@admin_bp.route('/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def admin_get_job(job_id: int):
+    """Poll a background job; clients retry until status is succeeded or failed."""
+    try:
+        municipality_id = require_admin_municipality()
+        if isinstance(municipality_id, tuple):
+            return municipality_id
+        job = db.session.get(Job, job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.municipality_id and int(job.municipality_id) != int(municipality_id):
+            return jsonify({'error': 'Job not in your municipality'}), 403
+        return jsonify({'job': job.to_dict()}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to get job', 'details': str(e)}), 500
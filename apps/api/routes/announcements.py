@@ -7,9 +7,11 @@ import sqlite3
 try:
     from apps.api import db
     from apps.api.models.announcement import Announcement
+    from apps.api.utils.pagination import keyset_paginate, cursor_meta, wants_cursor, wants_total, CursorError
 except ImportError:
     from __init__ import db
     from models.announcement import Announcement
+    from utils.pagination import keyset_paginate, cursor_meta, wants_cursor, wants_total, CursorError
 
 
 announcements_bp = Blueprint('announcements', __name__, url_prefix='/api/announcements')
@@ -24,6 +26,9 @@ def list_announcements():
       - active: bool (default true)
       - page: int (default 1)
       - per_page: int (default 20)
+      - cursor: opaque keyset cursor (empty for the first page); switches to
+        cursor pagination with ``pagination.next_cursor``
+      - include_total: bool (cursor mode only; default false)
     """
     try:
         municipality_id = request.args.get('municipality_id', type=int)
@@ -43,6 +48,17 @@ def list_announcements():
         if filters:
             query = query.filter(and_(*filters))
 
+        if wants_cursor(request.args):
+            total = query.order_by(None).count() if wants_total(request.args) else None
+            rows, next_cursor = keyset_paginate(
+                query, Announcement.created_at, Announcement.id, request.args.get('cursor'), per_page
+            )
+            return jsonify({
+                'announcements': [a.to_dict() for a in rows],
+                'count': len(rows),
+                'pagination': cursor_meta(next_cursor, per_page, total),
+            }), 200
+
         query = query.order_by(Announcement.created_at.desc())
         paginated = query.paginate(page=page, per_page=per_page, error_out=False)
 
@@ -72,6 +88,8 @@ def list_announcements():
                 'pages': 0,
             }
         }), 200
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get announcements', 'details': str(e)}), 500
 
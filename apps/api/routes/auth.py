@@ -37,9 +37,13 @@ try:
 except ImportError:
     from models.transfer import TransferRequest
 try:
-    from apps.api.models.token_blacklist import TokenBlacklist
+    from apps.api.utils.token_revocation import revoke_token
+    from apps.api.utils.identity import identity_claims
+    from apps.api.utils.geography import municipality_id_for_slug, barangay_municipality_id
 except ImportError:
-    from models.token_blacklist import TokenBlacklist
+    from utils.token_revocation import revoke_token
+    from utils.identity import identity_claims
+    from utils.geography import municipality_id_for_slug, barangay_municipality_id
 try:
     from apps.api.models.password_reset import PasswordResetToken
 except ImportError:
@@ -139,26 +143,18 @@ def register():
         municipality_slug = data.get('municipality_slug')
         barangay_id_raw = data.get('barangay_id')
         
-        # Get municipality ID from slug
-        municipality_id = None
-        if municipality_slug:
-            municipality = Municipality.query.filter_by(slug=municipality_slug).first()
-            if municipality:
-                municipality_id = municipality.id
+        # Get municipality ID from slug (geography registry, no query)
+        municipality_id = municipality_id_for_slug(municipality_slug)
         # Validate optional barangay_id belongs to municipality if both provided
         barangay_id = None
         if barangay_id_raw is not None and str(barangay_id_raw).strip() != '':
-            try:
-                from apps.api.models.municipality import Barangay
-            except ImportError:
-                from models.municipality import Barangay
             try:
                 bid = int(barangay_id_raw)
             except Exception:
                 bid = None
             if bid:
-                b = Barangay.query.get(bid)
-                if b and (not municipality_id or b.municipality_id == municipality_id):
+                b_municipality_id = barangay_municipality_id(bid)
+                if b_municipality_id and (not municipality_id or b_municipality_id == municipality_id):
                     barangay_id = bid
         
         # Check if user already exists
@@ -300,11 +296,13 @@ def login():
         user.last_login = datetime.utcnow()
         db.session.commit()
         
-        # Create access and refresh tokens (subject must be a string) with role claim
+        # Create access and refresh tokens (subject must be a string). The access
+        # token carries role, admin scope and verification level so guards can
+        # skip the user lookup; the refresh token only needs the role.
         access_token = create_access_token(
             identity=str(user.id),
             expires_delta=timedelta(hours=1),
-            additional_claims={"role": user.role}
+            additional_claims=identity_claims(user)
         )
         refresh_token = create_refresh_token(
             identity=str(user.id),
@@ -341,7 +339,7 @@ def logout():
         expires_at = datetime.utcnow() + expires_delta
         
         # Add token to blacklist
-        TokenBlacklist.add_token_to_blacklist(jti, token_type, user_id, expires_at)
+        revoke_token(jti, token_type, user_id, expires_at)
         
         resp = jsonify({'message': 'Logout successful'})
         # Clear JWT cookies (access/refresh) if present
@@ -505,13 +503,15 @@ def refresh():
         except Exception:
             uid = user_id
         user = User.query.get(uid)
-        role = getattr(user, 'role', None) or 'public'
+        # Re-issue identity claims from the current row so role/scope and
+        # verification changes reach the token on every refresh
+        claims = identity_claims(user) if user else {"role": 'public'}
 
         # Create new access token (subject must be a string)
         access_token = create_access_token(
             identity=str(user_id),
             expires_delta=timedelta(hours=1),
-            additional_claims={"role": role}
+            additional_claims=claims
         )
         
         return jsonify({'access_token': access_token}), 200
@@ -793,10 +793,6 @@ def update_profile():
         
         # Location updates
         if 'barangay_id' in data:
-            try:
-                from apps.api.models.municipality import Barangay
-            except ImportError:
-                from models.municipality import Barangay
             bid = data.get('barangay_id')
             try:
                 bid_int = int(bid) if bid is not None else None
@@ -804,8 +800,8 @@ def update_profile():
                 bid_int = None
             if bid_int is not None:
                 # Only allow barangay within user's municipality
-                b = Barangay.query.get(bid_int)
-                if not b or (user.municipality_id and b.municipality_id != user.municipality_id):
+                b_municipality_id = barangay_municipality_id(bid_int)
+                if not b_municipality_id or (user.municipality_id and b_municipality_id != user.municipality_id):
                     return jsonify({'error': 'Invalid barangay for your municipality'}), 400
                 user.barangay_id = bid_int
 
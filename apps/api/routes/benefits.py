@@ -1,12 +1,14 @@
 """Public/resident Benefits routes (programs and applications)."""
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
 from sqlalchemy.orm import joinedload
 import json
 
 try:
     from apps.api import db
+    from apps.api.utils.reference_numbers import allocate_reference_number
+    from apps.api.utils.benefit_counts import record_new_application, record_removed_application
     from apps.api.models.benefit import BenefitProgram, BenefitApplication
     from apps.api.models.user import User
     from apps.api.models.municipality import Municipality
@@ -20,6 +22,8 @@ try:
     )
 except ImportError:
     from __init__ import db
+    from utils.reference_numbers import allocate_reference_number
+    from utils.benefit_counts import record_new_application, record_removed_application
     from models.benefit import BenefitProgram, BenefitApplication
     from models.user import User
     from models.municipality import Municipality
@@ -43,7 +47,8 @@ def list_programs():
         municipality_id = request.args.get('municipality_id', type=int)
         program_type = request.args.get('type')
 
-        query = BenefitProgram.query.filter_by(is_active=True)
+        # Expired programs are completed by the expiry sweeper (utils/benefit_expiry.py)
+        query = BenefitProgram.query.filter(BenefitProgram.open_clause())
         if municipality_id:
             query = query.filter((BenefitProgram.municipality_id == municipality_id) | (BenefitProgram.municipality_id.is_(None)))
         if program_type:
@@ -51,51 +56,6 @@ def list_programs():
 
         programs = query.order_by(BenefitProgram.created_at.desc()).all()
 
-        # Auto-complete expired programs before returning
-        now = datetime.now(timezone.utc)
-        changed = False
-        for p in programs:
-            try:
-                if p.is_active and p.duration_days and p.created_at:
-                    created_at = p.created_at
-                    if created_at.tzinfo is None:
-                        created_at = created_at.replace(tzinfo=timezone.utc)
-                    if created_at + timedelta(days=int(p.duration_days)) <= now:
-                        p.is_active = False
-                        p.is_accepting_applications = False
-                        p.completed_at = now.replace(tzinfo=None)
-                        changed = True
-            except Exception:
-                pass
-        if changed:
-            db.session.commit()
-            # Filter out programs that were just set inactive
-            programs = [p for p in programs if p.is_active]
-        # Compute beneficiaries as count of approved applications per program (public view)
-        try:
-            ids = [p.id for p in programs] or []
-            if ids:
-                rows = (
-                    db.session.query(
-                        BenefitApplication.program_id,
-                        db.func.count(BenefitApplication.id)
-                    )
-                    .filter(
-                        BenefitApplication.program_id.in_(ids),
-                        BenefitApplication.status == 'approved'
-                    )
-                    .group_by(BenefitApplication.program_id)
-                    .all()
-                )
-                counts = {pid: int(cnt) for pid, cnt in rows}
-                for p in programs:
-                    try:
-                        p.current_beneficiaries = counts.get(p.id, 0)
-                    except Exception:
-                        pass
-        except Exception:
-            pass
-
         return jsonify({'programs': [p.to_dict() for p in programs], 'count': len(programs)}), 200
     except Exception as e:
         return jsonify({'error': 'Failed to get programs', 'details': str(e)}), 500
@@ -109,7 +69,7 @@ def get_program(program_id: int):
             return jsonify({'error': 'Program not found'}), 404
 
         data = program.to_dict()
-        if not program.is_active or not program.is_accepting_applications:
+        if not data['is_active'] or not data['is_accepting_applications']:
             data['warning'] = 'This program is no longer accepting applications.'
         return jsonify(data), 200
     except Exception as e:
@@ -145,10 +105,12 @@ def create_application():
             return jsonify({'error': 'Invalid program_id'}), 400
 
         program = BenefitProgram.query.get(program_id)
-        if not program or not program.is_active:
+        if not program or not program.is_active or program.has_expired:
             return jsonify({'error': 'Selected program is no longer available'}), 400
         if not getattr(program, 'is_accepting_applications', True):
             return jsonify({'error': 'Selected program is not currently accepting applications'}), 400
+        if program.max_beneficiaries and (program.current_beneficiaries or 0) >= program.max_beneficiaries:
+            return jsonify({'error': 'Selected program has reached its beneficiary limit'}), 400
 
         # Municipality scoping: allow province-wide (None) or user's municipality
         if program.municipality_id and user.municipality_id != program.municipality_id:
@@ -171,8 +133,7 @@ def create_application():
             return jsonify({'error': 'Missing required attachments', 'details': f'{len(required_docs)} files required; received {len(uploaded_requirement_files)}'}), 400
 
         # Generate application number
-        count = BenefitApplication.query.count() + 1
-        app_number = f"APP-{user.municipality_id}-{user_id}-{count}"
+        app_number = allocate_reference_number('benefit_application', user.municipality_id)
 
         raw_app_data = data.get('application_data')
         if isinstance(raw_app_data, str):
@@ -194,6 +155,7 @@ def create_application():
             status='pending',
         )
         db.session.add(app)
+        record_new_application(program.id, app.status)
         db.session.commit()
 
         if (uploaded_requirement_files or additional_files):
@@ -210,6 +172,7 @@ def create_application():
                     db.session.commit()
             except Exception as file_exc:
                 db.session.rollback()
+                record_removed_application(app.program_id, app.status)
                 db.session.delete(app)
                 db.session.commit()
                 return jsonify({'error': 'Failed to save attachments', 'details': str(file_exc)}), 500
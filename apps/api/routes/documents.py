@@ -4,6 +4,7 @@ from flask_jwt_extended import jwt_required
 
 try:
     from apps.api import db
+    from apps.api.utils.reference_numbers import allocate_reference_number
     from apps.api.models.document import DocumentType, DocumentRequest
     from apps.api.models.user import User
     from apps.api.models.municipality import Municipality
@@ -16,6 +17,7 @@ try:
     )
 except ImportError:
     from __init__ import db
+    from utils.reference_numbers import allocate_reference_number
     from models.document import DocumentType, DocumentRequest
     from models.user import User
     from models.municipality import Municipality
@@ -159,7 +161,7 @@ def create_document_request():
             resident_input = None
 
         req = DocumentRequest(
-            request_number=f"REQ-{user_id}-{User.query.count()}-{DocumentRequest.query.count()+1}",
+            request_number=allocate_reference_number('document_request', municipality_id),
             user_id=user_id,
             document_type_id=document_type_id,
             municipality_id=municipality_id,
@@ -5,7 +5,9 @@ from sqlalchemy import or_
 
 try:
     from apps.api import db
+    from apps.api.utils.reference_numbers import allocate_reference_number
     from apps.api.models.issue import Issue, IssueCategory
+    from apps.api.utils.pagination import keyset_paginate, cursor_meta, wants_cursor, wants_total, CursorError
     from apps.api.models.user import User
     from apps.api.models.municipality import Municipality
     from apps.api.utils import (
@@ -17,7 +19,9 @@ try:
     )
 except ImportError:
     from __init__ import db
+    from utils.reference_numbers import allocate_reference_number
     from models.issue import Issue, IssueCategory
+    from utils.pagination import keyset_paginate, cursor_meta, wants_cursor, wants_total, CursorError
     from models.user import User
     from models.municipality import Municipality
     from utils import (
@@ -66,6 +70,14 @@ def list_issues():
                 if cat:
                     query = query.filter(Issue.category_id == cat.id)
 
+        if wants_cursor(request.args):
+            total = query.count() if wants_total(request.args) else None
+            rows, next_cursor = keyset_paginate(query, Issue.created_at, Issue.id, request.args.get('cursor'), per_page)
+            return jsonify({
+                'issues': [i.to_dict() for i in rows],
+                'pagination': cursor_meta(next_cursor, per_page, total),
+            }), 200
+
         # Manual pagination to avoid paginate() edge cases
         total = query.count()
         items = (
@@ -84,6 +96,8 @@ def list_issues():
                 'pages': pages,
             }
         }), 200
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get issues', 'details': str(e)}), 500
 
@@ -133,9 +147,8 @@ def create_issue():
         if not category:
             return jsonify({'error': 'Invalid category'}), 400
 
-        # Generate issue number (simple and unique enough)
-        count = Issue.query.count() + 1
-        issue_number = f"ISS-{municipality_id}-{user_id}-{count}"
+        # Generate issue number from the per-municipality counter
+        issue_number = allocate_reference_number('issue', municipality_id)
 
         # Require a specific location (address) for actionable triage
         specific_location = (data.get('specific_location') or '').strip()
@@ -6,7 +6,7 @@ import sqlite3
 from sqlalchemy.exc import OperationalError as SAOperationalError, ProgrammingError as SAProgrammingError
 from apps.api import db
 from apps.api.models.user import User
-from apps.api.models.marketplace import Item, Transaction
+from apps.api.models.marketplace import Item, Transaction, ItemViewDaily
 from apps.api.models.municipality import Municipality
 from apps.api.utils import (
     verified_resident_required,
@@ -24,19 +24,28 @@ from apps.api.utils import (
     TransitionError,
 )
 from apps.api.utils.file_handler import save_marketplace_image
+from apps.api.utils.marketplace_search import apply_item_search
+from apps.api.utils.view_counter import get_view_counter
+from apps.api.utils.pagination import keyset_paginate, cursor_meta, wants_cursor, wants_total, CursorError
 
 marketplace_bp = Blueprint('marketplace', __name__, url_prefix='/api/marketplace')
 
 
 @marketplace_bp.route('/items', methods=['GET'])
 def list_items():
-    """Get list of marketplace items with optional filters."""
+    """Get list of marketplace items with optional filters.
+
+    ``q`` adds ranked keyword search over title/description (prefix matching,
+    all words required). Ranked order applies to page/per_page results;
+    cursor mode keeps newest-first order so cursors stay stable.
+    """
     try:
         # Get query parameters
         municipality_id = request.args.get('municipality_id', type=int)
         category = request.args.get('category')
         transaction_type = request.args.get('transaction_type')
         status = request.args.get('status', 'available')
+        search = (request.args.get('q') or '').strip()
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
@@ -54,22 +63,38 @@ def list_items():
         
         if status:
             query = query.filter_by(status=status)
+
+        rank_order = None
+        if search:
+            query, rank_order = apply_item_search(query, search)
         
-        # Order by most recent
-        query = query.order_by(Item.created_at.desc())
+        def _serialize(rows):
+            # Include municipality_name for each item
+            items_data = []
+            for item in rows:
+                d = item.to_dict(include_user=True)
+                try:
+                    d['municipality_name'] = item.municipality.name if item.municipality else None
+                except Exception:
+                    d['municipality_name'] = None
+                items_data.append(d)
+            return items_data
+
+        # Cursor mode: constant-time deep scrolling, totals only on request
+        if wants_cursor(request.args):
+            total = query.order_by(None).count() if wants_total(request.args) else None
+            rows, next_cursor = keyset_paginate(query, Item.created_at, Item.id, request.args.get('cursor'), per_page)
+            return jsonify({'items': _serialize(rows), **cursor_meta(next_cursor, per_page, total)}), 200
+
+        # Order by relevance when searching, then most recent
+        if rank_order is not None:
+            query = query.order_by(rank_order, Item.created_at.desc(), Item.id.desc())
+        else:
+            query = query.order_by(Item.created_at.desc())
         
         # Paginate
         paginated = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        # Include municipality_name for each item
-        items_data = []
-        for item in paginated.items:
-            d = item.to_dict(include_user=True)
-            try:
-                d['municipality_name'] = item.municipality.name if item.municipality else None
-            except Exception:
-                d['municipality_name'] = None
-            items_data.append(d)
+        items_data = _serialize(paginated.items)
 
         return jsonify({
             'items': items_data,
@@ -88,6 +113,8 @@ def list_items():
             'per_page': per_page if 'per_page' in locals() else (request.args.get('per_page', 20, type=int) or 20),
             'pages': 0
         }), 200
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get items', 'details': str(e)}), 500
 
@@ -104,16 +131,48 @@ def get_item(item_id):
         if not item.is_active:
             return jsonify({'error': 'Item is no longer available'}), 404
         
-        # Increment view count
-        item.view_count += 1
-        db.session.commit()
+        # Count the view write-behind (utils/view_counter.py); include this
+        # worker's not-yet-flushed views so the number never goes backwards
+        counter = get_view_counter()
+        counter.record(item.id)
+        data = item.to_dict(include_user=True)
+        data['view_count'] = (item.view_count or 0) + counter.pending_for(item.id)
         
-        return jsonify(item.to_dict(include_user=True)), 200
+        return jsonify(data), 200
     
     except Exception as e:
         return jsonify({'error': 'Failed to get item', 'details': str(e)}), 500
 
 
+@marketplace_bp.route('/items/<int:item_id>/views', methods=['GET'])
+@jwt_required()
+def get_item_views(item_id):
+    """Daily view counts for one of the caller's items (last ``days`` days, default 30)."""
+    try:
+        user_id = jwt_identity_as_int()
+        item = Item.query.get(item_id)
+        if not item:
+            return jsonify({'error': 'Item not found'}), 404
+        if item.user_id != user_id:
+            return jsonify({'error': 'Forbidden'}), 403
+
+        days = max(1, min(request.args.get('days', 30, type=int) or 30, 366))
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+        rows = (
+            ItemViewDaily.query
+            .filter(ItemViewDaily.item_id == item_id, ItemViewDaily.day >= since)
+            .order_by(ItemViewDaily.day.asc())
+            .all()
+        )
+        return jsonify({
+            'item_id': item_id,
+            'view_count': (item.view_count or 0) + get_view_counter().pending_for(item_id),
+            'daily': [r.to_dict() for r in rows],
+        }), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to get item views', 'details': str(e)}), 500
+
+
 @marketplace_bp.route('/items', methods=['POST'])
 @jwt_required()
 @fully_verified_required
@@ -742,10 +801,10 @@ def tx_handover_seller(transaction_id: int):
                 notes=(request.get_json(silent=True) or {}).get('notes'),
                 ip_address=request.remote_addr,
                 user_agent=request.headers.get('User-Agent'),
+                sync=False,
             )
-            db.session.commit()
         except Exception:
-            db.session.rollback()
+            pass
         return jsonify({'message': 'Handover marked by seller', 'transaction': tx.to_dict()}), 200
     except TransitionError as e:
         return jsonify({'error': str(e)}), 400
@@ -786,10 +845,10 @@ def tx_handover_buyer(transaction_id: int):
                 notes=(request.get_json(silent=True) or {}).get('notes'),
                 ip_address=request.remote_addr,
                 user_agent=request.headers.get('User-Agent'),
+                sync=False,
             )
-            db.session.commit()
         except Exception:
-            db.session.rollback()
+            pass
         return jsonify({'message': 'Buyer confirmed receipt', 'transaction': tx.to_dict()}), 200
     except TransitionError as e:
         return jsonify({'error': str(e)}), 400
@@ -831,10 +890,10 @@ def tx_return_buyer(transaction_id: int):
                 notes=(request.get_json(silent=True) or {}).get('notes'),
                 ip_address=request.remote_addr,
                 user_agent=request.headers.get('User-Agent'),
+                sync=False,
             )
-            db.session.commit()
         except Exception:
-            db.session.rollback()
+            pass
         return jsonify({'message': 'Return marked by buyer', 'transaction': tx.to_dict()}), 200
     except TransitionError as e:
         return jsonify({'error': str(e)}), 400
@@ -884,10 +943,10 @@ def tx_return_seller(transaction_id: int):
                 notes=(request.get_json(silent=True) or {}).get('notes'),
                 ip_address=request.remote_addr,
                 user_agent=request.headers.get('User-Agent'),
+                sync=False,
             )
-            db.session.commit()
         except Exception:
-            db.session.rollback()
+            pass
         return jsonify({'message': 'Return confirmed by seller', 'transaction': tx.to_dict()}), 200
     except TransitionError as e:
         return jsonify({'error': str(e)}), 400
@@ -937,10 +996,10 @@ def tx_complete(transaction_id: int):
                 notes=(request.get_json(silent=True) or {}).get('notes'),
                 ip_address=request.remote_addr,
                 user_agent=request.headers.get('User-Agent'),
+                sync=False,
             )
-            db.session.commit()
         except Exception:
-            db.session.rollback()
+            pass
         return jsonify({'message': 'Transaction completed', 'transaction': tx.to_dict()}), 200
     except TransitionError as e:
         return jsonify({'error': str(e)}), 400
@@ -990,10 +1049,10 @@ def tx_dispute(transaction_id: int):
                 metadata={
                     'reported_user_id': (reported_user_id if reported_user_id in (tx.buyer_id, tx.seller_id) else (tx.seller_id if int(user_id) == int(tx.buyer_id) else tx.buyer_id))
                 },
+                sync=False,
             )
-            db.session.commit()
         except Exception:
-            db.session.rollback()
+            pass
         return jsonify({'message': 'Transaction disputed', 'transaction': tx.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
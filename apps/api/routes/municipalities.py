@@ -1,21 +1,33 @@
-"""Municipality and Barangay routes."""
+"""Municipality and Barangay routes.
+
+Served from the per-worker geography registry (utils/geography.py) as
+precomputed JSON with ETags; response shapes match the model to_dicts.
+"""
 from flask import Blueprint, jsonify, request
-from apps.api.models.municipality import Municipality, Barangay
-from apps.api import db
+from apps.api.utils.geography import geography_response, get_geography
 
 municipalities_bp = Blueprint('municipalities', __name__, url_prefix='/api/municipalities')
 
 
+def _include_barangays():
+    return request.args.get('include_barangays', 'false').lower() == 'true'
+
+
+def _municipality_payload(snap, municipality_id, include_barangays):
+    data = dict(snap.municipalities[municipality_id])
+    if include_barangays:
+        data['barangays'] = [snap.barangays[bid] for bid in snap.barangays_by_municipality.get(municipality_id, [])]
+    return data
+
+
 @municipalities_bp.route('', methods=['GET'])
 def list_municipalities():
     """Get list of all municipalities in Zambales."""
     try:
-        municipalities = Municipality.query.filter_by(is_active=True).all()
-        
-        return jsonify({
-            'count': len(municipalities),
-            'municipalities': [m.to_dict() for m in municipalities]
-        }), 200
+        return geography_response(('municipalities',), lambda snap: {
+            'count': len(snap.active_municipality_ids),
+            'municipalities': [snap.municipalities[mid] for mid in snap.active_municipality_ids],
+        })
     
     except Exception as e:
         return jsonify({'error': 'Failed to get municipalities', 'details': str(e)}), 500
@@ -25,14 +37,16 @@ def list_municipalities():
 def get_municipality(municipality_id):
     """Get details of a specific municipality."""
     try:
-        municipality = Municipality.query.get(municipality_id)
-        
-        if not municipality:
+        snap = get_geography().snapshot()
+        if municipality_id not in snap.municipalities:
             return jsonify({'error': 'Municipality not found'}), 404
         
-        include_barangays = request.args.get('include_barangays', 'false').lower() == 'true'
-        
-        return jsonify(municipality.to_dict(include_barangays=include_barangays)), 200
+        include_barangays = _include_barangays()
+        return geography_response(
+            ('municipality', municipality_id, include_barangays),
+            lambda snap: _municipality_payload(snap, municipality_id, include_barangays),
+            snap,
+        )
     
     except Exception as e:
         return jsonify({'error': 'Failed to get municipality', 'details': str(e)}), 500
@@ -42,14 +56,18 @@ def get_municipality(municipality_id):
 def get_municipality_by_slug(slug):
     """Get municipality by slug."""
     try:
-        municipality = Municipality.query.filter_by(slug=slug).first()
+        snap = get_geography().snapshot()
+        municipality_id = snap.slugs.get(slug)
         
-        if not municipality:
+        if municipality_id is None:
             return jsonify({'error': 'Municipality not found'}), 404
         
-        include_barangays = request.args.get('include_barangays', 'false').lower() == 'true'
-        
-        return jsonify(municipality.to_dict(include_barangays=include_barangays)), 200
+        include_barangays = _include_barangays()
+        return geography_response(
+            ('municipality', municipality_id, include_barangays),
+            lambda snap: _municipality_payload(snap, municipality_id, include_barangays),
+            snap,
+        )
     
     except Exception as e:
         return jsonify({'error': 'Failed to get municipality', 'details': str(e)}), 500
@@ -59,21 +77,22 @@ def get_municipality_by_slug(slug):
 def list_barangays(municipality_id):
     """Get list of barangays in a municipality."""
     try:
-        municipality = Municipality.query.get(municipality_id)
-        
-        if not municipality:
+        snap = get_geography().snapshot()
+        if municipality_id not in snap.municipalities:
             return jsonify({'error': 'Municipality not found'}), 404
         
-        barangays = Barangay.query.filter_by(
-            municipality_id=municipality_id,
-            is_active=True
-        ).all()
+        def build(snap):
+            barangays = [
+                snap.barangays[bid] for bid in snap.barangays_by_municipality.get(municipality_id, [])
+                if snap.barangays[bid]['is_active']
+            ]
+            return {
+                'municipality': snap.municipalities[municipality_id]['name'],
+                'count': len(barangays),
+                'barangays': barangays,
+            }
         
-        return jsonify({
-            'municipality': municipality.name,
-            'count': len(barangays),
-            'barangays': [b.to_dict() for b in barangays]
-        }), 200
+        return geography_response(('barangays', municipality_id), build, snap)
     
     except Exception as e:
         return jsonify({'error': 'Failed to get barangays', 'details': str(e)}), 500
@@ -83,15 +102,16 @@ def list_barangays(municipality_id):
 def get_barangay(barangay_id):
     """Get details of a specific barangay."""
     try:
-        barangay = Barangay.query.get(barangay_id)
-        
-        if not barangay:
+        snap = get_geography().snapshot()
+        if barangay_id not in snap.barangays:
             return jsonify({'error': 'Barangay not found'}), 404
         
-        data = barangay.to_dict()
-        data['municipality'] = barangay.municipality.to_dict()
+        def build(snap):
+            data = dict(snap.barangays[barangay_id])
+            data['municipality'] = snap.municipalities[data['municipality_id']]
+            return data
         
-        return jsonify(data), 200
+        return geography_response(('barangay', barangay_id), build, snap)
     
     except Exception as e:
         return jsonify({'error': 'Failed to get barangay', 'details': str(e)}), 500
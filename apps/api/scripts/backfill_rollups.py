@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Rebuild the daily chart rollups from the raw tables.
+
+Without a range the whole history is rebuilt (and each municipality is
+marked as seeded, so its first chart read skips the lazy backfill).
+
+Usage:
+  python apps/api/scripts/backfill_rollups.py [--since 2025-01-01] [--until 2025-06-30]
+                                              [--municipality-id 3] [--dry-run]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import json
+from datetime import date
+
+from apps.api.app import create_app
+from apps.api import db
+from apps.api.utils.daily_rollups import backfill_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill daily chart rollups')
+    parser.add_argument('--since', type=date.fromisoformat, help='First day to rebuild (YYYY-MM-DD)')
+    parser.add_argument('--until', type=date.fromisoformat, help='Last day to rebuild (YYYY-MM-DD)')
+    parser.add_argument('--municipality-id', type=int, help='Only this municipality (default: all)')
+    parser.add_argument('--dry-run', action='store_true', help='Compute the rows without saving them')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        result = backfill_rollups(args.since, args.until, args.municipality_id)
+        if args.dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Complete benefit programs whose duration (expires_at) has passed.
+
+The worker runs this every BENEFIT_EXPIRY_INTERVAL seconds; use the script
+from cron on deployments without a worker process.
+
+Usage:
+  python apps/api/scripts/expire_benefit_programs.py [--dry-run]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import json
+
+from apps.api.app import create_app
+from apps.api import db
+from apps.api.utils.benefit_expiry import expire_benefit_programs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Complete expired benefit programs')
+    parser.add_argument('--dry-run', action='store_true', help='Report how many would expire without saving')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        result = expire_benefit_programs()
+        if args.dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
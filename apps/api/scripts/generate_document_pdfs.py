@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Generate PDFs for many digital document requests in one run.
+
+Renders in a process pool and commits all updates together; prints the
+per-request result map as JSON.
+
+Usage:
+  python apps/api/scripts/generate_document_pdfs.py --municipality-id 3 --status processing
+  python apps/api/scripts/generate_document_pdfs.py --municipality-id 3 --ids 12,13,14 [--admin-id 1] [--processes 4]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import json
+from datetime import datetime
+
+from apps.api.app import create_app
+from apps.api import db
+from apps.api.models.user import User
+from apps.api.utils.bulk_documents import select_bulk_requests, generate_bulk_pdfs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk-generate document request PDFs')
+    parser.add_argument('--municipality-id', type=int, required=True)
+    parser.add_argument('--ids', default='', help='Comma-separated request ids (overrides the filters)')
+    parser.add_argument('--status', help='Only requests with this status (e.g. processing)')
+    parser.add_argument('--type-id', type=int, help='Only this document type id')
+    parser.add_argument('--since', help='Created on/after (ISO date)')
+    parser.add_argument('--until', help='Created on/before (ISO date)')
+    parser.add_argument('--admin-id', type=int, help='Admin shown on the BY line and in the audit log')
+    parser.add_argument('--processes', type=int, help='Renderer processes (default: BULK_PDF_PROCESSES or CPU count)')
+    parser.add_argument('--limit', type=int, help='Maximum number of requests when filtering')
+    args = parser.parse_args()
+
+    ids = [int(i) for i in args.ids.split(',') if i.strip()] or None
+    if ids is None and not (args.status or args.type_id or args.since or args.until):
+        parser.error('give --ids or at least one filter (--status, --type-id, --since, --until)')
+
+    app = create_app()
+    if args.processes:
+        app.config['BULK_PDF_PROCESSES'] = args.processes
+    with app.app_context():
+        reqs = select_bulk_requests(
+            args.municipality_id,
+            ids=ids,
+            status=args.status,
+            document_type_id=args.type_id,
+            start=datetime.fromisoformat(args.since) if args.since else None,
+            end=datetime.fromisoformat(args.until) if args.until else None,
+            limit=args.limit,
+        )
+        admin_user = db.session.get(User, args.admin_id) if args.admin_id else None
+        outcome = generate_bulk_pdfs(
+            reqs,
+            municipality_id=args.municipality_id,
+            admin_user=admin_user,
+            actor_id=args.admin_id,
+            requested_ids=ids,
+        )
+    print(json.dumps(outcome, indent=2, default=str))
+    return 0 if outcome['summary']['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
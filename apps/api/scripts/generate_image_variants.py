@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Backfill WebP size variants for images uploaded before the image pipeline.
+
+Walks the marketplace, announcement and profile upload folders and processes
+every image that is missing a variant (or all of them with --force).
+
+Usage:
+  python apps/api/scripts/generate_image_variants.py [--folder marketplace] [--force] [--dry-run]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+
+from apps.api.app import create_app
+from apps.api.utils.image_variants import VARIANT_SIZES, process_image, variant_source
+
+FOLDERS = ('marketplace', 'announcements', 'profiles')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def _originals(root):
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if variant_source(name) is None and name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(dirpath, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate WebP variants for existing uploads')
+    parser.add_argument('--folder', choices=FOLDERS, action='append', help='Limit to these upload folders')
+    parser.add_argument('--force', action='store_true', help='Reprocess images that already have variants')
+    parser.add_argument('--dry-run', action='store_true', help='Only list what would be processed')
+    args = parser.parse_args()
+
+    app = create_app()
+    upload_root = str(app.config.get('UPLOAD_FOLDER', 'uploads'))
+    processed = failed = 0
+    for folder in args.folder or FOLDERS:
+        for path in _originals(os.path.join(upload_root, folder)):
+            if not args.force and all(os.path.exists(f"{path}.{b}.webp") for b in VARIANT_SIZES):
+                continue
+            if args.dry_run:
+                print(path)
+                processed += 1
+                continue
+            try:
+                process_image(path)
+                processed += 1
+            except Exception as exc:
+                failed += 1
+                print(f"FAILED {path}: {exc}", file=sys.stderr)
+
+    print(f"{'Would process' if args.dry_run else 'Processed'} {processed} image(s), {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Verify the stored benefit program counts (per-status application counts and
+current_beneficiaries) against benefit_applications and repair any drift.
+
+Usage:
+  python apps/api/scripts/reconcile_benefit_counts.py [--program-id 3] [--dry-run]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import json
+
+from apps.api.app import create_app
+from apps.api import db
+from apps.api.utils.benefit_counts import reconcile_benefit_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconcile benefit program counts')
+    parser.add_argument('--program-id', type=int, help='Only this program (default: all)')
+    parser.add_argument('--dry-run', action='store_true', help='Report drift without saving the repairs (exit 1 if any)')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        result = reconcile_benefit_counts(args.program_id)
+        if args.dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    print(json.dumps(result))
+    # Non-zero when drift was found, so cron/CI can alert on it
+    return 1 if args.dry_run and result['repaired'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
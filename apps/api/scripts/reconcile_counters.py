@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Recompute the per-municipality dashboard counters and repair drift.
+
+Run after bulk edits made outside the ORM, or to seed the table at once
+instead of on each municipality's first stats read.
+
+Usage:
+  python apps/api/scripts/reconcile_counters.py [--municipality-id 3] [--dry-run]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import json
+
+from apps.api.app import create_app
+from apps.api import db
+from apps.api.utils.municipality_counters import reconcile_counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconcile municipality dashboard counters')
+    parser.add_argument('--municipality-id', type=int, help='Only this municipality (default: all)')
+    parser.add_argument('--dry-run', action='store_true', help='Report drift without saving the repairs')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        result = reconcile_counters(args.municipality_id)
+        if args.dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
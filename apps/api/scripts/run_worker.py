@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Run the background job worker (exports, document PDFs, emails).
+
+Polls the jobs table; start as many of these as needed, on any host that can
+reach the database. Also runs the email outbox dispatcher unless --no-outbox
+is given, and the periodic maintenance tasks (e.g. token blacklist purge)
+unless --no-periodic is given.
+
+Usage:
+  python apps/api/scripts/run_worker.py [--concurrency 2] [--poll-interval 2] [--burst] [--kinds export,email] [--no-outbox] [--no-periodic]
+"""
+import os
+import sys
+
+# Ensure project root is importable
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '../../..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+
+from apps.api.app import create_app
+from apps.api.utils import job_handlers  # noqa: F401  (registers job kinds)
+from apps.api.utils.jobs import run_worker, registered_kinds
+from apps.api.utils.email_sender import OutboxDispatcher, drain_outbox
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the MunLink background job worker')
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('JOBS_WORKER_CONCURRENCY', 2)),
+                        help='Number of jobs processed in parallel by this process')
+    parser.add_argument('--poll-interval', type=float, default=float(os.getenv('JOBS_POLL_INTERVAL', 2.0)),
+                        help='Seconds to wait when the queue is empty')
+    parser.add_argument('--burst', action='store_true', help='Exit once no jobs are due')
+    parser.add_argument('--kinds', default='', help='Comma-separated job kinds to handle (default: all)')
+    parser.add_argument('--no-outbox', action='store_true', help='Do not dispatch the email outbox from this process')
+    parser.add_argument('--no-periodic', action='store_true', help='Do not run periodic maintenance tasks')
+    args = parser.parse_args()
+
+    kinds = [k.strip() for k in args.kinds.split(',') if k.strip()] or None
+    app = create_app()
+    app.logger.info("Job worker starting: concurrency=%s kinds=%s", args.concurrency, kinds or registered_kinds())
+    if not args.no_outbox:
+        if args.burst:
+            with app.app_context():
+                drain_outbox()
+        else:
+            OutboxDispatcher.for_app(app)
+    run_worker(app, concurrency=args.concurrency, poll_interval=args.poll_interval, burst=args.burst, kinds=kinds,
+               periodic=not args.no_periodic)
+
+
+if __name__ == '__main__':
+    main()
@@ -21,9 +21,9 @@ def main() -> int:
     app = create_app()
     with app.app_context():
         try:
-            from apps.api.utils.email_sender import send_generic_email
+            from apps.api.utils.email_sender import send_email_now
         except Exception:
-            from utils.email_sender import send_generic_email
+            from utils.email_sender import send_email_now
 
         subj = f"{app.config.get('APP_NAME', 'MunLink Zambales')} SMTP Test"
         body = (
@@ -33,7 +33,7 @@ def main() -> int:
         )
 
         try:
-            send_generic_email(to_email, subj, body)
+            send_email_now(to_email, subj, body)
             print("OK: Test email sent. Check the recipient inbox/spam.")
             return 0
         except Exception as e:
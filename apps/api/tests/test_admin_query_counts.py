@@ -0,0 +1,147 @@
+from contextlib import contextmanager
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.user import User
+from apps.api.models.municipality import Municipality
+from apps.api.models.marketplace import Item, Transaction
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+@contextmanager
+def count_queries(app):
+    """Count SQL statements issued against the app's engine."""
+    statements = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', _before)
+
+
+def _seed_transactions(app, n: int):
+    with app.app_context():
+        muni = Municipality(name='Iba', slug='iba', psgc_code='012345678')
+        db.session.add(muni)
+        db.session.commit()
+        admin = User(
+            username='admin1', email='admin1@example.com', password_hash='x', first_name='Admin', last_name='User',
+            role='municipal_admin', admin_municipality_id=muni.id, municipality_id=muni.id,
+        )
+        db.session.add(admin)
+        db.session.flush()
+        for i in range(n):
+            seller = User(username=f'seller{i}', email=f'seller{i}@example.com', password_hash='x',
+                          first_name='Seller', last_name=str(i), municipality_id=muni.id)
+            buyer = User(username=f'buyer{i}', email=f'buyer{i}@example.com', password_hash='x',
+                         first_name='Buyer', last_name=str(i), municipality_id=muni.id)
+            db.session.add_all([seller, buyer])
+            db.session.flush()
+            item = Item(user_id=seller.id, title=f'Item {i}', description='d', category='furniture',
+                        condition='good', transaction_type='donate', municipality_id=muni.id)
+            db.session.add(item)
+            db.session.flush()
+            db.session.add(Transaction(item_id=item.id, buyer_id=buyer.id, seller_id=seller.id,
+                                       transaction_type='donate'))
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+        first_tx = Transaction.query.order_by(Transaction.id.asc()).first().id
+    return {'Authorization': f'Bearer {token}'}, first_tx
+
+
+def test_transaction_listing_query_count_is_independent_of_page_size(app, client):
+    headers, _ = _seed_transactions(app, 12)
+    # Warm per-worker caches (JWT revocation set) so both requests are comparable
+    client.get('/api/admin/transactions?per_page=1', headers=headers)
+
+    with count_queries(app) as small:
+        resp = client.get('/api/admin/transactions?per_page=2', headers=headers)
+    assert resp.status_code == 200
+    assert len(resp.get_json()['transactions']) == 2
+
+    with count_queries(app) as large:
+        resp = client.get('/api/admin/transactions?per_page=12', headers=headers)
+    assert resp.status_code == 200
+    rows = resp.get_json()['transactions']
+    assert len(rows) == 12
+    assert all(r['item_title'] and r['buyer_name'].startswith('Buyer') and r['seller_name'].startswith('Seller') for r in rows)
+
+    assert len(large) == len(small)
+
+
+def test_transaction_detail_loads_parties_without_extra_queries(app, client):
+    headers, tx_id = _seed_transactions(app, 1)
+
+    with count_queries(app) as statements:
+        resp = client.get(f'/api/admin/transactions/{tx_id}', headers=headers)
+    assert resp.status_code == 200
+    data = resp.get_json()['transaction']
+    assert data['buyer']['username'] == 'buyer0'
+    assert data['seller_name'] == 'Seller 0'
+    # Only the admin's own lookup hits users directly; item/buyer/seller ride on the transaction query
+    assert sum(1 for s in statements if s.lstrip().startswith('SELECT users.')) == 1
+    assert not any(s.lstrip().startswith('SELECT items.') for s in statements)
+
+
+def _seed_province_admin(app, n_munis: int):
+    with app.app_context():
+        munis = [Municipality(name=f'Town {i}', slug=f'town-{i}', psgc_code=f'0100000{i:02d}') for i in range(n_munis)]
+        db.session.add_all(munis)
+        db.session.flush()
+        admin = User(username='prov', email='prov@example.com', password_hash='x', first_name='Prov', last_name='Admin',
+                     role='admin', admin_municipality_id=munis[0].id)
+        db.session.add(admin)
+        for i, m in enumerate(munis):
+            db.session.add(User(username=f'res{i}', email=f'res{i}@example.com', password_hash='x',
+                                first_name='Res', last_name=str(i), role='resident', municipality_id=m.id,
+                                admin_verified=True, is_active=True))
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'admin'})
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_municipality_performance_query_count_is_independent_of_municipality_count(tmp_path):
+    counts = []
+    for n in (2, 6):
+        app = create_app(TestingConfig)
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.create_all()
+        headers = _seed_province_admin(app, n)
+        with count_queries(app) as statements:
+            resp = app.test_client().get('/api/admin/municipalities/performance', headers=headers)
+        assert resp.status_code == 200
+        rows = resp.get_json()['municipalities']
+        assert len(rows) == n
+        assert all(r['users'] == 1 and r['name'].startswith('Town') for r in rows)
+        counts.append(len(statements))
+        with app.app_context():
+            db.drop_all()
+    assert counts[0] == counts[1]
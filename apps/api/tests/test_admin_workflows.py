@@ -11,6 +11,8 @@ from apps.api.models.user import User
 from apps.api.models.municipality import Municipality
 from apps.api.models.document import DocumentType, DocumentRequest
 from apps.api.models.audit import AuditLog
+from apps.api.models.job import Job
+from apps.api.utils import jobs
 
 
 @pytest.fixture()
@@ -219,3 +221,106 @@ def test_export_failure_returns_error_payload(app, client, monkeypatch):
     assert data['error'] == 'Failed to export'
     assert 'Boom' in data.get('details', '')
 
+
+
+def test_export_requests_streaming_writes_all_rows(app, client):
+    admin_id, resident_id, muni_id = _seed_admin_and_resident(app)
+    _seed_document_request(app, resident_id, muni_id)
+
+    headers = _auth_header(app, admin_id)
+    resp = client.post('/api/admin/exports/requests.xlsx', json={'range': 'all', 'stream': True}, headers=headers)
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['summary']['rows'] == 1
+
+    from openpyxl import load_workbook
+    wb = load_workbook(Path(app.config['UPLOAD_FOLDER']) / data['url'], read_only=True)
+    values = [row for row in wb.active.iter_rows(values_only=True)]
+    assert ('ID', 'Req No', 'User', 'Type', 'Status', 'Created') in values
+    assert any(len(row) >= 4 and row[2] == 'Resident Example' and row[3] == 'Certificate of Indigency' for row in values)
+
+    resp = client.post('/api/admin/exports/requests.pdf?stream=1', json={'range': 'all'}, headers=headers)
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['summary']['rows'] == 1
+    assert (Path(app.config['UPLOAD_FOLDER']) / data['url']).read_bytes().startswith(b'%PDF')
+
+
+def _seed_more_requests(app, resident_id: int, muni_id: int, doc_type_id: int, n: int, delivery='digital'):
+    with app.app_context():
+        ids = []
+        for i in range(n):
+            req = DocumentRequest(
+                request_number=f'REQ-{resident_id}-{delivery}-{i + 2}',
+                user_id=resident_id,
+                document_type_id=doc_type_id,
+                municipality_id=muni_id,
+                delivery_method=delivery,
+                purpose='Employment',
+                status='processing',
+            )
+            db.session.add(req)
+            db.session.flush()
+            ids.append(req.id)
+        db.session.commit()
+        return ids
+
+
+def test_bulk_generate_pdfs_by_ids_reports_per_request(app, client):
+    admin_id, resident_id, muni_id = _seed_admin_and_resident(app)
+    doc_type_id, first_id = _seed_document_request(app, resident_id, muni_id)
+    digital_ids = _seed_more_requests(app, resident_id, muni_id, doc_type_id, 2)
+    (pickup_id,) = _seed_more_requests(app, resident_id, muni_id, doc_type_id, 1, delivery='physical')
+
+    headers = _auth_header(app, admin_id)
+    resp = client.post('/api/admin/documents/requests/generate-pdf', headers=headers,
+                       json={'ids': [first_id, *digital_ids, pickup_id, 9999]})
+    assert resp.status_code == 200
+    data = resp.get_json()
+    results = data['results']
+    for rid in [first_id, *digital_ids]:
+        assert results[str(rid)]['ok'] is True
+        assert (Path(app.config['UPLOAD_FOLDER']) / results[str(rid)]['url'][len('/uploads/'):]).exists()
+    assert results[str(pickup_id)]['ok'] is False
+    assert results['9999'] == {'ok': False, 'error': 'Request not found'}
+    assert data['summary'] == {'total': 5, 'succeeded': 3, 'failed': 2}
+
+    with app.app_context():
+        assert DocumentRequest.query.filter_by(status='ready').count() == 3
+        assert AuditLog.query.filter_by(action='generate_pdf').count() == 3
+
+
+def test_bulk_generate_pdfs_by_filter_in_process_pool(app, client):
+    app.config['BULK_PDF_PROCESSES'] = 2
+    admin_id, resident_id, muni_id = _seed_admin_and_resident(app)
+    doc_type_id, approved_id = _seed_document_request(app, resident_id, muni_id)
+    processing_ids = _seed_more_requests(app, resident_id, muni_id, doc_type_id, 3)
+
+    headers = _auth_header(app, admin_id)
+    assert client.post('/api/admin/documents/requests/generate-pdf', headers=headers, json={}).status_code == 400
+    resp = client.post('/api/admin/documents/requests/generate-pdf', headers=headers, json={'status': 'processing'})
+    assert resp.status_code == 200
+    results = resp.get_json()['results']
+    assert sorted(int(k) for k in results) == processing_ids
+    assert all(r['ok'] for r in results.values())
+    with app.app_context():
+        assert db.session.get(DocumentRequest, approved_id).status == 'approved'
+        for rid in processing_ids:
+            assert db.session.get(DocumentRequest, rid).document_file.endswith(f'{rid}.pdf')
+
+
+def test_async_bulk_generate_respects_max_requests(app, client):
+    app.config['BULK_PDF_MAX_REQUESTS'] = 2
+    admin_id, resident_id, muni_id = _seed_admin_and_resident(app)
+    doc_type_id, _ = _seed_document_request(app, resident_id, muni_id)
+    processing_ids = _seed_more_requests(app, resident_id, muni_id, doc_type_id, 3)
+
+    headers = _auth_header(app, admin_id)
+    resp = client.post('/api/admin/documents/requests/generate-pdf', headers=headers,
+                       json={'status': 'processing', 'async': True})
+    assert resp.status_code == 202
+    with app.app_context():
+        assert jobs.work_once('test-worker') is True
+        job = db.session.get(Job, resp.get_json()['job_id'])
+        assert job.status == Job.STATUS_SUCCEEDED
+        assert sorted(int(k) for k in job.result['results']) == processing_ids[:2]
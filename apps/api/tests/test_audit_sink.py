@@ -0,0 +1,134 @@
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.audit import AuditLog
+from apps.api.models.marketplace import TransactionAuditLog
+from apps.api.models.municipality import Municipality
+from apps.api.utils.audit import log_action
+from apps.api.utils.audit_sink import AuditSink
+
+
+@pytest.fixture()
+def app():
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        db.session.add(Municipality(name='Iba', slug='iba', psgc_code='012345678'))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def _log(n, **kwargs):
+    return log_action(user_id=None, municipality_id=1, entity_type='user', entity_id=n,
+                      action='update', new_values={'n': n}, **kwargs)
+
+
+def _row(n):
+    return {'user_id': None, 'municipality_id': 1, 'entity_type': 'user', 'entity_id': n,
+            'action': 'update', 'actor_role': 'admin', 'old_values': None, 'new_values': {'n': n},
+            'notes': None, 'created_at': datetime.utcnow()}
+
+
+def _stop_without_flush(sink):
+    sink._stop.set()
+    sink._wake.set()
+    sink._thread.join(5)
+
+
+def test_async_log_is_written_through_in_tests(app):
+    with app.app_context():
+        assert _log(1, sync=False) is None
+        row = AuditLog.query.one()
+        assert (row.entity_id, row.new_values) == (1, {'n': 1})
+
+        # Synchronous mode still joins the caller's transaction
+        _log(2)
+        db.session.rollback()
+        assert AuditLog.query.count() == 1
+
+
+def test_buffered_rows_flush_in_one_insert_per_table(app):
+    app.config['AUDIT_FLUSH_INTERVAL'] = 3600
+    sink = AuditSink(app)
+    inserts = []
+
+    def _count(conn, cursor, statement, params, context, executemany):
+        if statement.startswith('INSERT INTO'):
+            inserts.append(statement.split()[2])
+
+    with app.app_context():
+        for n in range(5):
+            sink.record('audit_logs', _row(n))
+        sink.record('transaction_audit_logs', {'transaction_id': 1, 'action': 'confirm',
+                                               'metadata': {'k': 'v'}, 'created_at': datetime.utcnow()})
+        assert sink.pending_count() == 6
+        assert AuditLog.query.count() == 0
+
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', _count)
+        try:
+            assert sink.flush() == 6
+        finally:
+            event.remove(engine, 'before_cursor_execute', _count)
+
+        assert sorted(inserts) == ['audit_logs', 'transaction_audit_logs']
+        assert sorted(r.entity_id for r in AuditLog.query.all()) == [0, 1, 2, 3, 4]
+        assert TransactionAuditLog.query.one().metadata_json == {'k': 'v'}
+    _stop_without_flush(sink)
+
+
+def test_spooled_rows_survive_a_lost_process(app, tmp_path):
+    app.config.update(AUDIT_FLUSH_INTERVAL=3600, AUDIT_SPOOL_DIR=str(tmp_path))
+    crashed = AuditSink(app)
+    crashed.record('audit_logs', _row(1))
+    crashed.record('audit_logs', _row(2))
+    _stop_without_flush(crashed)
+    # The process is gone: its queue with it, its lock released, its spool file left behind
+    crashed._pending.clear()
+    crashed._active.fh.close()
+
+    sink = AuditSink(app)
+    assert sink.pending_count() == 2
+    with app.app_context():
+        assert sink.flush() == 2
+        assert sorted(r.entity_id for r in AuditLog.query.all()) == [1, 2]
+    assert os.listdir(tmp_path) == [os.path.basename(sink._active.path)]
+    _stop_without_flush(sink)
+
+
+def test_rejected_row_is_dropped_without_blocking_the_queue(app, tmp_path):
+    app.config.update(AUDIT_FLUSH_INTERVAL=3600, AUDIT_SPOOL_DIR=str(tmp_path))
+    sink = AuditSink(app)
+    bad = dict(_row(2), municipality_id=None)  # NOT NULL: the database rejects it
+    for row in (_row(1), bad, _row(3)):
+        sink.record('audit_logs', row)
+    sink.record('transaction_audit_logs', {'transaction_id': 1, 'action': 'confirm',
+                                           'user_agent': 'x' * 1000, 'created_at': datetime.utcnow()})
+
+    with app.app_context():
+        assert sink.flush() == 3
+        assert sink.pending_count() == 0
+        assert sorted(r.entity_id for r in AuditLog.query.all()) == [1, 3]
+        assert len(TransactionAuditLog.query.one().user_agent) == 255
+    rejected = [name for name in os.listdir(tmp_path) if name.endswith('.rejected')]
+    assert len(rejected) == 1
+    _stop_without_flush(sink)
+
+
+def test_queue_is_capped(app):
+    app.config.update(AUDIT_FLUSH_INTERVAL=3600, AUDIT_MAX_PENDING=3)
+    sink = AuditSink(app)
+    for n in range(5):
+        sink.record('audit_logs', _row(n))
+    assert [row['entity_id'] for _, row in sink._pending] == [2, 3, 4]
+    sink._pending.clear()
+    _stop_without_flush(sink)
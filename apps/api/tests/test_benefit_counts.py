@@ -0,0 +1,118 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.benefit import BenefitApplication, BenefitProgram
+from apps.api.models.municipality import Municipality
+from apps.api.models.user import User
+from apps.api.utils.identity import identity_claims
+from apps.api.utils.benefit_counts import (
+    compute_benefit_counts,
+    get_status_counts,
+    record_new_application,
+    reconcile_benefit_counts,
+)
+
+
+@pytest.fixture()
+def app():
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _seed(app, max_beneficiaries=None, applications=3):
+    with app.app_context():
+        muni = Municipality(name='Iba', slug='iba', psgc_code='012345678')
+        db.session.add(muni)
+        db.session.flush()
+        admin = User(username='admin1', email='admin1@example.com', password_hash='x', first_name='A',
+                     last_name='U', role='municipal_admin', admin_municipality_id=muni.id)
+        resident = User(username='res1', email='res1@example.com', password_hash='x', first_name='R',
+                        last_name='S', municipality_id=muni.id)
+        program = BenefitProgram(name='Aid', code='AID', description='d', program_type='financial',
+                                 municipality_id=muni.id, max_beneficiaries=max_beneficiaries)
+        db.session.add_all([admin, resident, program])
+        db.session.flush()
+        app_ids = []
+        for n in range(applications):
+            application = BenefitApplication(application_number=f'APP-{n}', user_id=resident.id,
+                                             program_id=program.id, status='pending')
+            db.session.add(application)
+            db.session.flush()
+            record_new_application(program.id, 'pending')
+            app_ids.append(application.id)
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims=identity_claims(admin))
+        return program.id, app_ids, {'Authorization': f'Bearer {token}'}
+
+
+def _set_status(client, headers, application_id, status):
+    return client.put(f'/api/admin/benefits/applications/{application_id}/status',
+                      json={'status': status}, headers=headers)
+
+
+def test_status_changes_move_stored_counts(app, client):
+    program_id, app_ids, headers = _seed(app)
+
+    assert _set_status(client, headers, app_ids[0], 'approved').status_code == 200
+    assert _set_status(client, headers, app_ids[1], 'rejected').status_code == 200
+
+    resp = client.get(f'/api/admin/benefits/programs/{program_id}', headers=headers)
+    data = resp.get_json()['program']
+    assert data['current_beneficiaries'] == 1
+    assert data['application_stats'] == {
+        'total': 3, 'approved': 1, 'completed': 0,
+        'by_status': {'pending': 1, 'approved': 1, 'rejected': 1},
+    }
+
+    assert client.put(f'/api/admin/benefits/programs/{program_id}/complete', headers=headers).status_code == 200
+    with app.app_context():
+        counts = get_status_counts(program_id)
+        assert counts['completed'] == 1 and counts['approved'] == 0
+        assert dict(compute_benefit_counts(program_id)) == \
+            {(program_id, status): n for status, n in counts.items()}
+        assert db.session.get(BenefitProgram, program_id).current_beneficiaries == 1
+
+
+def test_approval_respects_max_beneficiaries(app, client):
+    program_id, app_ids, headers = _seed(app, max_beneficiaries=1)
+
+    assert _set_status(client, headers, app_ids[0], 'approved').status_code == 200
+    resp = _set_status(client, headers, app_ids[1], 'approved')
+    assert resp.status_code == 409
+
+    with app.app_context():
+        assert db.session.get(BenefitApplication, app_ids[1]).status == 'pending'
+        assert db.session.get(BenefitProgram, program_id).current_beneficiaries == 1
+        assert get_status_counts(program_id)['approved'] == 1
+
+    # Releasing the slot lets the next approval through
+    assert _set_status(client, headers, app_ids[0], 'cancelled').status_code == 200
+    assert _set_status(client, headers, app_ids[1], 'approved').status_code == 200
+
+
+def test_reconcile_repairs_drift(app):
+    program_id, app_ids, _ = _seed(app)
+    with app.app_context():
+        # Bypass the helpers, as raw SQL or a manual fix would
+        BenefitApplication.query.filter_by(id=app_ids[0]).update({'status': 'approved'})
+        db.session.commit()
+
+        result = reconcile_benefit_counts()
+        db.session.commit()
+        assert result['repaired'] == 3  # pending, approved, current_beneficiaries
+        assert get_status_counts(program_id) == {'pending': 2, 'approved': 1}
+        assert db.session.get(BenefitProgram, program_id).current_beneficiaries == 1
+        assert reconcile_benefit_counts()['repaired'] == 0
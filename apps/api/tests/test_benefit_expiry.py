@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.benefit import BenefitProgram
+from apps.api.utils.benefit_expiry import expire_benefit_programs
+
+
+@pytest.fixture()
+def app():
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _create_program(code, **overrides):
+    base = dict(name=f'Program {code}', code=code, description='Test program', program_type='general',
+                is_active=True, is_accepting_applications=True)
+    base.update(overrides)
+    program = BenefitProgram(**base)
+    db.session.add(program)
+    db.session.commit()
+    return program
+
+
+def test_expires_at_follows_duration(app):
+    with app.app_context():
+        created = datetime(2025, 1, 1, 8, 0)
+        program = _create_program('DUR', created_at=created, duration_days=30)
+        assert program.expires_at == created + timedelta(days=30)
+
+        program.duration_days = '10'
+        db.session.commit()
+        assert program.expires_at == created + timedelta(days=10)
+
+        program.duration_days = None
+        db.session.commit()
+        assert program.expires_at is None
+
+
+def test_sweeper_completes_only_expired_programs(app):
+    with app.app_context():
+        old = datetime.utcnow() - timedelta(days=40)
+        expired = _create_program('OLD', created_at=old, duration_days=30)
+        running = _create_program('NEW', duration_days=30)
+        open_ended = _create_program('OPEN', created_at=old)
+
+        assert expire_benefit_programs() == {'expired': 1}
+        db.session.commit()
+        db.session.expire_all()
+
+        assert expired.is_active is False
+        assert expired.is_accepting_applications is False
+        assert expired.completed_at == expired.expires_at
+        assert running.is_active is True
+        assert open_ended.is_active is True
+        assert expire_benefit_programs() == {'expired': 0}
+
+
+def test_program_list_is_a_pure_read(app, client):
+    with app.app_context():
+        _create_program('OLD', created_at=datetime.utcnow() - timedelta(days=40), duration_days=30)
+        _create_program('NEW', duration_days=30)
+
+    resp = client.get('/api/benefits/programs')
+    assert resp.status_code == 200
+    assert [p['code'] for p in resp.get_json()['programs']] == ['NEW']
+
+    resp = client.get('/api/benefits/programs/1')
+    data = resp.get_json()
+    assert data['status'] == 'completed'
+    assert 'warning' in data
+
+    with app.app_context():
+        # Reads report the expiry but leave the stored flags to the sweeper
+        assert BenefitProgram.query.filter_by(code='OLD').one().is_active is True
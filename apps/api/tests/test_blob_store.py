@@ -0,0 +1,124 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.upload_blob import UploadBlob, UploadRef
+from apps.api.utils.blob_store import blob_rel_path
+from apps.api.utils.file_handler import (
+    cleanup_item_files,
+    delete_file,
+    save_issue_attachment,
+    save_marketplace_image,
+)
+from apps.api.utils.image_variants import image_variant_paths
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def _png(color=(10, 120, 200), name='photo.png'):
+    buf = io.BytesIO()
+    Image.new('RGB', (64, 48), color).save(buf, 'PNG')
+    return FileStorage(stream=io.BytesIO(buf.getvalue()), filename=name, content_type='image/png')
+
+
+def _blob(sha_row, tmp_path):
+    return tmp_path / 'uploads' / blob_rel_path(sha_row.sha256, sha_row.extension)
+
+
+def test_duplicate_uploads_share_one_blob_until_released(app, tmp_path):
+    base = tmp_path / 'uploads'
+    with app.test_request_context():
+        first = save_issue_attachment(_png(), 1, 'iba')
+        second = save_issue_attachment(_png(name='again.png'), 2, 'iba')
+        other = save_issue_attachment(_png(color=(0, 0, 0)), 2, 'iba')
+        db.session.commit()
+
+        assert first != second
+        assert os.path.samefile(base / first, base / second)
+        assert not os.path.samefile(base / first, base / other)
+        blob = db.session.get(UploadRef, first).sha256
+        row = db.session.get(UploadBlob, blob)
+        assert row.ref_count == 2 and db.session.query(UploadBlob).count() == 2
+        blob_file = _blob(row, tmp_path)
+
+        assert delete_file(first) is True
+        db.session.commit()
+        assert blob_file.exists() and (base / second).exists()
+        assert db.session.get(UploadBlob, blob).ref_count == 1
+
+        delete_file(second)
+        db.session.commit()
+        assert not blob_file.exists()
+        assert db.session.get(UploadBlob, blob) is None
+        assert db.session.query(UploadRef).count() == 1
+
+
+def test_image_blob_is_processed_once_and_cleanup_releases(app, tmp_path):
+    base = tmp_path / 'uploads'
+    with app.test_request_context():
+        first = save_marketplace_image(_png(), 1, 'iba')
+        second = save_marketplace_image(_png(), 2, 'iba')
+        db.session.commit()
+
+        row = db.session.query(UploadBlob).one()
+        blob_file = _blob(row, tmp_path)
+        assert row.ref_count == 2
+        for rel in (first, second):
+            paths = image_variant_paths(rel)
+            assert os.path.samefile(base / rel, blob_file)
+            assert os.path.samefile(base / paths['thumb'], f"{blob_file}.thumb.webp")
+
+        cleanup_item_files(1, 'iba')
+        db.session.commit()
+        assert not (base / first).exists()
+        assert db.session.get(UploadBlob, row.sha256).ref_count == 1
+
+        cleanup_item_files(2, 'iba')
+        db.session.commit()
+        assert not blob_file.exists() and not os.path.exists(f"{blob_file}.thumb.webp")
+        assert db.session.query(UploadBlob).count() == 0
+
+
+def test_released_blob_survives_a_rollback(app, tmp_path):
+    base = tmp_path / 'uploads'
+    with app.test_request_context():
+        rel = save_issue_attachment(_png(), 1, 'iba')
+        db.session.commit()
+        row = db.session.query(UploadBlob).one()
+        blob_file = _blob(row, tmp_path)
+
+        delete_file(rel)
+        assert blob_file.exists()  # nothing is unlinked before the commit
+        db.session.rollback()
+        assert blob_file.exists()
+        assert db.session.get(UploadBlob, row.sha256).ref_count == 1
+
+        # A new upload re-links the entity path from the surviving blob
+        again = save_issue_attachment(_png(), 2, 'iba')
+        db.session.commit()
+        assert os.path.samefile(base / again, blob_file)
+
+
+def test_disabled_store_writes_plain_files(app, tmp_path):
+    app.config['UPLOAD_CONTENT_ADDRESSED'] = False
+    with app.test_request_context():
+        rel = save_issue_attachment(_png(), 1, 'iba')
+        assert os.stat(tmp_path / 'uploads' / rel).st_nlink == 1
+        assert db.session.query(UploadRef).count() == 0
+        assert delete_file(rel) is True
@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.daily_rollup import DailyRollup
+from apps.api.models.document import DocumentRequest, DocumentType
+from apps.api.models.marketplace import Item, Transaction
+from apps.api.models.municipality import Municipality
+from apps.api.models.user import User
+from apps.api.utils.identity import identity_claims
+from apps.api.utils.daily_rollups import BACKFILLED, backfill_rollups, compute_rollups
+
+
+@pytest.fixture()
+def app():
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _seed(app):
+    now = datetime.utcnow()
+    with app.app_context():
+        muni = Municipality(name='Iba', slug='iba', psgc_code='012345678')
+        db.session.add(muni)
+        db.session.flush()
+        admin = User(username='admin1', email='admin1@example.com', password_hash='x', first_name='A',
+                     last_name='U', role='municipal_admin', admin_municipality_id=muni.id)
+        residents = [
+            User(username=f'res{i}', email=f'res{i}@example.com', password_hash='x', first_name='R',
+                 last_name='S', municipality_id=muni.id, created_at=now - timedelta(days=i))
+            for i in range(3)
+        ]
+        clearance = DocumentType(name='Barangay Clearance', code='BC', authority_level='barangay')
+        permit = DocumentType(name='Business Permit', code='BP', authority_level='municipal')
+        db.session.add_all([admin, clearance, permit, *residents])
+        db.session.flush()
+        for n, doc_type in enumerate((clearance, clearance, permit)):
+            db.session.add(DocumentRequest(request_number=f'REQ-{n}', user_id=residents[0].id,
+                                           document_type_id=doc_type.id, municipality_id=muni.id,
+                                           delivery_method='digital', purpose='Work'))
+        item = Item(user_id=residents[0].id, title='Lamp', description='d', category='other',
+                    condition='good', transaction_type='donate', municipality_id=muni.id)
+        db.session.add(item)
+        db.session.flush()
+        db.session.add(Transaction(item_id=item.id, buyer_id=residents[1].id, seller_id=residents[0].id,
+                                   transaction_type='donate'))
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims=identity_claims(admin))
+        return muni.id, {'Authorization': f'Bearer {token}'}
+
+
+def _stored(municipality_id):
+    rows = DailyRollup.query.filter_by(municipality_id=municipality_id).all()
+    return {(r.municipality_id, r.day, r.metric): r.value for r in rows if r.value and r.metric != BACKFILLED}
+
+
+def test_hooks_match_recomputed_rollups(app):
+    muni_id, _ = _seed(app)
+    today = datetime.utcnow().date()
+    with app.app_context():
+        rollups = _stored(muni_id)
+        assert rollups == compute_rollups(municipality_id=muni_id)
+        assert rollups[(muni_id, today, 'document_requests')] == 3
+        assert rollups[(muni_id, today, 'transactions')] == 1
+        assert rollups[(muni_id, today - timedelta(days=2), 'registrations')] == 1
+
+        db.session.delete(DocumentRequest.query.filter_by(request_number='REQ-2').one())
+        db.session.commit()
+        assert _stored(muni_id)[(muni_id, today, 'document_requests')] == 2
+        assert _stored(muni_id) == compute_rollups(municipality_id=muni_id)
+
+
+def test_changes_to_expired_attributes_move_rollups(app):
+    muni_id, _ = _seed(app)
+    today = datetime.utcnow().date()
+    with app.app_context():
+        request = DocumentRequest.query.filter_by(request_number='REQ-2').one()
+        clearance = DocumentType.query.filter_by(code='BC').one()
+        request.document_type_id = clearance.id  # expired by the seed commit
+        db.session.commit()
+
+        rollups = _stored(muni_id)
+        assert rollups == compute_rollups(municipality_id=muni_id)
+        assert rollups[(muni_id, today, f'document_requests.type.{clearance.id}')] == 3
+
+
+def test_backfill_repairs_and_marks_history(app):
+    muni_id, _ = _seed(app)
+    today = datetime.utcnow().date()
+    with app.app_context():
+        DailyRollup.query.delete()
+        db.session.commit()
+
+        backfill_rollups(start=today, end=today)
+        db.session.commit()
+        assert (muni_id, today - timedelta(days=1), 'registrations') not in _stored(muni_id)
+        assert DailyRollup.query.filter_by(metric=BACKFILLED).count() == 0
+
+        backfill_rollups()
+        db.session.commit()
+        assert _stored(muni_id) == compute_rollups(municipality_id=muni_id)
+        assert DailyRollup.query.filter_by(municipality_id=muni_id, metric=BACKFILLED).count() == 1
+
+
+def test_growth_and_document_stats_read_rollups(app, client):
+    muni_id, headers = _seed(app)
+    with app.app_context():
+        DailyRollup.query.delete()  # first chart read seeds the history
+        db.session.commit()
+
+    resp = client.get('/api/admin/users/growth?range=last_7_days', headers=headers)
+    assert resp.status_code == 200
+    series = {row['day']: row['count'] for row in resp.get_json()['series']}
+    today = datetime.utcnow().date()
+    for offset in range(3):
+        assert series[(today - timedelta(days=offset)).strftime('%Y-%m-%d')] == 1
+    assert sum(series.values()) == 3
+
+    resp = client.get('/api/admin/documents/stats', headers=headers)
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['total_requests'] == 3
+    assert data['top_requested'] == [
+        {'name': 'Barangay Clearance', 'count': 2},
+        {'name': 'Business Permit', 'count': 1},
+    ]
+    with app.app_context():
+        assert DailyRollup.query.filter_by(municipality_id=muni_id, metric=BACKFILLED).count() == 1
+
+
+def test_status_only_transaction_update_skips_the_item_lookup(app):
+    _seed(app)
+    lookups = []
+
+    def _count(conn, cursor, statement, params, context, executemany):
+        if statement.startswith('SELECT items.municipality_id'):
+            lookups.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', _count)
+        try:
+            tx = Transaction.query.one()
+            tx.status = 'accepted'
+            db.session.commit()
+        finally:
+            event.remove(engine, 'before_cursor_execute', _count)
+    assert lookups == []
@@ -0,0 +1,102 @@
+import json
+import os
+
+import pytest
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api.utils import doc_assets
+
+
+@pytest.fixture()
+def app(tmp_path, monkeypatch):
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    app.config['DOC_ASSET_CHECK_INTERVAL'] = 0
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    monkeypatch.setattr(doc_assets, '_config_dir', lambda: tmp_path / 'config')
+    monkeypatch.setattr(doc_assets, '_logos_dir', lambda: tmp_path / 'logos')
+    (tmp_path / 'config').mkdir()
+    doc_assets.clear_doc_asset_cache()
+    yield app
+    doc_assets.clear_doc_asset_cache()
+
+
+def _touch_later(path):
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 5))
+
+
+def _seal(path):
+    from PIL import Image
+    im = Image.new('RGB', (40, 40), 'white')
+    im.paste((0, 0, 128), (10, 10, 30, 30))
+    im.save(path)
+
+
+def test_json_config_is_parsed_once_and_reloaded_on_mtime_change(app, tmp_path, monkeypatch):
+    cfg = tmp_path / 'config' / 'barangayOfficials.json'
+    cfg.write_text(json.dumps({'Iba': {'Zone 1 (Pob.)': 'Juan Cruz'}}), encoding='utf-8')
+
+    loads = []
+    real_loads = json.loads
+    monkeypatch.setattr(doc_assets.json, 'loads', lambda s: loads.append(1) or real_loads(s))
+
+    with app.app_context():
+        first = doc_assets.load_json_config('barangayOfficials.json')
+        assert doc_assets.load_json_config('barangayOfficials.json') is first
+        assert len(loads) == 1
+
+        lookup = doc_assets.barangay_official_lookup()
+        assert lookup['Iba'][doc_assets.normalize_place_name('zone 1 (pob.)')] == 'Juan Cruz'
+        assert doc_assets.barangay_official_lookup() is lookup
+
+        cfg.write_text(json.dumps({'Iba': {'Zone 1 (Pob.)': 'Maria Santos'}}), encoding='utf-8')
+        _touch_later(cfg)
+        assert doc_assets.load_json_config('barangayOfficials.json')['Iba']['Zone 1 (Pob.)'] == 'Maria Santos'
+        assert doc_assets.barangay_official_lookup()['Iba'][doc_assets.normalize_place_name('Zone 1 (Pob.)')] == 'Maria Santos'
+
+
+def test_logo_resolution_is_cached_until_directory_changes(app, tmp_path, monkeypatch):
+    nested = tmp_path / 'logos' / 'municipalities' / 'Iba'
+    nested.mkdir(parents=True)
+    (tmp_path / 'logos' / 'zambales').mkdir(parents=True)
+    (nested / 'banner.png').write_bytes(b'x')
+
+    with app.app_context():
+        mun_logo, prov_logo = doc_assets.resolve_logo_paths('Iba')
+        assert mun_logo == nested / 'banner.png'
+        assert prov_logo is None
+
+        globbed = []
+        real_glob = type(nested).glob
+        monkeypatch.setattr(type(nested), 'glob', lambda self, pat: globbed.append(pat) or real_glob(self, pat))
+        assert doc_assets.resolve_logo_paths('Iba')[0] == nested / 'banner.png'
+        assert globbed == []
+
+        (nested / 'iba_seal.png').write_bytes(b'x')
+        _touch_later(nested)
+        assert doc_assets.resolve_logo_paths('Iba')[0] == nested / 'iba_seal.png'
+
+
+def test_watermark_is_prepared_once_and_reused_from_disk(app, tmp_path, monkeypatch):
+    logo = tmp_path / 'seal.png'
+    _seal(logo)
+
+    with app.app_context():
+        reader = doc_assets.prepared_watermark(logo, 0.25, 150.0)
+        assert doc_assets.prepared_watermark(logo, 0.25, 150.0) is reader
+        assert doc_assets.prepared_watermark(logo, 0.5, 150.0) is not reader
+
+        cached = list((tmp_path / 'uploads' / 'cache' / 'watermarks').glob('*.png'))
+        assert len(cached) == 2
+        from PIL import Image
+        with Image.open(cached[0]) as im:
+            alphas = {im.getpixel((0, 0))[3], im.getpixel((20, 20))[3]}
+        assert 0 in alphas  # white background removed
+        assert alphas - {0} <= {63, 64, 127, 128}  # seal faded to the requested opacity
+
+        # A fresh worker loads the PNG instead of redoing the Pillow work
+        doc_assets.clear_doc_asset_cache()
+        monkeypatch.setattr(doc_assets, '_watermark_image', lambda *a: pytest.fail('recomputed watermark'))
+        assert doc_assets.prepared_watermark(logo, 0.25, 150.0) is not None
@@ -0,0 +1,80 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api.utils import doc_templates
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    app.config['DOC_ASSET_CHECK_INTERVAL'] = 0
+    app.config['BASE_DIR'] = tmp_path
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    doc_templates.clear_template_cache()
+    yield app
+    doc_templates.clear_template_cache()
+
+
+def _bump(path):
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 5))
+
+
+def test_registry_resolves_from_index_and_picks_up_new_templates(app, tmp_path, monkeypatch):
+    base = tmp_path / 'public' / 'digital_docs_template'
+    (base / 'Iba').mkdir(parents=True)
+    (base / '_default').mkdir()
+    (base / 'Iba' / 'other.docx').write_bytes(b'iba')
+    (base / '_default' / 'CLEARANCE.docx').write_bytes(b'default')
+    (base / 'Iba' / 'meta.json').write_text(json.dumps({'seal': 'seal.png'}), encoding='utf-8')
+
+    with app.app_context():
+        assert doc_templates.resolve_template(base, 'Iba', 'CLEARANCE') == base / 'Iba' / 'other.docx'
+        assert doc_templates.resolve_template(base, 'Botolan', 'CLEARANCE') == base / '_default' / 'CLEARANCE.docx'
+        assert doc_templates.municipal_meta(base, 'Iba') == {'seal': 'seal.png'}
+        assert doc_templates.municipal_meta(base, 'Botolan') == {}
+
+        scans = []
+        real_scandir = os.scandir
+        monkeypatch.setattr(doc_templates.os, 'scandir', lambda p: scans.append(p) or real_scandir(p))
+        assert doc_templates.resolve_template(base, 'Iba', 'CLEARANCE') == base / 'Iba' / 'other.docx'
+        assert scans == []
+
+        (base / 'Iba' / 'CLEARANCE.docx').write_bytes(b'specific')
+        _bump(base / 'Iba')
+        path = doc_templates.resolve_template(base, 'Iba', 'CLEARANCE')
+        assert path == base / 'Iba' / 'CLEARANCE.docx'
+        assert doc_templates.template_bytes(path) == b'specific'
+        assert doc_templates.template_bytes(path) is doc_templates.template_bytes(path)
+
+
+def test_render_request_docx_uses_cached_template(app, tmp_path):
+    docx = pytest.importorskip('docx')
+    pytest.importorskip('docxtpl')
+    from apps.api.utils.doc_template_renderer import render_request_docx
+
+    base = tmp_path / 'public' / 'digital_docs_template' / 'Iba'
+    base.mkdir(parents=True)
+    d = docx.Document()
+    d.add_paragraph('Certified: {{ resident_name }} ({{ request_number }})')
+    d.save(str(base / 'CLEARANCE.docx'))
+
+    req = SimpleNamespace(id=7, request_number='REQ-7', municipality_id=1, municipality=SimpleNamespace(name='Iba'),
+                          barangay=SimpleNamespace(name='Zone 1'), delivery_address='Zone 1', purpose='Work')
+    doc_type = SimpleNamespace(code='CLEARANCE', name='Barangay Clearance', processing_days=3)
+    user = SimpleNamespace(first_name='Juan', last_name='Cruz', username='juan')
+
+    with app.app_context():
+        for _ in range(2):
+            docx_out, pdf_target = render_request_docx(request=req, document_type=doc_type, user=user)
+            text = '\n'.join(p.text for p in docx.Document(str(docx_out)).paragraphs)
+            assert 'Certified: Juan Cruz (REQ-7)' in text
+            # Key fields rendered, so no fallback page was appended
+            assert 'Request Number' not in text
+        assert pdf_target.name == 'document.pdf'
@@ -0,0 +1,92 @@
+import shutil
+
+import pytest
+
+from apps.api.utils import doc_to_pdf
+
+
+@pytest.fixture(autouse=True)
+def _reset_pool(monkeypatch):
+    monkeypatch.setattr(doc_to_pdf, '_pool', None)
+    monkeypatch.setattr(doc_to_pdf, '_pool_failed', False)
+
+
+class _FakePool:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def convert(self, input_docx, output_pdf, timeout=120.0):
+        self.calls.append(input_docx)
+        if self.fail:
+            raise RuntimeError('listener died')
+        output_pdf.write_bytes(b'%PDF-1.4\n%EOF')
+        return output_pdf
+
+
+def test_pooled_conversion_is_preferred(tmp_path, monkeypatch):
+    docx = tmp_path / 'document.docx'
+    docx.write_bytes(b'PK')
+    pool = _FakePool()
+    monkeypatch.setattr(doc_to_pdf, '_pool', pool)
+    monkeypatch.setattr(doc_to_pdf, '_convert_with_soffice', lambda *a: pytest.fail('spawned soffice'))
+
+    out = doc_to_pdf.convert_docx_to_pdf(docx, tmp_path / 'document.pdf')
+    assert out.read_bytes().startswith(b'%PDF')
+    assert pool.calls == [docx]
+
+
+def test_falls_back_to_subprocess_when_pool_fails_or_is_disabled(tmp_path, monkeypatch):
+    docx = tmp_path / 'document.docx'
+    docx.write_bytes(b'PK')
+    spawned = []
+
+    def fake_soffice(input_docx, output_pdf):
+        spawned.append(input_docx)
+        output_pdf.write_bytes(b'%PDF-1.4\n%EOF')
+        return True
+
+    monkeypatch.setattr(doc_to_pdf, '_has_soffice', lambda: True)
+    monkeypatch.setattr(doc_to_pdf, '_convert_with_soffice', fake_soffice)
+
+    monkeypatch.setattr(doc_to_pdf, '_pool', _FakePool(fail=True))
+    assert doc_to_pdf.convert_docx_to_pdf(docx, tmp_path / 'a.pdf').exists()
+
+    monkeypatch.setenv('DOCX_PDF_CONVERTER', 'subprocess')
+    monkeypatch.setattr(doc_to_pdf, '_pool', _FakePool())
+    assert doc_to_pdf.convert_docx_to_pdf(docx, tmp_path / 'b.pdf').exists()
+    assert len(spawned) == 2
+
+
+@pytest.mark.skipif(doc_to_pdf.fcntl is None, reason='needs flock')
+def test_each_process_claims_its_own_port_block(tmp_path, monkeypatch):
+    monkeypatch.setattr(doc_to_pdf.tempfile, 'gettempdir', lambda: str(tmp_path))
+    # flock is per open file, so two claims in one process behave like two workers
+    first, first_lock = doc_to_pdf._claim_port_block(2002, 2)
+    second, second_lock = doc_to_pdf._claim_port_block(2002, 2)
+    assert (first, second) == (2002, 2004)
+
+    first_lock.close()  # worker exited
+    third, third_lock = doc_to_pdf._claim_port_block(2002, 2)
+    assert third == 2002
+    second_lock.close()
+    third_lock.close()
+
+
+@pytest.mark.skipif(not shutil.which('soffice'), reason='LibreOffice not installed')
+def test_real_pool_converts_docx(tmp_path):
+    pytest.importorskip('uno')
+    docx_mod = pytest.importorskip('docx')
+    src = tmp_path / 'document.docx'
+    d = docx_mod.Document()
+    d.add_paragraph('Barangay Clearance')
+    d.save(str(src))
+
+    pool = doc_to_pdf.get_conversion_pool()
+    assert pool is not None
+    try:
+        for i in range(2):
+            out = doc_to_pdf.convert_docx_to_pdf(src, tmp_path / f'out{i}.pdf')
+            assert out.read_bytes().startswith(b'%PDF')
+    finally:
+        pool.close()
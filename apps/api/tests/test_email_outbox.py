@@ -0,0 +1,160 @@
+import socket
+from datetime import datetime
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.email_outbox import EmailOutbox
+from apps.api.models.user import User
+from apps.api.models.municipality import Municipality
+from apps.api.utils import email_sender
+
+
+aiosmtpd_controller = pytest.importorskip('aiosmtpd.controller')
+
+
+class _Collector:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, envelope.content))
+        return '250 OK'
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture()
+def smtp_server():
+    handler = _Collector()
+    controller = aiosmtpd_controller.Controller(handler, hostname='127.0.0.1', port=_free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+@pytest.fixture()
+def app(smtp_server):
+    controller, _handler = smtp_server
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    app.config.update(
+        SMTP_SERVER='127.0.0.1',
+        SMTP_PORT=controller.port,
+        SMTP_USERNAME='',
+        SMTP_PASSWORD='',
+        EMAIL_SMTP_POOL_SIZE=2,
+    )
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+    email_sender._pools.clear()
+
+
+def test_outbox_batches_over_pooled_sessions(app, smtp_server, monkeypatch):
+    _controller, handler = smtp_server
+    connects = []
+    real_connect = email_sender.SMTPConnectionPool._connect
+
+    def counting_connect(self):
+        connects.append(1)
+        return real_connect(self)
+
+    monkeypatch.setattr(email_sender.SMTPConnectionPool, '_connect', counting_connect)
+
+    with app.app_context():
+        for i in range(6):
+            email_sender.send_generic_email(f'user{i}@example.com', f'Subject {i}', 'Hello')
+        assert EmailOutbox.query.filter_by(status=EmailOutbox.STATUS_PENDING).count() == 6
+        assert handler.messages == []
+
+        counts = email_sender.dispatch_outbox()
+        assert counts == {'sent': 6, 'retry': 0, 'failed': 0}
+        assert EmailOutbox.query.filter_by(status=EmailOutbox.STATUS_SENT).count() == 6
+
+        email_sender.send_generic_email('late@example.com', 'Later', 'Hello again')
+        assert email_sender.dispatch_outbox()['sent'] == 1
+
+    recipients = sorted(r for rcpts, _ in handler.messages for r in rcpts)
+    assert recipients == sorted([f'user{i}@example.com' for i in range(6)] + ['late@example.com'])
+    # At most one session per pool slot, reused for the follow-up batch
+    assert len(connects) <= 2
+
+
+def test_failed_delivery_is_retried_with_backoff(app):
+    app.config['SMTP_PORT'] = _free_port()  # nothing listening
+    app.config['EMAIL_MAX_ATTEMPTS'] = 2
+    with app.app_context():
+        row_id = email_sender.queue_email('user@example.com', 'Hi', 'Body').id
+
+        counts = email_sender.dispatch_outbox()
+        assert counts == {'sent': 0, 'retry': 1, 'failed': 0}
+        row = db.session.get(EmailOutbox, row_id)
+        assert row.status == EmailOutbox.STATUS_PENDING
+        assert row.attempts == 1
+        assert row.next_attempt_at > datetime.utcnow()
+        assert row.last_error
+
+        # Not due yet
+        assert email_sender.dispatch_outbox() == {'sent': 0, 'retry': 0, 'failed': 0}
+
+        row.next_attempt_at = datetime.utcnow()
+        db.session.commit()
+        assert email_sender.dispatch_outbox()['failed'] == 1
+        assert db.session.get(EmailOutbox, row_id).status == EmailOutbox.STATUS_FAILED
+
+
+def test_failed_queue_rolls_back_the_session(app):
+    with app.app_context():
+        with pytest.raises(Exception):
+            email_sender.queue_email(None, 'Hi', 'Body')  # to_email is NOT NULL
+        # The session is usable again and nothing was stored
+        assert EmailOutbox.query.count() == 0
+        assert email_sender.queue_email('user@example.com', 'Hi', 'Body').id
+
+
+def test_admin_verify_queues_email_instead_of_sending(app, smtp_server):
+    _controller, handler = smtp_server
+    with app.app_context():
+        muni = Municipality(name='Iba', slug='iba', psgc_code='012345678')
+        db.session.add(muni)
+        db.session.flush()
+        admin = User(username='admin1', email='admin1@example.com', password_hash='x', first_name='Admin',
+                     last_name='User', role='municipal_admin', admin_municipality_id=muni.id, municipality_id=muni.id)
+        resident = User(username='res1', email='res1@example.com', password_hash='x', first_name='Res',
+                        last_name='Ident', role='resident', municipality_id=muni.id)
+        db.session.add_all([admin, resident])
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+        resident_id = resident.id
+
+    resp = app.test_client().post(f'/api/admin/users/{resident_id}/verify',
+                                  headers={'Authorization': f'Bearer {token}'})
+    assert resp.status_code == 200
+    assert handler.messages == []
+
+    with app.app_context():
+        rows = EmailOutbox.query.all()
+        assert [r.to_email for r in rows] == ['res1@example.com']
+        assert email_sender.dispatch_outbox()['sent'] == 1
+    assert handler.messages[0][0] == ['res1@example.com']
+
+
+def test_permanent_failure_does_not_log_the_body(app, caplog, monkeypatch):
+    monkeypatch.setattr(email_sender, '_is_permanent', lambda exc: True)
+    app.config['SMTP_PORT'] = _free_port()  # nothing listening
+    with app.app_context():
+        row_id = email_sender.queue_email('user@example.com', 'Reset', 'https://x/reset?token=secret').id
+        with caplog.at_level('DEBUG'):
+            assert email_sender.dispatch_outbox()['failed'] == 1
+    assert str(row_id) in caplog.text and 'user@example.com' in caplog.text
+    assert 'token=secret' not in caplog.text
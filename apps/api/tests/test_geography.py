@@ -0,0 +1,138 @@
+import json
+
+import pytest
+from sqlalchemy import event
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.municipality import Municipality, Barangay
+from apps.api.utils.geography import barangay_municipality_id, get_geography, municipality_id_for_slug
+
+
+@pytest.fixture()
+def app():
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        iba = Municipality(name='Iba', slug='iba', psgc_code='037103000')
+        closed = Municipality(name='Old Town', slug='old-town', psgc_code='037199000', is_active=False)
+        db.session.add_all([iba, closed])
+        db.session.flush()
+        db.session.add_all([
+            Barangay(name='Zone 1', slug='zone-1', municipality_id=iba.id, psgc_code='037103001'),
+            Barangay(name='Zone 2', slug='zone-2', municipality_id=iba.id, psgc_code='037103002', is_active=False),
+        ])
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _count_selects():
+    statements = []
+
+    def before(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before)
+    return statements, lambda: event.remove(db.engine, 'before_cursor_execute', before)
+
+
+def test_endpoints_match_model_dicts_and_skip_the_database(app, client):
+    client.get('/api/municipalities')  # load
+    with app.app_context():
+        iba = Municipality.query.filter_by(slug='iba').one()
+        expected = iba.to_dict(include_barangays=True)
+        zone1 = Barangay.query.filter_by(slug='zone-1').one()
+        expected_barangay = dict(zone1.to_dict(), municipality=iba.to_dict())
+
+        statements, stop = _count_selects()
+        try:
+            listing = client.get('/api/municipalities').get_json()
+            detail = client.get(f'/api/municipalities/{iba.id}?include_barangays=true').get_json()
+            by_slug = client.get('/api/municipalities/slug/old-town').get_json()
+            barangays = client.get(f'/api/municipalities/{iba.id}/barangays').get_json()
+            barangay = client.get(f'/api/municipalities/barangays/{zone1.id}').get_json()
+            assert municipality_id_for_slug('iba') == iba.id
+            assert barangay_municipality_id(zone1.id) == iba.id
+            assert barangay_municipality_id(999) is None
+        finally:
+            stop()
+        assert statements == []
+
+    assert [m['slug'] for m in listing['municipalities']] == ['iba'] and listing['count'] == 1
+    assert detail == json.loads(json.dumps(expected))
+    assert by_slug['is_active'] is False
+    assert barangays == {'municipality': 'Iba', 'count': 1, 'barangays': [expected_barangay_item(zone1)]}
+    assert barangay == json.loads(json.dumps(expected_barangay))
+    assert client.get('/api/municipalities/999').status_code == 404
+    assert client.get('/api/municipalities/barangays/999').status_code == 404
+
+
+def expected_barangay_item(barangay):
+    return json.loads(json.dumps(barangay.to_dict()))
+
+
+def test_etag_revalidation_and_commit_invalidation(app, client):
+    first = client.get('/api/municipalities')
+    etag = first.headers['ETag']
+    assert first.cache_control.max_age == 300
+    assert client.get('/api/municipalities', headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        db.session.add(Municipality(name='Subic', slug='subic', psgc_code='037110000'))
+        db.session.commit()
+
+    changed = client.get('/api/municipalities', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.get_json()['count'] == 2
+    with app.app_context():
+        assert municipality_id_for_slug('subic') is not None
+
+
+def test_version_stamp_picks_up_writes_from_other_workers(app):
+    with app.app_context():
+        registry = get_geography()
+        registry.check_interval = 0
+        snap = registry.snapshot()
+        # A write this worker's session did not see (e.g. another process)
+        db.session.execute(Barangay.__table__.insert().values(
+            name='Zone 3', slug='zone-3', municipality_id=municipality_id_for_slug('iba'), psgc_code='037103003',
+            is_active=True,
+        ))
+        db.session.commit()
+        assert registry.snapshot() is not snap
+        assert len(registry.snapshot().barangays) == 3
+
+
+def test_register_validates_barangay_from_registry(app, client):
+    with app.app_context():
+        other = Municipality.query.filter_by(slug='old-town').one()
+        foreign = Barangay(name='Elsewhere', slug='elsewhere', municipality_id=other.id, psgc_code='037199001')
+        db.session.add(foreign)
+        db.session.commit()
+        foreign_id = foreign.id
+        zone1_id = Barangay.query.filter_by(slug='zone-1').one().id
+
+    def register(username, barangay_id):
+        return client.post('/api/auth/register', json={
+            'username': username, 'email': f'{username}@gmail.com', 'password': 'PassWord123',
+            'first_name': 'Juan', 'last_name': 'Cruz', 'date_of_birth': '1990-01-01',
+            'municipality_slug': 'iba', 'barangay_id': str(barangay_id),
+        })
+
+    assert register('juan1', zone1_id).status_code == 201
+    assert register('juan2', foreign_id).status_code == 201
+    with app.app_context():
+        from apps.api.models.user import User
+        users = {u.username: u for u in User.query.all()}
+        assert users['juan1'].barangay_id == zone1_id
+        assert users['juan2'].barangay_id is None
+        assert users['juan1'].municipality_id == municipality_id_for_slug('iba')
@@ -0,0 +1,156 @@
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from flask_jwt_extended import create_access_token, decode_token
+from sqlalchemy import event
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.user import User
+from apps.api.models.municipality import Municipality
+from apps.api.utils.identity import identity_claims
+from apps.api.utils.token_revocation import RevocationCache
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+@contextmanager
+def user_lookups(app):
+    """Collect statements that load a single user by primary key."""
+    statements = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if 'WHERE users.id = ?' in statement:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', _before)
+
+
+def _seed(app):
+    with app.app_context():
+        muni = Municipality(name='Iba', slug='iba', psgc_code='012345678')
+        db.session.add(muni)
+        db.session.commit()
+        admin = User(username='admin1', email='admin1@example.com', password_hash='x', first_name='Admin',
+                     last_name='User', role='municipal_admin', admin_municipality_id=muni.id)
+        resident = User(username='res1', email='res1@example.com', password_hash='x', first_name='Res',
+                        last_name='One', role='resident', municipality_id=muni.id, email_verified=True,
+                        admin_verified=False, date_of_birth=date(1990, 1, 1))
+        db.session.add_all([admin, resident])
+        db.session.commit()
+        return {'admin': admin.id, 'resident': resident.id, 'muni': muni.id}
+
+
+def _token(app, user_id, claims):
+    with app.app_context():
+        if claims is None:
+            claims = identity_claims(db.session.get(User, user_id))
+        return {'Authorization': f'Bearer {create_access_token(identity=str(user_id), additional_claims=claims)}'}
+
+
+def test_admin_scope_comes_from_token_claims(app, client):
+    ids = _seed(app)
+    headers = _token(app, ids['admin'], None)
+    client.get('/api/admin/users/pending', headers=headers)  # warm per-worker caches
+
+    with user_lookups(app) as lookups:
+        resp = client.get('/api/admin/users/pending', headers=headers)
+    assert resp.status_code == 200
+    assert lookups == []
+
+
+def test_legacy_role_only_token_falls_back_to_one_lookup(app, client):
+    ids = _seed(app)
+    headers = _token(app, ids['admin'], {'role': 'municipal_admin'})
+    client.get('/api/admin/users/pending', headers=headers)
+
+    with user_lookups(app) as lookups:
+        resp = client.get('/api/admin/users/pending', headers=headers)
+    assert resp.status_code == 200
+    assert len(lookups) == 1
+
+
+def test_role_mismatch_is_rejected_without_lookup(app, client):
+    ids = _seed(app)
+    headers = _token(app, ids['resident'], None)
+    client.post('/api/documents/requests', headers=headers, json={})
+
+    with user_lookups(app) as lookups:
+        resp = client.post('/api/admin/announcements', headers=headers, json={})
+    assert resp.status_code == 403
+    assert lookups == []
+
+
+def test_stale_verification_claim_is_rechecked(app, client):
+    ids = _seed(app)
+    headers = _token(app, ids['resident'], None)
+
+    resp = client.post('/api/documents/requests/999/upload', headers=headers)
+    assert resp.status_code == 403
+
+    # Approved after the token was issued: the false claim is confirmed
+    # against the database instead of blocking until the next refresh.
+    with app.app_context():
+        db.session.get(User, ids['resident']).admin_verified = True
+        db.session.commit()
+    resp = client.post('/api/documents/requests/999/upload', headers=headers)
+    assert resp.status_code == 404
+
+
+def test_revoked_verification_does_not_outlive_the_token(app, client):
+    ids = _seed(app)
+    with app.app_context():
+        db.session.get(User, ids['resident']).admin_verified = True
+        db.session.commit()
+    resident = _token(app, ids['resident'], None)
+    assert client.post('/api/documents/requests/999/upload', headers=resident).status_code == 404
+
+    resp = client.post(f"/api/admin/users/{ids['resident']}/reject", headers=_token(app, ids['admin'], None),
+                       json={'reason': 'Blurry ID'})
+    assert resp.status_code == 200
+    # The true admin_verified claim in the old token is no longer honoured
+    assert client.post('/api/documents/requests/999/upload', headers=resident).status_code == 401
+
+
+def test_demoted_and_deleted_users_lose_their_tokens(app, client):
+    ids = _seed(app)
+    admin = _token(app, ids['admin'], None)
+    resident = _token(app, ids['resident'], None)
+    assert client.get('/api/admin/users/pending', headers=admin).status_code == 200
+
+    with app.app_context():
+        db.session.get(User, ids['admin']).role = 'resident'
+        db.session.delete(db.session.get(User, ids['resident']))
+        db.session.commit()
+    assert client.get('/api/admin/users/pending', headers=admin).status_code == 401
+    assert client.get('/api/auth/profile', headers=resident).status_code == 401
+
+    with app.app_context():
+        # Another worker learns of it from the table; later tokens are unaffected
+        other = RevocationCache()
+        iat = decode_token(admin['Authorization'].split()[1])['iat']
+        assert other.is_user_token_revoked(ids['admin'], iat)
+        assert not other.is_user_token_revoked(ids['admin'], iat + 5)
@@ -0,0 +1,73 @@
+import io
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.marketplace import Item
+from apps.api.utils.file_handler import save_marketplace_image
+from apps.api.utils.image_variants import image_variant_paths, variant_source
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _rotated_jpeg(width=2000, height=1000):
+    img = Image.new('RGB', (width, height), (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 CW on display
+    exif[0x010F] = 'TestCam'  # Make
+    buf = io.BytesIO()
+    img.save(buf, 'JPEG', exif=exif.tobytes())
+    buf.seek(0)
+    return FileStorage(stream=buf, filename='photo.jpg', content_type='image/jpeg')
+
+
+def test_upload_is_normalised_and_gets_webp_variants(app, tmp_path):
+    with app.test_request_context():
+        rel = save_marketplace_image(_rotated_jpeg(), 1, 'iba')
+    base = tmp_path / 'uploads'
+
+    with Image.open(base / rel) as original:
+        assert original.size == (1000, 2000)  # orientation applied
+        assert not original.getexif()  # metadata stripped
+
+    paths = image_variant_paths(rel)
+    for bucket, edge in (('thumb', 320), ('medium', 960), ('large', 1600)):
+        with Image.open(base / paths[bucket]) as variant:
+            assert variant.format == 'WEBP'
+            assert max(variant.size) == edge
+    assert (base / paths['thumb']).stat().st_size < (base / rel).stat().st_size
+
+
+def test_to_dict_lists_variants_and_missing_variant_falls_back(app, client, tmp_path):
+    rel = 'marketplace/residents/iba/item_1/legacy.png'
+    target = tmp_path / 'uploads' / rel
+    target.parent.mkdir(parents=True)
+    Image.new('RGB', (10, 10)).save(target)
+
+    item = Item(images=[rel])
+    variants = item.to_dict()['image_variants']
+    assert variants == [image_variant_paths(rel)]
+    assert variant_source(variants[0]['thumb']) == rel
+
+    resp = client.get(f"/uploads/{variants[0]['thumb']}")
+    assert resp.status_code == 200
+    assert resp.data == target.read_bytes()
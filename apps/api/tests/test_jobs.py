@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.job import Job
+from apps.api.models.user import User
+from apps.api.models.municipality import Municipality
+from apps.api.utils import jobs
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def _seed_admin(app):
+    with app.app_context():
+        muni = Municipality(name='Iba', slug='iba', psgc_code='012345678')
+        db.session.add(muni)
+        db.session.flush()
+        admin = User(username='admin1', email='admin1@example.com', password_hash='x', first_name='Admin',
+                     last_name='User', role='municipal_admin', admin_municipality_id=muni.id, municipality_id=muni.id)
+        db.session.add(admin)
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+        return {'Authorization': f'Bearer {token}'}
+
+
+def test_async_export_returns_job_and_worker_completes_it(app):
+    headers = _seed_admin(app)
+    client = app.test_client()
+
+    resp = client.post('/api/admin/exports/users.xlsx', json={'async': True}, headers=headers)
+    assert resp.status_code == 202
+    job_id = resp.get_json()['job_id']
+
+    poll = client.get(f'/api/admin/jobs/{job_id}', headers=headers).get_json()['job']
+    assert poll['status'] == 'queued'
+
+    with app.app_context():
+        assert jobs.work_once('test-worker') is True
+        assert jobs.work_once('test-worker') is False
+
+    poll = client.get(f'/api/admin/jobs/{job_id}', headers=headers).get_json()['job']
+    assert poll['status'] == 'succeeded'
+    assert poll['result']['url'].endswith('.xlsx')
+    assert (Path(app.config['UPLOAD_FOLDER']) / poll['result']['url']).exists()
+
+    listing = client.get('/api/admin/jobs', headers=headers).get_json()['jobs']
+    assert [j['id'] for j in listing] == [job_id]
+
+
+def test_failed_job_retries_with_backoff_then_fails(app):
+    calls = []
+
+    @jobs.job_handler('test_flaky')
+    def _flaky(payload, job):
+        calls.append(job.attempts)
+        raise RuntimeError('smtp down')
+
+    with app.app_context():
+        job = jobs.enqueue('test_flaky', {'x': 1}, max_attempts=2)
+        job_id = job.id
+
+        assert jobs.work_once('w1') is True
+        job = db.session.get(Job, job_id)
+        assert job.status == Job.STATUS_QUEUED
+        assert job.attempts == 1
+        assert job.run_after > datetime.utcnow()
+        assert 'smtp down' in job.error
+
+        # Not due yet, so nothing is claimed
+        assert jobs.work_once('w1') is False
+
+        job.run_after = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        assert jobs.work_once('w1') is True
+        job = db.session.get(Job, job_id)
+        assert job.status == Job.STATUS_FAILED
+        assert job.attempts == 2
+        assert job.finished_at is not None
+    assert calls == [1, 2]
+
+
+def test_claimed_job_is_not_handed_to_a_second_worker(app):
+    @jobs.job_handler('test_noop')
+    def _noop(payload, job):
+        return {'ok': True}
+
+    with app.app_context():
+        jobs.enqueue('test_noop')
+        first = jobs.claim_next('w1')
+        assert first is not None and first.locked_by == 'w1'
+        assert jobs.claim_next('w2') is None
+
+        # A worker that died mid-job releases it after the lock timeout
+        first.locked_at = datetime.utcnow() - timedelta(hours=1)
+        db.session.commit()
+        assert jobs.requeue_stale(timeout_seconds=60) == 1
+        again = jobs.claim_next('w2')
+        assert again is not None and again.id == first.id and again.attempts == 2
+
+
+def test_stale_job_on_its_last_attempt_is_failed(app):
+    @jobs.job_handler('test_noop')
+    def _noop(payload, job):
+        return {'ok': True}
+
+    with app.app_context():
+        job_id = jobs.enqueue('test_noop', max_attempts=1).id
+        job = jobs.claim_next('w1')
+        job.locked_at = datetime.utcnow() - timedelta(hours=1)
+        db.session.commit()
+
+        assert jobs.requeue_stale(timeout_seconds=60) == 1
+        job = db.session.get(Job, job_id)
+        assert job.status == Job.STATUS_FAILED
+        assert job.locked_by is None and job.finished_at is not None
+        assert jobs.claim_next('w2') is None
+    assert 'requeue_stale_jobs' in jobs.registered_periodic_tasks()
+
+
+def test_async_export_rejects_unknown_entity_and_format(app):
+    headers = _seed_admin(app)
+    client = app.test_client()
+
+    assert client.post('/api/admin/exports/secrets.xlsx', json={'async': True}, headers=headers).status_code == 400
+    assert client.post('/api/admin/exports/users.exe', json={'async': True}, headers=headers).status_code == 400
+    with app.app_context():
+        assert Job.query.count() == 0
@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.marketplace import Item, ITEM_SEARCH_POSTGRES_DDL
+from apps.api.models.municipality import Municipality
+from apps.api.models.user import User
+from apps.api.utils.marketplace_search import _pg_vector, search_terms
+
+
+@pytest.fixture()
+def app():
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _seed(app):
+    with app.app_context():
+        iba = Municipality(name='Iba', slug='iba', psgc_code='012345678')
+        subic = Municipality(name='Subic', slug='subic', psgc_code='012345679')
+        db.session.add_all([iba, subic])
+        db.session.flush()
+        seller = User(username='seller', email='seller@example.com', password_hash='x', first_name='S',
+                      last_name='L', municipality_id=iba.id)
+        db.session.add(seller)
+        db.session.flush()
+        rows = [
+            ('Mountain bike', 'Lightly used, 21 speeds', iba.id),
+            ('Study table', 'Comes with a bike rack for kids', subic.id),
+            ('Rice cooker', 'Works fine', iba.id),
+            ('Electric fan', 'Stand fan, slightly noisy', subic.id),
+        ]
+        ids = {}
+        for title, desc, muni in rows:
+            item = Item(user_id=seller.id, title=title, description=desc, category='other',
+                        condition='good', transaction_type='donate', municipality_id=muni)
+            db.session.add(item)
+            db.session.flush()
+            ids[title] = item.id
+        db.session.commit()
+        return ids, iba.id
+
+
+def _ids(client, **params):
+    resp = client.get('/api/marketplace/items', query_string=params)
+    assert resp.status_code == 200
+    return [row['id'] for row in resp.get_json()['items']]
+
+
+def test_prefix_search_ranks_title_matches_first(app, client):
+    ids, _ = _seed(app)
+    assert _ids(client, q='bik') == [ids['Mountain bike'], ids['Study table']]
+    assert _ids(client, q='fan noisy') == [ids['Electric fan']]
+    assert _ids(client, q='bike noisy') == []
+
+
+def test_search_combines_with_filters_and_cursor_mode(app, client):
+    ids, iba_id = _seed(app)
+    assert _ids(client, q='bike', municipality_id=iba_id) == [ids['Mountain bike']]
+    body = client.get('/api/marketplace/items', query_string={'q': 'bike', 'cursor': '', 'include_total': 1}).get_json()
+    assert body['total'] == 2 and body['next_cursor'] is None
+
+
+def test_index_follows_updates_and_deletes(app, client):
+    ids, _ = _seed(app)
+    with app.app_context():
+        item = db.session.get(Item, ids['Rice cooker'])
+        item.title = 'Bicycle helmet'
+        db.session.delete(db.session.get(Item, ids['Mountain bike']))
+        db.session.commit()
+    assert _ids(client, q='rice') == []
+    assert _ids(client, q='bicycle') == [ids['Rice cooker']]
+    assert _ids(client, q='bike') == [ids['Study table']]
+
+
+def test_operators_in_query_are_ignored():
+    assert search_terms('"bike" OR NEAR(* -fan') == ['bike', 'or', 'near', 'fan']
+    assert search_terms('') == []
+
+
+def test_postgres_expression_matches_index_definition():
+    compiled = str(_pg_vector().compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+    normalize = lambda s: s.replace('items.', '').replace(' ', '')
+    assert normalize(compiled) in normalize(ITEM_SEARCH_POSTGRES_DDL)
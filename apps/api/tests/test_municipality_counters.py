@@ -0,0 +1,150 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.issue import Issue, IssueCategory
+from apps.api.models.marketplace import Item
+from apps.api.models.municipality import Municipality
+from apps.api.models.municipality_counter import MunicipalityCounter
+from apps.api.models.user import User
+from apps.api.utils.identity import identity_claims
+from apps.api.utils.municipality_counters import compute_counters, get_counters, reconcile_counters
+
+
+@pytest.fixture()
+def app():
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _seed(app):
+    with app.app_context():
+        muni = Municipality(name='Iba', slug='iba', psgc_code='012345678')
+        db.session.add(muni)
+        db.session.flush()
+        admin = User(username='admin1', email='admin1@example.com', password_hash='x', first_name='A',
+                     last_name='U', role='municipal_admin', admin_municipality_id=muni.id)
+        residents = [
+            User(username=f'res{i}', email=f'res{i}@example.com', password_hash='x', first_name='R',
+                 last_name='S', municipality_id=muni.id, admin_verified=(i == 0))
+            for i in range(3)
+        ]
+        category = IssueCategory(name='Roads', slug='roads')
+        db.session.add_all([admin, category, *residents])
+        db.session.flush()
+        for n, status in enumerate(('pending', 'pending', 'in_progress', 'resolved')):
+            db.session.add(Issue(issue_number=f'ISS-{n}', user_id=residents[0].id, municipality_id=muni.id,
+                                 category_id=category.id, title='Pothole', description='Big one', status=status))
+        for status, active in (('pending', True), ('available', True), ('rejected', True), ('pending', False)):
+            db.session.add(Item(user_id=residents[0].id, title='Lamp', description='d', category='other',
+                                condition='good', transaction_type='donate', municipality_id=muni.id,
+                                status=status, is_active=active))
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims=identity_claims(admin))
+        return muni.id, {'Authorization': f'Bearer {token}'}
+
+
+def _stored(municipality_id):
+    rows = MunicipalityCounter.query.filter_by(municipality_id=municipality_id).all()
+    return {(r.municipality_id, r.name): r.value for r in rows if r.value and not r.name.startswith('_')}
+
+
+def test_hooks_track_inserts_updates_and_deletes(app):
+    muni_id, _ = _seed(app)
+    with app.app_context():
+        assert _stored(muni_id) == compute_counters(muni_id)
+
+        item = Item.query.filter_by(status='pending', is_active=True).one()
+        item.status = 'available'
+        user = User.query.filter_by(username='res1').one()
+        user.admin_verified = True
+        db.session.delete(Issue.query.filter_by(status='resolved').one())
+        db.session.commit()
+
+        counters = _stored(muni_id)
+        assert counters == compute_counters(muni_id)
+        assert counters[(muni_id, 'items.active.status.available')] == 2
+        assert (muni_id, 'items.active.status.pending') not in counters
+        assert counters[(muni_id, 'users.residents.verified')] == 2
+
+        db.session.delete(item)  # expired again by the commit above
+        db.session.commit()
+        assert _stored(muni_id) == compute_counters(muni_id)
+        assert counters[(muni_id, 'issues')] == 3
+
+
+def test_changes_to_expired_attributes_are_tracked(app):
+    muni_id, _ = _seed(app)
+    with app.app_context():
+        item = Item(user_id=User.query.filter_by(username='res0').one().id, title='Fan', description='d',
+                    category='other', condition='good', transaction_type='donate', municipality_id=muni_id,
+                    status='pending')
+        user = User.query.filter_by(username='res1').one()
+        db.session.add(item)
+        db.session.commit()  # expires item.status and user.admin_verified
+
+        item.status = 'available'
+        user.admin_verified = True
+        db.session.commit()
+
+        counters = _stored(muni_id)
+        assert counters == compute_counters(muni_id)
+        assert counters[(muni_id, 'items.active.status.available')] == 2
+        assert counters[(muni_id, 'users.residents.verified')] == 2
+
+
+def test_rolled_back_changes_leave_counters_alone(app):
+    muni_id, _ = _seed(app)
+    with app.app_context():
+        before = _stored(muni_id)
+        Item.query.filter_by(status='rejected').one().is_active = False
+        db.session.flush()
+        db.session.rollback()
+        assert _stored(muni_id) == before
+
+
+def test_reconcile_repairs_bulk_update_drift(app):
+    muni_id, _ = _seed(app)
+    with app.app_context():
+        Issue.query.filter(Issue.status == 'pending').update({'status': 'closed'}, synchronize_session=False)
+        db.session.commit()
+        assert _stored(muni_id) != compute_counters(muni_id)
+
+        result = reconcile_counters()
+        db.session.commit()
+        assert result['repaired'] == 3  # pending, closed and the _seeded marker
+        assert _stored(muni_id) == compute_counters(muni_id)
+        assert reconcile_counters()['repaired'] == 0
+
+
+def test_stats_endpoints_read_counters(app, client):
+    muni_id, headers = _seed(app)
+    with app.app_context():
+        # Pre-existing data with no counter rows yet: the first read seeds them
+        MunicipalityCounter.query.delete()
+        db.session.commit()
+
+    users = client.get('/api/admin/users/stats', headers=headers).get_json()
+    assert users['total_users'] == 3 and users['pending_verifications'] == 2 and users['verified_users'] == 1
+    assert users['recent_registrations'] == 3
+    issues = client.get('/api/admin/issues/stats', headers=headers).get_json()
+    assert issues == {'total_issues': 4, 'pending_issues': 2, 'active_issues': 1, 'resolved_issues': 1}
+    items = client.get('/api/admin/marketplace/stats', headers=headers).get_json()
+    assert items == {'total_items': 3, 'pending_items': 1, 'approved_items': 1, 'rejected_items': 1}
+    dashboard = client.get('/api/admin/dashboard/stats', headers=headers).get_json()
+    assert dashboard == {'pending_verifications': 2, 'active_issues': 3, 'marketplace_items': 1, 'announcements': 0}
+
+    with app.app_context():
+        assert get_counters(muni_id)['_seeded'] == 1
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.audit import AuditLog
+from apps.api.models.marketplace import Item
+from apps.api.models.municipality import Municipality
+from apps.api.models.user import User
+from apps.api.utils.identity import identity_claims
+from apps.api.utils.pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture()
+def app():
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _seed(app, n=25):
+    base = datetime(2025, 1, 1, 12, 0, 0)
+    with app.app_context():
+        muni = Municipality(name='Iba', slug='iba', psgc_code='012345678')
+        db.session.add(muni)
+        db.session.flush()
+        admin = User(username='admin1', email='admin1@example.com', password_hash='x', first_name='Admin',
+                     last_name='User', role='municipal_admin', admin_municipality_id=muni.id)
+        seller = User(username='seller', email='seller@example.com', password_hash='x', first_name='S',
+                      last_name='L', municipality_id=muni.id)
+        db.session.add_all([admin, seller])
+        db.session.flush()
+        for i in range(n):
+            # Pairs of rows share a timestamp so the id tie-breaker matters
+            created = base + timedelta(minutes=i // 2)
+            db.session.add(Item(user_id=seller.id, title=f'Item {i}', description='d', category='furniture',
+                                condition='good', transaction_type='donate', municipality_id=muni.id,
+                                created_at=created))
+            db.session.add(AuditLog(municipality_id=muni.id, entity_type='item', entity_id=i, action='create',
+                                    created_at=created))
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims=identity_claims(admin))
+    return {'Authorization': f'Bearer {token}'}
+
+
+def _walk(client, url, key, headers=None):
+    seen, cursor, pages = [], '', 0
+    while cursor is not None:
+        resp = client.get(url, query_string={'cursor': cursor, 'per_page': 10}, headers=headers)
+        assert resp.status_code == 200
+        body = resp.get_json()
+        seen.extend(row['id'] for row in body[key])
+        meta = body.get('pagination', body)
+        cursor = meta['next_cursor']
+        pages += 1
+    return seen, pages
+
+
+def test_cursor_walk_covers_feed_once_in_order(app, client):
+    _seed(app)
+    ids, pages = _walk(client, '/api/marketplace/items', 'items')
+    assert pages == 3
+    assert len(ids) == 25 and len(set(ids)) == 25
+    assert ids == sorted(ids, reverse=True)
+
+    first = client.get('/api/marketplace/items?cursor=&per_page=10').get_json()
+    assert 'total' not in first and first['has_more'] is True
+    with_total = client.get('/api/marketplace/items?cursor=&per_page=10&include_total=1').get_json()
+    assert with_total['total'] == 25
+
+
+def test_offset_mode_is_unchanged(app, client):
+    _seed(app)
+    body = client.get('/api/marketplace/items?page=2&per_page=10').get_json()
+    assert body['page'] == 2 and body['total'] == 25 and 'next_cursor' not in body
+
+
+def test_admin_audit_cursor_walk(app, client):
+    headers = _seed(app)
+    ids, _ = _walk(client, '/api/admin/audit', 'logs', headers=headers)
+    assert len(ids) == 25 and ids == sorted(ids, reverse=True)
+
+    for url, key in (('/api/admin/transactions', 'transactions'), ('/api/admin/documents/requests', 'requests')):
+        body = client.get(url, query_string={'cursor': '', 'include_total': 1}, headers=headers).get_json()
+        assert body[key] == []
+        assert body.get('pagination', body)['next_cursor'] is None
+
+
+def test_invalid_cursor_is_rejected(app, client):
+    _seed(app, n=1)
+    assert client.get('/api/marketplace/items?cursor=not-a-cursor').status_code == 400
+    assert client.get('/api/issues?cursor=%%%').status_code == 400
+
+
+def test_cursor_round_trip():
+    when = datetime(2025, 5, 1, 8, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(when, 42)) == (when, 42)
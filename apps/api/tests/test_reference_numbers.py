@@ -0,0 +1,93 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.reference_counter import ReferenceCounter
+from apps.api.utils.reference_numbers import allocate_reference_number, get_reference_allocator
+
+
+@pytest.fixture()
+def app():
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def _file_app(tmp_path, block_size):
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'refs.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30, 'check_same_thread': False}}
+        REFERENCE_BLOCK_SIZE = block_size
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_numbers_are_sequential_per_municipality_and_year(app):
+    with app.app_context():
+        first = allocate_reference_number('issue', 3)
+        second = allocate_reference_number('issue', 3)
+        other = allocate_reference_number('issue', 4)
+        db.session.commit()
+        year = datetime.utcnow().year
+        # The Y keeps new numbers apart from legacy all-digit ISS-<muni>-<user>-<count>
+        assert first == f'ISS-3-Y{year}-00001'
+
+        assert second.endswith('-00002')
+        assert other.startswith('ISS-4-') and other.endswith('-00001')
+        assert allocate_reference_number('benefit_application', None).startswith('APP-0-')
+
+
+def test_rolled_back_allocation_is_returned(app):
+    with app.app_context():
+        allocate_reference_number('document_request', 1)
+        db.session.rollback()
+        assert allocate_reference_number('document_request', 1).endswith('-00001')
+        db.session.commit()
+        assert ReferenceCounter.query.one().next_value == 2
+
+
+@pytest.mark.parametrize('block_size', [1, 5])
+def test_concurrent_allocation_has_no_duplicates(tmp_path, block_size):
+    app = _file_app(tmp_path, block_size)
+    threads, per_thread = 6, 10
+    numbers, errors = [], []
+    lock = threading.Lock()
+    start = threading.Barrier(threads)
+
+    def worker():
+        try:
+            start.wait()
+            for _ in range(per_thread):
+                with app.app_context():
+                    number = allocate_reference_number('document_request', 7)
+                    db.session.commit()
+                with lock:
+                    numbers.append(number)
+        except Exception as exc:  # pragma: no cover - surfaced below
+            errors.append(exc)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    assert errors == []
+    total = threads * per_thread
+    assert len(set(numbers)) == total
+    assert sorted(int(n.rsplit('-', 1)[1]) for n in numbers) == list(range(1, total + 1))
+    with app.app_context():
+        assert get_reference_allocator().block_size == block_size
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,84 @@
+import pytest
+from PIL import Image
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.utils.image_variants import process_image, variant_path
+
+
+UNIQUE = 'marketplace/residents/iba/item_1/20250101_120000_abcdef12.png'
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _write(tmp_path, rel, processed=True):
+    target = tmp_path / 'uploads' / rel
+    target.parent.mkdir(parents=True, exist_ok=True)
+    Image.new('RGB', (40, 30), (10, 120, 200)).save(target)
+    if processed:
+        process_image(str(target))
+    return target
+
+
+def test_unique_upload_is_immutable_and_conditional(app, client, tmp_path):
+    target = _write(tmp_path, UNIQUE)
+    resp = client.get(f'/uploads/{UNIQUE}')
+    assert resp.status_code == 200
+    assert resp.data == target.read_bytes()
+    cc = resp.cache_control
+    assert cc.immutable and cc.public and cc.max_age == 31536000
+    etag = resp.headers['ETag']
+
+    again = client.get(f'/uploads/{UNIQUE}', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+
+    part = client.get(f'/uploads/{UNIQUE}', headers={'Range': 'bytes=0-9'})
+    assert part.status_code == 206
+    assert part.data == target.read_bytes()[:10]
+
+
+def test_non_unique_and_fallback_responses_are_revalidated(app, client, tmp_path):
+    _write(tmp_path, 'generated_docs/iba/request_7.png', processed=False)
+    resp = client.get('/uploads/generated_docs/iba/request_7.png')
+    assert resp.status_code == 200
+    assert resp.cache_control.no_cache and not resp.cache_control.immutable
+    assert 'ETag' in resp.headers
+
+    # Original not processed yet: neither it nor the stand-in variant are immutable
+    rel = 'announcements/iba/20250101_120000_00000001.png'
+    _write(tmp_path, rel, processed=False)
+    assert not client.get(f'/uploads/{rel}').cache_control.immutable
+    stand_in = client.get(f"/uploads/{variant_path(rel, 'thumb')}")
+    assert stand_in.status_code == 200 and stand_in.cache_control.no_cache
+
+    assert client.get('/uploads/marketplace/missing.png').status_code == 404
+
+
+def test_proxy_handoff(app, client, tmp_path):
+    _write(tmp_path, UNIQUE)
+    app.config['UPLOADS_ACCEL_REDIRECT_PREFIX'] = '/_uploads/'
+    resp = client.get(f'/uploads/{UNIQUE}')
+    assert resp.status_code == 200 and resp.data == b''
+    assert resp.headers['X-Accel-Redirect'] == f'/_uploads/{UNIQUE}'
+    assert resp.mimetype == 'image/png' and resp.cache_control.immutable
+
+    app.config['UPLOADS_ACCEL_REDIRECT_PREFIX'] = ''
+    app.config['UPLOADS_X_SENDFILE'] = True
+    resp = client.get(f'/uploads/{UNIQUE}')
+    assert resp.headers['X-Sendfile'].endswith(UNIQUE) and resp.data == b''
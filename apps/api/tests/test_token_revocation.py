@@ -0,0 +1,112 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token, decode_token
+from sqlalchemy import event
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.user import User
+from apps.api.models.token_blacklist import TokenBlacklist
+from apps.api.utils import jobs
+from apps.api.utils import job_handlers  # noqa: F401  (registers periodic tasks)
+from apps.api.utils.token_revocation import get_revocation_cache
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    app.config['JWT_REVOCATION_REFRESH_SECONDS'] = 60
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def _seed_user(app):
+    with app.app_context():
+        user = User(username='res1', email='res1@example.com', password_hash='x', first_name='Res',
+                    last_name='Ident', role='resident')
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+        return user.id, token
+
+
+def _blacklist_selects(app):
+    seen = []
+
+    def _listener(conn, cursor, statement, params, context, executemany):
+        if 'FROM token_blacklist' in statement:
+            seen.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _listener)
+    return seen
+
+
+def test_valid_tokens_skip_the_database_and_logout_is_immediate(app):
+    user_id, token = _seed_user(app)
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    seen = _blacklist_selects(app)
+
+    for _ in range(5):
+        assert client.get('/api/auth/profile', headers=headers).status_code == 200
+    # Loaded once at first use, then served from memory
+    assert len(seen) == 1
+
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+    assert client.get('/api/auth/profile', headers=headers).status_code == 401
+
+
+def test_revocations_from_other_workers_arrive_via_high_water_mark(app):
+    user_id, token = _seed_user(app)
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    assert client.get('/api/auth/profile', headers=headers).status_code == 200
+
+    with app.app_context():
+        jti = decode_token(token)['jti']
+        # Another worker logs the token out
+        TokenBlacklist.add_token_to_blacklist(jti, 'access', user_id, datetime.utcnow() + timedelta(hours=1))
+        cache = get_revocation_cache(app)
+        assert jti not in cache._revoked
+
+    seen = _blacklist_selects(app)
+    app.config['JWT_REVOCATION_REFRESH_SECONDS'] = 0
+    get_revocation_cache(app).refresh_seconds = 0
+    assert client.get('/api/auth/profile', headers=headers).status_code == 401
+    assert seen and 'revoked_at >=' in seen[-1]
+
+
+def test_periodic_purge_removes_expired_tokens(app):
+    user_id, _token = _seed_user(app)
+    with app.app_context():
+        now = datetime.utcnow()
+        TokenBlacklist.add_token_to_blacklist('old', 'access', user_id, now - timedelta(hours=1))
+        TokenBlacklist.add_token_to_blacklist('live', 'access', user_id, now + timedelta(hours=1))
+
+    assert 'token_cleanup' in jobs.registered_periodic_tasks()
+    app.config['TOKEN_CLEANUP_INTERVAL'] = 3600
+    stop = threading.Event()
+    thread = threading.Thread(target=jobs.run_periodic_tasks, args=(app, stop), kwargs={'tick': 0.05})
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            with app.app_context():
+                remaining = [t.jti for t in TokenBlacklist.query.all()]
+            if remaining == ['live']:
+                break
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        thread.join()
+    assert remaining == ['live']
@@ -0,0 +1,106 @@
+from datetime import datetime
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.models.marketplace import Item, ItemViewDaily
+from apps.api.models.municipality import Municipality
+from apps.api.models.user import User
+from apps.api.utils.view_counter import get_view_counter
+
+
+@pytest.fixture()
+def app():
+    app = create_app(TestingConfig)
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _seed(app, n=2):
+    with app.app_context():
+        muni = Municipality(name='Iba', slug='iba', psgc_code='012345678')
+        db.session.add(muni)
+        db.session.flush()
+        seller = User(username='seller', email='seller@example.com', password_hash='x', first_name='S',
+                      last_name='L', municipality_id=muni.id)
+        db.session.add(seller)
+        db.session.flush()
+        ids = []
+        for i in range(n):
+            item = Item(user_id=seller.id, title=f'Item {i}', description='d', category='other',
+                        condition='good', transaction_type='donate', municipality_id=muni.id)
+            db.session.add(item)
+            db.session.flush()
+            ids.append(item.id)
+        db.session.commit()
+        token = create_access_token(identity=str(seller.id), additional_claims={'role': 'resident'})
+        return ids, {'Authorization': f'Bearer {token}'}
+
+
+def test_views_are_buffered_and_flushed_in_bulk(app, client):
+    ids, headers = _seed(app)
+    app.config['ITEM_VIEW_FLUSH_INTERVAL'] = 3600  # buffer; flush manually below
+    counter = get_view_counter(app)
+    try:
+        for _ in range(3):
+            body = client.get(f'/api/marketplace/items/{ids[0]}').get_json()
+        client.get(f'/api/marketplace/items/{ids[1]}')
+        # Shown count includes buffered views even before they are written
+        assert body['view_count'] == 3
+
+        with app.app_context():
+            assert db.session.get(Item, ids[0]).view_count == 0
+            assert counter.flush() == 2
+            assert db.session.get(Item, ids[0]).view_count == 3
+            assert db.session.get(Item, ids[1]).view_count == 1
+            daily = db.session.get(ItemViewDaily, (ids[0], datetime.utcnow().date()))
+            assert daily.views == 3
+    finally:
+        counter.stop()
+
+    resp = client.get(f'/api/marketplace/items/{ids[0]}/views', headers=headers)
+    assert resp.status_code == 200
+    assert resp.get_json()['daily'][-1]['views'] == 3
+
+
+def test_write_through_mode_and_rollup_upsert(app, client):
+    ids, headers = _seed(app, n=1)
+    client.get(f'/api/marketplace/items/{ids[0]}')
+    client.get(f'/api/marketplace/items/{ids[0]}')
+    with app.app_context():
+        assert db.session.get(Item, ids[0]).view_count == 2
+        assert ItemViewDaily.query.one().views == 2
+
+
+def test_failed_flush_keeps_deltas(app, client, monkeypatch):
+    ids, _ = _seed(app, n=1)
+    app.config['ITEM_VIEW_FLUSH_INTERVAL'] = 3600
+    counter = get_view_counter(app)
+    try:
+        client.get(f'/api/marketplace/items/{ids[0]}')
+        import apps.api.utils.view_counter as vc
+
+        def boom(*args, **kwargs):
+            raise RuntimeError('db down')
+
+        monkeypatch.setattr(vc, 'write_view_deltas', boom)
+        with app.app_context(), pytest.raises(RuntimeError):
+            counter.flush()
+        assert counter.pending_for(ids[0]) == 1
+        monkeypatch.undo()
+    finally:
+        counter.stop()
+    with app.app_context():
+        assert db.session.get(Item, ids[0]).view_count == 1
@@ -1,4 +1,9 @@
-"""Generic audit logging utilities for admin/system actions."""
+"""Generic audit logging utilities for admin/system actions.
+
+By default the row joins the caller's session and commits with it. Pass
+``sync=False`` for best-effort entries written after the change itself was
+committed; they go through the batched writer in utils/audit_sink.py.
+"""
 
 from datetime import datetime
 from typing import Optional, Any, Dict
@@ -22,7 +27,27 @@ def log_action(
     old_values: Optional[Dict[str, Any]] = None,
     new_values: Optional[Dict[str, Any]] = None,
     notes: Optional[str] = None,
-) -> AuditLog:
+    sync: bool = True,
+) -> Optional[AuditLog]:
+    if not sync:
+        try:
+            from apps.api.utils.audit_sink import get_audit_sink
+        except ImportError:  # pragma: no cover - fallback for direct execution
+            from utils.audit_sink import get_audit_sink
+
+        get_audit_sink().record(AuditLog.__tablename__, {
+            'user_id': user_id,
+            'municipality_id': municipality_id,
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'action': action,
+            'actor_role': actor_role,
+            'old_values': old_values,
+            'new_values': new_values,
+            'notes': notes,
+            'created_at': datetime.utcnow(),
+        })
+        return None
     log = AuditLog(
         user_id=user_id,
         municipality_id=municipality_id,
@@ -0,0 +1,319 @@
+"""Buffered, batched writer for audit rows.
+
+``log_action`` / ``log_tx_action`` add an ORM object to the caller's
+session by default, so the audit row commits (or rolls back) with the
+business change. Best-effort audit entries, written after the change has
+already been committed, can pass ``sync=False`` instead: the row is queued
+here and a background thread writes queued rows every
+``AUDIT_FLUSH_INTERVAL`` seconds (or as soon as ``AUDIT_BATCH_SIZE`` are
+waiting) with one multi-row ``INSERT`` per table and chunk.
+
+Queued rows are lost if a worker is killed, unless ``AUDIT_SPOOL_DIR`` is
+set: every row is then also appended to a per-process JSON-lines segment
+file, deleted only after its rows are committed. A process that starts
+later replays segments whose owner is gone (detected with ``flock``; spool
+replay is skipped on platforms without ``fcntl``).
+
+A batch the database rejects is retried row by row; rows that still fail
+with a data/constraint error are logged and dropped (and kept in
+``dead-*.jsonl.rejected`` when spooling) so one bad row cannot block the
+queue. String values are cut to their column length when queued, and at
+most ``AUDIT_MAX_PENDING`` rows are held; beyond that the oldest are
+dropped.
+
+``AUDIT_FLUSH_INTERVAL = 0`` writes each row immediately (used by tests).
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import String
+from sqlalchemy.exc import DataError, IntegrityError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+try:
+    from apps.api import db
+    from apps.api.models.audit import AuditLog
+    from apps.api.models.marketplace import TransactionAuditLog
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.audit import AuditLog
+    from models.marketplace import TransactionAuditLog
+
+
+_CHUNK_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+# Tables the sink may write, by name (the name is what gets spooled)
+_TABLES = {
+    AuditLog.__tablename__: AuditLog.__table__,
+    TransactionAuditLog.__tablename__: TransactionAuditLog.__table__,
+}
+
+Row = Tuple[str, dict]
+
+# Errors caused by the row itself rather than by the database being unavailable
+_ROW_ERRORS = (DataError, IntegrityError)
+
+
+def _fit_row(table_name: str, row: dict) -> dict:
+    """Cut strings to their column length (e.g. a client-supplied User-Agent)."""
+    table = _TABLES[table_name]
+    fitted = dict(row)
+    for key, value in row.items():
+        column = table.c.get(key)
+        if column is None or not isinstance(value, str) or not isinstance(column.type, String):
+            continue
+        length = column.type.length
+        if length and len(value) > length:
+            fitted[key] = value[:length]
+    return fitted
+
+
+def write_audit_rows(rows: List[Row]) -> int:
+    """Insert ``[(table name, row)]`` with multi-row INSERTs and commit."""
+    by_table: Dict[str, List[dict]] = {}
+    for table_name, row in rows:
+        by_table.setdefault(table_name, []).append(row)
+    for table_name, table_rows in by_table.items():
+        table = _TABLES[table_name]
+        # Multi-row VALUES needs the same keys in every row
+        columns = sorted({key for row in table_rows for key in row})
+        table_rows = [{c: row.get(c) for c in columns} for row in table_rows]
+        for start in range(0, len(table_rows), _CHUNK_SIZE):
+            db.session.execute(table.insert().values(table_rows[start:start + _CHUNK_SIZE]))
+    db.session.commit()
+    return len(rows)
+
+
+def _encode(table_name: str, row: dict) -> str:
+    data = {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in row.items()}
+    return json.dumps({'table': table_name, 'row': data}, default=str) + '\n'
+
+
+def _decode(line: str) -> Optional[Row]:
+    try:
+        entry = json.loads(line)
+        row = entry['row']
+        if row.get('created_at'):
+            row['created_at'] = datetime.fromisoformat(row['created_at'])
+        return entry['table'], row
+    except (ValueError, KeyError, TypeError):
+        return None  # torn last line of a crashed writer
+
+
+class _Segment:
+    """An open, exclusively locked spool file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fh = open(path, 'a+', encoding='utf-8')
+        if fcntl is not None:
+            try:
+                fcntl.flock(self.fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self.fh.close()
+                raise
+
+    def append(self, line: str) -> None:
+        self.fh.write(line)
+        self.fh.flush()
+
+    def discard(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        self.fh.close()
+
+
+class AuditSink:
+    """Per-app queue of audit rows plus the thread that flushes it."""
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = float(app.config.get('AUDIT_FLUSH_INTERVAL', 2) or 0)
+        self.batch_size = max(1, int(app.config.get('AUDIT_BATCH_SIZE', 200) or 1))
+        self.spool_dir = app.config.get('AUDIT_SPOOL_DIR') or ''
+        self.max_pending = max(1, int(app.config.get('AUDIT_MAX_PENDING', 10000) or 1))
+        self._pending: List[Row] = []
+        self._segments: List[_Segment] = []  # closed segments whose rows are in _pending
+        self._active: Optional[_Segment] = None
+        self._seq = 0
+        self._token = uuid.uuid4().hex[:8]  # pids get reused; segment names must not
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        if self.spool_dir:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            self._active = self._new_segment()
+            self._replay_orphans()
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='audit-flusher', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    # --- spool ---------------------------------------------------------------
+
+    def _new_segment(self) -> _Segment:
+        self._seq += 1
+        return _Segment(os.path.join(self.spool_dir, f'audit-{os.getpid()}-{self._token}-{self._seq}.jsonl'))
+
+    def _replay_orphans(self) -> None:
+        if fcntl is None:
+            return
+        for name in sorted(os.listdir(self.spool_dir)):
+            path = os.path.join(self.spool_dir, name)
+            if not name.endswith('.jsonl') or path == self._active.path:
+                continue
+            try:
+                segment = _Segment(path)
+            except OSError:
+                continue  # locked: its process is still alive
+            segment.fh.seek(0)
+            rows = [row for row in map(_decode, segment.fh) if row]
+            with self._lock:
+                self._pending.extend(rows)
+                self._segments.append(segment)
+
+    # --- queue ---------------------------------------------------------------
+
+    def record(self, table_name: str, row: dict) -> None:
+        row = _fit_row(table_name, row)
+        with self._lock:
+            self._pending.append((table_name, row))
+            self._trim()
+            if self._active is not None:
+                self._active.append(_encode(table_name, row))
+            full = len(self._pending) >= self.batch_size
+        if self.interval <= 0:
+            self.flush()
+        elif full:
+            self._wake.set()
+
+    def _trim(self) -> None:
+        """Drop the oldest rows beyond ``max_pending``; call with the lock held."""
+        excess = len(self._pending) - self.max_pending
+        if excess > 0:
+            del self._pending[:excess]
+            logger.warning("Audit queue full; dropped %s oldest rows", excess)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Write queued rows; must run inside an app context."""
+        with self._lock:
+            rows, self._pending = self._pending, []
+            segments, self._segments = self._segments, []
+            if rows and self._active is not None:
+                segments.append(self._active)
+                self._active = self._new_segment()
+        if not rows:
+            for segment in segments:
+                segment.discard()
+            return 0
+        try:
+            written = write_audit_rows(rows)
+        except Exception:
+            db.session.rollback()
+            try:
+                written = self._write_one_by_one(rows)
+            except Exception:
+                with self._lock:
+                    self._pending = rows + self._pending
+                    self._segments = segments + self._segments
+                    self._trim()
+                raise
+        for segment in segments:
+            segment.discard()
+        return written
+
+    def _write_one_by_one(self, rows: List[Row]) -> int:
+        """Fallback after a failed batch: isolate and drop the rows the database rejects.
+
+        Other errors (e.g. the database is down) propagate so the caller
+        requeues the batch; rows already committed here are removed from it.
+        """
+        written = 0
+        while rows:
+            row = rows[0]
+            try:
+                write_audit_rows([row])
+                written += 1
+            except _ROW_ERRORS as exc:
+                db.session.rollback()
+                logger.error("Dropping audit row rejected by the database (%s): %s", row[0], exc)
+                self._dead_letter(row)
+            except Exception:
+                db.session.rollback()
+                raise
+            rows.pop(0)
+        return written
+
+    def _dead_letter(self, row: Row) -> None:
+        if not self.spool_dir:
+            return
+        path = os.path.join(self.spool_dir, f'dead-{os.getpid()}-{self._token}.jsonl.rejected')
+        try:
+            with open(path, 'a', encoding='utf-8') as fh:
+                fh.write(_encode(*row))
+        except OSError:
+            logger.exception("Could not keep rejected audit row")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the flusher and write whatever is still queued."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        with self.app.app_context():
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception("Final audit flush failed")
+            finally:
+                db.session.remove()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            with self.app.app_context():
+                try:
+                    self.flush()
+                except Exception:
+                    self.app.logger.exception("Audit flush failed")
+                finally:
+                    db.session.remove()
+
+
+_init_lock = threading.Lock()
+
+
+def get_audit_sink(app=None) -> AuditSink:
+    app = app or current_app._get_current_object()
+    sink = app.extensions.get('audit_sink')
+    if sink is None:
+        with _init_lock:
+            sink = app.extensions.get('audit_sink')
+            if sink is None:
+                sink = AuditSink(app)
+                app.extensions['audit_sink'] = sink
+    return sink
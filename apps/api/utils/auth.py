@@ -5,8 +5,14 @@ from typing import Optional
 from flask import jsonify
 from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
 
-from apps.api.models.token_blacklist import TokenBlacklist
-from apps.api.models.user import User
+from apps.api.utils.token_revocation import is_token_revoked
+from apps.api.utils.identity import (
+    ADMIN_ROLES,
+    claim,
+    current_admin_municipality_id,
+    current_user,
+    verification_flag,
+)
 
 
 def jwt_identity_as_int() -> Optional[int]:
@@ -23,34 +29,47 @@ def jwt_identity_as_int() -> Optional[int]:
 
 
 def get_current_user():
-    """Get the current authenticated user."""
+    """Get the current authenticated user (loaded once per request)."""
+    return current_user()
+
+
+def _require_user_id():
     verify_jwt_in_request()
-    user_id = jwt_identity_as_int()
+    if not jwt_identity_as_int():
+        return jsonify({'error': 'Authentication required'}), 401
+    return None
 
-    if not user_id:
-        return None
 
-    user = User.query.get(user_id)
-    return user
+def _require_user():
+    """401/404 response when the caller cannot be resolved, else None."""
+    denied = _require_user_id()
+    if denied:
+        return denied
+    if current_user() is None:
+        return jsonify({'error': 'User not found'}), 404
+    return None
+
+
+def _require_role(allowed, error='Admin access required'):
+    """Role check from the token claim; legacy tokens fall back to the user row."""
+    role = claim('role')
+    if role is None:
+        denied = _require_user()
+        if denied:
+            return denied
+        role = current_user().role
+    if role not in allowed:
+        return jsonify({'error': error, 'code': 'ROLE_MISMATCH'}), 403
+    return None
 
 
 def admin_required(fn):
     """Decorator to require admin role (accept legacy 'municipal_admin')."""
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        user_id = jwt_identity_as_int()
-
-        if not user_id:
-            return jsonify({'error': 'Authentication required'}), 401
-
-        user = User.query.get(user_id)
-
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-
-        if user.role not in ('admin', 'municipal_admin'):
-            return jsonify({'error': 'Admin access required', 'code': 'ROLE_MISMATCH'}), 403
+        denied = _require_user_id() or _require_role(ADMIN_ROLES)
+        if denied:
+            return denied
 
         return fn(*args, **kwargs)
     
@@ -61,22 +80,15 @@ def verified_resident_required(fn):
     """Decorator to require verified resident (email verified at minimum)."""
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        user_id = jwt_identity_as_int()
-
-        if not user_id:
-            return jsonify({'error': 'Authentication required'}), 401
-
-        user = User.query.get(user_id)
-
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-
         # Strict resident role requirement
-        if user.role != 'resident':
-            return jsonify({'error': 'Resident account required', 'code': 'ROLE_MISMATCH'}), 403
+        denied = _require_user_id() or _require_role(('resident',), 'Resident account required')
+        if denied:
+            return denied
         
-        if not user.email_verified:
+        if not verification_flag('email_verified'):
+            denied = _require_user()
+            if denied:
+                return denied
             return jsonify({'error': 'Email verification required'}), 403
         
         return fn(*args, **kwargs)
@@ -88,21 +100,14 @@ def fully_verified_required(fn):
     """Decorator to require fully verified resident (admin verified)."""
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        user_id = jwt_identity_as_int()
-
-        if not user_id:
-            return jsonify({'error': 'Authentication required'}), 401
-
-        user = User.query.get(user_id)
-
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-
         # Must be a resident and fully verified
-        if user.role != 'resident':
-            return jsonify({'error': 'Resident account required', 'code': 'ROLE_MISMATCH'}), 403
-        if not user.admin_verified:
+        denied = _require_user_id() or _require_role(('resident',), 'Resident account required')
+        if denied:
+            return denied
+        if not verification_flag('admin_verified'):
+            denied = _require_user()
+            if denied:
+                return denied
             return jsonify({'error': 'Full verification required. Please submit ID documents for verification'}), 403
         
         return fn(*args, **kwargs)
@@ -114,18 +119,14 @@ def adult_required(fn):
     """Decorator to require user to be 18 or older."""
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        user_id = jwt_identity_as_int()
-
-        if not user_id:
-            return jsonify({'error': 'Authentication required'}), 401
-
-        user = User.query.get(user_id)
-
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-
-        if user.is_under_18():
+        denied = _require_user_id()
+        if denied:
+            return denied
+
+        if not verification_flag('adult'):
+            denied = _require_user()
+            if denied:
+                return denied
             return jsonify({'error': 'You must be 18 or older to access this feature'}), 403
         
         return fn(*args, **kwargs)
@@ -138,7 +139,7 @@ def check_token_blacklist():
     verify_jwt_in_request()
     jti = get_jwt()['jti']
     
-    if TokenBlacklist.is_token_revoked(jti):
+    if is_token_revoked(jti):
         return jsonify({'error': 'Token has been revoked'}), 401
     
     return None
@@ -149,23 +150,13 @@ def municipality_admin_required(municipality_id=None):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            verify_jwt_in_request()
-            user_id = jwt_identity_as_int()
-
-            if not user_id:
-                return jsonify({'error': 'Authentication required'}), 401
-
-            user = User.query.get(user_id)
-
-            if not user:
-                return jsonify({'error': 'User not found'}), 404
-
-            if user.role not in ('admin', 'municipal_admin'):
-                return jsonify({'error': 'Admin access required', 'code': 'ROLE_MISMATCH'}), 403
+            denied = _require_user_id() or _require_role(ADMIN_ROLES)
+            if denied:
+                return denied
             
             # If specific municipality is required
             if municipality_id is not None:
-                if user.admin_municipality_id != municipality_id:
+                if current_admin_municipality_id() != municipality_id:
                     return jsonify({'error': 'You do not have admin access to this municipality'}), 403
             
             return fn(*args, **kwargs)
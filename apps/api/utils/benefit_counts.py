@@ -0,0 +1,220 @@
+"""Stored application counts for benefit programs.
+
+Program listings used to ``GROUP BY program_id`` over approved applications
+on every request and the admin program view ran three more ``COUNT(*)``
+queries. Two stored values replace them, both written in the same
+transaction as the application change:
+
+* ``benefit_program_counts``: applications per (program, status), moved by
+  :func:`record_new_application`, :func:`record_status_change`,
+  :func:`record_removed_application` and :func:`complete_program_applications`.
+* ``benefit_programs.current_beneficiaries``: applications in
+  ``BENEFICIARY_STATUSES``. Entering that set goes through a guarded
+  ``UPDATE ... WHERE current_beneficiaries < max_beneficiaries``, so two
+  admins approving at once cannot overfill a capped program.
+
+Changes made outside these helpers (raw SQL, manual fixes) are repaired by
+:func:`reconcile_benefit_counts` / ``scripts/reconcile_benefit_counts.py``.
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+try:
+    from apps.api import db
+    from apps.api.models.benefit import BenefitApplication, BenefitProgram, BenefitProgramCount
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.benefit import BenefitApplication, BenefitProgram, BenefitProgramCount
+
+
+BENEFICIARY_STATUSES = ('approved', 'completed')
+
+_table = BenefitProgramCount.__table__
+
+
+class BeneficiaryLimitReached(Exception):
+    """The program already has ``max_beneficiaries`` approved applicants."""
+
+
+# --- Writing ----------------------------------------------------------------
+
+def _insert_missing(program_id: int, status: str) -> None:
+    values = dict(program_id=program_id, status=status, value=0)
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        db.session.execute(insert(_table).values(**values).on_conflict_do_nothing())
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(_table.insert().values(**values))
+    except IntegrityError:
+        pass  # created concurrently
+
+
+def _set(program_id: int, status: str, value_expr) -> None:
+    stmt = update(_table).where(
+        _table.c.program_id == program_id, _table.c.status == status
+    ).values(value=value_expr)
+    if db.session.execute(stmt).rowcount == 0:
+        _insert_missing(program_id, status)
+        db.session.execute(stmt)
+
+
+def _add(program_id: int, status: str, delta: int) -> None:
+    if delta:
+        _set(program_id, status, _table.c.value + delta)
+
+
+def _beneficiaries(program_id: int, delta: int) -> None:
+    current = func.coalesce(BenefitProgram.current_beneficiaries, 0)
+    stmt = update(BenefitProgram).where(BenefitProgram.id == program_id)
+    if delta > 0:
+        stmt = stmt.where(or_(
+            BenefitProgram.max_beneficiaries.is_(None),
+            BenefitProgram.max_beneficiaries <= 0,
+            current + delta <= BenefitProgram.max_beneficiaries,
+        ))
+        new_value = current + delta
+    else:
+        new_value = case((current + delta < 0, 0), else_=current + delta)
+    result = db.session.execute(
+        stmt.values(current_beneficiaries=new_value).execution_options(synchronize_session=False)
+    )
+    if delta > 0 and result.rowcount == 0:
+        raise BeneficiaryLimitReached(program_id)
+    program = db.session.identity_map.get(db.session.identity_key(BenefitProgram, program_id))
+    if program is not None:
+        db.session.expire(program, ['current_beneficiaries'])
+
+
+def _normalise(status: Optional[str]) -> str:
+    return (status or 'pending').lower()
+
+
+def record_new_application(program_id: int, status: str = 'pending') -> None:
+    """Count a newly created application (same transaction as the insert)."""
+    status = _normalise(status)
+    if status in BENEFICIARY_STATUSES:
+        _beneficiaries(program_id, 1)
+    _add(program_id, status, 1)
+
+
+def record_removed_application(program_id: int, status: str) -> None:
+    """Uncount a deleted application."""
+    status = _normalise(status)
+    if status in BENEFICIARY_STATUSES:
+        _beneficiaries(program_id, -1)
+    _add(program_id, status, -1)
+
+
+def record_status_change(program_id: int, previous: str, new: str) -> None:
+    """Move one application between statuses.
+
+    Raises :class:`BeneficiaryLimitReached` (nothing written) when it would
+    take a capped program past ``max_beneficiaries``; the caller rolls back.
+    """
+    previous, new = _normalise(previous), _normalise(new)
+    if previous == new:
+        return
+    was, now = previous in BENEFICIARY_STATUSES, new in BENEFICIARY_STATUSES
+    if now and not was:
+        _beneficiaries(program_id, 1)
+    elif was and not now:
+        _beneficiaries(program_id, -1)
+    # Fixed order keeps two concurrent transitions from deadlocking
+    for status, delta in sorted(((previous, -1), (new, 1))):
+        _add(program_id, status, delta)
+
+
+def complete_program_applications(program_id: int, now: Optional[datetime] = None) -> int:
+    """Mark a program's approved applications completed in one UPDATE; returns how many."""
+    now = now or datetime.utcnow()
+    moved = db.session.execute(
+        update(BenefitApplication)
+        .where(BenefitApplication.program_id == program_id, BenefitApplication.status == 'approved')
+        .values(
+            status='completed',
+            completed_at=now,
+            approved_at=func.coalesce(BenefitApplication.approved_at, now),
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount or 0
+    # approved -> completed stays within BENEFICIARY_STATUSES
+    _add(program_id, 'approved', -moved)
+    _add(program_id, 'completed', moved)
+    return int(moved)
+
+
+def clear_program_counts(program_id: int) -> None:
+    """Drop a program's count rows (before deleting the program)."""
+    db.session.execute(_table.delete().where(_table.c.program_id == program_id))
+
+
+# --- Reading ----------------------------------------------------------------
+
+def get_status_counts(program_id: int) -> Dict[str, int]:
+    """Applications per status for one program (missing statuses count as 0)."""
+    rows = db.session.execute(
+        select(_table.c.status, _table.c.value).where(_table.c.program_id == program_id)
+    ).all()
+    return Counter({status: int(value) for status, value in rows if value})
+
+
+# --- Reconcile --------------------------------------------------------------
+
+def compute_benefit_counts(program_id: Optional[int] = None) -> Dict[Tuple[int, str], int]:
+    """True (program, status) counts from benefit_applications."""
+    status_col = func.lower(func.coalesce(BenefitApplication.status, 'pending'))
+    q = select(BenefitApplication.program_id, status_col, func.count()).group_by(
+        BenefitApplication.program_id, status_col
+    )
+    if program_id is not None:
+        q = q.where(BenefitApplication.program_id == program_id)
+    truth: Dict[Tuple[int, str], int] = Counter()
+    for pid, status, n in db.session.execute(q):
+        truth[(pid, status)] += int(n)
+    return truth
+
+
+def reconcile_benefit_counts(program_id: Optional[int] = None) -> Dict[str, int]:
+    """Overwrite drifted status counts and beneficiary totals; the caller commits."""
+    stored_q = select(_table.c.program_id, _table.c.status, _table.c.value).with_for_update()
+    programs_q = select(BenefitProgram.id, BenefitProgram.current_beneficiaries).with_for_update()
+    if program_id is not None:
+        stored_q = stored_q.where(_table.c.program_id == program_id)
+        programs_q = programs_q.where(BenefitProgram.id == program_id)
+    # Lock first so concurrent status changes wait and are included in the counts below
+    programs = {pid: int(current or 0) for pid, current in db.session.execute(programs_q)}
+    stored = {(pid, status): int(value) for pid, status, value in db.session.execute(stored_q)}
+    truth = compute_benefit_counts(program_id)
+
+    repaired = 0
+    for key in sorted(set(stored) | set(truth)):
+        want = truth.get(key, 0)
+        if stored.get(key, 0) != want:
+            _set(key[0], key[1], want)
+            repaired += 1
+
+    beneficiaries = Counter()
+    for (pid, status), n in truth.items():
+        if status in BENEFICIARY_STATUSES:
+            beneficiaries[pid] += n
+    for pid, current in sorted(programs.items()):
+        if current != beneficiaries.get(pid, 0):
+            db.session.execute(
+                update(BenefitProgram).where(BenefitProgram.id == pid)
+                .values(current_beneficiaries=beneficiaries.get(pid, 0))
+                .execution_options(synchronize_session=False)
+            )
+            repaired += 1
+    return {'checked': len(set(stored) | set(truth)) + len(programs), 'repaired': repaired}
@@ -0,0 +1,42 @@
+"""Scheduled completion of benefit programs whose duration has run out.
+
+Programs with a ``duration_days`` store ``expires_at`` (created_at +
+duration, maintained by the model on save). :func:`expire_benefit_programs`
+completes every program past it with a single indexed ``UPDATE``, so the
+program list endpoints no longer check and commit expiry on each GET.
+
+It runs as the ``benefit_expiry`` periodic task
+(``BENEFIT_EXPIRY_INTERVAL``), as a ``benefit_expiry`` job, and from
+``scripts/expire_benefit_programs.py``. Between runs, reads treat a program
+past ``expires_at`` as completed (see ``BenefitProgram.open_clause`` and
+``to_dict``), so the sweep interval only affects the stored flags.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import func, update
+
+try:
+    from apps.api import db
+    from apps.api.models.benefit import BenefitProgram
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.benefit import BenefitProgram
+
+
+def expire_benefit_programs(now: Optional[datetime] = None) -> Dict[str, int]:
+    """Complete active programs past ``expires_at``; the caller commits."""
+    now = now or datetime.utcnow()
+    result = db.session.execute(
+        update(BenefitProgram)
+        .where(BenefitProgram.is_active.is_(True), BenefitProgram.expires_at <= now)
+        .values(
+            is_active=False,
+            is_accepting_applications=False,
+            completed_at=func.coalesce(BenefitProgram.completed_at, BenefitProgram.expires_at),
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return {'expired': int(result.rowcount or 0)}
@@ -0,0 +1,213 @@
+"""Content-addressed storage for uploads.
+
+``save_uploaded_file`` streams each upload into a temp file while hashing
+it, then keeps one copy per distinct content under
+``UPLOAD_FOLDER/blobs/ab/cd/<sha256><ext>``. The entity path it returns
+(``marketplace/.../<timestamp>_<uuid>.jpg`` as before) is a hard link to
+that blob, so ``/uploads``, the admin file viewer and document rendering
+keep reading plain paths while duplicate uploads take no extra space.
+Filesystems without hard links get a copy instead (correct, no saving).
+
+``upload_refs`` records which blob each entity path points at and
+``upload_blobs.ref_count`` how many paths do. ``delete_file`` and the
+``cleanup_*_files`` helpers release references; a blob file is removed
+when its count reaches zero. Reference rows are written in the caller's
+session and committed with it, like the rest of the request's changes; the
+blob file itself is unlinked only after that commit (a rollback keeps it),
+and not at all if the same content was uploaded again in the meantime.
+
+Blobs are keyed by the hash of the bytes as uploaded. The image pipeline
+rewrites an image blob once (EXIF strip) and writes its variants next to
+it; later uploads of the same photo reuse both.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.exc import IntegrityError
+
+try:
+    from apps.api import db
+    from apps.api.models.upload_blob import UploadBlob, UploadRef
+    from apps.api.utils.image_variants import delete_variants
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.upload_blob import UploadBlob, UploadRef
+    from utils.image_variants import delete_variants
+
+
+BLOB_DIR = 'blobs'
+_CHUNK_SIZE = 64 * 1024
+_FREED_KEY = 'freed_upload_blobs'
+
+_blobs = UploadBlob.__table__
+
+
+def content_addressed_enabled() -> bool:
+    return bool(current_app.config.get('UPLOAD_CONTENT_ADDRESSED', True))
+
+
+def _upload_root() -> str:
+    return str(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
+
+
+def blob_rel_path(sha256: str, extension: str = '') -> str:
+    return '/'.join((BLOB_DIR, sha256[:2], sha256[2:4], f"{sha256}{extension}"))
+
+
+def link_file(src: str, dst: str) -> None:
+    """Atomically make ``dst`` a hard link to ``src`` (a copy if links are unsupported)."""
+    tmp = f"{dst}.lnk-{os.getpid()}-{threading.get_ident()}"
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _stream_to_temp(file, directory: str) -> Tuple[str, str, int]:
+    """Copy ``file`` to a temp file in ``directory``; returns (path, sha256, size)."""
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f"upload-{os.getpid()}-{threading.get_ident()}-{datetime.utcnow().timestamp()}")
+    digest = hashlib.sha256()
+    size = 0
+    stream = getattr(file, 'stream', file)
+    stream.seek(0)
+    with open(tmp, 'wb') as out:
+        while True:
+            chunk = stream.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return tmp, digest.hexdigest(), size
+
+
+def _insert_blob(values: dict) -> None:
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        db.session.execute(insert(_blobs).values(**values).on_conflict_do_nothing())
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(_blobs.insert().values(**values))
+    except IntegrityError:
+        pass  # created concurrently
+
+
+def _add_reference(rel_path: str, sha256: str, size: int, extension: str) -> str:
+    """Count a new reference to ``sha256``; returns the extension the blob is stored with."""
+    where = _blobs.c.sha256 == sha256
+    bump = update(_blobs).where(where).values(ref_count=_blobs.c.ref_count + 1)
+    if db.session.execute(bump).rowcount == 0:
+        _insert_blob(dict(sha256=sha256, size=size, extension=extension, ref_count=0,
+                          created_at=datetime.utcnow()))
+        db.session.execute(bump)
+    db.session.add(UploadRef(path=rel_path, sha256=sha256))
+    db.session.flush()
+    return db.session.execute(select(_blobs.c.extension).where(where)).scalar_one()
+
+
+def store_upload(file, abs_path: str, rel_path: str) -> str:
+    """Save ``file`` at ``abs_path`` backed by its blob; returns the blob's absolute path."""
+    root = _upload_root()
+    extension = os.path.splitext(abs_path)[1].lower()[:16]
+    tmp, sha256, size = _stream_to_temp(file, os.path.join(root, BLOB_DIR, 'tmp'))
+    try:
+        extension = _add_reference(rel_path, sha256, size, extension)
+        blob_path = os.path.join(root, blob_rel_path(sha256, extension))
+        if not os.path.isfile(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(tmp, blob_path)
+        link_file(blob_path, abs_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return blob_path
+
+
+def _release(refs: List[Tuple[str, str]]) -> int:
+    if not refs:
+        return 0
+    counts = Counter(sha256 for _, sha256 in refs)
+    db.session.execute(delete(UploadRef).where(UploadRef.path.in_([path for path, _ in refs])))
+    for sha256, n in counts.items():
+        db.session.execute(
+            update(_blobs).where(_blobs.c.sha256 == sha256).values(ref_count=_blobs.c.ref_count - n)
+        )
+    dead = db.session.execute(
+        select(_blobs.c.sha256, _blobs.c.extension)
+        .where(_blobs.c.sha256.in_(list(counts)), _blobs.c.ref_count <= 0)
+    ).all()
+    if not dead:
+        return 0
+    db.session.execute(delete(UploadBlob).where(UploadBlob.sha256.in_([row.sha256 for row in dead])))
+
+    # Unlinked once the caller commits; see _remove_freed_blobs
+    root = _upload_root()
+    freed = db.session.info.setdefault(_FREED_KEY, {})
+    for row in dead:
+        freed[row.sha256] = os.path.join(root, blob_rel_path(row.sha256, row.extension))
+    return len(dead)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _remove_freed_blobs(session):
+    freed = session.info.pop(_FREED_KEY, None)
+    if not freed:
+        return
+    # The session cannot run SQL here; a short connection of its own checks
+    # whether another upload brought the content back after our commit
+    with session.get_bind().connect() as conn:
+        revived = set(conn.execute(
+            select(_blobs.c.sha256).where(_blobs.c.sha256.in_(list(freed)))
+        ).scalars())
+    for sha256, blob_path in freed.items():
+        if sha256 in revived:
+            continue
+        try:
+            os.remove(blob_path)
+        except OSError:
+            pass
+        delete_variants(blob_path)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _keep_freed_blobs(session):
+    session.info.pop(_FREED_KEY, None)
+
+
+def release_paths(rel_paths: Iterable[Optional[str]]) -> int:
+    """Drop the references held by ``rel_paths``; returns the number of blobs freed."""
+    paths = [p for p in rel_paths if p]
+    if not paths:
+        return 0
+    refs = db.session.execute(
+        select(UploadRef.path, UploadRef.sha256).where(UploadRef.path.in_(paths))
+    ).all()
+    return _release([tuple(r) for r in refs])
+
+
+def release_prefix(rel_prefix: str) -> int:
+    """Drop every reference under a directory such as ``marketplace/residents/iba/item_4/``."""
+    prefix = rel_prefix.rstrip('/') + '/'
+    refs = db.session.execute(
+        select(UploadRef.path, UploadRef.sha256).where(UploadRef.path.startswith(prefix, autoescape=True))
+    ).all()
+    return _release([tuple(r) for r in refs])
@@ -0,0 +1,223 @@
+"""Bulk PDF generation for document requests.
+
+Requests are read in one query, reduced to plain attribute snapshots and
+rendered in a process pool (ReportLab is CPU-bound, so threads would not
+help). The parent process then applies every ``document_file`` update and
+audit entry and commits once. Used by the admin bulk endpoint, the
+``document_pdf_bulk`` job and ``scripts/generate_document_pdfs.py``.
+
+Set ``BULK_PDF_PROCESSES=1`` to render inline (tests do this).
+"""
+
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional
+
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+try:
+    from apps.api import db
+    from apps.api.models.user import User
+    from apps.api.models.document import DocumentRequest, DocumentType
+    from apps.api.utils.document_issuing import mark_document_issued
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.user import User
+    from models.document import DocumentRequest, DocumentType
+    from utils.document_issuing import mark_document_issued
+
+
+# Config keys the renderer reads through current_app in pool workers
+_WORKER_CONFIG_KEYS = ('UPLOAD_FOLDER', 'QR_BASE_URL', 'WEB_BASE_URL', 'APP_NAME', 'DOC_ASSET_CHECK_INTERVAL')
+
+
+def select_bulk_requests(municipality_id: int, *, ids: Optional[Iterable[int]] = None, status: Optional[str] = None,
+                         document_type_id: Optional[int] = None, start: Optional[datetime] = None,
+                         end: Optional[datetime] = None, limit: Optional[int] = None) -> List[DocumentRequest]:
+    """Digital requests in the municipality matching ids or the filter, oldest first.
+
+    With ``ids``, requests from other municipalities or with pickup delivery
+    are still returned so the caller can report them per id.
+    """
+    q = DocumentRequest.query.options(
+        joinedload(DocumentRequest.user),
+        joinedload(DocumentRequest.municipality),
+        joinedload(DocumentRequest.barangay),
+    )
+    if ids is not None:
+        q = q.filter(DocumentRequest.id.in_(list(ids)))
+    else:
+        q = q.filter(DocumentRequest.municipality_id == municipality_id, DocumentRequest.delivery_method == 'digital')
+        if status:
+            q = q.filter(DocumentRequest.status == status)
+        if document_type_id:
+            q = q.filter(DocumentRequest.document_type_id == document_type_id)
+        if start is not None:
+            q = q.filter(DocumentRequest.created_at >= start)
+        if end is not None:
+            q = q.filter(DocumentRequest.created_at <= end)
+    q = q.order_by(DocumentRequest.created_at.asc(), DocumentRequest.id.asc())
+    if limit:
+        q = q.limit(limit)
+    return q.all()
+
+
+def _snapshot(req: DocumentRequest, doc_type: DocumentType, admin_user: Optional[User]) -> SimpleNamespace:
+    """Picklable stand-ins carrying what generate_document_pdf reads."""
+    user = req.user
+    return SimpleNamespace(
+        request=SimpleNamespace(
+            id=req.id,
+            request_number=req.request_number,
+            municipality_id=req.municipality_id,
+            municipality=SimpleNamespace(name=getattr(req.municipality, 'name', '')),
+            barangay=SimpleNamespace(name=getattr(req.barangay, 'name', '')),
+            delivery_address=req.delivery_address,
+            purpose=req.purpose,
+            created_at=req.created_at,
+            admin_edited_content=req.admin_edited_content,
+            additional_notes=req.additional_notes,
+            resident_input=req.resident_input,
+        ),
+        document_type=SimpleNamespace(code=doc_type.code, name=doc_type.name),
+        user=SimpleNamespace(
+            first_name=getattr(user, 'first_name', None),
+            last_name=getattr(user, 'last_name', None),
+            username=getattr(user, 'username', None),
+        ),
+        admin_user=SimpleNamespace(
+            first_name=admin_user.first_name,
+            last_name=admin_user.last_name,
+            username=admin_user.username,
+            role=admin_user.role,
+        ) if admin_user is not None else None,
+    )
+
+
+def _render(snap: SimpleNamespace):
+    # Resolved at call time so tests can monkeypatch the generator
+    from apps.api.utils.pdf_generator import generate_document_pdf
+
+    try:
+        _abs, rel_path = generate_document_pdf(snap.request, snap.document_type, snap.user, admin_user=snap.admin_user)
+        return snap.request.id, rel_path, None
+    except Exception as exc:
+        return snap.request.id, None, f"{type(exc).__name__}: {exc}"
+
+
+def _init_worker(root_path: str, config: dict) -> None:
+    """Give each pool process a minimal app context for the renderer."""
+    from flask import Flask
+
+    app = Flask('apps.api.app', root_path=root_path)
+    app.config.update(config)
+    app.app_context().push()
+
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+
+def _shutdown_pool() -> None:
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _pool_key = None, None
+
+
+atexit.register(_shutdown_pool)
+
+
+def _get_pool(processes: int) -> ProcessPoolExecutor:
+    """Process pool kept warm across batches (fonts, logos and watermarks stay cached)."""
+    global _pool, _pool_key
+    app = current_app._get_current_object()
+    config = {k: (str(app.config.get(k)) if k == 'UPLOAD_FOLDER' else app.config.get(k)) for k in _WORKER_CONFIG_KEYS}
+    key = (processes, app.root_path, tuple(sorted((k, str(v)) for k, v in config.items())))
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            import multiprocessing
+            # spawn: forking a process with live DB connections and threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(app.root_path, config),
+            )
+            _pool_key = key
+        return _pool
+
+
+def _process_count(n_items: int) -> int:
+    configured = int(current_app.config.get('BULK_PDF_PROCESSES', 0) or 0)
+    processes = configured if configured > 0 else (os.cpu_count() or 1)
+    return max(1, min(processes, n_items))
+
+
+def generate_bulk_pdfs(requests: List[DocumentRequest], *, municipality_id: int, admin_user: Optional[User] = None,
+                       actor_id=None, requested_ids: Optional[Iterable[int]] = None) -> Dict:
+    """Render PDFs for ``requests`` and commit all updates in one transaction.
+
+    Returns ``{'results': {id: {...}}, 'summary': {...}}`` where each result
+    has ``ok`` plus either ``url`` or ``error``.
+    """
+    results: Dict[int, dict] = {}
+    if requested_ids is not None:
+        found = {r.id for r in requests}
+        for rid in requested_ids:
+            if rid not in found:
+                results[rid] = {'ok': False, 'error': 'Request not found'}
+
+    type_ids = {r.document_type_id for r in requests}
+    doc_types = {t.id: t for t in DocumentType.query.filter(DocumentType.id.in_(type_ids)).all()} if type_ids else {}
+
+    by_id: Dict[int, DocumentRequest] = {}
+    snapshots = []
+    for req in requests:
+        if req.municipality_id != municipality_id:
+            results[req.id] = {'ok': False, 'error': 'Request not in your municipality'}
+        elif (req.delivery_method or '').lower() != 'digital':
+            results[req.id] = {'ok': False, 'error': 'PDF generation is only available for digital requests'}
+        elif req.document_type_id not in doc_types:
+            results[req.id] = {'ok': False, 'error': 'Document type not found'}
+        else:
+            by_id[req.id] = req
+            snapshots.append(_snapshot(req, doc_types[req.document_type_id], admin_user))
+
+    rendered = []
+    processes = _process_count(len(snapshots))
+    if processes > 1:
+        try:
+            pool = _get_pool(processes)
+            chunksize = max(1, len(snapshots) // (processes * 4))
+            rendered = list(pool.map(_render, snapshots, chunksize=chunksize))
+        except BrokenProcessPool:
+            _shutdown_pool()
+            current_app.logger.warning("Bulk PDF pool broke; rendering inline")
+            rendered = []
+    if not rendered:
+        rendered = [_render(s) for s in snapshots]
+
+    for rid, rel_path, error in rendered:
+        if error:
+            results[rid] = {'ok': False, 'error': error}
+            continue
+        mark_document_issued(by_id[rid], rel_path, actor_id=actor_id)
+        results[rid] = {'ok': True, 'url': f"/uploads/{rel_path}"}
+    db.session.commit()
+
+    succeeded = sum(1 for r in results.values() if r['ok'])
+    return {
+        'results': results,
+        'summary': {'total': len(results), 'succeeded': succeeded, 'failed': len(results) - succeeded},
+    }
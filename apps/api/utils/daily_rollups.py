@@ -0,0 +1,344 @@
+"""Daily activity rollups for the admin growth/trend charts.
+
+``daily_rollups`` holds one row per (municipality, day, metric):
+
+* ``registrations``    residents by ``users.created_at``
+* ``document_requests`` plus ``document_requests.type.<document_type_id>``
+* ``issues``, ``listings`` (marketplace items), ``transactions``
+
+Rows are kept current the same way as the dashboard counters
+(utils/municipality_counters.py): ORM insert/update/delete hooks collect
+deltas for the (municipality, day, metric) a row enters and leaves and
+write them at the end of the flush. ``backfill_rollups`` recomputes a day
+range from the raw tables with one ``GROUP BY`` per metric; it seeds a
+municipality's history on its first chart read, runs from
+``scripts/backfill_rollups.py``, and the ``daily_rollups`` periodic task
+re-derives the last ``ROLLUP_RECONCILE_DAYS`` days to repair drift from
+bulk updates. A chart range is then a read of at most ~365 rows per metric.
+
+Days are UTC dates, like the stored ``created_at`` values.
+"""
+
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, and_, cast, event, func, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import object_session
+
+try:
+    from apps.api import db
+    from apps.api.models.daily_rollup import DailyRollup
+    from apps.api.models.user import User
+    from apps.api.models.document import DocumentRequest
+    from apps.api.models.issue import Issue
+    from apps.api.models.marketplace import Item, Transaction
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.daily_rollup import DailyRollup
+    from models.user import User
+    from models.document import DocumentRequest
+    from models.issue import Issue
+    from models.marketplace import Item, Transaction
+
+
+# Marker row recording that a municipality's history has been backfilled
+BACKFILLED = '_backfilled'
+_MARKER_DAY = date(1970, 1, 1)
+
+_table = DailyRollup.__table__
+_DELTAS_KEY = 'daily_rollup_deltas'
+
+Key = Tuple[int, date, str]
+
+_ONE_DAY = timedelta(days=1)
+
+
+def _day(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _registration_metrics(v) -> List[str]:
+    return ['registrations'] if v['role'] == 'resident' else []
+
+
+def _document_metrics(v) -> List[str]:
+    return ['document_requests', f"document_requests.type.{v['document_type_id']}"]
+
+
+# model -> (extra columns the metrics depend on, metric function)
+_SPECS = {
+    User: (('role',), _registration_metrics),
+    DocumentRequest: (('document_type_id',), _document_metrics),
+    Issue: ((), lambda v: ['issues']),
+    Item: ((), lambda v: ['listings']),
+    Transaction: (('item_id',), lambda v: ['transactions']),
+}
+
+
+def _keys(model, values: dict, connection=None) -> List[Key]:
+    municipality_id = values.get('municipality_id')
+    if model is Transaction and values.get('item_id') is not None and connection is not None:
+        # Transactions belong to their item's municipality
+        municipality_id = connection.execute(
+            select(Item.municipality_id).where(Item.id == values['item_id'])
+        ).scalar()
+    day = _day(values.get('created_at'))
+    if not municipality_id or day is None:
+        return []
+    return [(municipality_id, day, metric) for metric in _SPECS[model][1](values)]
+
+
+def _columns(model) -> Tuple[str, ...]:
+    cols = ('created_at',) + _SPECS[model][0]
+    return cols if model is Transaction else ('municipality_id',) + cols
+
+
+def _current_values(model, target) -> dict:
+    return {c: getattr(target, c) for c in _columns(model)}
+
+
+def _previous_values(model, target) -> dict:
+    state = inspect(target)
+    values = {}
+    for c in _columns(model):
+        hist = state.attrs[c].history
+        values[c] = hist.deleted[0] if hist.deleted else state.dict.get(c)
+    return values
+
+
+def _changed(model, target) -> bool:
+    state = inspect(target)
+    return any(state.attrs[c].history.has_changes() for c in _columns(model))
+
+
+def _record(target, before: List[Key], after: List[Key]) -> None:
+    if before == after:
+        return
+    session = object_session(target)
+    if session is None:
+        return
+    deltas = session.info.setdefault(_DELTAS_KEY, Counter())
+    for key in before:
+        deltas[key] -= 1
+    for key in after:
+        deltas[key] += 1
+
+
+def _keep_previous(target, value, oldvalue, initiator):
+    return value
+
+
+def _register(model) -> None:
+    # active_history: an expired column's committed value is loaded before it
+    # is overwritten, so history.deleted holds the key the row leaves
+    for column in _columns(model):
+        event.listen(getattr(model, column), 'set', _keep_previous, active_history=True)
+
+    @event.listens_for(model, 'before_delete')
+    def _loading(mapper, connection, target):
+        _current_values(model, target)  # reload expired columns while the row still exists
+
+    @event.listens_for(model, 'after_insert')
+    def _inserted(mapper, connection, target):
+        _record(target, [], _keys(model, _current_values(model, target), connection))
+
+    @event.listens_for(model, 'after_update')
+    def _updated(mapper, connection, target):
+        if not _changed(model, target):
+            return  # e.g. a status-only update: no key moves, no Item lookup for transactions
+        _record(target, _keys(model, _previous_values(model, target), connection),
+                _keys(model, _current_values(model, target), connection))
+
+    @event.listens_for(model, 'after_delete')
+    def _deleted(mapper, connection, target):
+        _record(target, _keys(model, _previous_values(model, target), connection), [])
+
+
+for _model in _SPECS:
+    _register(_model)
+
+
+# --- Writing ----------------------------------------------------------------
+
+def _key_clause(key: Key):
+    municipality_id, day, metric = key
+    return and_(_table.c.municipality_id == municipality_id, _table.c.day == day, _table.c.metric == metric)
+
+
+def _insert_missing(session, key: Key) -> None:
+    municipality_id, day, metric = key
+    values = dict(municipality_id=municipality_id, day=day, metric=metric, value=0)
+    dialect = session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        session.execute(insert(_table).values(**values).on_conflict_do_nothing())
+        return
+    try:
+        with session.begin_nested():
+            session.execute(_table.insert().values(**values))
+    except IntegrityError:
+        pass  # created concurrently
+
+
+def _upsert(session, key: Key, value: int) -> None:
+    """Set a rollup row to ``value``, creating it if needed."""
+    municipality_id, day, metric = key
+    values = dict(municipality_id=municipality_id, day=day, metric=metric, value=value)
+    dialect = session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(_table).values(**values)
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=['municipality_id', 'day', 'metric'],
+            set_={'value': stmt.excluded.value},
+        ))
+        return
+    stmt = update(_table).where(_key_clause(key)).values(value=value)
+    if session.execute(stmt).rowcount == 0:
+        _insert_missing(session, key)
+        session.execute(stmt)
+
+
+def _add(session, key: Key, delta: int) -> None:
+    stmt = update(_table).where(_key_clause(key)).values(value=_table.c.value + delta)
+    if session.execute(stmt).rowcount == 0:
+        _insert_missing(session, key)
+        session.execute(stmt)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _write_deltas(session, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if not deltas:
+        return
+    for key in sorted(deltas):  # fixed order keeps concurrent flushes from deadlocking
+        if deltas[key]:
+            _add(session, key, deltas[key])
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _drop_deltas(session):
+    session.info.pop(_DELTAS_KEY, None)
+
+
+# --- Backfill ---------------------------------------------------------------
+
+def _day_expr(column):
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.date(column)
+    return cast(column, Date)
+
+
+def compute_rollups(start: Optional[date] = None, end: Optional[date] = None,
+                    municipality_id: Optional[int] = None) -> Dict[Key, int]:
+    """Rollup values for days in [start, end] derived from the raw tables."""
+    truth: Dict[Key, int] = Counter()
+    for model, (extra, _) in _SPECS.items():
+        muni_col = Item.municipality_id if model is Transaction else model.municipality_id
+        day_col = _day_expr(model.created_at)
+        extra_cols = [getattr(model, c) for c in extra if c != 'item_id']
+        cols = [muni_col, day_col] + extra_cols
+        q = select(*cols, func.count()).group_by(*cols)
+        if model is Transaction:
+            q = q.select_from(Transaction).join(Item, Item.id == Transaction.item_id)
+        if municipality_id is not None:
+            q = q.where(muni_col == municipality_id)
+        if start is not None:
+            q = q.where(model.created_at >= datetime.combine(start, datetime.min.time()))
+        if end is not None:
+            q = q.where(model.created_at < datetime.combine(end, datetime.min.time()) + _ONE_DAY)
+        names = ['municipality_id', 'created_at'] + [c for c in extra if c != 'item_id']
+        for row in db.session.execute(q):
+            values = dict(zip(names, row[:-1]))
+            for key in _keys(model, values):
+                truth[key] += int(row[-1])
+    return truth
+
+
+def backfill_rollups(start: Optional[date] = None, end: Optional[date] = None,
+                     municipality_id: Optional[int] = None) -> Dict[str, int]:
+    """Overwrite rollup rows for [start, end] (default: all history) with recomputed values.
+
+    Existing rows are locked before counting, as in ``reconcile_counters``,
+    and written with upserts rather than delete + insert, so a concurrent
+    flush either waits for the backfill or adds its delta on top of it. Rows
+    without activity are set to 0. The caller commits.
+    """
+    conditions = [_table.c.metric != BACKFILLED]
+    if municipality_id is not None:
+        conditions.append(_table.c.municipality_id == municipality_id)
+    if start is not None:
+        conditions.append(_table.c.day >= start)
+    if end is not None:
+        conditions.append(_table.c.day <= end)
+    stored_q = select(_table.c.municipality_id, _table.c.day, _table.c.metric, _table.c.value) \
+        .where(and_(*conditions)).with_for_update()
+    stored = {(m, _day(d), metric): int(v) for m, d, metric, v in db.session.execute(stored_q)}
+    truth = compute_rollups(start, end, municipality_id)
+
+    written = 0
+    for key in sorted(set(stored) | set(truth)):  # fixed order, as in _write_deltas
+        want = truth.get(key, 0)
+        if stored.get(key) != want:
+            _upsert(db.session, key, want)
+            written += 1
+    if start is None and end is None:
+        # Full history: record which municipalities are now seeded
+        seeded = {municipality_id} if municipality_id is not None else {m for m, _, _ in truth}
+        for m in sorted(seeded):
+            _upsert(db.session, (m, _MARKER_DAY, BACKFILLED), 1)
+    return {'rows': written}
+
+
+def ensure_backfilled(municipality_id: int) -> None:
+    """Seed a municipality's history the first time its charts are read."""
+    marker = db.session.execute(
+        select(_table.c.value).where(_key_clause((municipality_id, _MARKER_DAY, BACKFILLED)))
+    ).scalar()
+    if marker is None:
+        backfill_rollups(municipality_id=municipality_id)
+        db.session.commit()
+
+
+# --- Reading ----------------------------------------------------------------
+
+def rollup_series(municipality_id: int, metric: str, start: date, end: date) -> Dict[date, int]:
+    """``{day: value}`` for one metric over [start, end]; days without activity are absent."""
+    ensure_backfilled(municipality_id)
+    rows = db.session.execute(
+        select(_table.c.day, _table.c.value).where(
+            _table.c.municipality_id == municipality_id,
+            _table.c.metric == metric,
+            _table.c.day >= start,
+            _table.c.day <= end,
+        )
+    ).all()
+    return {_day(d): int(v) for d, v in rows}
+
+
+def rollup_totals(municipality_id: int, metric_prefix: str, start: date, end: date) -> Dict[str, int]:
+    """Sum per metric over [start, end] for ``metric_prefix`` and its ``<prefix>.*`` sub-metrics."""
+    ensure_backfilled(municipality_id)
+    rows = db.session.execute(
+        select(_table.c.metric, func.sum(_table.c.value)).where(
+            _table.c.municipality_id == municipality_id,
+            (_table.c.metric == metric_prefix) | _table.c.metric.startswith(f'{metric_prefix}.', autoescape=True),
+            _table.c.day >= start,
+            _table.c.day <= end,
+        ).group_by(_table.c.metric)
+    ).all()
+    return {metric: int(total or 0) for metric, total in rows}
@@ -0,0 +1,301 @@
+"""Per-process cache for document-generation config and assets.
+
+The JSON specs under ``apps/api/config`` and the logo lookup under
+``public/logos`` change rarely, but were re-read (and re-globbed) for every
+generated PDF. Entries here are loaded once per worker and reloaded when the
+mtime of any file or directory they were built from changes. Those mtimes
+are re-checked at most every ``DOC_ASSET_CHECK_INTERVAL`` seconds, so a warm
+cache does no filesystem work at all between checks.
+"""
+
+import json
+import os
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from flask import current_app
+
+
+def _mtime(path: Path) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class MtimeCache:
+    """Values keyed by name, each tied to the mtimes of the paths it came from."""
+
+    def __init__(self):
+        self._entries: Dict[Any, Tuple[Any, Tuple, Tuple[Optional[float], ...], float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, build: Callable[[], Tuple[Any, Iterable[Path]]], check_interval: float = 2.0):
+        """Return the cached value for ``key``, rebuilding when stale.
+
+        ``build()`` returns ``(value, paths)`` where ``paths`` are the files or
+        directories whose mtimes decide when the value must be rebuilt.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            value, paths, mtimes, checked_at = entry
+            if now - checked_at < check_interval:
+                return value
+            if tuple(_mtime(p) for p in paths) == mtimes:
+                with self._lock:
+                    self._entries[key] = (value, paths, mtimes, now)
+                return value
+        value, paths = build()
+        paths = tuple(paths)
+        with self._lock:
+            self._entries[key] = (value, paths, tuple(_mtime(p) for p in paths), now)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = MtimeCache()
+
+
+def asset_check_interval() -> float:
+    try:
+        return float(current_app.config.get('DOC_ASSET_CHECK_INTERVAL', 2.0))
+    except Exception:
+        return 2.0
+
+
+def _config_dir() -> Path:
+    # apps/api is current_app.root_path
+    return Path(current_app.root_path) / "config"
+
+
+def _logos_dir() -> Path:
+    # Compute repository root from Flask app root (apps/api)
+    return Path(current_app.root_path).parents[1] / "public" / "logos"
+
+
+def clear_doc_asset_cache() -> None:
+    _cache.clear()
+
+
+def load_json_config(filename: str) -> Dict:
+    """Parsed ``apps/api/config/<filename>``; ``{}`` if missing or invalid."""
+    cfg_path = _config_dir() / filename
+
+    def build():
+        try:
+            value = json.loads(cfg_path.read_text(encoding="utf-8")) if cfg_path.exists() else {}
+        except Exception:
+            value = {}
+        return value, [cfg_path]
+
+    return _cache.get(('json', str(cfg_path)), build, asset_check_interval())
+
+
+def normalize_place_name(s: str) -> str:
+    """Normalize barangay/municipality names for lookup (accents, punctuation, spacing)."""
+    try:
+        s2 = unicodedata.normalize('NFKD', s or '')
+        s2 = ''.join(ch for ch in s2 if not unicodedata.combining(ch))
+    except Exception:
+        s2 = (s or '')
+    s2 = s2.strip().lower()
+    # Remove punctuation we don't care about and unify spacing
+    s2 = s2.replace('.', '').replace('-', ' ').replace('(', ' ').replace(')', ' ')
+    # Normalize common variants: "(Pob.)" -> "poblacion"
+    s2 = s2.replace(' pob ', ' poblacion ')
+    s2 = s2.replace(' pob.', ' poblacion')
+    s2 = s2.replace(' (pob) ', ' poblacion ')
+    s2 = s2.replace(' (pob.) ', ' poblacion ')
+    s2 = s2.replace('pob.', 'poblacion')
+    while '  ' in s2:
+        s2 = s2.replace('  ', ' ')
+    return s2
+
+
+def barangay_official_lookup() -> Dict[str, Dict[str, str]]:
+    """``{municipality: {normalized barangay: Punong Barangay}}`` from barangayOfficials.json."""
+    cfg_path = _config_dir() / "barangayOfficials.json"
+
+    def build():
+        raw = load_json_config("barangayOfficials.json")
+        lookup = {}
+        for muni, barangays in (raw or {}).items():
+            if isinstance(barangays, dict):
+                lookup[muni] = {normalize_place_name(k): v for k, v in barangays.items()}
+        return lookup, [cfg_path]
+
+    return _cache.get(('barangay_lookup', str(cfg_path)), build, asset_check_interval())
+
+
+def _slugify(name: str) -> str:
+    return (
+        (name or "")
+        .strip()
+        .lower()
+        .replace(" ", "_")
+        .replace("-", "_")
+        .replace(".", "")
+    )
+
+
+def _find_logos(municipality_name: str):
+    mun_dir = _logos_dir() / "municipalities"
+    prov_dir = _logos_dir() / "zambales"
+    watched = [mun_dir, prov_dir]
+
+    slug = _slugify(municipality_name)
+    # Try flat structure first (files directly in municipalities/)
+    candidates = [
+        mun_dir / f"{municipality_name}.png",
+        mun_dir / f"{municipality_name}.jpg",
+        mun_dir / f"{slug}.png",
+        mun_dir / f"{slug}.jpg",
+    ]
+    mun_logo = next((p for p in candidates if p.exists()), None)
+
+    # Try nested structure (municipalities/MunicipalityName/*.png)
+    if not mun_logo and mun_dir.exists():
+        for folder_variant in [municipality_name, slug, municipality_name.replace(' ', '')]:
+            nested = mun_dir / folder_variant
+            watched.append(nested)
+            if nested.exists() and nested.is_dir():
+                # Look for seal files first, then any png/jpg
+                seal_patterns = ['*seal*.png', '*Seal*.png', '*logo*.png', '*Logo*.png']
+                for pattern in seal_patterns:
+                    matches = sorted(nested.glob(pattern))
+                    if matches:
+                        mun_logo = matches[0]
+                        break
+                if mun_logo:
+                    break
+                # Fallback: any png/jpg in folder
+                for ext in ['*.png', '*.jpg']:
+                    matches = sorted(nested.glob(ext))
+                    if matches:
+                        mun_logo = matches[0]
+                        break
+                if mun_logo:
+                    break
+
+    # Final fallback: first png in flat dir matching slug fragment
+    if not mun_logo and mun_dir.exists():
+        try:
+            for p in sorted(mun_dir.glob("*.png")):
+                if slug in p.name.lower().replace('-', '_'):
+                    mun_logo = p
+                    break
+        except Exception:
+            pass
+
+    # Province logo fallback
+    prov_candidates = list(prov_dir.glob("*.png")) + list(prov_dir.glob("*.jpg"))
+    prov_logo = prov_candidates[0] if prov_candidates else None
+
+    if mun_logo is not None:
+        watched.append(mun_logo)
+    if prov_logo is not None:
+        watched.append(prov_logo)
+    return (mun_logo, prov_logo), watched
+
+
+def resolve_logo_paths(municipality_name: str) -> Tuple[Optional[Path], Optional[Path]]:
+    """Return (municipal_logo, province_logo) if available; cached per municipality."""
+    key = ('logos', str(_logos_dir()), municipality_name or '')
+    return _cache.get(key, lambda: _find_logos(municipality_name or ''), asset_check_interval())
+
+
+# Watermarks are rasterised for this resolution at their printed size
+WATERMARK_DPI = 150
+WATERMARK_WHITE_THRESHOLD = 245
+
+
+def _watermark_image(logo: Path, opacity: float, size_mm: float):
+    """Faded RGBA seal with near-white background removed (Pillow point tables)."""
+    from PIL import Image
+
+    with Image.open(str(logo)) as src:
+        im = src.convert('RGBA')
+    max_px = max(1, int(round(size_mm / 25.4 * WATERMARK_DPI)))
+    if max(im.size) > max_px:
+        im.thumbnail((max_px, max_px), Image.LANCZOS)
+    # Mask of near-white pixels, removed so seal edges show on white paper
+    bg_mask = im.convert('RGB').convert('L').point([255 if x >= WATERMARK_WHITE_THRESHOLD else 0 for x in range(256)])
+    a = im.getchannel('A')
+    a.paste(0, mask=bg_mask)
+    # Apply global fade
+    fade = int(max(0, min(255, round(opacity * 255))))
+    a = a.point([int(px * (fade / 255.0)) for px in range(256)])
+    im.putalpha(a)
+    return im
+
+
+def _watermark_disk_path(logo: Path, opacity: float, size_mm: float) -> Optional[Path]:
+    try:
+        base = Path(current_app.config.get('UPLOAD_FOLDER'))
+    except Exception:
+        return None
+    import hashlib
+
+    st = os.stat(logo)
+    digest = hashlib.sha1(
+        f"{logo.resolve()}|{st.st_mtime_ns}|{st.st_size}|{opacity:.4f}|{size_mm:.2f}|{WATERMARK_DPI}".encode('utf-8')
+    ).hexdigest()
+    return base / 'cache' / 'watermarks' / f"{digest}.png"
+
+
+def prepared_watermark(logo: Path, opacity: float = 0.25, size_mm: float = 150.0):
+    """Return a ready-to-draw ``ImageReader`` for the faded seal.
+
+    Built once per (logo, opacity, size) and kept in memory; the PNG is also
+    written under UPLOAD_FOLDER/cache/watermarks so other workers and restarts
+    skip the Pillow work. Returns None if the logo cannot be processed.
+    """
+    from reportlab.lib.utils import ImageReader
+
+    logo = Path(logo)
+
+    def build():
+        reader = None
+        disk = None
+        try:
+            disk = _watermark_disk_path(logo, opacity, size_mm)
+        except OSError:
+            disk = None
+        try:
+            if disk is not None and disk.exists():
+                from PIL import Image
+                with Image.open(str(disk)) as cached:
+                    reader = ImageReader(cached.copy())
+        except Exception:
+            reader = None
+        if reader is None:
+            try:
+                im = _watermark_image(logo, opacity, size_mm)
+            except Exception as pil_err:
+                try:
+                    current_app.logger.debug(f"Watermark Pillow processing failed: {pil_err}")
+                except Exception:
+                    pass
+                return None, [logo]
+            if disk is not None:
+                try:
+                    disk.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = disk.with_suffix(f'.{os.getpid()}.tmp')
+                    im.save(str(tmp), format='PNG')
+                    os.replace(tmp, disk)
+                except Exception:
+                    pass
+            reader = ImageReader(im)
+        # Decode once up front; canvases reuse the cached RGB/alpha data
+        reader.getRGBData()
+        return reader, [logo]
+
+    return _cache.get(('watermark', str(logo), round(opacity, 4), round(size_mm, 2)), build, asset_check_interval())
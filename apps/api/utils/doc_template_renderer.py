@@ -9,76 +9,34 @@ import os
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Optional, Tuple, Any, Dict
-import json
+import io
 
 from flask import current_app
 from docxtpl import DocxTemplate, InlineImage
 from docx.shared import Mm, Inches, Pt, RGBColor
-from docx import Document as WordDocument
 import qrcode
 
-
-def _slugify(name: str) -> str:
-    return name.lower().replace(' ', '-').replace('_', '-').replace('–', '-').replace('—', '-')
-
-
-def _municipality_alias(name: str) -> str:
-    # Handle common aliasing between folder names and canonical names
-    aliases = {
-        'Santa Cruz': 'Sta Cruz',
-        'Sta. Cruz': 'Sta Cruz',
-        'SanAntonio': 'San Antonio',
-        'SanAntonio ': 'San Antonio',
-    }
-    return aliases.get(name, name)
+try:
+    from apps.api.utils.doc_templates import (
+        _slugify,
+        _municipality_alias,
+        resolve_template,
+        municipal_meta,
+        template_bytes,
+    )
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from utils.doc_templates import (
+        _slugify,
+        _municipality_alias,
+        resolve_template,
+        municipal_meta,
+        template_bytes,
+    )
 
 
 def _resolve_template_path(base_dir: Path, municipality_name: str, document_code: str) -> Optional[Path]:
-    alias_name = _municipality_alias(municipality_name)
-    slug = _slugify(alias_name)
-
-    # 1) municipality/{code}.docx
-    # 2) municipality-slug/{code}.docx
-    # 3) municipality/{municipality}.docx
-    # 4) municipality-slug/{slug}.docx
-    # 5) any .docx in municipality folder (pick first)
-    # 6) _default/{code}.docx
-    # 7) _default/{municipality}.docx
-    # 8) any .docx in _default (pick first)
-    candidates = [
-        base_dir / alias_name / f"{document_code}.docx",
-        base_dir / slug / f"{document_code}.docx",
-        base_dir / alias_name / f"{alias_name}.docx",
-        base_dir / slug / f"{slug}.docx",
-    ]
-    for p in candidates:
-        if p.exists():
-            return p
-
-    for folder in [base_dir / alias_name, base_dir / slug]:
-        if folder.exists() and folder.is_dir():
-            any_docs = sorted(folder.glob("*.docx"))
-            for p in any_docs:
-                if p.is_file():
-                    return p
-
-    default_candidates = [
-        base_dir / "_default" / f"{document_code}.docx",
-        base_dir / "_default" / f"{alias_name}.docx",
-        base_dir / "_default" / f"{slug}.docx",
-    ]
-    for p in default_candidates:
-        if p.exists():
-            return p
-
-    default_folder = base_dir / "_default"
-    if default_folder.exists() and default_folder.is_dir():
-        any_default_docs = sorted(default_folder.glob("*.docx"))
-        for p in any_default_docs:
-            if p.is_file():
-                return p
-
-    return None
+    # Answered from the cached folder index (see utils/doc_templates.py)
+    return resolve_template(base_dir, municipality_name, document_code)
 
 
 def _ensure_dir(path: Path) -> None:
@@ -94,16 +52,7 @@ def _build_qr_image(temp_dir: Path, qr_data: str) -> Path:
 
 
 def _load_municipal_meta(base_dir: Path, municipality_name: str) -> Dict[str, Any]:
-    alias_name = _municipality_alias(municipality_name)
-    slug = _slugify(alias_name)
-    for folder in [base_dir / alias_name, base_dir / slug, base_dir / "_default"]:
-        meta_path = folder / "meta.json"
-        if meta_path.exists():
-            try:
-                return json.loads(meta_path.read_text(encoding="utf-8"))
-            except Exception:
-                return {}
-    return {}
+    return municipal_meta(base_dir, municipality_name)
 
 
 def render_request_docx(*, request, document_type, user) -> Tuple[Path, Path]:
@@ -164,7 +113,8 @@ def render_request_docx(*, request, document_type, user) -> Tuple[Path, Path]:
     }
 
     # Render
-    doc = DocxTemplate(str(template_path))
+    # Parse from cached bytes; no disk read for warm templates
+    doc = DocxTemplate(io.BytesIO(template_bytes(template_path)))
     # Helpful filters
     try:
         doc.jinja_env.filters['date_long'] = lambda s: datetime.strptime(s, '%Y-%m-%d').strftime('%B %d, %Y') if isinstance(s, str) else (s.strftime('%B %d, %Y') if isinstance(s, datetime) else s)
@@ -208,11 +158,11 @@ def render_request_docx(*, request, document_type, user) -> Tuple[Path, Path]:
     doc.render(ctx)
 
     docx_out = out_dir / 'document.docx'
-    doc.save(str(docx_out))
 
-    # Safety net: append default content if template didn't render key fields
+    # Safety net: append default content if template didn't render key fields.
+    # Works on the rendered document in memory so it is saved exactly once.
     try:
-        wd = WordDocument(str(docx_out))
+        wd = doc.docx
         full_text = []
         for p in wd.paragraphs:
             full_text.append(p.text or '')
@@ -275,9 +225,9 @@ def render_request_docx(*, request, document_type, user) -> Tuple[Path, Path]:
                 wd.add_picture(str(qr_img_path), width=Inches(1.2))
             except Exception:
                 pass
-            wd.save(str(docx_out))
     except Exception:
         pass
+    doc.save(str(docx_out))
 
     pdf_target = out_dir / 'document.pdf'
     return docx_out, pdf_target
@@ -0,0 +1,160 @@
+"""Registry of DOCX templates under ``public/digital_docs_template``.
+
+The template folder is indexed once per worker (folder -> .docx files and
+meta.json) and (municipality, document code) lookups are answered from that
+index. Template bytes and parsed meta.json are kept in memory. Everything is
+tied to file/directory mtimes through :class:`utils.doc_assets.MtimeCache`,
+so adding or replacing a template is picked up without a restart.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from apps.api.utils.doc_assets import MtimeCache, asset_check_interval
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from utils.doc_assets import MtimeCache, asset_check_interval
+
+
+_cache = MtimeCache()
+
+
+def _slugify(name: str) -> str:
+    return name.lower().replace(' ', '-').replace('_', '-').replace('–', '-').replace('—', '-')
+
+
+def _municipality_alias(name: str) -> str:
+    # Handle common aliasing between folder names and canonical names
+    aliases = {
+        'Santa Cruz': 'Sta Cruz',
+        'Sta. Cruz': 'Sta Cruz',
+        'SanAntonio': 'San Antonio',
+        'SanAntonio ': 'San Antonio',
+    }
+    return aliases.get(name, name)
+
+
+class TemplateIndex:
+    """Snapshot of the template folder: ``{folder: {'docx': [...], 'meta': bool}}``."""
+
+    def __init__(self, base_dir: Path, folders: Dict[str, Dict[str, Any]]):
+        self.base_dir = base_dir
+        self.folders = folders
+        self._resolved: Dict[tuple, Optional[Path]] = {}
+
+    def _has(self, folder: str, filename: str) -> bool:
+        entry = self.folders.get(folder)
+        return bool(entry) and filename in entry['docx_set']
+
+    def resolve(self, municipality_name: str, document_code: str) -> Optional[Path]:
+        key = (municipality_name, document_code)
+        if key not in self._resolved:
+            self._resolved[key] = self._resolve(municipality_name, document_code)
+        return self._resolved[key]
+
+    def _resolve(self, municipality_name: str, document_code: str) -> Optional[Path]:
+        alias_name = _municipality_alias(municipality_name)
+        slug = _slugify(alias_name)
+
+        # 1) municipality/{code}.docx
+        # 2) municipality-slug/{code}.docx
+        # 3) municipality/{municipality}.docx
+        # 4) municipality-slug/{slug}.docx
+        # 5) any .docx in municipality folder (pick first)
+        # 6) _default/{code}.docx
+        # 7) _default/{municipality}.docx
+        # 8) any .docx in _default (pick first)
+        candidates = [
+            (alias_name, f"{document_code}.docx"),
+            (slug, f"{document_code}.docx"),
+            (alias_name, f"{alias_name}.docx"),
+            (slug, f"{slug}.docx"),
+        ]
+        for folder, filename in candidates:
+            if self._has(folder, filename):
+                return self.base_dir / folder / filename
+
+        for folder in [alias_name, slug]:
+            entry = self.folders.get(folder)
+            if entry and entry['docx']:
+                return self.base_dir / folder / entry['docx'][0]
+
+        for filename in [f"{document_code}.docx", f"{alias_name}.docx", f"{slug}.docx"]:
+            if self._has('_default', filename):
+                return self.base_dir / '_default' / filename
+
+        entry = self.folders.get('_default')
+        if entry and entry['docx']:
+            return self.base_dir / '_default' / entry['docx'][0]
+        return None
+
+    def meta_path(self, municipality_name: str) -> Optional[Path]:
+        alias_name = _municipality_alias(municipality_name)
+        for folder in [alias_name, _slugify(alias_name), '_default']:
+            entry = self.folders.get(folder)
+            if entry and entry['meta']:
+                return self.base_dir / folder / 'meta.json'
+        return None
+
+
+def _scan(base_dir: Path):
+    folders: Dict[str, Dict[str, Any]] = {}
+    watched: List[Path] = [base_dir]
+    try:
+        with os.scandir(base_dir) as it:
+            dirs = [e for e in it if e.is_dir()]
+    except OSError:
+        dirs = []
+    for d in dirs:
+        docx: List[str] = []
+        meta = False
+        with os.scandir(d.path) as it:
+            for e in it:
+                if not e.is_file():
+                    continue
+                if e.name.endswith('.docx'):
+                    docx.append(e.name)
+                elif e.name == 'meta.json':
+                    meta = True
+        docx.sort()
+        folders[d.name] = {'docx': docx, 'docx_set': frozenset(docx), 'meta': meta}
+        watched.append(Path(d.path))
+    return TemplateIndex(base_dir, folders), watched
+
+
+def template_index(base_dir: Path) -> TemplateIndex:
+    base_dir = Path(base_dir)
+    return _cache.get(('index', str(base_dir)), lambda: _scan(base_dir), asset_check_interval())
+
+
+def resolve_template(base_dir: Path, municipality_name: str, document_code: str) -> Optional[Path]:
+    return template_index(base_dir).resolve(municipality_name, document_code)
+
+
+def template_bytes(path: Path) -> bytes:
+    """Raw .docx bytes, read once and kept until the file changes."""
+    path = Path(path)
+    return _cache.get(('bytes', str(path)), lambda: (path.read_bytes(), [path]), asset_check_interval())
+
+
+def municipal_meta(base_dir: Path, municipality_name: str) -> Dict[str, Any]:
+    """Parsed meta.json for the municipality (or _default); ``{}`` if none/invalid."""
+    meta_path = template_index(base_dir).meta_path(municipality_name)
+    if meta_path is None:
+        return {}
+
+    def build():
+        try:
+            value = json.loads(meta_path.read_text(encoding="utf-8"))
+        except Exception:
+            value = {}
+        return value, [meta_path]
+
+    return _cache.get(('meta', str(meta_path)), build, asset_check_interval())
+
+
+def clear_template_cache() -> None:
+    _cache.clear()
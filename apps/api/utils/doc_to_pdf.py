@@ -1,18 +1,69 @@
 """DOCX to PDF conversion utilities.
 
-Prefers LibreOffice headless conversion; falls back to docx2pdf on Windows.
+Prefers a pool of long-lived headless LibreOffice instances driven over UNO,
+then a one-shot ``soffice --convert-to`` subprocess, and finally docx2pdf on
+Windows.
+
+The pool needs the ``uno`` Python bridge (``python3-uno`` on Debian/Ubuntu)
+and is started lazily on the first conversion. Each instance listens on its
+own port with its own profile directory; conversions are queued to whichever
+instance is free, and an instance that errors is restarted. Set
+``DOCX_PDF_CONVERTER=subprocess`` to disable it, or ``DOCX_UNO_ENDPOINTS`` to
+``host:port,...`` to use listeners managed elsewhere (e.g. a sidecar running
+``soffice --accept=...``) instead of spawning them here.
+
+Every server process (e.g. each of gunicorn's ``-w`` workers) runs its own
+pool, so each claims a separate block of ``DOCX_UNO_INSTANCES`` ports above
+``DOCX_UNO_PORT_BASE``, held with a lock file for the process lifetime.
 """
 from __future__ import annotations
 
+import atexit
+import logging
 import os
+import queue
 import shutil
 import subprocess
-import sys
+import tempfile
+import threading
+import time
 from pathlib import Path
+from typing import IO, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name: str, default):
+    """Flask config when inside an app context, else the environment."""
+    try:
+        from flask import current_app
+        value = current_app.config.get(name)
+        if value is not None:
+            return value
+    except Exception:
+        pass
+    return os.getenv(name, default)
+
+
+def _soffice_binary() -> Optional[str]:
+    return shutil.which('soffice') or shutil.which('libreoffice')
 
 
 def _has_soffice() -> bool:
-    return shutil.which('soffice') is not None or shutil.which('libreoffice') is not None
+    return _soffice_binary() is not None
+
+
+def _profile_uri(path: Path) -> str:
+    return path.resolve().as_uri()
+
+
+# Reused by the subprocess path so LibreOffice skips first-run profile setup
+_SUBPROCESS_PROFILE = Path(tempfile.gettempdir()) / 'munlink-soffice-profile'
 
 
 def _convert_with_soffice(input_docx: Path, output_pdf: Path) -> bool:
@@ -20,13 +71,17 @@ def _convert_with_soffice(input_docx: Path, output_pdf: Path) -> bool:
     out_dir = output_pdf.parent
     out_dir.mkdir(parents=True, exist_ok=True)
     cmd = [
-        shutil.which('soffice') or shutil.which('libreoffice'),
+        _soffice_binary(),
         '--headless',
+        f'-env:UserInstallation={_profile_uri(_SUBPROCESS_PROFILE)}',
         '--convert-to', 'pdf',
         '--outdir', str(out_dir),
         str(input_docx),
     ]
     proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    produced = out_dir / f"{input_docx.stem}.pdf"
+    if proc.returncode == 0 and produced.exists() and produced != output_pdf:
+        os.replace(produced, output_pdf)
     return proc.returncode == 0 and output_pdf.exists()
 
 
@@ -40,6 +95,198 @@ def _convert_with_docx2pdf(input_docx: Path, output_pdf: Path) -> bool:
     return output_pdf.exists()
 
 
+class OfficeInstance:
+    """One headless LibreOffice listening on a UNO socket."""
+
+    def __init__(self, host: str, port: int, *, spawn: bool = True):
+        self.host = host
+        self.port = port
+        self.spawn = spawn
+        self._proc: Optional[subprocess.Popen] = None
+        self._profile: Optional[Path] = None
+        self._desktop = None
+
+    @property
+    def _connect_string(self) -> str:
+        return f"socket,host={self.host},port={self.port};urp;StarOffice.ComponentContext"
+
+    def start(self, timeout: float = 30.0) -> None:
+        import uno  # type: ignore
+
+        if self.spawn and (self._proc is None or self._proc.poll() is not None):
+            self._profile = Path(tempfile.mkdtemp(prefix=f'munlink-soffice-{self.port}-'))
+            self._proc = subprocess.Popen(
+                [
+                    _soffice_binary(),
+                    '--headless', '--invisible', '--nologo', '--norestore', '--nodefault', '--nolockcheck',
+                    f'-env:UserInstallation={_profile_uri(self._profile)}',
+                    f'--accept={self._connect_string}',
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        local_ctx = uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext('com.sun.star.bridge.UnoUrlResolver', local_ctx)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                ctx = resolver.resolve(f"uno:{self._connect_string}")
+                break
+            except Exception:
+                if time.monotonic() >= deadline or (self._proc is not None and self._proc.poll() is not None):
+                    raise RuntimeError(f"LibreOffice listener on {self.host}:{self.port} did not come up")
+                time.sleep(0.25)
+        self._desktop = ctx.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', ctx)
+
+    def convert(self, input_docx: Path, output_pdf: Path) -> None:
+        import uno  # type: ignore
+        from com.sun.star.beans import PropertyValue  # type: ignore
+
+        def _props(**kwargs):
+            out = []
+            for k, v in kwargs.items():
+                p = PropertyValue()
+                p.Name, p.Value = k, v
+                out.append(p)
+            return tuple(out)
+
+        if self._desktop is None:
+            self.start()
+        output_pdf.parent.mkdir(parents=True, exist_ok=True)
+        doc = self._desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(str(input_docx.resolve())), '_blank', 0, _props(Hidden=True, ReadOnly=True)
+        )
+        if doc is None:
+            raise RuntimeError(f"LibreOffice could not open {input_docx}")
+        try:
+            doc.storeToURL(uno.systemPathToFileUrl(str(output_pdf.resolve())), _props(FilterName='writer_pdf_Export'))
+        finally:
+            doc.close(True)
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+    def stop(self) -> None:
+        self._desktop = None
+        if self._proc is not None:
+            try:
+                self._proc.terminate()
+                self._proc.wait(timeout=10)
+            except Exception:
+                try:
+                    self._proc.kill()
+                except Exception:
+                    pass
+            self._proc = None
+        if self._profile is not None:
+            shutil.rmtree(self._profile, ignore_errors=True)
+            self._profile = None
+
+
+class OfficeConversionPool:
+    """Queue conversions across a fixed set of :class:`OfficeInstance`."""
+
+    def __init__(self, instances: List[OfficeInstance]):
+        self.instances = instances
+        self._free: "queue.Queue[OfficeInstance]" = queue.Queue()
+        for inst in instances:
+            inst.start()
+            self._free.put(inst)
+
+    def convert(self, input_docx: Path, output_pdf: Path, timeout: float = 120.0) -> Path:
+        inst = self._free.get(timeout=timeout)
+        try:
+            inst.convert(input_docx, output_pdf)
+        except Exception:
+            # Bring the instance back in a clean state for the next caller
+            try:
+                inst.restart()
+            except Exception:
+                pass
+            raise
+        finally:
+            self._free.put(inst)
+        if not output_pdf.exists():
+            raise RuntimeError(f"LibreOffice produced no output for {input_docx}")
+        return output_pdf
+
+    def close(self) -> None:
+        for inst in self.instances:
+            inst.stop()
+
+
+# Most server processes that may each run a pool on one host
+_MAX_PORT_BLOCKS = 64
+
+
+def _claim_port_block(base_port: int, count: int) -> Tuple[int, Optional[IO]]:
+    """First port of a ``count``-port block no other process on this host holds.
+
+    Returns the port and the open lock file, which must stay open while the
+    ports are in use. Without ``fcntl`` the first block is used.
+    """
+    if fcntl is None:
+        return base_port, None
+    for block in range(_MAX_PORT_BLOCKS):
+        port = base_port + block * count
+        fh = open(Path(tempfile.gettempdir()) / f'munlink-uno-{port}.lock', 'a')
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            continue
+        return port, fh
+    raise RuntimeError(f"no free LibreOffice port block above {base_port}")
+
+
+_pool: Optional[OfficeConversionPool] = None
+_port_lock: Optional[IO] = None
+_pool_failed = False
+_pool_lock = threading.Lock()
+
+
+def _uno_available() -> bool:
+    try:
+        import uno  # type: ignore  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+def get_conversion_pool() -> Optional[OfficeConversionPool]:
+    """The process-wide pool, started on first use; None if unavailable."""
+    global _pool, _pool_failed, _port_lock
+    if _pool is not None or _pool_failed:
+        return _pool
+    with _pool_lock:
+        if _pool is not None or _pool_failed:
+            return _pool
+        if not _uno_available():
+            _pool_failed = True
+            return None
+        endpoints = str(_setting('DOCX_UNO_ENDPOINTS', '') or '').strip()
+        try:
+            if endpoints:
+                instances = []
+                for ep in endpoints.split(','):
+                    host, _, port = ep.strip().rpartition(':')
+                    instances.append(OfficeInstance(host or '127.0.0.1', int(port), spawn=False))
+            else:
+                if not _has_soffice():
+                    _pool_failed = True
+                    return None
+                count = max(1, int(_setting('DOCX_UNO_INSTANCES', 1)))
+                base_port, _port_lock = _claim_port_block(int(_setting('DOCX_UNO_PORT_BASE', 2002)), count)
+                instances = [OfficeInstance('127.0.0.1', base_port + i) for i in range(count)]
+            _pool = OfficeConversionPool(instances)
+            atexit.register(_pool.close)
+        except Exception as exc:
+            _pool_failed = True
+            logger.warning("LibreOffice pool unavailable, using subprocess conversion: %s", exc)
+        return _pool
+
+
 def convert_docx_to_pdf(input_docx_path: Path, pdf_target_path: Path) -> Path:
     """Convert DOCX to PDF and return the PDF path. Raises on failure."""
     input_docx = Path(input_docx_path)
@@ -48,7 +295,18 @@ def convert_docx_to_pdf(input_docx_path: Path, pdf_target_path: Path) -> Path:
     if not input_docx.exists():
         raise FileNotFoundError(f"Input DOCX not found: {input_docx}")
 
-    # Prefer LibreOffice if available
+    mode = str(_setting('DOCX_PDF_CONVERTER', 'auto') or 'auto').lower()
+
+    # Long-lived LibreOffice instances (no per-document cold start)
+    if mode in ('auto', 'uno'):
+        pool = get_conversion_pool()
+        if pool is not None:
+            try:
+                return pool.convert(input_docx, output_pdf)
+            except Exception as exc:
+                logger.warning("Pooled conversion failed, retrying via subprocess: %s", exc)
+
+    # One-shot LibreOffice
     if _has_soffice():
         if _convert_with_soffice(input_docx, output_pdf):
             return output_pdf
@@ -58,5 +316,3 @@ def convert_docx_to_pdf(input_docx_path: Path, pdf_target_path: Path) -> Path:
         return output_pdf
 
     raise RuntimeError("Failed to convert DOCX to PDF (no converter available or conversion failed)")
-
-
@@ -0,0 +1,71 @@
+"""Issue generated documents for document requests.
+
+Shared by the admin generate-PDF endpoints (single and bulk) and the
+background job handlers so all apply the same status change and audit entry.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+try:
+    from apps.api import db
+    from apps.api.models.user import User
+    from apps.api.models.document import DocumentRequest, DocumentType
+    from apps.api.utils.audit import log_action
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.user import User
+    from models.document import DocumentRequest, DocumentType
+    from utils.audit import log_action
+
+
+class DocumentIssueError(Exception):
+    """Request cannot be issued (e.g. missing type or not a digital request)."""
+
+
+def issue_document_pdf(req: DocumentRequest, *, admin_user: Optional[User] = None, actor_id=None,
+                       user: Optional[User] = None, doc_type: Optional[DocumentType] = None) -> str:
+    """Render the PDF for ``req``, mark it ready and queue an audit entry.
+
+    Does not commit; callers decide the transaction boundary. Returns the
+    generated file path relative to UPLOAD_FOLDER.
+    """
+    # Resolved at call time so tests can monkeypatch the generator
+    from apps.api.utils.pdf_generator import generate_document_pdf
+
+    if (req.delivery_method or '').lower() not in ('digital',):
+        raise DocumentIssueError('PDF generation is only available for digital requests')
+    user = user or db.session.get(User, req.user_id)
+    doc_type = doc_type or db.session.get(DocumentType, req.document_type_id)
+    if not doc_type:
+        raise DocumentIssueError('Document type not found')
+
+    _abs_path, rel_path = generate_document_pdf(req, doc_type, user, admin_user=admin_user)
+    mark_document_issued(req, rel_path, actor_id=actor_id)
+    return rel_path
+
+
+def mark_document_issued(req: DocumentRequest, rel_path: str, *, actor_id=None) -> None:
+    """Record a generated file on ``req``, set it ready and queue the audit entry."""
+    req.document_file = rel_path
+    # Retain existing behavior for digital requests: set ready after generation,
+    # but defer final completion to an explicit action.
+    now = datetime.utcnow()
+    req.status = 'ready'
+    req.ready_at = now
+    req.updated_at = now
+    # Audit (best-effort)
+    try:
+        log_action(
+            user_id=actor_id,
+            municipality_id=req.municipality_id,
+            entity_type='document_request',
+            entity_id=req.id,
+            action='generate_pdf',
+            actor_role='admin',
+            old_values=None,
+            new_values={'document_file': rel_path},
+            notes=None,
+        )
+    except Exception:
+        pass
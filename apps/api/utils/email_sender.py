@@ -1,25 +1,411 @@
-"""Simple email sending utility for verification and notification emails.
+"""Email sending utility for verification and notification emails.
 
-Adds generic helpers with SMTP-if-configured behavior and logger fallback.
+Messages go through an outbox table by default: callers enqueue and return
+immediately, and a dispatcher delivers queued rows in batches over a small
+pool of authenticated SMTP sessions, retrying transient failures with
+backoff. The dispatcher runs as a background thread in each API worker
+(``EMAIL_DISPATCH_INLINE``) and/or inside ``scripts/run_worker.py``.
+
+Set ``EMAIL_OUTBOX_ENABLED=False`` to send synchronously as before.
 """
 import smtplib
+import ssl
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from email.utils import formataddr
+from typing import Dict, List, Optional
+
 from flask import current_app
-import ssl
+
+try:
+    from apps.api import db
+    from apps.api.models.email_outbox import EmailOutbox
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.email_outbox import EmailOutbox
+
+
+def _smtp_settings(app) -> Dict:
+    username = app.config.get('SMTP_USERNAME')
+    return {
+        'server': app.config.get('SMTP_SERVER'),
+        'port': int(app.config.get('SMTP_PORT', 587)),
+        'username': username,
+        'password': app.config.get('SMTP_PASSWORD'),
+        'from_email': app.config.get('FROM_EMAIL', username or 'noreply@example.com'),
+        'app_name': app.config.get('APP_NAME', 'MunLink Zambales'),
+        'timeout': float(app.config.get('SMTP_TIMEOUT', 10)),
+    }
+
+
+def _build_message(settings: Dict, to_email: str, subject: str, body: str) -> MIMEText:
+    msg = MIMEText(body, 'plain', 'utf-8')
+    msg['Subject'] = subject
+    msg['From'] = formataddr((settings['app_name'], settings['from_email']))
+    msg['To'] = to_email
+    return msg
+
+
+class SMTPConnectionPool:
+    """A small pool of logged-in SMTP sessions reused across messages.
+
+    Sessions idle longer than ``max_idle_seconds`` or that have sent
+    ``max_messages`` messages are closed instead of being reused, which keeps
+    us clear of provider-side idle/volume disconnects.
+    """
+
+    def __init__(self, settings: Dict, size: int = 2, max_idle_seconds: float = 60.0, max_messages: int = 100):
+        self.settings = dict(settings)
+        self.size = max(1, int(size))
+        self.max_idle_seconds = max_idle_seconds
+        self.max_messages = max_messages
+        self._idle: List[list] = []  # [connection, last_used, messages_sent]
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def _connect(self):
+        s = self.settings
+        if not s.get('server'):
+            raise RuntimeError("SMTP_SERVER is not configured")
+        # Use SSL for 465, STARTTLS for others (e.g., 587)
+        if s['port'] == 465:
+            conn = smtplib.SMTP_SSL(s['server'], s['port'], context=ssl.create_default_context(), timeout=s['timeout'])
+            conn.ehlo()
+        else:
+            conn = smtplib.SMTP(s['server'], s['port'], timeout=s['timeout'])
+            conn.ehlo()
+            if conn.has_extn('starttls'):
+                conn.starttls(context=ssl.create_default_context())
+                conn.ehlo()
+        if s.get('username') and s.get('password'):
+            conn.login(s['username'], s['password'])
+        return conn
+
+    @staticmethod
+    def _close(conn) -> None:
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _checkout(self) -> list:
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                entry = self._idle.pop()
+                if now - entry[1] <= self.max_idle_seconds:
+                    return entry
+                self._close(entry[0])
+        return [self._connect(), now, 0]
+
+    @contextmanager
+    def session(self):
+        """Borrow a session; yields a ``send(to_email, msg)`` callable."""
+        self._slots.acquire()
+        entry = None
+        healthy = True
+        try:
+            entry = self._checkout()
+
+            def send(to_email: str, msg: MIMEText) -> None:
+                nonlocal healthy
+                try:
+                    entry[0].sendmail(self.settings['from_email'], [to_email], msg.as_string())
+                    entry[2] += 1
+                except (smtplib.SMTPServerDisconnected, OSError):
+                    # Reconnect once and retry this message on a fresh session
+                    self._close(entry[0])
+                    entry[0], entry[2] = self._connect(), 0
+                    try:
+                        entry[0].sendmail(self.settings['from_email'], [to_email], msg.as_string())
+                        entry[2] += 1
+                    except Exception:
+                        healthy = False
+                        raise
+
+            yield send
+        finally:
+            if entry is not None:
+                if healthy and entry[2] < self.max_messages:
+                    entry[1] = time.monotonic()
+                    with self._lock:
+                        self._idle.append(entry)
+                else:
+                    self._close(entry[0])
+            self._slots.release()
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._close(entry[0])
+
+
+_pools: Dict[tuple, SMTPConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_smtp_pool(app=None) -> SMTPConnectionPool:
+    """Return the process-wide pool for the app's SMTP settings."""
+    app = app or current_app
+    settings = _smtp_settings(app)
+    key = (settings['server'], settings['port'], settings['username'], settings['password'], settings['from_email'])
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = SMTPConnectionPool(
+                settings,
+                size=int(app.config.get('EMAIL_SMTP_POOL_SIZE', 2)),
+                max_idle_seconds=float(app.config.get('EMAIL_SMTP_MAX_IDLE_SECONDS', 60)),
+            )
+            _pools[key] = pool
+        return pool
+
+
+def send_email_now(to_email: str, subject: str, body: str) -> None:
+    """Send one message immediately over a pooled session. Raises on failure."""
+    pool = get_smtp_pool()
+    msg = _build_message(pool.settings, to_email, subject, body)
+    with pool.session() as send:
+        send(to_email, msg)
+
+
+def _outbox_enabled() -> bool:
+    try:
+        return bool(current_app.config.get('EMAIL_OUTBOX_ENABLED', True))
+    except Exception:
+        return False
+
+
+def queue_email(to_email: str, subject: str, body: str, *, max_attempts: Optional[int] = None) -> EmailOutbox:
+    """Store a message in the outbox, commit, and wake the dispatcher.
+
+    Callers send notifications after their own commit, so committing here
+    only persists the outbox row. If the commit fails the session is rolled
+    back before the error propagates, leaving it usable for the caller.
+    """
+    app = current_app._get_current_object()
+    row = EmailOutbox(
+        to_email=to_email,
+        subject=(subject or '')[:255],
+        body=body or '',
+        status=EmailOutbox.STATUS_PENDING,
+        attempts=0,
+        max_attempts=int(max_attempts or app.config.get('EMAIL_MAX_ATTEMPTS', 5)),
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.session.add(row)
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    if app.config.get('EMAIL_DISPATCH_INLINE', True):
+        OutboxDispatcher.for_app(app).notify()
+    return row
+
+
+def _is_permanent(exc: Exception) -> bool:
+    """5xx replies for a specific message will not succeed on retry."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return True
+    code = getattr(exc, 'smtp_code', None)
+    return isinstance(exc, (smtplib.SMTPDataError, smtplib.SMTPSenderRefused)) and bool(code) and 500 <= int(code) < 600
+
+
+def _retry_delay(attempts: int) -> float:
+    base = float(current_app.config.get('EMAIL_RETRY_BASE_SECONDS', 30))
+    cap = float(current_app.config.get('EMAIL_RETRY_MAX_SECONDS', 3600))
+    return min(cap, base * (2 ** max(0, attempts - 1)))
+
+
+def _claim_batch(limit: int) -> List[EmailOutbox]:
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=float(current_app.config.get('EMAIL_CLAIM_TIMEOUT', 300)))
+    token = uuid.uuid4().hex
+    ids = [
+        r.id for r in db.session.query(EmailOutbox.id).filter(
+            db.or_(
+                db.and_(EmailOutbox.status == EmailOutbox.STATUS_PENDING, EmailOutbox.next_attempt_at <= now),
+                db.and_(EmailOutbox.status == EmailOutbox.STATUS_SENDING, EmailOutbox.claimed_at < stale),
+            )
+        ).order_by(EmailOutbox.next_attempt_at.asc(), EmailOutbox.id.asc()).limit(limit).all()
+    ]
+    if not ids:
+        db.session.rollback()
+        return []
+    # Guarded claim: rows another dispatcher already took keep their token
+    EmailOutbox.query.filter(
+        EmailOutbox.id.in_(ids),
+        db.or_(
+            EmailOutbox.status == EmailOutbox.STATUS_PENDING,
+            db.and_(EmailOutbox.status == EmailOutbox.STATUS_SENDING, EmailOutbox.claimed_at < stale),
+        ),
+    ).update(
+        {'status': EmailOutbox.STATUS_SENDING, 'claim_token': token, 'claimed_at': now,
+         'attempts': EmailOutbox.attempts + 1},
+        synchronize_session=False,
+    )
+    db.session.commit()
+    return EmailOutbox.query.filter(EmailOutbox.claim_token == token).order_by(EmailOutbox.id.asc()).all()
+
+
+def dispatch_outbox(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Deliver one batch of due outbox messages. Returns counts by outcome.
+
+    The batch is split across the pool's sessions and sent in parallel; all
+    database writes happen on the calling thread.
+    """
+    app = current_app._get_current_object()
+    batch = _claim_batch(int(batch_size or app.config.get('EMAIL_BATCH_SIZE', 50)))
+    counts = {'sent': 0, 'retry': 0, 'failed': 0}
+    if not batch:
+        return counts
+
+    pool = get_smtp_pool(app)
+    messages = [(row.id, row.to_email, _build_message(pool.settings, row.to_email, row.subject, row.body)) for row in batch]
+    chunks = [messages[i::pool.size] for i in range(pool.size)]
+    outcomes: Dict[int, Optional[Exception]] = {}
+
+    def _send_chunk(chunk):
+        if not chunk:
+            return
+        try:
+            with pool.session() as send:
+                for row_id, to_email, msg in chunk:
+                    try:
+                        send(to_email, msg)
+                        outcomes[row_id] = None
+                    except Exception as exc:
+                        outcomes[row_id] = exc
+        except Exception as exc:
+            # Could not open a session at all; every message in the chunk failed
+            for row_id, _to, _msg in chunk:
+                outcomes.setdefault(row_id, exc)
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        list(executor.map(_send_chunk, chunks))
+
+    now = datetime.utcnow()
+    for row in batch:
+        exc = outcomes.get(row.id, RuntimeError('not attempted'))
+        row.claim_token = None
+        row.claimed_at = None
+        if exc is None:
+            row.status = EmailOutbox.STATUS_SENT
+            row.sent_at = now
+            row.last_error = None
+            counts['sent'] += 1
+            continue
+        row.last_error = f"{type(exc).__name__}: {exc}"
+        if _is_permanent(exc) or row.attempts >= row.max_attempts:
+            row.status = EmailOutbox.STATUS_FAILED
+            counts['failed'] += 1
+            try:
+                # Never log the body: it can hold live verification/reset links
+                app.logger.warning("Email %s to %s (subject=%r) failed permanently: %s",
+                                   row.id, row.to_email, row.subject, row.last_error)
+            except Exception:
+                pass
+        else:
+            row.status = EmailOutbox.STATUS_PENDING
+            row.next_attempt_at = now + timedelta(seconds=_retry_delay(row.attempts))
+            counts['retry'] += 1
+    db.session.commit()
+    return counts
+
+
+def drain_outbox(max_batches: int = 100) -> Dict[str, int]:
+    """Dispatch batches until nothing is due (or ``max_batches`` is hit)."""
+    totals = {'sent': 0, 'retry': 0, 'failed': 0}
+    for _ in range(max_batches):
+        counts = dispatch_outbox()
+        for k, v in counts.items():
+            totals[k] += v
+        if not any(counts.values()):
+            break
+    return totals
+
+
+class OutboxDispatcher:
+    """Per-process background thread that drains the outbox.
+
+    Wakes immediately when a message is queued and otherwise polls every
+    ``EMAIL_DISPATCH_INTERVAL`` seconds so retries are picked up.
+    """
+
+    _instances: Dict[int, 'OutboxDispatcher'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = float(app.config.get('EMAIL_DISPATCH_INTERVAL', 15))
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='email-outbox-dispatcher', daemon=True)
+        # Drain anything left over from a previous process on start-up
+        self._wake.set()
+
+    @classmethod
+    def for_app(cls, app) -> 'OutboxDispatcher':
+        with cls._instances_lock:
+            inst = cls._instances.get(id(app))
+            if inst is None or not inst._thread.is_alive():
+                inst = cls(app)
+                cls._instances[id(app)] = inst
+                inst._thread.start()
+            return inst
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            with self.app.app_context():
+                try:
+                    drain_outbox()
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception("Email outbox dispatch failed")
+                finally:
+                    db.session.remove()
+
+
+def _deliver(to_email: str, subject: str, body: str) -> None:
+    """Queue when the outbox is enabled, otherwise send inline."""
+    if _outbox_enabled():
+        queue_email(to_email, subject, body)
+    else:
+        send_email_now(to_email, subject, body)
 
 
 def send_verification_email(to_email: str, verify_link: str) -> None:
     """Send an email verification message with a verification link.
 
-    Uses SMTP settings from Flask app config.
+    Uses SMTP settings from Flask app config. Raises if SMTP is not
+    configured so callers can surface that in DEBUG.
     """
     app = current_app
     smtp_server = app.config.get('SMTP_SERVER')
-    smtp_port = int(app.config.get('SMTP_PORT', 587))
     smtp_username = app.config.get('SMTP_USERNAME')
     smtp_password = app.config.get('SMTP_PASSWORD')
-    from_email = app.config.get('FROM_EMAIL', smtp_username)
     app_name = app.config.get('APP_NAME', 'MunLink Zambales')
 
     subject = f"Verify your email for {app_name}"
@@ -32,36 +418,13 @@ def send_verification_email(to_email: str, verify_link: str) -> None:
         f"Thank you,\n{app_name} Team"
     )
 
-    msg = MIMEText(body, 'plain', 'utf-8')
-    msg['Subject'] = subject
-    msg['From'] = formataddr((app_name, from_email))
-    msg['To'] = to_email
-
     # Best effort send; raise with detailed logs so caller can surface in DEBUG
     try:
         if not smtp_server:
             raise RuntimeError("SMTP_SERVER is not configured")
         if not (smtp_username and smtp_password):
             raise RuntimeError("SMTP credentials are not configured (SMTP_USERNAME/SMTP_PASSWORD)")
-
-        # Use SSL for 465, STARTTLS for others (e.g., 587)
-        if smtp_port == 465:
-            context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(smtp_server, smtp_port, context=context, timeout=10) as server:
-                server.ehlo()
-                server.login(smtp_username, smtp_password)
-                server.sendmail(from_email, [to_email], msg.as_string())
-        else:
-            with smtplib.SMTP(smtp_server, smtp_port, timeout=10) as server:
-                server.ehlo()
-                try:
-                    server.starttls(context=ssl.create_default_context())
-                    server.ehlo()
-                except Exception:
-                    # STARTTLS may be unsupported on some servers
-                    pass
-                server.login(smtp_username, smtp_password)
-                server.sendmail(from_email, [to_email], msg.as_string())
+        _deliver(to_email, subject, body)
     except Exception as exc:
         try:
             current_app.logger.exception("Failed to send verification email to %s: %s", to_email, exc)
@@ -71,37 +434,12 @@ def send_verification_email(to_email: str, verify_link: str) -> None:
 
 
 def send_generic_email(to_email: str, subject: str, body: str) -> None:
-    """Send a generic email using SMTP config if available; fallback to logging."""
-    app = current_app
+    """Send a generic email (queued via the outbox); fallback to logging."""
     try:
-        smtp_server = app.config.get('SMTP_SERVER')
-        smtp_port = int(app.config.get('SMTP_PORT', 587))
-        smtp_username = app.config.get('SMTP_USERNAME')
-        smtp_password = app.config.get('SMTP_PASSWORD')
-        from_email = app.config.get('FROM_EMAIL', smtp_username or 'noreply@example.com')
-        app_name = app.config.get('APP_NAME', 'MunLink Zambales')
-
-        msg = MIMEText(body, 'plain', 'utf-8')
-        msg['Subject'] = subject
-        msg['From'] = formataddr((app_name, from_email))
-        msg['To'] = to_email
-
-        with smtplib.SMTP(smtp_server, smtp_port, timeout=10) as server:
-            server.ehlo()
-            try:
-                server.starttls()
-                server.ehlo()
-            except Exception:
-                pass
-            if smtp_username and smtp_password:
-                try:
-                    server.login(smtp_username, smtp_password)
-                except Exception:
-                    pass
-            server.sendmail(from_email, [to_email], msg.as_string())
+        _deliver(to_email, subject, body)
     except Exception:
         try:
-            current_app.logger.info("Email (fallback log): to=%s subject=%s body=%s", to_email, subject, body)
+            current_app.logger.info("Email (fallback log): to=%s subject=%s", to_email, subject)
         except Exception:
             pass
 
@@ -1,9 +1,11 @@
 """Excel (XLSX) report utilities using openpyxl."""
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable
+from itertools import chain, islice
 from pathlib import Path
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
 
@@ -135,3 +137,86 @@ def save_workbook(wb: Workbook, out_path: Path) -> Path:
     return out_path
 
 
+
+
+def write_streaming_workbook(
+    out_path: Path,
+    *,
+    sheet_name: str,
+    headers: List[str],
+    rows: Iterable[List[Any]],
+    municipality_name: Optional[str] = None,
+    title: Optional[str] = None,
+    gov_lines: Optional[list[str]] = None,
+) -> Path:
+    """Write a single-sheet workbook in openpyxl write-only mode.
+
+    Rows are written as they are consumed, so memory stays flat regardless of
+    row count. Write-only sheets cannot merge cells or be autosized after the
+    fact, so the preheader is left-aligned and column widths come from the
+    first rows instead of the whole sheet.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_name[:31])
+
+    header_fill = PatternFill(start_color='FFEEF7FF', end_color='FFEEF7FF', fill_type='solid')
+    zebra_fill = PatternFill(start_color='FFF8FAFC', end_color='FFF8FAFC', fill_type='solid')
+    headers = [str(h) for h in (headers or [])]
+    id_col = headers.index('ID') if 'ID' in headers else None
+
+    def _clean(v):
+        return "" if v is None else (v if isinstance(v, (int, float)) else str(v))
+
+    rows_iter = iter(rows)
+    sample = [[_clean(v) for v in r] for r in islice(rows_iter, 50)]
+    # Column dimensions must be set before the first row is written
+    for ci, h in enumerate(headers):
+        width = max([10, len(h)] + [len(str(r[ci])) for r in sample if ci < len(r)])
+        ws.column_dimensions[get_column_letter(ci + 1)].width = min(48, width + 2)
+
+    def _styled(value, *, font=None, fill=None, alignment=None, number_format=None):
+        cell = WriteOnlyCell(ws, value=value)
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        if alignment is not None:
+            cell.alignment = alignment
+        if number_format is not None:
+            cell.number_format = number_format
+        return cell
+
+    preheader = 0
+    if municipality_name:
+        ws.append([_styled(municipality_name, font=Font(bold=True, size=16))])
+        preheader += 1
+    if title:
+        ws.append([_styled(title, font=Font(bold=True, size=12))])
+        preheader += 1
+    for line in gov_lines or []:
+        ws.append([_styled(line, font=Font(size=10))])
+        preheader += 1
+    if preheader:
+        ws.append([])
+
+    if headers:
+        bold = Font(bold=True)
+        center = Alignment(horizontal='center', vertical='center')
+        ws.append([_styled(h, font=bold, fill=header_fill, alignment=center) for h in headers])
+
+    left = Alignment(horizontal='left')
+    for idx, r in enumerate(chain(sample, ([_clean(v) for v in r] for r in rows_iter))):
+        fill = zebra_fill if idx % 2 == 1 else None
+        out = []
+        for ci, v in enumerate(r):
+            if ci == id_col:
+                out.append(_styled(v, fill=fill, alignment=left, number_format='@'))
+            elif fill is not None:
+                out.append(_styled(v, fill=fill))
+            else:
+                out.append(v)
+        ws.append(out)
+
+    wb.save(out_path)
+    return out_path
@@ -0,0 +1,241 @@
+"""Row sources for admin table exports.
+
+Each entity is read as plain column tuples with ``yield_per`` so Postgres
+uses a server-side cursor and rows never accumulate in the session identity
+map. Related names (e.g. the requesting resident) are joined into the same
+query instead of being looked up per row.
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_
+
+try:
+    from apps.api import db
+    from apps.api.models.user import User
+    from apps.api.models.marketplace import Item
+    from apps.api.models.document import DocumentRequest, DocumentType
+    from apps.api.models.issue import Issue
+    from apps.api.models.benefit import BenefitProgram
+    from apps.api.models.announcement import Announcement
+    from apps.api.models.audit import AuditLog
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.user import User
+    from models.marketplace import Item
+    from models.document import DocumentRequest, DocumentType
+    from models.issue import Issue
+    from models.benefit import BenefitProgram
+    from models.announcement import Announcement
+    from models.audit import AuditLog
+
+
+EXPORT_YIELD_PER = 500
+
+# Buffered (non-streaming) exports keep the historical cap on audit rows
+AUDIT_BUFFERED_LIMIT = 1000
+
+
+def _date(value) -> str:
+    return value.isoformat()[:10] if value else ''
+
+
+def _datetime(value) -> str:
+    return value.isoformat()[:19].replace('T', ' ') if value else ''
+
+
+def _person(first, last, username) -> str:
+    return f"{first or ''} {last or ''}".strip() or (username or '')
+
+
+def _in_range(column, start, end):
+    if start is None:
+        return True
+    return and_(column >= start, column <= end)
+
+
+def _stream(query) -> Iterator[tuple]:
+    return iter(query.yield_per(EXPORT_YIELD_PER))
+
+
+def _users(municipality_id, start, end, streaming) -> Iterator[list]:
+    q = db.session.query(
+        User.id, User.first_name, User.last_name, User.username, User.email,
+        User.phone_number, User.admin_verified, User.created_at,
+    ).filter(and_(User.municipality_id == municipality_id, User.role == 'resident')).order_by(User.id.asc())
+    for uid, first, last, username, email, phone, verified, created in _stream(q):
+        yield [uid, _person(first, last, username), email or '', phone or '', 'Yes' if verified else 'No', _date(created)]
+
+
+def _benefits(municipality_id, start, end, streaming) -> Iterator[list]:
+    q = db.session.query(
+        BenefitProgram.id, BenefitProgram.name, BenefitProgram.is_active, BenefitProgram.created_at,
+    ).filter(BenefitProgram.municipality_id == municipality_id).order_by(BenefitProgram.id.asc())
+    for bid, name, active, created in _stream(q):
+        yield [bid, name or '', 'Yes' if active else 'No', _date(created)]
+
+
+def _requests(municipality_id, start, end, streaming) -> Iterator[list]:
+    q = (
+        db.session.query(
+            DocumentRequest.id, DocumentRequest.request_number,
+            User.first_name, User.last_name, User.username,
+            DocumentType.name, DocumentRequest.status, DocumentRequest.created_at,
+        )
+        .outerjoin(User, User.id == DocumentRequest.user_id)
+        .outerjoin(DocumentType, DocumentType.id == DocumentRequest.document_type_id)
+        .filter(DocumentRequest.municipality_id == municipality_id)
+        .filter(_in_range(DocumentRequest.created_at, start, end))
+        .order_by(DocumentRequest.id.asc())
+    )
+    for rid, number, first, last, username, type_name, status, created in _stream(q):
+        yield [rid, number, _person(first, last, username), type_name or '', status, _datetime(created)]
+
+
+def _issues(municipality_id, start, end, streaming) -> Iterator[list]:
+    q = db.session.query(Issue.id, Issue.title, Issue.status, Issue.created_at)\
+        .filter(Issue.municipality_id == municipality_id).order_by(Issue.id.asc())
+    for iid, title, status, created in _stream(q):
+        yield [iid, title, status, _datetime(created)]
+
+
+def _items(municipality_id, start, end, streaming) -> Iterator[list]:
+    q = db.session.query(Item.id, Item.title, Item.status, Item.created_at)\
+        .filter(Item.municipality_id == municipality_id).order_by(Item.id.asc())
+    for iid, title, status, created in _stream(q):
+        yield [iid, title, status, _datetime(created)]
+
+
+def _announcements(municipality_id, start, end, streaming) -> Iterator[list]:
+    q = db.session.query(Announcement.id, Announcement.title, Announcement.is_active, Announcement.created_at)\
+        .filter(Announcement.municipality_id == municipality_id).order_by(Announcement.id.asc())
+    for aid, title, active, created in _stream(q):
+        yield [aid, title, 'Yes' if active else 'No', _date(created)]
+
+
+def _audit(municipality_id, start, end, streaming) -> Iterator[list]:
+    q = db.session.query(
+        AuditLog.created_at, AuditLog.user_id, AuditLog.actor_role,
+        AuditLog.entity_type, AuditLog.entity_id, AuditLog.action,
+    ).filter(AuditLog.municipality_id == municipality_id).order_by(AuditLog.created_at.desc())
+    if not streaming:
+        q = q.limit(AUDIT_BUFFERED_LIMIT)
+    for created, user_id, role, entity_type, entity_id, action in _stream(q):
+        yield [_datetime(created), user_id, role, entity_type, entity_id, action]
+
+
+EXPORT_ENTITIES: Dict[str, Tuple[List[str], Callable[..., Iterator[list]]]] = {
+    'users': (['ID', 'Name', 'Email', 'Phone', 'Verified', 'Joined'], _users),
+    'benefits': (['ID', 'Name', 'Active', 'Created'], _benefits),
+    'requests': (['ID', 'Req No', 'User', 'Type', 'Status', 'Created'], _requests),
+    'issues': (['ID', 'Title', 'Status', 'Created'], _issues),
+    'items': (['ID', 'Title', 'Status', 'Created'], _items),
+    'announcements': (['ID', 'Title', 'Active', 'Created'], _announcements),
+    'audit': (['Time', 'Actor', 'Role', 'Entity', 'Entity ID', 'Action'], _audit),
+}
+
+
+def export_rows(entity: str, municipality_id: int, start=None, end=None, *, streaming: bool = False) -> Optional[Tuple[List[str], Iterator[list]]]:
+    """Return (headers, row iterator) for an export entity, or None if unknown.
+
+    ``start=None`` disables the date window for entities that honour one.
+    """
+    spec = EXPORT_ENTITIES.get((entity or '').lower())
+    if spec is None:
+        return None
+    headers, source = spec
+    return list(headers), source(municipality_id, start, end, streaming)
+
+
+class RowCounter:
+    """Iterator wrapper that counts rows as a writer consumes them."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = next(self._rows)
+        self.count += 1
+        return row
+
+
+EXPORT_FORMATS = ('pdf', 'xlsx', 'excel')
+
+
+class ExportError(ValueError):
+    """Raised for caller errors (unknown entity or format)."""
+
+
+def validate_export(entity: str, fmt: str) -> Tuple[str, str]:
+    """Normalise ``(entity, fmt)`` or raise :class:`ExportError`."""
+    et = (entity or '').lower()
+    fmt = (fmt or '').lower()
+    if et not in EXPORT_ENTITIES:
+        raise ExportError('Unknown export entity')
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError('Unsupported format')
+    return et, fmt
+
+
+def write_export(entity: str, fmt: str, *, municipality_id: int, municipality_name: str, municipality_slug: str,
+                 start=None, end=None, streaming: bool = False) -> dict:
+    """Build an export file under UPLOAD_FOLDER/exports and describe it.
+
+    Returns ``{'url': <path relative to UPLOAD_FOLDER>, 'summary': {'rows': n}}``.
+    Used by the export endpoint directly and by the background 'export' job.
+    """
+    from pathlib import Path
+    from datetime import datetime
+    from flask import current_app
+
+    et, fmt = validate_export(entity, fmt)
+    headers, row_iter = export_rows(et, municipality_id, start, end, streaming=streaming)
+    rows = RowCounter(row_iter) if streaming else list(row_iter)
+
+    base = Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
+    out_dir = base / 'exports' / str(municipality_slug)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    filename_base = f"{et}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+    report_title = f"{municipality_name} – {et.title()} Report"
+
+    if fmt == 'pdf':
+        from apps.api.utils.pdf_table_report import generate_table_pdf
+        out_path = out_dir / f"{filename_base}.pdf"
+        generate_table_pdf(out_path=out_path, title=report_title, municipality_name=municipality_name, headers=headers, rows=rows)
+    else:
+        from apps.api.utils.excel_generator import generate_workbook, save_workbook, write_streaming_workbook
+        out_path = out_dir / f"{filename_base}.xlsx"
+        gov_lines = [
+            'Republic of the Philippines',
+            'Province of Zambales',
+            f'Municipality of {municipality_name}',
+            'Office of the Municipal Mayor',
+        ]
+        if streaming:
+            write_streaming_workbook(
+                out_path,
+                sheet_name=et.title(),
+                headers=headers,
+                rows=rows,
+                municipality_name=municipality_name,
+                title=report_title,
+                gov_lines=gov_lines,
+            )
+        else:
+            wb = generate_workbook({
+                et.title(): {
+                    'headers': headers,
+                    'rows': rows,
+                    'municipality_name': municipality_name,
+                    'title': report_title,
+                    'gov_lines': gov_lines,
+                }
+            })
+            save_workbook(wb, out_path)
+
+    rel = str(out_path.relative_to(base)).replace('\\', '/')
+    return {'url': rel, 'summary': {'rows': rows.count if streaming else len(rows)}}
@@ -4,6 +4,8 @@ import uuid
 from datetime import datetime
 from werkzeug.utils import secure_filename
 from apps.api.utils.validators import validate_file_size, validate_file_extension, ALLOWED_IMAGE_EXTENSIONS, ALLOWED_DOCUMENT_EXTENSIONS
+from apps.api.utils.image_variants import schedule_image_variants, delete_variants
+from apps.api.utils.blob_store import content_addressed_enabled, store_upload, release_paths, release_prefix
 
 # Base upload directory - will be set by Flask app
 UPLOAD_BASE_DIR = None
@@ -63,21 +65,8 @@ def generate_unique_filename(original_filename):
     return f"{timestamp}_{unique_id}{ext}"
 
 
-def save_uploaded_file(file, category, municipality_slug, subcategory=None, allowed_extensions=None, max_size_mb=10, user_type='residents'):
-    """
-    Save an uploaded file and return the file path.
-    
-    Args:
-        file: FileStorage object from request.files
-        category: Category of upload (profiles, marketplace, etc.)
-        municipality_slug: Municipality slug for organization
-        subcategory: Optional subcategory
-        allowed_extensions: Set of allowed file extensions
-        max_size_mb: Maximum file size in MB
-    
-    Returns:
-        Relative file path from uploads directory
-    """
+def _save_upload(file, category, municipality_slug, subcategory=None, allowed_extensions=None, max_size_mb=10, user_type='residents'):
+    """Validate and store an upload; returns (relative path, blob path or None)."""
     if not file:
         raise FileUploadError('No file provided')
     
@@ -107,29 +96,53 @@ def save_uploaded_file(file, category, municipality_slug, subcategory=None, allo
     
     validate_file_size(file_size, max_size_mb)
     
-    # Save the file
-    file.save(file_path)
-    
-    # Return relative path (from upload directory)
+    # Relative path (from upload directory) is what callers store
     from flask import current_app
     upload_base_dir = current_app.config.get('UPLOAD_FOLDER', 'uploads')
     relative_path = os.path.relpath(file_path, upload_base_dir)
     
+    # Save the file: linked to its content-addressed blob, or as a plain file
+    blob_path = None
+    if content_addressed_enabled():
+        blob_path = store_upload(file, file_path, relative_path)
+    else:
+        file.save(file_path)
+    
+    return relative_path, blob_path
+
+
+def save_uploaded_file(file, category, municipality_slug, subcategory=None, allowed_extensions=None, max_size_mb=10, user_type='residents'):
+    """
+    Save an uploaded file and return the file path.
+    
+    Args:
+        file: FileStorage object from request.files
+        category: Category of upload (profiles, marketplace, etc.)
+        municipality_slug: Municipality slug for organization
+        subcategory: Optional subcategory
+        allowed_extensions: Set of allowed file extensions
+        max_size_mb: Maximum file size in MB
+    
+    Returns:
+        Relative file path from uploads directory
+    """
+    relative_path, _ = _save_upload(file, category, municipality_slug, subcategory, allowed_extensions,
+                                    max_size_mb, user_type)
+    return relative_path
+
+
+def _save_image(file, category, municipality_slug, subcategory, max_size_mb=5, user_type='residents'):
+    relative_path, blob_path = _save_upload(file, category, municipality_slug, subcategory,
+                                            ALLOWED_IMAGE_EXTENSIONS, max_size_mb, user_type)
+    # Orientation fix, EXIF strip and WebP size variants (background)
+    schedule_image_variants(relative_path, blob_path)
     return relative_path
 
 
 def save_profile_picture(file, user_id, municipality_slug, user_type='residents'):
     """Save user profile picture."""
     subcategory = f"user_{user_id}"
-    return save_uploaded_file(
-        file,
-        category='profiles',
-        municipality_slug=municipality_slug,
-        subcategory=subcategory,
-        allowed_extensions=ALLOWED_IMAGE_EXTENSIONS,
-        max_size_mb=5,
-        user_type=user_type
-    )
+    return _save_image(file, 'profiles', municipality_slug, subcategory, user_type=user_type)
 
 
 def save_verification_document(file, user_id, municipality_slug, doc_type, user_type='residents'):
@@ -157,14 +170,7 @@ def save_verification_document(file, user_id, municipality_slug, doc_type, user_
 def save_marketplace_image(file, item_id, municipality_slug):
     """Save marketplace item image."""
     subcategory = f"item_{item_id}"
-    return save_uploaded_file(
-        file,
-        category='marketplace',
-        municipality_slug=municipality_slug,
-        subcategory=subcategory,
-        allowed_extensions=ALLOWED_IMAGE_EXTENSIONS,
-        max_size_mb=5
-    )
+    return _save_image(file, 'marketplace', municipality_slug, subcategory)
 
 
 def save_issue_attachment(file, issue_id, municipality_slug):
@@ -183,14 +189,7 @@ def save_issue_attachment(file, issue_id, municipality_slug):
 def save_announcement_image(file, announcement_id, municipality_slug):
     """Save announcement image file."""
     subcategory = f"announcement_{announcement_id}"
-    return save_uploaded_file(
-        file,
-        category='announcements',
-        municipality_slug=municipality_slug,
-        subcategory=subcategory,
-        allowed_extensions=ALLOWED_IMAGE_EXTENSIONS,
-        max_size_mb=5
-    )
+    return _save_image(file, 'announcements', municipality_slug, subcategory)
 
 
 def save_benefit_document(file, application_id, municipality_slug):
@@ -220,13 +219,18 @@ def save_document_request_file(file, request_id, municipality_slug):
 
 
 def delete_file(file_path):
-    """Delete a file if it exists using the configured UPLOAD_FOLDER."""
+    """Delete a file if it exists using the configured UPLOAD_FOLDER.
+
+    Also drops its blob reference; the caller commits.
+    """
     from flask import current_app
     base_dir = current_app.config.get('UPLOAD_FOLDER', 'uploads')
     full_path = os.path.join(str(base_dir), file_path)
+    release_paths([file_path])
     if os.path.exists(full_path):
         try:
             os.remove(full_path)
+            delete_variants(full_path)
             return True
         except OSError:
             return False
@@ -244,8 +248,14 @@ def get_file_url(file_path, base_url=None):
     return f"{base_url}/uploads/{file_path}"
 
 
+def _relative_to_uploads(path):
+    from flask import current_app
+    base_dir = current_app.config.get('UPLOAD_FOLDER', 'uploads')
+    return os.path.relpath(path, str(base_dir)).replace(os.sep, '/')
+
+
 def cleanup_user_files(user_id, municipality_slug):
-    """Delete all files for a user (when deleting account)."""
+    """Delete all files for a user (when deleting account); the caller commits."""
     import shutil
     
     categories = ['profiles', 'verification']
@@ -253,6 +263,7 @@ def cleanup_user_files(user_id, municipality_slug):
     
     for category in categories:
         directory = get_file_path(category, municipality_slug, subcategory)
+        release_prefix(_relative_to_uploads(directory))
         if os.path.exists(directory):
             try:
                 shutil.rmtree(directory)
@@ -261,11 +272,12 @@ def cleanup_user_files(user_id, municipality_slug):
 
 
 def cleanup_item_files(item_id, municipality_slug):
-    """Delete all files for a marketplace item."""
+    """Delete all files for a marketplace item; the caller commits."""
     import shutil
     
     subcategory = f"item_{item_id}"
     directory = get_file_path('marketplace', municipality_slug, subcategory)
+    release_prefix(_relative_to_uploads(directory))
     
     if os.path.exists(directory):
         try:
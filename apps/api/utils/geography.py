@@ -0,0 +1,178 @@
+"""Per-worker registry of municipalities and barangays.
+
+Zambales has 13 municipalities and a few hundred barangays and they almost
+never change, yet the geography endpoints and registration/profile checks
+queried them on every call. Each app now keeps a snapshot of both tables
+in memory:
+
+* serialized payloads for the public endpoints are built once per
+  snapshot as JSON bytes plus an ETag, so responses are a dict lookup and
+  repeat clients get 304s;
+* ``municipality_id_for_slug`` / ``barangay_municipality_id`` answer the
+  lookups ``register`` and ``update_profile`` need without a query.
+
+The snapshot is loaded at worker start (``GEOGRAPHY_PRELOAD``) or on first
+use. Commits in this worker that touch either model drop it at once; other
+workers notice through a version stamp (row counts and latest
+``updated_at`` of both tables) checked at most every
+``GEOGRAPHY_CHECK_INTERVAL`` seconds.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import current_app, request
+from sqlalchemy import event, func, select
+
+try:
+    from apps.api import db
+    from apps.api.models.municipality import Municipality, Barangay
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.municipality import Municipality, Barangay
+
+
+class _Snapshot:
+    def __init__(self, municipalities: List[Municipality], barangays: List[Barangay], version: tuple):
+        self.version = version
+        self.municipalities: Dict[int, dict] = {m.id: m.to_dict() for m in municipalities}
+        self.active_municipality_ids = [m.id for m in municipalities if m.is_active]
+        self.slugs: Dict[str, int] = {m.slug: m.id for m in municipalities}
+        self.barangays: Dict[int, dict] = {b.id: b.to_dict() for b in barangays}
+        self.barangays_by_municipality: Dict[int, List[int]] = {m.id: [] for m in municipalities}
+        for b in barangays:
+            self.barangays_by_municipality.setdefault(b.municipality_id, []).append(b.id)
+        self._payloads: Dict[tuple, Tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    def payload(self, key: tuple, build: Callable[[], Any]) -> Tuple[bytes, str]:
+        cached = self._payloads.get(key)
+        if cached is None:
+            body = current_app.json.dumps(build()).encode('utf-8')
+            cached = (body, hashlib.sha1(body).hexdigest())
+            with self._lock:
+                self._payloads[key] = cached
+        return cached
+
+
+class GeographyRegistry:
+    def __init__(self, check_interval: float = 60.0):
+        self.check_interval = check_interval
+        self._snapshot: Optional[_Snapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version() -> tuple:
+        return tuple(db.session.execute(select(
+            select(func.count()).select_from(Municipality).scalar_subquery(),
+            select(func.max(Municipality.updated_at)).scalar_subquery(),
+            select(func.count()).select_from(Barangay).scalar_subquery(),
+            select(func.max(Barangay.updated_at)).scalar_subquery(),
+        )).one())
+
+    def _load(self, version: tuple) -> _Snapshot:
+        municipalities = db.session.query(Municipality).order_by(Municipality.id).all()
+        barangays = db.session.query(Barangay).order_by(Barangay.id).all()
+        return _Snapshot(municipalities, barangays, version)
+
+    def snapshot(self) -> _Snapshot:
+        snap = self._snapshot
+        now = time.monotonic()
+        if snap is not None and now - self._checked_at < self.check_interval:
+            return snap
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._snapshot
+            version = self._version()
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = self._load(version)
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+
+def get_geography(app=None) -> GeographyRegistry:
+    app = app or current_app._get_current_object()
+    registry = app.extensions.get('geography')
+    if registry is None:
+        registry = GeographyRegistry(float(app.config.get('GEOGRAPHY_CHECK_INTERVAL', 60)))
+        app.extensions['geography'] = registry
+    return registry
+
+
+def preload_geography(app) -> None:
+    """Warm the registry at startup; tables may not exist yet (migrations, tests)."""
+    with app.app_context():
+        try:
+            get_geography(app).snapshot()
+        except Exception as exc:
+            app.logger.info("Geography registry not preloaded: %s", exc)
+            db.session.rollback()
+        finally:
+            db.session.remove()
+
+
+# --- Lookups ----------------------------------------------------------------
+
+def municipality_id_for_slug(slug: Optional[str]) -> Optional[int]:
+    if not slug:
+        return None
+    return get_geography().snapshot().slugs.get(slug)
+
+
+def municipality_exists(municipality_id) -> bool:
+    return municipality_id in get_geography().snapshot().municipalities
+
+
+def barangay_municipality_id(barangay_id) -> Optional[int]:
+    """Municipality of ``barangay_id``, or None if there is no such barangay."""
+    data = get_geography().snapshot().barangays.get(barangay_id)
+    return data['municipality_id'] if data else None
+
+
+# --- Endpoint payloads ------------------------------------------------------
+
+def geography_response(key: tuple, build: Callable[[_Snapshot], Any], snap: Optional[_Snapshot] = None):
+    """JSON response for a payload of ``snap`` (default: current), honouring If-None-Match."""
+    snap = snap or get_geography().snapshot()
+    body, etag = snap.payload(key, lambda: build(snap))
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = int(current_app.config.get('GEOGRAPHY_MAX_AGE', 300))
+    return response.make_conditional(request)
+
+
+# --- Invalidation -----------------------------------------------------------
+
+_GEOGRAPHY_MODELS = (Municipality, Barangay)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _note_geography_changes(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _GEOGRAPHY_MODELS):
+            session.info['geography_changed'] = True
+            return
+
+
+@event.listens_for(db.session, 'after_commit')
+def _drop_stale_geography(session):
+    if session.info.pop('geography_changed', False):
+        try:
+            registry = current_app.extensions.get('geography')
+        except RuntimeError:  # committed outside an app context
+            return
+        if registry is not None:
+            registry.invalidate()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_geography_changes(session):
+    session.info.pop('geography_changed', None)
@@ -0,0 +1,120 @@
+"""Request-scoped identity resolution.
+
+Access tokens carry the caller's role, admin scope and verification level as
+signed claims (see :func:`identity_claims`), so role and scope checks are
+answered from the token alone. When the full ``User`` row is needed it is
+loaded at most once per request and memoized on ``flask.g``.
+
+Verification claims can go stale between token refreshes (e.g. an admin
+approves a resident mid-session), so a *failing* verification check is
+confirmed against the database before returning 403. The opposite direction
+is handled by revocation: when a user loses a role, admin scope or a
+verification flag, or is deleted, their outstanding access tokens are
+revoked (utils/token_revocation.py), so a true claim never outlives the
+grant behind it. Tokens minted before these claims existed fall back to the
+database for everything.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from flask import g, has_request_context, request
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+
+try:
+    from apps.api import db
+    from apps.api.models.user import User
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.user import User
+
+
+ADMIN_ROLES = ('admin', 'municipal_admin')
+
+_UNSET = object()
+
+
+def identity_claims(user: User) -> Dict[str, Any]:
+    """Claims to embed in access/refresh tokens for ``user``."""
+    return {
+        'role': user.role,
+        'admin_municipality_id': user.admin_municipality_id,
+        'email_verified': bool(user.email_verified),
+        'admin_verified': bool(user.admin_verified),
+        'adult': not user.is_under_18(),
+        'claims_at': int(datetime.utcnow().timestamp()),
+    }
+
+
+def current_user_id() -> Optional[int]:
+    uid = get_jwt_identity()
+    if uid is None:
+        return None
+    try:
+        return int(uid)
+    except (TypeError, ValueError):
+        return None
+
+
+def _request_marker():
+    # ``g`` outlives the request when an app context is reused (CLI, tests),
+    # so the memo is tagged with the request it was loaded for.
+    return request._get_current_object() if has_request_context() else None
+
+
+def current_user() -> Optional[User]:
+    """The authenticated ``User``, loaded once per request."""
+    marker, user = g.get('_identity_user', (_UNSET, None))
+    if marker is not _UNSET and marker is _request_marker():
+        return user
+    verify_jwt_in_request()
+    user_id = current_user_id()
+    # Always read the row: the claim re-checks below must see current state
+    user = db.session.get(User, user_id, populate_existing=True) if user_id else None
+    g._identity_user = (_request_marker(), user)
+    return user
+
+
+def claim(name: str, default=None):
+    """A claim from the verified JWT, or ``default`` if the token predates it."""
+    return (get_jwt() or {}).get(name, default)
+
+
+def _has_identity_claims() -> bool:
+    return 'claims_at' in (get_jwt() or {})
+
+
+def current_role() -> Optional[str]:
+    role = claim('role')
+    if role is not None:
+        return role
+    user = current_user()
+    return user.role if user else None
+
+
+def current_admin_municipality_id() -> Optional[int]:
+    """Admin scope from the token; None for non-admins."""
+    if _has_identity_claims():
+        if claim('role') not in ADMIN_ROLES:
+            return None
+        return claim('admin_municipality_id')
+    user = current_user()
+    if not user or user.role not in ADMIN_ROLES:
+        return None
+    return user.admin_municipality_id
+
+
+def verification_flag(name: str) -> bool:
+    """``email_verified`` / ``admin_verified`` / ``adult`` for the caller.
+
+    A true claim is trusted (losing the flag revokes the token); a false or
+    missing one is confirmed against the database so freshly approved users
+    are not turned away until refresh.
+    """
+    if claim(name) is True:
+        return True
+    user = current_user()
+    if user is None:
+        return False
+    if name == 'adult':
+        return not user.is_under_18()
+    return bool(getattr(user, name, False))
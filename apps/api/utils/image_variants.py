@@ -0,0 +1,176 @@
+"""Resized WebP variants for uploaded images.
+
+After a marketplace, announcement or profile image is saved, a background
+thread pool:
+
+1. applies the EXIF orientation and rewrites the original without EXIF
+   (no camera/GPS metadata is served back), and
+2. writes one WebP per size bucket next to it, named
+   ``<original filename>.<bucket>.webp`` (e.g. ``x.jpg.thumb.webp``).
+
+Names are derived from the original path, so models can list variant
+paths without storing them. Until a variant exists (still processing, or
+an image uploaded before this pipeline), ``/uploads`` serves the original
+in its place; see :func:`variant_source`.
+
+Content-addressed uploads (utils/blob_store.py) are processed through
+their blob, once per distinct content, and the entity path and its
+variants are then re-linked to the processed files.
+
+``IMAGE_PIPELINE_WORKERS = 0`` processes inline (used by tests).
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+# Bucket name -> longest edge in pixels (images are only ever scaled down)
+VARIANT_SIZES: Dict[str, int] = {
+    'thumb': 320,
+    'medium': 960,
+    'large': 1600,
+}
+WEBP_QUALITY = 80
+
+logger = logging.getLogger(__name__)
+
+_VARIANT_SUFFIXES = tuple(f'.{bucket}.webp' for bucket in VARIANT_SIZES)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Striped locks so two uploads of the same blob are not processed twice
+_blob_locks = [threading.Lock() for _ in range(32)]
+
+
+def variant_path(rel_path: str, bucket: str) -> str:
+    return f"{rel_path}.{bucket}.webp"
+
+
+def image_variant_paths(rel_path: Optional[str]) -> Optional[Dict[str, str]]:
+    """``{'original': ..., 'thumb': ..., 'medium': ..., 'large': ...}`` for an upload path."""
+    if not rel_path or not isinstance(rel_path, str):
+        return None
+    if rel_path.startswith(('http://', 'https://')):
+        return {'original': rel_path}
+    paths = {'original': rel_path}
+    for bucket in VARIANT_SIZES:
+        paths[bucket] = variant_path(rel_path, bucket)
+    return paths
+
+
+def variant_source(rel_path: str) -> Optional[str]:
+    """The original a variant path was derived from, or None if it is not a variant."""
+    for suffix in _VARIANT_SUFFIXES:
+        if rel_path.endswith(suffix):
+            return rel_path[:-len(suffix)]
+    return None
+
+
+def _atomic_save(img, target: str, fmt: str, **params) -> None:
+    tmp = f"{target}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        img.save(tmp, fmt, **params)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def process_image(abs_path: str) -> Dict[str, str]:
+    """Normalise ``abs_path`` in place and write its variants; returns bucket -> file."""
+    from PIL import Image, ImageOps
+
+    written: Dict[str, str] = {}
+    with Image.open(abs_path) as src:
+        if getattr(src, 'n_frames', 1) > 1:
+            # Animated GIF/WebP: leave untouched, variants would lose frames
+            return written
+        fmt = src.format
+        icc = src.info.get('icc_profile')
+        img = ImageOps.exif_transpose(src)
+        img.load()
+
+    # Re-encode the original without EXIF (orientation is now baked in)
+    if fmt in ('JPEG', 'MPO'):
+        _atomic_save(img.convert('RGB'), abs_path, 'JPEG', quality=90, optimize=True, icc_profile=icc)
+    elif fmt in ('PNG', 'WEBP'):
+        _atomic_save(img, abs_path, fmt, icc_profile=icc)
+
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'A' in img.getbands() or img.mode == 'P' else 'RGB')
+    for bucket, edge in VARIANT_SIZES.items():
+        variant = img.copy()
+        variant.thumbnail((edge, edge), Image.LANCZOS)
+        target = f"{abs_path}.{bucket}.webp"
+        _atomic_save(variant, target, 'WEBP', quality=WEBP_QUALITY, method=4)
+        written[bucket] = target
+    return written
+
+
+def _variants_complete(abs_path: str) -> bool:
+    return all(os.path.isfile(f"{abs_path}.{bucket}.webp") for bucket in VARIANT_SIZES)
+
+
+def _process_blob(abs_path: str, blob_path: str) -> Dict[str, str]:
+    try:
+        from apps.api.utils.blob_store import link_file
+    except ImportError:  # pragma: no cover - fallback for direct execution
+        from utils.blob_store import link_file
+
+    with _blob_locks[hash(blob_path) % len(_blob_locks)]:
+        if not _variants_complete(blob_path):
+            process_image(blob_path)
+
+    written: Dict[str, str] = {}
+    link_file(blob_path, abs_path)
+    for bucket in VARIANT_SIZES:
+        src = f"{blob_path}.{bucket}.webp"
+        if os.path.isfile(src):
+            target = f"{abs_path}.{bucket}.webp"
+            link_file(src, target)
+            written[bucket] = target
+    return written
+
+
+def _safe_process(abs_path: str, blob_path: Optional[str] = None) -> Dict[str, str]:
+    try:
+        if blob_path:
+            return _process_blob(abs_path, blob_path)
+        return process_image(abs_path)
+    except Exception as exc:  # corrupt/unsupported upload: the original is still served
+        logger.warning("Image variants failed for %s: %s", abs_path, exc)
+        return {}
+
+
+def _get_executor(workers: int) -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-variants')
+        return _executor
+
+
+def schedule_image_variants(rel_path: str, blob_path: Optional[str] = None) -> Optional[Future]:
+    """Queue processing for an upload saved under ``UPLOAD_FOLDER``.
+
+    ``blob_path`` is the content-addressed blob ``rel_path`` links to, if any.
+    """
+    from flask import current_app
+
+    abs_path = os.path.join(str(current_app.config.get('UPLOAD_FOLDER', 'uploads')), rel_path)
+    workers = int(current_app.config.get('IMAGE_PIPELINE_WORKERS', 2) or 0)
+    if workers <= 0:
+        _safe_process(abs_path, blob_path)
+        return None
+    return _get_executor(workers).submit(_safe_process, abs_path, blob_path)
+
+
+def delete_variants(abs_path: str) -> None:
+    for bucket in VARIANT_SIZES:
+        try:
+            os.remove(f"{abs_path}.{bucket}.webp")
+        except OSError:
+            pass
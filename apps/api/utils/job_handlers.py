@@ -0,0 +1,184 @@
+"""Handlers for background job kinds and periodic maintenance tasks.
+
+Importing this module registers the handlers with :mod:`apps.api.utils.jobs`;
+both the API process (which enqueues) and the worker (which runs) import it.
+Payloads hold ids and plain values only; handlers reload rows themselves.
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+try:
+    from apps.api import db
+    from apps.api.models.user import User
+    from apps.api.models.municipality import Municipality
+    from apps.api.models.document import DocumentRequest, DocumentType
+    from apps.api.models.token_blacklist import TokenBlacklist, UserTokenRevocation
+    from apps.api.utils.jobs import job_handler, periodic_task, requeue_stale
+    from apps.api.utils.municipality_counters import reconcile_counters
+    from apps.api.utils.daily_rollups import backfill_rollups
+    from apps.api.utils.benefit_expiry import expire_benefit_programs
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.user import User
+    from models.municipality import Municipality
+    from models.document import DocumentRequest, DocumentType
+    from models.token_blacklist import TokenBlacklist, UserTokenRevocation
+    from utils.jobs import job_handler, periodic_task, requeue_stale
+    from utils.municipality_counters import reconcile_counters
+    from utils.daily_rollups import backfill_rollups
+    from utils.benefit_expiry import expire_benefit_programs
+
+
+def _parse_dt(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _int_or_none(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@job_handler('export')
+def run_export(payload, job):
+    from apps.api.utils.exports import write_export
+
+    municipality_id = int(payload['municipality_id'])
+    muni = db.session.get(Municipality, municipality_id)
+    return write_export(
+        payload.get('entity'),
+        payload.get('fmt'),
+        municipality_id=municipality_id,
+        municipality_name=getattr(muni, 'name', 'Municipality'),
+        municipality_slug=getattr(muni, 'slug', str(municipality_id)),
+        start=_parse_dt(payload.get('start')),
+        end=_parse_dt(payload.get('end')),
+        streaming=bool(payload.get('stream')),
+    )
+
+
+@job_handler('document_pdf')
+def run_document_pdf(payload, job):
+    from apps.api.utils.document_issuing import issue_document_pdf
+
+    req = db.session.get(DocumentRequest, int(payload['request_id']))
+    if req is None:
+        raise LookupError(f"Document request {payload['request_id']} not found")
+    admin_id = _int_or_none(payload.get('admin_id'))
+    admin_user = db.session.get(User, admin_id) if admin_id else None
+    rel_path = issue_document_pdf(req, admin_user=admin_user, actor_id=admin_id)
+    db.session.commit()
+    return {'request_id': req.id, 'url': f"/uploads/{rel_path}"}
+
+
+@job_handler('document_pdf_bulk')
+def run_document_pdf_bulk(payload, job):
+    from flask import current_app
+    from apps.api.utils.bulk_documents import select_bulk_requests, generate_bulk_pdfs
+
+    municipality_id = int(payload['municipality_id'])
+    max_requests = int(current_app.config.get('BULK_PDF_MAX_REQUESTS', 500))
+    ids = payload.get('ids')
+    admin_id = _int_or_none(payload.get('admin_id'))
+    reqs = select_bulk_requests(
+        municipality_id,
+        ids=ids,
+        status=payload.get('status'),
+        document_type_id=_int_or_none(payload.get('document_type_id')),
+        start=_parse_dt(payload.get('start')),
+        end=_parse_dt(payload.get('end')),
+        # Same cap as the synchronous endpoint (ids are checked when enqueued)
+        limit=None if ids is not None else max_requests,
+    )
+    outcome = generate_bulk_pdfs(
+        reqs,
+        municipality_id=municipality_id,
+        admin_user=db.session.get(User, admin_id) if admin_id else None,
+        actor_id=admin_id,
+        requested_ids=ids,
+    )
+    # JSON object keys must be strings
+    outcome['results'] = {str(k): v for k, v in outcome['results'].items()}
+    return outcome
+
+
+@job_handler('document_docx')
+def run_document_docx(payload, job):
+    """Render the municipality DOCX template and convert it to PDF."""
+    from flask import current_app
+    from apps.api.utils.doc_template_renderer import render_request_docx
+    from apps.api.utils.doc_to_pdf import convert_docx_to_pdf
+
+    req = db.session.get(DocumentRequest, int(payload['request_id']))
+    if req is None:
+        raise LookupError(f"Document request {payload['request_id']} not found")
+    user = db.session.get(User, req.user_id)
+    doc_type = db.session.get(DocumentType, req.document_type_id)
+    docx_path, pdf_target = render_request_docx(request=req, document_type=doc_type, user=user)
+    pdf_path = convert_docx_to_pdf(docx_path, pdf_target)
+    base = Path(current_app.config['UPLOAD_FOLDER'])
+    rel = str(Path(pdf_path).relative_to(base)).replace('\\', '/')
+    req.document_file = rel
+    req.updated_at = datetime.utcnow()
+    db.session.commit()
+    return {'request_id': req.id, 'url': f"/uploads/{rel}"}
+
+
+@job_handler('email')
+def run_email(payload, job):
+    from apps.api.utils.email_sender import send_email_now
+
+    # Send directly so SMTP failures surface to the job's retry handling
+    send_email_now(payload['to'], payload.get('subject') or '', payload.get('body') or '')
+    return {'to': payload['to']}
+
+
+@job_handler('benefit_expiry')
+def run_benefit_expiry(payload, job):
+    # Committed together with the job's status by run_job
+    return expire_benefit_programs(_parse_dt(payload.get('now')))
+
+
+@periodic_task('requeue_stale_jobs', interval_config='JOBS_REQUEUE_INTERVAL', default_interval=60)
+def release_stale_jobs():
+    """Release jobs whose worker died mid-run (see ``JOBS_LOCK_TIMEOUT``)."""
+    return {'released': requeue_stale()}
+
+
+@periodic_task('token_cleanup', interval_config='TOKEN_CLEANUP_INTERVAL', default_interval=3600)
+def purge_expired_tokens():
+    """Keep token_blacklist and user_token_revocations small; expired tokens fail signature checks anyway."""
+    return {
+        'removed': TokenBlacklist.cleanup_expired_tokens(),
+        'user_revocations_removed': UserTokenRevocation.cleanup_expired(),
+    }
+
+
+@periodic_task('municipality_counters', interval_config='COUNTER_RECONCILE_INTERVAL', default_interval=3600)
+def reconcile_municipality_counters():
+    """Repair dashboard counters that drifted (bulk updates, raw SQL)."""
+    result = reconcile_counters()
+    db.session.commit()
+    return result
+
+
+@periodic_task('daily_rollups', interval_config='ROLLUP_RECONCILE_INTERVAL', default_interval=3600)
+def reconcile_daily_rollups():
+    """Re-derive the most recent days of chart rollups from the raw tables."""
+    from flask import current_app
+
+    today = datetime.utcnow().date()
+    days = int(current_app.config.get('ROLLUP_RECONCILE_DAYS', 2))
+    result = backfill_rollups(start=today - timedelta(days=days), end=today)
+    db.session.commit()
+    return result
+
+
+@periodic_task('benefit_expiry', interval_config='BENEFIT_EXPIRY_INTERVAL', default_interval=300)
+def sweep_expired_benefit_programs():
+    """Complete benefit programs whose duration has run out."""
+    result = expire_benefit_programs()
+    db.session.commit()
+    return result
@@ -0,0 +1,293 @@
+"""Database-backed background job queue.
+
+Routes call :func:`enqueue` and return the job id straight away; worker
+processes (``python apps/api/scripts/run_worker.py``) claim queued rows and run
+the registered handler. No external broker is required: on Postgres, claiming
+uses ``FOR UPDATE SKIP LOCKED`` so any number of workers can poll the same
+table, and on SQLite a guarded ``UPDATE ... WHERE status='queued'`` decides
+which worker wins a row.
+
+Failed attempts are retried with exponential backoff until ``max_attempts``.
+Running jobs whose worker died are returned to the queue (or failed, once
+out of attempts) after ``JOBS_LOCK_TIMEOUT`` seconds.
+
+Maintenance work that should simply run every N seconds (purges, flushes)
+is registered with :func:`periodic_task`; each worker process runs those on
+a scheduler thread. Tasks must be idempotent since every worker runs them.
+"""
+
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import current_app
+
+try:
+    from apps.api import db
+    from apps.api.models.job import Job
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.job import Job
+
+
+class UnknownJobKind(Exception):
+    pass
+
+
+_HANDLERS: Dict[str, Callable[[dict, Job], Any]] = {}
+
+
+def job_handler(kind: str):
+    """Register ``fn(payload, job) -> result`` as the handler for ``kind``.
+
+    The return value must be JSON-serialisable; it is stored on the job.
+    """
+    def decorator(fn):
+        _HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def registered_kinds():
+    return sorted(_HANDLERS)
+
+
+# name -> (fn, interval config key, default interval seconds)
+_PERIODIC: Dict[str, Tuple[Callable[[], Any], str, float]] = {}
+
+
+def periodic_task(name: str, *, interval_config: str, default_interval: float):
+    """Register ``fn()`` to run every ``app.config[interval_config]`` seconds (<= 0 disables)."""
+    def decorator(fn):
+        _PERIODIC[name] = (fn, interval_config, default_interval)
+        return fn
+    return decorator
+
+
+def registered_periodic_tasks():
+    return sorted(_PERIODIC)
+
+
+def run_periodic_tasks(app, stop_event: threading.Event, *, tick: float = 1.0, now=time.monotonic) -> None:
+    """Scheduler loop: run each periodic task when its interval has elapsed."""
+    next_run: Dict[str, float] = {}
+    while not stop_event.is_set():
+        for name, (fn, interval_key, default) in list(_PERIODIC.items()):
+            interval = float(app.config.get(interval_key, default) or 0)
+            if interval <= 0:
+                continue
+            due = next_run.setdefault(name, now())
+            if now() < due:
+                continue
+            next_run[name] = now() + interval
+            with app.app_context():
+                try:
+                    result = fn()
+                    app.logger.info("Periodic task %s finished: %s", name, result)
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("Periodic task %s failed", name)
+                finally:
+                    db.session.remove()
+        stop_event.wait(tick)
+
+
+def _config(name: str, default):
+    try:
+        return current_app.config.get(name, default)
+    except Exception:
+        return default
+
+
+def enqueue(kind: str, payload: Optional[dict] = None, *, created_by=None, municipality_id=None,
+            max_attempts: Optional[int] = None, delay_seconds: float = 0, commit: bool = True) -> Job:
+    """Queue a job and return it (committed unless ``commit=False``)."""
+    if kind not in _HANDLERS:
+        raise UnknownJobKind(kind)
+    try:
+        created_by = int(created_by) if created_by is not None else None
+    except (TypeError, ValueError):
+        created_by = None
+    job = Job(
+        kind=kind,
+        payload=payload or {},
+        status=Job.STATUS_QUEUED,
+        attempts=0,
+        max_attempts=int(max_attempts or _config('JOBS_MAX_ATTEMPTS', 3)),
+        run_after=datetime.utcnow() + timedelta(seconds=delay_seconds),
+        created_by=created_by,
+        municipality_id=municipality_id,
+    )
+    db.session.add(job)
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
+    return job
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before the next try after ``attempts`` failed attempts."""
+    base = float(_config('JOBS_RETRY_BASE_SECONDS', 10))
+    cap = float(_config('JOBS_RETRY_MAX_SECONDS', 600))
+    return min(cap, base * (2 ** max(0, attempts - 1)))
+
+
+def requeue_stale(timeout_seconds: Optional[float] = None) -> int:
+    """Release jobs stuck in 'running' past the lock timeout; returns how many.
+
+    Jobs with attempts left go back to the queue; the rest are marked failed
+    (their worker died on the last attempt). Runs at worker start-up and as
+    the ``requeue_stale_jobs`` periodic task.
+    """
+    timeout = float(timeout_seconds if timeout_seconds is not None else _config('JOBS_LOCK_TIMEOUT', 900))
+    now = datetime.utcnow()
+    stale = Job.query.filter(Job.status == Job.STATUS_RUNNING, Job.locked_at < now - timedelta(seconds=timeout))
+    failed = stale.filter(Job.attempts >= Job.max_attempts).update(
+        {
+            'status': Job.STATUS_FAILED,
+            'error': 'Worker stopped responding on the last attempt',
+            'finished_at': now,
+            'locked_by': None,
+            'locked_at': None,
+        },
+        synchronize_session=False,
+    )
+    requeued = stale.filter(Job.attempts < Job.max_attempts).update(
+        {'status': Job.STATUS_QUEUED, 'locked_by': None, 'locked_at': None},
+        synchronize_session=False,
+    )
+    db.session.commit()
+    return failed + requeued
+
+
+def claim_next(worker_id: str, kinds=None) -> Optional[Job]:
+    """Atomically move the oldest due job to 'running' and return it."""
+    now = datetime.utcnow()
+    for _ in range(5):
+        q = Job.query.filter(Job.status == Job.STATUS_QUEUED, Job.run_after <= now)
+        if kinds:
+            q = q.filter(Job.kind.in_(list(kinds)))
+        q = q.order_by(Job.run_after.asc(), Job.id.asc())
+        if db.engine.dialect.name == 'postgresql':
+            q = q.with_for_update(skip_locked=True)
+        candidate = q.with_entities(Job.id).first()
+        if candidate is None:
+            db.session.rollback()
+            return None
+        claimed = Job.query.filter(Job.id == candidate.id, Job.status == Job.STATUS_QUEUED).update(
+            {
+                'status': Job.STATUS_RUNNING,
+                'locked_by': worker_id,
+                'locked_at': now,
+                'attempts': Job.attempts + 1,
+            },
+            synchronize_session=False,
+        )
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, candidate.id)
+        # Another worker took it between select and update; try the next one
+    return None
+
+
+def run_job(job: Job) -> Job:
+    """Execute a claimed job and record success, retry or failure."""
+    job_id = job.id
+    handler = _HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise UnknownJobKind(job.kind)
+        result = handler(dict(job.payload or {}), job)
+        job = db.session.get(Job, job_id)
+        job.status = Job.STATUS_SUCCEEDED
+        job.result = result
+        job.error = None
+        job.finished_at = datetime.utcnow()
+        job.locked_by = None
+        job.locked_at = None
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.error = f"{type(exc).__name__}: {exc}"
+        job.locked_by = None
+        job.locked_at = None
+        if job.attempts < job.max_attempts and not isinstance(exc, UnknownJobKind):
+            job.status = Job.STATUS_QUEUED
+            job.run_after = datetime.utcnow() + timedelta(seconds=backoff_seconds(job.attempts))
+        else:
+            job.status = Job.STATUS_FAILED
+            job.finished_at = datetime.utcnow()
+        db.session.commit()
+        try:
+            current_app.logger.warning("Job %s (%s) attempt %s failed: %s\n%s", job_id, job.kind,
+                                       job.attempts, exc, traceback.format_exc())
+        except Exception:
+            pass
+    return job
+
+
+def work_once(worker_id: Optional[str] = None, kinds=None) -> bool:
+    """Claim and run one job. Returns False when the queue had nothing due."""
+    job = claim_next(worker_id or default_worker_id(), kinds)
+    if job is None:
+        return False
+    run_job(job)
+    return True
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def run_worker(app, *, concurrency: int = 2, poll_interval: float = 2.0, burst: bool = False,
+               kinds=None, stop_event: Optional[threading.Event] = None, periodic: bool = True) -> None:
+    """Run ``concurrency`` polling threads until stopped.
+
+    With ``burst=True`` each thread exits once the queue has nothing due,
+    which is handy for cron-style runs and tests. Periodic tasks run on an
+    extra thread unless ``periodic=False`` or in burst mode.
+    """
+    stop_event = stop_event or threading.Event()
+
+    def _loop():
+        with app.app_context():
+            worker_id = default_worker_id()
+            while not stop_event.is_set():
+                try:
+                    did_work = work_once(worker_id, kinds)
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("Job worker %s crashed while polling", worker_id)
+                    did_work = False
+                finally:
+                    db.session.remove()
+                if not did_work:
+                    if burst:
+                        return
+                    stop_event.wait(poll_interval)
+
+    with app.app_context():
+        try:
+            requeue_stale()
+        except Exception:
+            db.session.rollback()
+
+    threads = [threading.Thread(target=_loop, name=f'job-worker-{i}', daemon=True) for i in range(max(1, concurrency))]
+    for t in threads:
+        t.start()
+    if periodic and not burst:
+        threading.Thread(target=run_periodic_tasks, args=(app, stop_event), name='job-scheduler', daemon=True).start()
+    try:
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=0.5)
+    except KeyboardInterrupt:
+        stop_event.set()
+        for t in threads:
+            t.join()
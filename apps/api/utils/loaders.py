@@ -0,0 +1,37 @@
+"""Batched relationship loading for listing endpoints.
+
+List views used to resolve related rows with one ``Model.query.get`` per
+result, which turns a 100-row page into hundreds of round trips. These
+helpers load the related rows up front so a page costs a fixed number of
+queries regardless of its size.
+"""
+
+from typing import Optional
+
+from sqlalchemy.orm import joinedload
+
+try:
+    from apps.api.models.marketplace import Transaction
+except Exception:  # pragma: no cover - fallback for direct execution
+    from models.marketplace import Transaction
+
+
+def transaction_party_options():
+    """Loader options that fetch a transaction's item, buyer and seller eagerly.
+
+    All three are many-to-one, so joined loading adds no duplicate rows and
+    stays compatible with ``paginate``.
+    """
+    return (
+        joinedload(Transaction.item),
+        joinedload(Transaction.buyer),
+        joinedload(Transaction.seller),
+    )
+
+
+def user_display_name(user, fallback=None) -> Optional[str]:
+    """Return "First Last", falling back to username, then ``fallback``."""
+    if user is None:
+        return fallback
+    name = f"{getattr(user, 'first_name', '') or ''} {getattr(user, 'last_name', '') or ''}".strip()
+    return name or getattr(user, 'username', None) or fallback
@@ -0,0 +1,91 @@
+"""Keyword search over marketplace items.
+
+``apply_item_search(query, q)`` narrows an ``Item`` query to rows matching
+every word of ``q`` (each word also matches as a prefix, so "bik" finds
+"bike") and returns a rank expression to order by, best match first.
+
+* PostgreSQL: weighted ``tsvector`` (title A, description B) matched with
+  ``to_tsquery`` and ranked by ``ts_rank``; served by the ``idx_item_search``
+  GIN expression index. The 'simple' configuration is used because listings
+  mix English and Filipino, which a stemming dictionary would mangle.
+* SQLite: the ``items_fts`` FTS5 table, ranked by ``bm25`` with titles
+  weighted higher.
+* Anything else (or SQLite without FTS5): case-insensitive LIKE per word,
+  newest first.
+
+The index DDL lives with the model (models/marketplace.py); both backends
+keep it in sync on insert/update/delete inside the database.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, func, literal_column, or_, select, text
+
+try:
+    from apps.api import db
+    from apps.api.models.marketplace import Item
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.marketplace import Item
+
+
+MAX_TERMS = 8
+MAX_QUERY_LENGTH = 200
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(q: Optional[str]) -> List[str]:
+    """Lower-cased word tokens of ``q``; punctuation and operators are dropped."""
+    return _WORD_RE.findall((q or '')[:MAX_QUERY_LENGTH].lower())[:MAX_TERMS]
+
+
+def _pg_vector():
+    # Must stay structurally identical to ITEM_SEARCH_POSTGRES_DDL for the
+    # planner to use the GIN index; literals keep it parameter-free.
+    simple = literal_column("'simple'")
+    return func.setweight(func.to_tsvector(simple, func.coalesce(Item.title, literal_column("''"))), literal_column("'A'")).op('||')(
+        func.setweight(func.to_tsvector(simple, func.coalesce(Item.description, literal_column("''"))), literal_column("'B'"))
+    )
+
+
+def _sqlite_has_fts() -> bool:
+    row = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'")
+    ).first()
+    return row is not None
+
+
+def apply_item_search(query, q: Optional[str]) -> Tuple[object, Optional[object]]:
+    """Return ``(filtered_query, rank_order)``; rank_order is None when there is nothing to rank."""
+    terms = search_terms(q)
+    if not terms:
+        return query, None
+
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        tsquery = func.to_tsquery(literal_column("'simple'"), ' & '.join(f"{t}:*" for t in terms))
+        vector = _pg_vector()
+        return query.filter(vector.op('@@')(tsquery)), func.ts_rank(vector, tsquery).desc()
+
+    if dialect == 'sqlite' and _sqlite_has_fts():
+        match = ' '.join(f'"{t}"*' for t in terms)
+        hits = (
+            select(
+                literal_column('rowid').label('item_id'),
+                literal_column('bm25(items_fts, 10.0, 1.0)').label('rank'),
+            )
+            .select_from(text('items_fts'))
+            .where(text('items_fts MATCH :item_search').bindparams(item_search=match))
+            .subquery('item_search_hits')
+        )
+        # bm25 is lower-is-better
+        return query.join(hits, hits.c.item_id == Item.id), hits.c.rank.asc()
+
+    clauses = []
+    for t in terms:
+        pattern = f"%{t}%"
+        clauses.append(or_(Item.title.ilike(pattern), Item.description.ilike(pattern)))
+    return query.filter(and_(*clauses)), None
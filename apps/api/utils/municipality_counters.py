@@ -0,0 +1,248 @@
+"""Incrementally maintained per-municipality dashboard counters.
+
+The admin stats endpoints used to run several ``COUNT(*)`` filters over
+``users``, ``issues``, ``items`` and ``announcements`` on every page load.
+Each tracked row now maps to a few named buckets (see ``_SPECS``), e.g. an
+active pending item counts towards ``items.active`` and
+``items.active.status.pending``. ORM ``after_insert`` / ``after_update`` /
+``after_delete`` hooks collect +1/-1 deltas for the buckets a row enters
+and leaves; they are written to ``municipality_counters`` at the end of the
+same flush, so counters commit or roll back with the change itself.
+
+Bulk ``query.update()``/``delete()`` and raw SQL bypass the hooks. The
+``municipality_counters`` periodic task (``COUNTER_RECONCILE_INTERVAL``)
+and ``scripts/reconcile_counters.py`` recompute the buckets with one
+``GROUP BY`` per table and repair any drift. A municipality without a
+``_seeded`` row is reconciled on its first read, which also fills the
+table after the migration.
+"""
+
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import object_session
+
+try:
+    from apps.api import db
+    from apps.api.models.municipality_counter import MunicipalityCounter
+    from apps.api.models.user import User
+    from apps.api.models.issue import Issue
+    from apps.api.models.marketplace import Item
+    from apps.api.models.announcement import Announcement
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.municipality_counter import MunicipalityCounter
+    from models.user import User
+    from models.issue import Issue
+    from models.marketplace import Item
+    from models.announcement import Announcement
+
+
+SEEDED = '_seeded'
+
+_table = MunicipalityCounter.__table__
+_DELTAS_KEY = 'municipality_counter_deltas'
+
+
+def _user_buckets(v) -> List[str]:
+    if v['role'] != 'resident':
+        return []
+    names = ['users.residents']
+    if v['is_active']:
+        names.append('users.residents.verified' if v['admin_verified'] else 'users.residents.pending')
+    return names
+
+
+def _issue_buckets(v) -> List[str]:
+    return ['issues', f"issues.status.{v['status']}"]
+
+
+def _item_buckets(v) -> List[str]:
+    if not v['is_active']:
+        return []
+    return ['items.active', f"items.active.status.{v['status']}"]
+
+
+def _announcement_buckets(v) -> List[str]:
+    names = ['announcements']
+    if v['is_active']:
+        names += ['announcements.active', f"announcements.active.priority.{v['priority']}"]
+    return names
+
+
+# model -> (columns the buckets depend on, bucket function); municipality_id is implied
+_SPECS: Dict[type, Tuple[Tuple[str, ...], Callable[[dict], List[str]]]] = {
+    User: (('role', 'admin_verified', 'is_active'), _user_buckets),
+    Issue: (('status',), _issue_buckets),
+    Item: (('status', 'is_active'), _item_buckets),
+    Announcement: (('priority', 'is_active'), _announcement_buckets),
+}
+
+
+def _buckets(model, values: dict) -> List[Tuple[int, str]]:
+    municipality_id = values.get('municipality_id')
+    if not municipality_id:
+        return []
+    return [(municipality_id, name) for name in _SPECS[model][1](values)]
+
+
+def _current_values(model, target) -> dict:
+    columns = ('municipality_id',) + _SPECS[model][0]
+    return {c: getattr(target, c) for c in columns}
+
+
+def _previous_values(model, target) -> dict:
+    state = inspect(target)
+    values = {}
+    for c in ('municipality_id',) + _SPECS[model][0]:
+        hist = state.attrs[c].history
+        # state.dict: a deleted row's attributes cannot be reloaded
+        values[c] = hist.deleted[0] if hist.deleted else state.dict.get(c)
+    return values
+
+
+def _record(target, before: List[Tuple[int, str]], after: List[Tuple[int, str]]) -> None:
+    if before == after:
+        return
+    session = object_session(target)
+    if session is None:
+        return
+    deltas = session.info.setdefault(_DELTAS_KEY, Counter())
+    for key in before:
+        deltas[key] -= 1
+    for key in after:
+        deltas[key] += 1
+
+
+def _keep_previous(target, value, oldvalue, initiator):
+    return value
+
+
+def _register(model) -> None:
+    # active_history loads the committed value before an expired attribute is
+    # overwritten, so history.deleted always holds the value the row leaves
+    for column in ('municipality_id',) + _SPECS[model][0]:
+        event.listen(getattr(model, column), 'set', _keep_previous, active_history=True)
+
+    @event.listens_for(model, 'before_delete')
+    def _loading(mapper, connection, target):
+        _current_values(model, target)  # reload expired columns while the row still exists
+
+    @event.listens_for(model, 'after_insert')
+    def _inserted(mapper, connection, target):
+        _record(target, [], _buckets(model, _current_values(model, target)))
+
+    @event.listens_for(model, 'after_update')
+    def _updated(mapper, connection, target):
+        _record(target, _buckets(model, _previous_values(model, target)),
+                _buckets(model, _current_values(model, target)))
+
+    @event.listens_for(model, 'after_delete')
+    def _deleted(mapper, connection, target):
+        _record(target, _buckets(model, _previous_values(model, target)), [])
+
+
+for _model in _SPECS:
+    _register(_model)
+
+
+# --- Writing ----------------------------------------------------------------
+
+def _insert_missing(session, municipality_id: int, name: str) -> None:
+    values = dict(municipality_id=municipality_id, name=name, value=0)
+    dialect = session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        session.execute(insert(_table).values(**values).on_conflict_do_nothing())
+        return
+    try:
+        with session.begin_nested():
+            session.execute(_table.insert().values(**values))
+    except IntegrityError:
+        pass  # created concurrently
+
+
+def _apply(session, key: Tuple[int, str], value_expr) -> None:
+    municipality_id, name = key
+    stmt = update(_table).where(
+        _table.c.municipality_id == municipality_id, _table.c.name == name
+    ).values(value=value_expr)
+    if session.execute(stmt).rowcount == 0:
+        _insert_missing(session, municipality_id, name)
+        session.execute(stmt)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _write_deltas(session, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if not deltas:
+        return
+    for key in sorted(deltas):  # fixed order keeps concurrent flushes from deadlocking
+        if deltas[key]:
+            _apply(session, key, _table.c.value + deltas[key])
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _drop_deltas(session):
+    session.info.pop(_DELTAS_KEY, None)
+
+
+# --- Reading ----------------------------------------------------------------
+
+def get_counters(municipality_id: int) -> Dict[str, int]:
+    """All counters of a municipality (missing names count as 0); seeds them on first use."""
+    rows = db.session.execute(
+        select(_table.c.name, _table.c.value).where(_table.c.municipality_id == municipality_id)
+    ).all()
+    counters = {name: int(value) for name, value in rows}
+    if SEEDED not in counters:
+        reconcile_counters(municipality_id)
+        db.session.commit()
+        return get_counters(municipality_id)
+    return Counter(counters)
+
+
+# --- Reconcile --------------------------------------------------------------
+
+def compute_counters(municipality_id: Optional[int] = None) -> Dict[Tuple[int, str], int]:
+    """True bucket counts from the source tables, one GROUP BY per model."""
+    truth: Dict[Tuple[int, str], int] = Counter()
+    for model, (columns, _) in _SPECS.items():
+        cols = [model.municipality_id] + [getattr(model, c) for c in columns]
+        q = select(*cols, func.count()).group_by(*cols)
+        if municipality_id is not None:
+            q = q.where(model.municipality_id == municipality_id)
+        for row in db.session.execute(q):
+            values = dict(zip(('municipality_id',) + columns, row[:-1]))
+            for key in _buckets(model, values):
+                truth[key] += int(row[-1])
+    return truth
+
+
+def reconcile_counters(municipality_id: Optional[int] = None) -> Dict[str, int]:
+    """Overwrite drifted counters with recomputed values; the caller commits."""
+    stored_q = select(_table.c.municipality_id, _table.c.name, _table.c.value).with_for_update()
+    if municipality_id is not None:
+        stored_q = stored_q.where(_table.c.municipality_id == municipality_id)
+    # Locking the rows first makes concurrent flushes wait, so the counts below include them
+    stored = {(m, n): int(v) for m, n, v in db.session.execute(stored_q)}
+    truth = compute_counters(municipality_id)
+
+    municipalities: Iterable[int] = {m for m, _ in stored} | {m for m, _ in truth}
+    if municipality_id is not None:
+        municipalities = {municipality_id}
+    for m in municipalities:
+        truth[(m, SEEDED)] = 1
+
+    repaired = 0
+    for key in sorted(set(stored) | set(truth)):
+        want = truth.get(key, 0)
+        if stored.get(key) != want:
+            _apply(db.session, key, want)
+            repaired += 1
+    return {'checked': len(set(stored) | set(truth)), 'repaired': repaired}
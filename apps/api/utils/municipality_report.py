@@ -0,0 +1,129 @@
+"""Grouped municipality performance report.
+
+Computes the per-municipality dashboard figures with one ``GROUP BY
+municipality_id`` query per entity instead of a set of ``count()`` calls per
+municipality, and keeps results for a short TTL keyed by (range, scope).
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from flask import current_app
+from sqlalchemy import and_, func
+
+try:
+    from apps.api import db
+    from apps.api.models.user import User
+    from apps.api.models.municipality import Municipality
+    from apps.api.models.marketplace import Item, Transaction
+    from apps.api.models.document import DocumentRequest
+    from apps.api.models.benefit import BenefitProgram
+    from apps.api.utils.ttl_cache import TTLCache
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.user import User
+    from models.municipality import Municipality
+    from models.marketplace import Item, Transaction
+    from models.document import DocumentRequest
+    from models.benefit import BenefitProgram
+    from utils.ttl_cache import TTLCache
+
+
+PROVINCE_SCOPE = 'province'
+
+_cache = TTLCache(ttl=60)
+
+
+def _grouped_counts(query, key_column, ids: Optional[List[int]]) -> Dict[int, int]:
+    if ids is not None:
+        query = query.filter(key_column.in_(ids))
+    rows = query.group_by(key_column).all()
+    return {int(mid): int(n) for mid, n in rows if mid is not None}
+
+
+def compute_municipality_performance(municipality_ids: Optional[Iterable[int]], start, end) -> List[dict]:
+    """Return performance rows for the given municipalities (all when None).
+
+    Issues a fixed number of queries regardless of how many municipalities
+    are included: one for names and one grouped count per metric.
+    """
+    ids = None if municipality_ids is None else [int(m) for m in municipality_ids]
+
+    mq = db.session.query(Municipality.id, Municipality.name)
+    if ids is not None:
+        mq = mq.filter(Municipality.id.in_(ids))
+    names = {int(mid): name for mid, name in mq.order_by(Municipality.id.asc()).all()}
+
+    users = _grouped_counts(
+        db.session.query(User.municipality_id, func.count(User.id)).filter(
+            and_(User.role == 'resident', User.admin_verified == True, User.is_active == True)  # noqa: E712
+        ),
+        User.municipality_id, ids,
+    )
+    listings = _grouped_counts(
+        db.session.query(Item.municipality_id, func.count(Item.id)).filter(
+            and_(Item.created_at >= start, Item.created_at <= end)
+        ),
+        Item.municipality_id, ids,
+    )
+    documents = _grouped_counts(
+        db.session.query(DocumentRequest.municipality_id, func.count(DocumentRequest.id)).filter(
+            and_(DocumentRequest.created_at >= start, DocumentRequest.created_at <= end)
+        ),
+        DocumentRequest.municipality_id, ids,
+    )
+    benefits_active: Dict[int, int] = {}
+    try:
+        benefits_active = _grouped_counts(
+            db.session.query(BenefitProgram.municipality_id, func.count(BenefitProgram.id)).filter(
+                BenefitProgram.is_active == True  # noqa: E712
+            ),
+            BenefitProgram.municipality_id, ids,
+        )
+    except Exception:
+        pass
+    disputes: Dict[int, int] = {}
+    try:
+        # Transactions carry no municipality; attribute disputes via the item
+        disputes = _grouped_counts(
+            db.session.query(Item.municipality_id, func.count(Transaction.id))
+            .join(Item, Item.id == Transaction.item_id)
+            .filter(and_(Transaction.status == 'disputed', Transaction.created_at >= start, Transaction.created_at <= end)),
+            Item.municipality_id, ids,
+        )
+    except Exception:
+        pass
+
+    order = ids if ids is not None else list(names.keys())
+    return [
+        {
+            'id': m_id,
+            'name': names.get(m_id) or f"Municipality {m_id}",
+            'users': users.get(m_id, 0),
+            'listings': listings.get(m_id, 0),
+            'documents': documents.get(m_id, 0),
+            'benefits_active': benefits_active.get(m_id, 0),
+            'disputes': disputes.get(m_id, 0),
+        }
+        for m_id in order
+    ]
+
+
+def get_municipality_performance(range_key: str, scope, start, end) -> List[dict]:
+    """Cached wrapper around :func:`compute_municipality_performance`.
+
+    ``scope`` is :data:`PROVINCE_SCOPE` for every municipality or a single
+    municipality id. TTL comes from ``PERFORMANCE_CACHE_TTL`` (0 disables).
+    """
+    ttl = float(current_app.config.get('PERFORMANCE_CACHE_TTL', 60) or 0)
+    ids = None if scope == PROVINCE_SCOPE else [int(scope)]
+    if ttl <= 0:
+        return compute_municipality_performance(ids, start, end)
+    return _cache.get_or_set(
+        (range_key, scope),
+        lambda: compute_municipality_performance(ids, start, end),
+        ttl=ttl,
+    )
+
+
+def invalidate_municipality_performance() -> None:
+    _cache.invalidate()
@@ -0,0 +1,94 @@
+"""Keyset (cursor) pagination for newest-first listings.
+
+OFFSET pagination makes the database walk and discard every row before the
+requested page, and the accompanying ``COUNT(*)`` scans the whole filtered
+set; both grow with the table. In cursor mode a page is instead "the next N
+rows older than (created_at, id) of the last row seen", which an index on
+``(..., created_at, id)`` answers in constant time at any depth.
+
+Endpoints opt in when the request carries ``cursor`` (empty for the first
+page) and answer with ``next_cursor`` (None on the last page). Totals are
+only computed when ``include_total=1`` is also passed. Without ``cursor``
+the existing page/per_page behaviour is unchanged.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+
+MAX_PER_PAGE = 100
+
+
+class CursorError(ValueError):
+    """Raised for cursors that were not produced by :func:`encode_cursor`."""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), int(row_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise CursorError('Invalid cursor')
+
+
+def wants_cursor(args) -> bool:
+    return 'cursor' in args
+
+
+def wants_total(args) -> bool:
+    return str(args.get('include_total', '')).lower() in ('1', 'true', 'yes')
+
+
+def _entity_key(row) -> Tuple[Optional[datetime], int]:
+    return row.created_at, row.id
+
+
+def keyset_paginate(
+    query,
+    created_col,
+    id_col,
+    cursor: Optional[str],
+    per_page: int,
+    key: Callable[[Any], Tuple[Optional[datetime], int]] = _entity_key,
+) -> Tuple[List[Any], Optional[str]]:
+    """Return ``(rows, next_cursor)`` for the page after ``cursor``.
+
+    ``query`` must not be ordered yet; ``key`` maps a result row to its
+    (created_at, id) when rows are tuples rather than entities.
+    """
+    per_page = max(1, min(int(per_page or 20), MAX_PER_PAGE))
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            created_col < created_at,
+            and_(created_col == created_at, id_col < row_id),
+        ))
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        created_at, row_id = key(rows[-1])
+        if created_at is not None:
+            next_cursor = encode_cursor(created_at, row_id)
+    return rows, next_cursor
+
+
+def cursor_meta(next_cursor: Optional[str], per_page: int, total: Optional[int] = None) -> Dict[str, Any]:
+    meta: Dict[str, Any] = {
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+        'per_page': max(1, min(int(per_page or 20), MAX_PER_PAGE)),
+    }
+    if total is not None:
+        meta['total'] = total
+    return meta
@@ -29,6 +29,23 @@ from reportlab.lib.utils import ImageReader
 from reportlab.lib import colors
 from reportlab.lib.units import mm
 
+try:
+    from apps.api.utils.doc_assets import (
+        load_json_config,
+        resolve_logo_paths,
+        barangay_official_lookup,
+        normalize_place_name,
+        prepared_watermark,
+    )
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from utils.doc_assets import (
+        load_json_config,
+        resolve_logo_paths,
+        barangay_official_lookup,
+        normalize_place_name,
+        prepared_watermark,
+    )
+
 
 def _slugify(name: str) -> str:
     return (
@@ -46,30 +63,13 @@ def _ensure_dir(p: Path) -> None:
 
 
 def _load_document_types() -> Dict[str, Dict]:
-    # Load JSON config with type definitions
-    try:
-        # apps/api is current_app.root_path
-        cfg_path = Path(current_app.root_path) / "config" / "documentTypes.json"
-        if not cfg_path.exists():
-            return {}
-        import json
-
-        return json.loads(cfg_path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+    # Load JSON config with type definitions (cached, reloaded on mtime change)
+    return load_json_config("documentTypes.json")
 
 
 def _load_municipality_officials() -> Dict[str, Dict]:
     # Load JSON config with mayor/vice mayor info
-    try:
-        cfg_path = Path(current_app.root_path) / "config" / "municipalityOfficials.json"
-        if not cfg_path.exists():
-            return {}
-        import json
-
-        return json.loads(cfg_path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+    return load_json_config("municipalityOfficials.json")
 
 
 def _load_barangay_officials() -> Dict[str, Dict[str, str]]:
@@ -77,71 +77,11 @@ def _load_barangay_officials() -> Dict[str, Dict[str, str]]:
 
     File format: { "Municipality": { "Barangay Name": "Punong Barangay Name" } }
     """
-    try:
-        cfg_path = Path(current_app.root_path) / "config" / "barangayOfficials.json"
-        if not cfg_path.exists():
-            return {}
-        import json
-
-        return json.loads(cfg_path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+    return load_json_config("barangayOfficials.json")
 
 def _resolve_logo_paths(municipality_name: str) -> Tuple[Path | None, Path | None]:
     """Return (municipal_logo, province_logo) if available."""
-    # Compute repository root from Flask app root (apps/api)
-    repo_root = Path(current_app.root_path).parents[1]
-    mun_dir = repo_root / "public" / "logos" / "municipalities"
-    prov_dir = repo_root / "public" / "logos" / "zambales"
-
-    slug = _slugify(municipality_name)
-    # Try flat structure first (files directly in municipalities/)
-    candidates = [
-        mun_dir / f"{municipality_name}.png",
-        mun_dir / f"{municipality_name}.jpg",
-        mun_dir / f"{slug}.png",
-        mun_dir / f"{slug}.jpg",
-    ]
-    mun_logo = next((p for p in candidates if p.exists()), None)
-    
-    # Try nested structure (municipalities/MunicipalityName/*.png)
-    if not mun_logo and mun_dir.exists():
-        for folder_variant in [municipality_name, slug, municipality_name.replace(' ', '')]:
-            nested = mun_dir / folder_variant
-            if nested.exists() and nested.is_dir():
-                # Look for seal files first, then any png/jpg
-                seal_patterns = ['*seal*.png', '*Seal*.png', '*logo*.png', '*Logo*.png']
-                for pattern in seal_patterns:
-                    matches = sorted(nested.glob(pattern))
-                    if matches:
-                        mun_logo = matches[0]
-                        break
-                if mun_logo:
-                    break
-                # Fallback: any png/jpg in folder
-                for ext in ['*.png', '*.jpg']:
-                    matches = sorted(nested.glob(ext))
-                    if matches:
-                        mun_logo = matches[0]
-                        break
-                if mun_logo:
-                    break
-    
-    # Final fallback: first png in flat dir matching slug fragment
-    if not mun_logo and mun_dir.exists():
-        try:
-            for p in sorted(mun_dir.glob("*.png")):
-                if slug in p.name.lower().replace('-', '_'):
-                    mun_logo = p
-                    break
-        except Exception:
-            pass
-
-    # Province logo fallback
-    prov_candidates = list(prov_dir.glob("*.png")) + list(prov_dir.glob("*.jpg"))
-    prov_logo = prov_candidates[0] if prov_candidates else None
-
-    return mun_logo, prov_logo
+    return resolve_logo_paths(municipality_name)
 
 
 def _simple_template(text: str, ctx: Dict[str, str]) -> str:
@@ -208,44 +148,16 @@ def _draw_header(c: canvas.Canvas, municipality_name: str, mun_logo: Path | None
 def _draw_watermark(c: canvas.Canvas, mun_logo: Path | None, opacity: float = 0.25, size_mm: float = 150.0):
     """Draw a semi-transparent watermark centered on the page.
 
-    Uses Pillow to pre-apply opacity so it works even if setFillAlpha is unavailable
-    or not honored for images on some ReportLab backends.
+    The faded seal is prepared once per (logo, opacity, size) by
+    utils/doc_assets.prepared_watermark so opacity works even if setFillAlpha
+    is unavailable or not honored for images on some ReportLab backends.
     """
     if not mun_logo or not mun_logo.exists():
         return
     width, height = A4
     try:
-        logger = getattr(current_app, 'logger', None)
-        # Prefer Pillow processing for reliable opacity and background removal
-        try:
-            from PIL import Image
-
-            with Image.open(str(mun_logo)).convert('RGBA') as im:
-                # Remove near-white backgrounds to reveal seal edges on white paper
-                r, g, b, a = im.split()
-                # Compute a mask of near-white pixels
-                # Threshold: values > 245 (almost white)
-                white_threshold = 245
-                bg_mask = Image.eval(r, lambda x: 255 if x >= white_threshold else 0)
-                bg_mask = Image.eval(Image.merge('RGB', (r, g, b)).convert('L'), lambda x: 255 if x >= white_threshold else 0)
-                # Invert mask to keep non-white content
-                keep_mask = Image.eval(bg_mask, lambda x: 0 if x > 0 else 255)
-                # Combine with existing alpha if present
-                if im.mode != 'RGBA':
-                    a = Image.new('L', im.size, color=255)
-                # Remove background
-                a = Image.eval(a, lambda px: px)  # copy
-                a.paste(0, mask=bg_mask)
-                # Apply global fade
-                fade = int(max(0, min(255, round(opacity * 255))))
-                a = Image.eval(a, lambda px: int(px * (fade / 255.0)))
-                im.putalpha(a)
-                img = ImageReader(im)
-                if logger:
-                    logger.debug(f"Watermark prepared via Pillow: {mun_logo}")
-        except Exception as pil_err:
-            if logger:
-                logger.debug(f"Watermark Pillow processing failed: {pil_err}")
+        img = prepared_watermark(mun_logo, opacity, size_mm)
+        if img is None:
             # Fallback: draw original image with canvas alpha (if available)
             img = ImageReader(str(mun_logo))
 
@@ -260,6 +172,8 @@ def _draw_watermark(c: canvas.Canvas, mun_logo: Path | None, opacity: float = 0.
     except Exception:
         # Silently ignore watermark failures to avoid blocking PDF generation
         pass
+
+
 def _set_font(c: canvas.Canvas, name: str, size: int):
     """Set font with fallback to Helvetica family if Times is unavailable."""
     try:
@@ -493,37 +407,14 @@ def generate_document_pdf(request, document_type, user, admin_user: Optional[obj
     
     # Load municipality officials data
     officials = _load_municipality_officials()
-    barangay_officials = _load_barangay_officials()
     mun_officials = officials.get(municipality_name, {})
 
-    # Helper to normalize names for lookup (tolerate accents, punctuation, spacing)
-    def _norm(s: str) -> str:
-        try:
-            import unicodedata as _ud
-            s2 = _ud.normalize('NFKD', s or '')
-            s2 = ''.join(ch for ch in s2 if not _ud.combining(ch))
-        except Exception:
-            s2 = (s or '')
-        s2 = s2.strip().lower()
-        # Remove punctuation we don't care about and unify spacing
-        s2 = s2.replace('.', '').replace('-', ' ').replace('(', ' ').replace(')', ' ')
-        # Normalize common variants: "(Pob.)" -> "poblacion"
-        s2 = s2.replace(' pob ', ' poblacion ')
-        s2 = s2.replace(' pob.', ' poblacion')
-        s2 = s2.replace(' (pob) ', ' poblacion ')
-        s2 = s2.replace(' (pob.) ', ' poblacion ')
-        s2 = s2.replace('pob.', 'poblacion')
-        while '  ' in s2:
-            s2 = s2.replace('  ', ' ')
-        return s2
-
     if level == 'barangay':
         # Prefer explicit Punong Barangay list by municipality + barangay
         pb_name = None
         try:
-            muni_map = barangay_officials.get(municipality_name) or {}
-            lookup = { _norm(k): v for k, v in muni_map.items() }
-            pb_name = lookup.get(_norm(barangay_name))
+            lookup = barangay_official_lookup().get(municipality_name) or {}
+            pb_name = lookup.get(normalize_place_name(barangay_name))
         except Exception:
             pb_name = None
         # Fallback to municipalityOfficials.json if it contains punong_barangay
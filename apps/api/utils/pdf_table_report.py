@@ -1,9 +1,12 @@
 """PDF table report utilities using reportlab.
 
 Generates simple, branded PDF reports with header/footer and zebra table.
+Rows may be any iterable; they are drawn as they are consumed so large
+exports never need to be materialised as a list.
 """
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Iterable
+from itertools import chain, islice
 from datetime import datetime
 from pathlib import Path
 import os
@@ -22,6 +25,10 @@ except Exception:  # pragma: no cover
     _draw_border = None
 
 
+# Rows sampled up front to size the columns before drawing starts
+WIDTH_SAMPLE_ROWS = 50
+
+
 def _draw_header_footer(c: canvas.Canvas, title: str, municipality_name: str, page_w: int, page_h: int):
     c.setFillColor(colors.black)
     c.setFont('Helvetica-Bold', 12)
@@ -64,7 +71,7 @@ def _compute_col_widths(c: canvas.Canvas, headers: List[str], rows: List[List[An
     """Compute proportional column widths based on content, with sane min/max caps.
     We sample headers and first N rows to estimate width, then normalize to total_width.
     """
-    sample_rows = rows[:50]  # limit for speed
+    sample_rows = rows[:WIDTH_SAMPLE_ROWS]  # limit for speed
     c.setFont(font_name, font_size)
     estimates: List[float] = []
     for ci, h in enumerate(headers):
@@ -88,7 +95,7 @@ def generate_table_pdf(
     title: str,
     municipality_name: str,
     headers: List[str],
-    rows: List[List[Any]],
+    rows: Iterable[List[Any]],
 ) -> Path:
     out_path.parent.mkdir(parents=True, exist_ok=True)
     page_w, page_h = A4
@@ -125,8 +132,10 @@ def generate_table_pdf(
     # Drop the table lower to clear header & watermark title
     y = page_h - 72*mm
     table_width = (page_w - 40*mm)
-    # Compute adaptive column widths
-    col_widths = _compute_col_widths(c, headers, rows, table_width)
+    # Compute adaptive column widths from a leading sample, then draw the rest as it arrives
+    rows_iter = iter(rows)
+    sample = list(islice(rows_iter, WIDTH_SAMPLE_ROWS))
+    col_widths = _compute_col_widths(c, headers, sample, table_width)
     row_h = 8*mm
 
     # Header row
@@ -144,7 +153,7 @@ def generate_table_pdf(
 
     c.setFont('Helvetica', 9)
     # Rows (paginate if needed)
-    for r_idx, r in enumerate(rows):
+    for r_idx, r in enumerate(chain(sample, rows_iter)):
         if y < 20*mm:
             c.showPage()
             _draw_header_footer(c, title, municipality_name, page_w, page_h)
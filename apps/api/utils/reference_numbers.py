@@ -0,0 +1,126 @@
+"""Reference numbers for requests, issues and applications.
+
+Numbers come from ``reference_counters`` rows keyed by (entity,
+municipality, year); allocating one is a single-row ``UPDATE`` that holds
+the row lock until its transaction ends, so concurrent submissions never
+see the same value and nothing scans the entity table.
+
+With ``REFERENCE_BLOCK_SIZE`` = 1 (default) the counter is bumped inside
+the caller's session: a rolled-back submission gives its number back and
+numbers stay dense. With a larger block size each worker reserves a block
+of values in a short transaction of its own and hands them out from
+memory; unused values are lost when the worker exits, leaving gaps.
+
+The year is written with a ``Y`` (``REQ-3-Y2025-00042``). Numbers issued
+before this scheme (``REQ-<user>-<count>-<n>``, ``ISS-<muni>-<user>-<count>``)
+are all digits, so a new number can never equal an existing one.
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, select, update
+from sqlalchemy.exc import IntegrityError
+
+try:
+    from apps.api import db
+    from apps.api.models.reference_counter import ReferenceCounter
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.reference_counter import ReferenceCounter
+
+
+PREFIXES = {
+    'document_request': 'REQ',
+    'issue': 'ISS',
+    'benefit_application': 'APP',
+}
+
+_table = ReferenceCounter.__table__
+
+
+def _key_clause(entity: str, municipality_id: int, year: int):
+    return and_(
+        _table.c.entity == entity,
+        _table.c.municipality_id == municipality_id,
+        _table.c.year == year,
+    )
+
+
+def _insert_counter(conn, entity: str, municipality_id: int, year: int) -> None:
+    values = dict(entity=entity, municipality_id=municipality_id, year=year, next_value=1,
+                  updated_at=datetime.utcnow())
+    bind = conn.get_bind() if hasattr(conn, 'get_bind') else conn
+    dialect = bind.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        conn.execute(insert(_table).values(**values).on_conflict_do_nothing())
+        return
+    try:
+        with conn.begin_nested():
+            conn.execute(_table.insert().values(**values))
+    except IntegrityError:
+        pass  # created concurrently
+
+
+def _reserve(conn, entity: str, municipality_id: int, year: int, count: int) -> int:
+    """Advance the counter by ``count`` and return the first reserved value."""
+    where = _key_clause(entity, municipality_id, year)
+    bump = update(_table).where(where).values(
+        next_value=_table.c.next_value + count, updated_at=datetime.utcnow()
+    )
+    if conn.execute(bump).rowcount == 0:
+        _insert_counter(conn, entity, municipality_id, year)
+        conn.execute(bump)
+    # Same transaction as the UPDATE, so this reads our own locked row
+    end = conn.execute(select(_table.c.next_value).where(where)).scalar_one()
+    return end - count
+
+
+class ReferenceAllocator:
+    """Hands out sequence values; keeps per-worker blocks when block_size > 1."""
+
+    def __init__(self, block_size: int = 1):
+        self.block_size = max(1, int(block_size))
+        self._blocks: Dict[Tuple[str, int, int], List[int]] = {}  # key -> [next, end)
+        self._lock = threading.Lock()
+
+    def next_value(self, entity: str, municipality_id: Optional[int], year: Optional[int] = None) -> int:
+        key = (entity, int(municipality_id or 0), int(year or datetime.utcnow().year))
+        if self.block_size == 1:
+            return _reserve(db.session, *key, 1)
+        with self._lock:
+            block = self._blocks.get(key)
+            if not block or block[0] >= block[1]:
+                # Own transaction: the block must survive the caller rolling back
+                with db.engine.begin() as conn:
+                    start = _reserve(conn, *key, self.block_size)
+                block = self._blocks[key] = [start, start + self.block_size]
+            value = block[0]
+            block[0] += 1
+            return value
+
+
+def get_reference_allocator(app=None) -> ReferenceAllocator:
+    app = app or current_app._get_current_object()
+    allocator = app.extensions.get('reference_numbers')
+    if allocator is None:
+        allocator = ReferenceAllocator(app.config.get('REFERENCE_BLOCK_SIZE', 1))
+        app.extensions['reference_numbers'] = allocator
+    return allocator
+
+
+def format_reference(entity: str, municipality_id: Optional[int], year: int, value: int) -> str:
+    return f"{PREFIXES[entity]}-{int(municipality_id or 0)}-Y{year}-{value:05d}"
+
+
+def allocate_reference_number(entity: str, municipality_id: Optional[int]) -> str:
+    """e.g. ``REQ-3-Y2025-00042`` for the 42nd document request of municipality 3 in 2025."""
+    year = datetime.utcnow().year
+    value = get_reference_allocator().next_value(entity, municipality_id, year)
+    return format_reference(entity, municipality_id, year, value)
@@ -0,0 +1,112 @@
+"""Cache-friendly responses for ``/uploads/<path>``.
+
+Files saved through ``save_uploaded_file`` get a ``<YYYYmmdd_HHMMSS>_<uuid8>``
+name (see ``generate_unique_filename``) and are never overwritten, so their
+URLs can be cached by browsers and CDNs for a year with ``immutable``.
+Other files (generated documents, exports) and stand-ins for image variants
+that are not written yet are sent with ``UPLOADS_MAX_AGE`` and revalidated
+through their ETag.
+
+Every response carries an ETag and Last-Modified and honours
+If-None-Match / If-Modified-Since and Range. The bytes themselves can be
+handed to the front proxy:
+
+* ``UPLOADS_ACCEL_REDIRECT_PREFIX``: empty response with
+  ``X-Accel-Redirect: <prefix>/<path>``; nginx serves the file from an
+  ``internal`` location (and does its own conditional/Range handling).
+* ``UPLOADS_X_SENDFILE``: ``X-Sendfile: <absolute path>`` for
+  Apache mod_xsendfile / lighttpd.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from flask import current_app, request
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+
+try:
+    from apps.api.utils.image_variants import VARIANT_SIZES, variant_path
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from utils.image_variants import VARIANT_SIZES, variant_path
+
+
+# generate_unique_filename(); variants append ".<bucket>.webp" to the same stem
+_UNIQUE_NAME_RE = re.compile(r'^\d{8}_\d{6}_[0-9a-f]{8}(\.|$)')
+
+# Originals in these folders are rewritten once by the image pipeline
+_PIPELINE_PREFIXES = ('marketplace/', 'announcements/', 'profiles/')
+_PIPELINE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def is_immutable_upload(rel_path: str) -> bool:
+    return bool(_UNIQUE_NAME_RE.match(os.path.basename(rel_path)))
+
+
+def _pipeline_pending(directory: str, rel_path: str) -> bool:
+    """True while an image original may still be rewritten (EXIF strip) by the pipeline."""
+    if not rel_path.startswith(_PIPELINE_PREFIXES) or not rel_path.lower().endswith(_PIPELINE_EXTENSIONS):
+        return False
+    last_bucket = list(VARIANT_SIZES)[-1]
+    return not os.path.isfile(os.path.join(directory, variant_path(rel_path, last_bucket)))
+
+
+def _apply_cache_headers(response, immutable: bool) -> None:
+    cfg = current_app.config
+    cc = response.cache_control
+    if immutable:
+        max_age = int(cfg.get('UPLOADS_IMMUTABLE_MAX_AGE', 31536000))
+        cc.no_cache = None
+        cc.public = True
+        cc.max_age = max_age
+        cc.immutable = True
+    else:
+        max_age = int(cfg.get('UPLOADS_MAX_AGE', 0))
+        cc.public = True
+        cc.max_age = max_age
+        if max_age <= 0:
+            cc.no_cache = True
+    response.expires = None
+
+
+def send_upload(directory: str, rel_path: str, *, fallback: bool = False):
+    """Response for ``rel_path`` under ``directory``; raises NotFound if missing.
+
+    ``fallback`` marks a file served in place of another URL (a missing
+    variant), which must not be cached as if it were the real thing.
+    """
+    path = safe_join(directory, rel_path)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+
+    immutable = (
+        not fallback
+        and is_immutable_upload(rel_path)
+        and not _pipeline_pending(directory, rel_path)
+    )
+    cfg = current_app.config
+
+    accel_prefix = (cfg.get('UPLOADS_ACCEL_REDIRECT_PREFIX') or '').rstrip('/')
+    if accel_prefix:
+        response = current_app.response_class(
+            status=200,
+            mimetype=mimetypes.guess_type(rel_path)[0] or 'application/octet-stream',
+        )
+        response.headers['X-Accel-Redirect'] = f"{accel_prefix}/{quote(rel_path)}"
+        _apply_cache_headers(response, immutable)
+        return response
+
+    response = send_file(
+        path,
+        request.environ,
+        use_x_sendfile=bool(cfg.get('UPLOADS_X_SENDFILE')),
+        response_class=current_app.response_class,
+        conditional=True,
+        etag=True,
+        max_age=None,
+    )
+    _apply_cache_headers(response, immutable)
+    return response
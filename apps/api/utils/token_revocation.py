@@ -0,0 +1,236 @@
+"""Per-worker cache of revoked JWT ids.
+
+Every authenticated request asks whether its ``jti`` was revoked. Instead of
+querying ``token_blacklist`` each time, each app keeps the set of revoked,
+not-yet-expired jtis in memory. The set is loaded on first use and then
+topped up with rows whose ``revoked_at`` is past a high-water mark, at most
+once every ``JWT_REVOCATION_REFRESH_SECONDS``. Logouts handled by this worker
+are added immediately; revocations made by other workers become visible
+within the refresh interval.
+
+Access tokens carry role, admin scope and verification claims that are
+trusted until they expire (utils/identity.py). When a user loses any of
+them (role or admin scope changed, a verification flag or ``is_active``
+turned off) or the user is deleted, ORM hooks write a
+``user_token_revocations`` row in the same transaction; every access token
+of that user issued at or before it is then rejected. Refresh tokens are
+left alone, so ``/refresh`` hands out a token with the current claims.
+"""
+
+import calendar
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+
+try:
+    from apps.api import db
+    from apps.api.models.token_blacklist import TokenBlacklist, UserTokenRevocation
+    from apps.api.models.user import User
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.token_blacklist import TokenBlacklist, UserTokenRevocation
+    from models.user import User
+
+
+# Rows committed slightly out of revoked_at order are still caught
+HIGH_WATER_OVERLAP = timedelta(seconds=5)
+
+
+class RevocationCache:
+    def __init__(self, refresh_seconds: float = 2.0):
+        self.refresh_seconds = refresh_seconds
+        self._revoked: Dict[str, datetime] = {}  # jti -> expires_at
+        self._high_water: Optional[datetime] = None
+        self._users: Dict[int, Tuple[datetime, datetime]] = {}  # user id -> (revoked_at, expires_at)
+        self._users_high_water: Optional[datetime] = None
+        self._loaded = False
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        now = datetime.utcnow()
+        q = db.session.query(TokenBlacklist.jti, TokenBlacklist.expires_at, TokenBlacklist.revoked_at)\
+            .filter(TokenBlacklist.expires_at >= now)
+        if self._loaded and self._high_water is not None:
+            q = q.filter(TokenBlacklist.revoked_at >= self._high_water - HIGH_WATER_OVERLAP)
+        rows = q.all()
+        uq = db.session.query(UserTokenRevocation.user_id, UserTokenRevocation.revoked_at,
+                              UserTokenRevocation.expires_at).filter(UserTokenRevocation.expires_at >= now)
+        if self._loaded and self._users_high_water is not None:
+            uq = uq.filter(UserTokenRevocation.revoked_at >= self._users_high_water - HIGH_WATER_OVERLAP)
+        user_rows = uq.all()
+        with self._lock:
+            for jti, expires_at, revoked_at in rows:
+                self._revoked[jti] = expires_at
+                if revoked_at and (self._high_water is None or revoked_at > self._high_water):
+                    self._high_water = revoked_at
+            if self._high_water is None:
+                # Nothing revoked yet; later loads only need rows from now on
+                self._high_water = now
+            for user_id, revoked_at, expires_at in user_rows:
+                self._add_user(user_id, revoked_at, expires_at)
+                if self._users_high_water is None or revoked_at > self._users_high_water:
+                    self._users_high_water = revoked_at
+            if self._users_high_water is None:
+                self._users_high_water = now
+            # Expired tokens are rejected by signature checks anyway
+            for jti in [j for j, exp in self._revoked.items() if exp and exp < now]:
+                del self._revoked[jti]
+            for user_id in [u for u, (_, exp) in self._users.items() if exp < now]:
+                del self._users[user_id]
+            self._loaded = True
+            self._last_refresh = time.monotonic()
+
+    def _add_user(self, user_id: int, revoked_at: datetime, expires_at: datetime) -> None:
+        current = self._users.get(user_id)
+        if current is None or revoked_at > current[0]:
+            self._users[user_id] = (revoked_at, expires_at)
+
+    def is_revoked(self, jti: str) -> bool:
+        if not self._loaded or time.monotonic() - self._last_refresh >= self.refresh_seconds:
+            self._refresh()
+        return jti in self._revoked
+
+    def is_user_token_revoked(self, user_id: int, issued_at: int) -> bool:
+        """Whether an access token of ``user_id`` with ``iat`` = ``issued_at`` predates a revocation."""
+        if not self._loaded or time.monotonic() - self._last_refresh >= self.refresh_seconds:
+            self._refresh()
+        entry = self._users.get(user_id)
+        # iat has whole-second precision: a token from the same second is revoked too
+        return entry is not None and issued_at <= calendar.timegm(entry[0].utctimetuple())
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def add_user(self, user_id: int, revoked_at: datetime, expires_at: datetime) -> None:
+        with self._lock:
+            self._add_user(user_id, revoked_at, expires_at)
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+def get_revocation_cache(app=None) -> RevocationCache:
+    app = app or current_app._get_current_object()
+    cache = app.extensions.get('token_revocation')
+    if cache is None:
+        cache = RevocationCache(float(app.config.get('JWT_REVOCATION_REFRESH_SECONDS', 2)))
+        app.extensions['token_revocation'] = cache
+    return cache
+
+
+def is_token_revoked(jti: str) -> bool:
+    """Cached equivalent of ``TokenBlacklist.is_token_revoked``."""
+    return get_revocation_cache().is_revoked(jti)
+
+
+def is_payload_revoked(jwt_payload: dict) -> bool:
+    """Revocation check for a decoded JWT: its jti, then (access tokens) its user."""
+    cache = get_revocation_cache()
+    if cache.is_revoked(jwt_payload['jti']):
+        return True
+    if jwt_payload.get('type') != 'access' or jwt_payload.get('iat') is None:
+        return False
+    try:
+        user_id = int(jwt_payload.get('sub'))
+    except (TypeError, ValueError):
+        return False
+    return cache.is_user_token_revoked(user_id, int(jwt_payload['iat']))
+
+
+def revoke_token(jti: str, token_type: str, user_id, expires_at: datetime) -> None:
+    """Persist the revocation and make it visible to this worker at once."""
+    TokenBlacklist.add_token_to_blacklist(jti, token_type, user_id, expires_at)
+    get_revocation_cache().add(jti, expires_at)
+
+
+# --- Revoking a user's tokens when their claims are taken away -----------------
+
+_REVOKE_KEY = 'revoked_user_tokens'
+_WRITTEN_KEY = 'revoked_user_tokens_written'
+
+# Columns behind the identity claims; a change to these revokes the user's tokens
+_SCOPE_COLUMNS = ('role', 'admin_municipality_id')
+# Flags whose loss (true -> false) revokes the user's tokens
+_GRANT_COLUMNS = ('email_verified', 'admin_verified', 'is_active')
+
+
+def _access_token_lifetime() -> timedelta:
+    lifetime = current_app.config.get('JWT_ACCESS_TOKEN_EXPIRES') if has_app_context() else None
+    if isinstance(lifetime, timedelta):
+        return lifetime
+    return timedelta(seconds=int(lifetime or 86400))
+
+
+def _claims_lost(target) -> bool:
+    state = inspect(target)
+    for column in _SCOPE_COLUMNS:
+        hist = state.attrs[column].history
+        if hist.deleted and hist.added and hist.deleted[0] != hist.added[0]:
+            return True
+    for column in _GRANT_COLUMNS:
+        hist = state.attrs[column].history
+        if hist.deleted and hist.deleted[0] and not (hist.added and hist.added[0]):
+            return True
+    return False
+
+
+def _queue_user(target) -> None:
+    session = object_session(target)
+    if session is not None and target.id is not None:
+        session.info.setdefault(_REVOKE_KEY, set()).add(target.id)
+
+
+def _keep_previous(target, value, oldvalue, initiator):
+    return value
+
+
+# active_history: the committed value is loaded before an expired attribute is
+# overwritten, so a downgrade after a commit still shows up in the history
+for _column in _SCOPE_COLUMNS + _GRANT_COLUMNS:
+    event.listen(getattr(User, _column), 'set', _keep_previous, active_history=True)
+
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    if _claims_lost(target):
+        _queue_user(target)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    _queue_user(target)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _write_user_revocations(session, flush_context):
+    user_ids = session.info.pop(_REVOKE_KEY, None)
+    if not user_ids:
+        return
+    revoked_at = datetime.utcnow()
+    expires_at = revoked_at + _access_token_lifetime()
+    rows = [{'user_id': uid, 'revoked_at': revoked_at, 'expires_at': expires_at} for uid in sorted(user_ids)]
+    session.execute(UserTokenRevocation.__table__.insert(), rows)
+    session.info.setdefault(_WRITTEN_KEY, []).extend(rows)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _publish_user_revocations(session):
+    # Visible to this worker at once; other workers pick the rows up on refresh
+    rows: List[dict] = session.info.pop(_WRITTEN_KEY, None) or []
+    if rows and has_app_context():
+        cache = get_revocation_cache()
+        for row in rows:
+            cache.add_user(row['user_id'], row['revoked_at'], row['expires_at'])
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _drop_user_revocations(session):
+    session.info.pop(_REVOKE_KEY, None)
+    session.info.pop(_WRITTEN_KEY, None)
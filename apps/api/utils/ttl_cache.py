@@ -0,0 +1,71 @@
+"""Small in-process TTL cache.
+
+Each gunicorn worker keeps its own copy, so entries must be safe to serve
+slightly stale for up to ``ttl`` seconds. A ttl of 0 disables caching.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """Thread-safe key -> value cache with per-entry expiry."""
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 256):
+        self.ttl = float(ttl)
+        self.max_entries = max_entries
+        self._data: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._data.pop(key, None)
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else float(ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if len(self._data) >= self.max_entries and key not in self._data:
+                self._evict_locked()
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any], ttl: float | None = None) -> Any:
+        """Return the cached value for ``key`` or compute, store and return it.
+
+        The factory runs outside the lock; concurrent misses may compute twice,
+        which is acceptable for the read-only reports this is used for.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            return value
+        value = factory()
+        self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        """Drop one key, or everything when ``key`` is None."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def _evict_locked(self) -> None:
+        now = time.monotonic()
+        expired = [k for k, (exp, _) in self._data.items() if exp <= now]
+        for k in expired:
+            self._data.pop(k, None)
+        if len(self._data) >= self.max_entries:
+            # Drop the entry closest to expiry
+            oldest = min(self._data.items(), key=lambda kv: kv[1][0])[0]
+            self._data.pop(oldest, None)
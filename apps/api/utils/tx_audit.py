@@ -46,12 +46,34 @@ def log_tx_action(
     ip_address: Optional[str] = None,
     user_agent: Optional[str] = None,
     metadata: Optional[Dict[str, Any]] = None,
-) -> TransactionAuditLog:
+    sync: bool = True,
+) -> Optional[TransactionAuditLog]:
     """Append an audit log row to the transaction.
 
     Commit is not performed here; caller should commit within their
-    request transaction to keep changes atomic.
+    request transaction to keep changes atomic. ``sync=False`` queues the
+    row on the batched audit writer (utils/audit_sink.py) instead.
     """
+    if not sync:
+        try:
+            from apps.api.utils.audit_sink import get_audit_sink
+        except ImportError:  # pragma: no cover - fallback for direct execution
+            from utils.audit_sink import get_audit_sink
+
+        get_audit_sink().record(TransactionAuditLog.__tablename__, {
+            'transaction_id': transaction.id,
+            'actor_id': actor_id,
+            'actor_role': actor_role,
+            'action': action,
+            'from_status': from_status,
+            'to_status': to_status,
+            'notes': notes,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'metadata': metadata or {},
+            'created_at': datetime.utcnow(),
+        })
+        return None
     log = TransactionAuditLog(
         transaction_id=transaction.id,
         actor_id=actor_id,
@@ -0,0 +1,168 @@
+"""Write-behind view counting for marketplace items.
+
+``get_item`` used to bump ``items.view_count`` and commit on every public
+GET, so the busiest read path was also a write and popular listings queued
+on one row lock. Views are now accumulated in memory per worker and flushed
+every ``ITEM_VIEW_FLUSH_INTERVAL`` seconds by a background thread:
+
+* one ``UPDATE items SET view_count = view_count + CASE id ... END`` per
+  chunk of items, and
+* when ``ITEM_VIEW_DAILY_ROLLUPS`` is on, one multi-row upsert into
+  ``item_view_daily`` for seller analytics.
+
+A failed flush puts its deltas back so they are retried with the next one.
+Views still buffered when a worker is killed are lost; counts are
+advisory. ``ITEM_VIEW_FLUSH_INTERVAL = 0`` flushes on every view (the old
+write-through behaviour, used by tests).
+"""
+
+import atexit
+import threading
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Tuple
+
+from flask import current_app
+from sqlalchemy import case, func, update
+
+try:
+    from apps.api import db
+    from apps.api.models.marketplace import Item, ItemViewDaily
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from __init__ import db
+    from models.marketplace import Item, ItemViewDaily
+
+
+_CHUNK_SIZE = 500
+
+
+def _upsert_daily(rows) -> None:
+    table = ItemViewDaily.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        # No portable upsert; fall back to per-row merge
+        for row in rows:
+            existing = db.session.get(ItemViewDaily, (row['item_id'], row['day']))
+            if existing:
+                existing.views = (existing.views or 0) + row['views']
+            else:
+                db.session.add(ItemViewDaily(**row))
+        return
+    stmt = insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.item_id, table.c.day],
+        set_={'views': table.c.views + stmt.excluded.views},
+    )
+    db.session.execute(stmt)
+
+
+def write_view_deltas(deltas: Dict[Tuple[int, date], int], *, rollups: bool = True) -> int:
+    """Apply ``{(item_id, day): views}`` and commit; returns the number of items touched."""
+    per_item: Dict[int, int] = defaultdict(int)
+    for (item_id, _), n in deltas.items():
+        per_item[item_id] += n
+    item_ids = sorted(per_item)
+    for start in range(0, len(item_ids), _CHUNK_SIZE):
+        chunk = item_ids[start:start + _CHUNK_SIZE]
+        db.session.execute(
+            update(Item)
+            .where(Item.id.in_(chunk))
+            .values(view_count=func.coalesce(Item.view_count, 0) + case(
+                {item_id: per_item[item_id] for item_id in chunk}, value=Item.id, else_=0
+            ))
+            .execution_options(synchronize_session=False)
+        )
+    if rollups:
+        rows = [{'item_id': item_id, 'day': day, 'views': n} for (item_id, day), n in sorted(deltas.items())]
+        for start in range(0, len(rows), _CHUNK_SIZE):
+            _upsert_daily(rows[start:start + _CHUNK_SIZE])
+    db.session.commit()
+    return len(item_ids)
+
+
+class ViewCounter:
+    """Per-app buffer of item views plus the thread that flushes it."""
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = float(app.config.get('ITEM_VIEW_FLUSH_INTERVAL', 10) or 0)
+        self.rollups = bool(app.config.get('ITEM_VIEW_DAILY_ROLLUPS', True))
+        self._pending: Dict[Tuple[int, date], int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='item-view-flusher', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def record(self, item_id: int) -> None:
+        with self._lock:
+            self._pending[(int(item_id), datetime.utcnow().date())] += 1
+        if self.interval <= 0:
+            self.flush()
+
+    def pending_for(self, item_id: int) -> int:
+        with self._lock:
+            return sum(n for (iid, _), n in self._pending.items() if iid == item_id)
+
+    def flush(self) -> int:
+        """Write buffered views; must run inside an app context."""
+        with self._lock:
+            deltas, self._pending = self._pending, defaultdict(int)
+        if not deltas:
+            return 0
+        try:
+            return write_view_deltas(deltas, rollups=self.rollups)
+        except Exception:
+            db.session.rollback()
+            with self._lock:
+                for key, n in deltas.items():
+                    self._pending[key] += n
+            raise
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the flusher and write whatever is still buffered."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        with self.app.app_context():
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception("Final item view flush failed")
+            finally:
+                db.session.remove()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    self.flush()
+                except Exception:
+                    self.app.logger.exception("Item view flush failed")
+                finally:
+                    db.session.remove()
+
+
+_init_lock = threading.Lock()
+
+
+def get_view_counter(app=None) -> ViewCounter:
+    app = app or current_app._get_current_object()
+    counter = app.extensions.get('item_views')
+    if counter is None:
+        with _init_lock:
+            counter = app.extensions.get('item_views')
+            if counter is None:
+                counter = ViewCounter(app)
+                app.extensions['item_views'] = counter
+    return counter
+
+
+def record_item_view(item_id: int) -> None:
+    get_view_counter().record(item_id)
@@ -157,7 +157,7 @@ export default function HomePage() {
                 {(featuredItems.length ? featuredItems : fallbackItems).map((it: any) => (
                   <motion.div key={it.id} initial={{opacity:0,y:8}} whileInView={{opacity:1,y:0}} viewport={{once:true}}>
                     <MarketplaceCard
-                      imageUrl={it.images?.[0] ? mediaUrl(it.images[0]) : undefined}
+                      imageUrl={it.images?.[0] ? mediaUrl(it.image_variants?.[0]?.medium || it.images[0]) : undefined}
                       title={it.title}
                       price={it.transaction_type==='sell' && it.price ? `₱${Number(it.price).toLocaleString()}` : undefined}
                       municipality={(it as any).municipality_name || selectedMunicipality?.name || 'Province-wide'}
@@ -179,7 +179,7 @@ export default function MarketplacePage() {
               <div className="w-full aspect-[4/3] bg-gray-100 rounded-lg mb-4 overflow-hidden relative">
                 <Link to={`/marketplace/${item.id}`} aria-label={`View ${item.title}`} className="absolute inset-0">
                   {item.images?.[0] ? (
-                    <img src={mediaUrl(item.images[0])} alt={item.title} loading="lazy" className="w-full h-full object-contain" />
+                    <img src={mediaUrl((item as any).image_variants?.[0]?.medium || item.images[0])} alt={item.title} loading="lazy" className="w-full h-full object-contain" />
                   ) : (
                     <div className="w-full h-full" />
                   )}